@@ -13,14 +13,28 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/4/6 14:21
 # @Desc    : 异步Aiomysql的增删改查封装
-from typing import Any, Dict, List, Union
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Union
 
 import aiomysql
 
+import config
+from tools import utils
+
 
 class AsyncMysqlDB:
     def __init__(self, pool: aiomysql.Pool) -> None:
         self.__pool = pool
+        # 批量 upsert 的写缓冲，key 为表名
+        self.__upsert_buffers: Dict[str, List[Dict[str, Any]]] = {}
+        self.__upsert_flush_task: Optional[asyncio.Task] = None
+        self.__upsert_lock: Optional[asyncio.Lock] = None
+        # 每张表批量写入连续失败的次数
+        self.__upsert_failures: Dict[str, int] = {}
+        self.batch_size: int = config.DB_BATCH_UPSERT_SIZE
+        self.flush_interval: float = config.DB_BATCH_FLUSH_INTERVAL_SEC
+        self.max_retries: int = config.DB_BATCH_MAX_RETRIES
+        self.max_buffer_size: int = config.DB_BATCH_BUFFER_MAX_SIZE
 
     async def query(self, sql: str, *args: Union[str, int]) -> List[Dict[str, Any]]:
         """
@@ -105,3 +119,114 @@ class AsyncMysqlDB:
             async with conn.cursor() as cur:
                 rows = await cur.execute(sql, args)
                 return rows
+
+    async def batch_upsert(self, table_name: str, items: Sequence[Dict[str, Any]],
+                           update_exclude: Sequence[str] = ("add_ts",)) -> int:
+        """
+        多行 INSERT ... ON DUPLICATE KEY UPDATE，需要表上有对应的唯一索引
+        字段不同的记录会拆成多条 sql 执行
+        :param table_name: 表名
+        :param items: 记录列表
+        :param update_exclude: 记录已存在时不更新的字段，默认保留第一次写入的 add_ts
+        :return:
+        """
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for item in items:
+            groups.setdefault(tuple(item.keys()), []).append(item)
+
+        rows = 0
+        async with self.__pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                for fields, group_items in groups.items():
+                    fieldstr = ','.join(f'`{field}`' for field in fields)
+                    valstr = '(' + ','.join(['%s'] * len(fields)) + ')'
+                    update_fields = [field for field in fields if field not in update_exclude] or list(fields[:1])
+                    updatestr = ','.join(f'`{field}`=VALUES(`{field}`)' for field in update_fields)
+                    sql = "INSERT INTO %s (%s) VALUES %s ON DUPLICATE KEY UPDATE %s" % (
+                        table_name, fieldstr, ','.join([valstr] * len(group_items)), updatestr
+                    )
+                    values = [item[field] for item in group_items for field in fields]
+                    rows += await cur.execute(sql, values)
+        return rows
+
+    async def upsert_later(self, table_name: str, item: Dict[str, Any]) -> None:
+        """
+        把记录放入写缓冲，缓冲满 batch_size 条或者每隔 flush_interval 秒合并成一条批量 upsert 写入
+        程序退出前需要调用 close_upserts，db.close 中已经调用
+        写入失败只记录日志，不影响爬虫继续爬取
+        :param table_name: 表名
+        :param item: 一条记录的字典信息
+        :return:
+        """
+        buffer = self.__upsert_buffers.setdefault(table_name, [])
+        buffer.append(item)
+        if self.__upsert_flush_task is None or self.__upsert_flush_task.done():
+            self.__upsert_flush_task = asyncio.create_task(self.__flush_upserts_periodically())
+        if len(buffer) >= self.batch_size:
+            try:
+                await self.flush_upserts(table_name, split_on_error=len(buffer) >= self.max_buffer_size)
+            except Exception as e:
+                utils.logger.error(f"[AsyncMysqlDB.upsert_later] batch upsert into {table_name} error, "
+                                   f"retry in next flush: {e}")
+
+    async def flush_upserts(self, table_name: Optional[str] = None, split_on_error: bool = False) -> None:
+        """
+        把写缓冲中的记录写入数据库
+        批量写入失败时记录留在缓冲中，下次刷新时重试；连续失败 max_retries 次后拆成单条写入，
+        单条仍然失败的记录（数据过长、取值不合法等）丢弃并记录日志，不会一直阻塞后面的记录
+        :param table_name: 只刷新指定表，为空时刷新所有表
+        :param split_on_error: 批量写入失败时不再重试，直接拆成单条写入
+        :return:
+        """
+        if self.__upsert_lock is None:
+            self.__upsert_lock = asyncio.Lock()
+        table_names = [table_name] if table_name else list(self.__upsert_buffers.keys())
+        for name in table_names:
+            while True:
+                # 保证同一条记录的多次写入按顺序执行
+                async with self.__upsert_lock:
+                    buffer = self.__upsert_buffers.get(name)
+                    if not buffer:
+                        break
+                    batch = buffer[:self.batch_size]
+                    try:
+                        await self.batch_upsert(name, batch)
+                    except Exception as e:
+                        failures = self.__upsert_failures.get(name, 0) + 1
+                        self.__upsert_failures[name] = failures
+                        if failures < self.max_retries and not split_on_error:
+                            # 写入失败时记录留在缓冲中，下次刷新时重试
+                            raise
+                        utils.logger.error(f"[AsyncMysqlDB.flush_upserts] batch upsert into {name} failed "
+                                           f"{failures} times, retry row by row: {e}")
+                        await self.__upsert_rows(name, batch)
+                    self.__upsert_failures.pop(name, None)
+                    del buffer[:len(batch)]
+
+    async def __upsert_rows(self, table_name: str, items: List[Dict[str, Any]]) -> None:
+        """
+        逐条写入，写入失败的记录丢弃并记录日志
+        :param table_name: 表名
+        :param items: 记录列表
+        :return:
+        """
+        for item in items:
+            try:
+                await self.batch_upsert(table_name, [item])
+            except Exception as e:
+                utils.logger.error(f"[AsyncMysqlDB.flush_upserts] drop row of {table_name}: {e}, item: {item}")
+
+    async def close_upserts(self) -> None:
+        if self.__upsert_flush_task is not None:
+            self.__upsert_flush_task.cancel()
+            self.__upsert_flush_task = None
+        # 程序退出前不会再有下次刷新，写入失败时直接拆成单条写入
+        await self.flush_upserts(split_on_error=True)
+
+    async def __flush_upserts_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush_upserts()
+            except Exception as e:
+                utils.logger.error(f"[AsyncMysqlDB.flush_upserts] batch upsert error, retry in next flush: {e}")
@@ -9,11 +9,18 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
 
 
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Union
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Union
 
+import httpx
 from playwright.async_api import BrowserContext, BrowserType
+from proxy.proxy_ip_pool import ProxyIpPool
 from task_manager.task_config import TaskConfig, SearchTaskConfig, CreatorTaskConfig, DetailTaskConfig
+from tools import utils
+from tools.http_pool import HttpClientPool, ProxiesType
+from tools.rate_limiter import RateLimitSlot, account_key, get_rate_limiter
 
 
 class AbstractCrawler(ABC):
@@ -97,6 +104,12 @@ class AbstractStoreImage(ABC):
 
 
 class AbstractApiClient(ABC):
+    _http_pool: Optional[HttpClientPool] = None
+    # 限流使用的平台标识，和 CrawlerFactory 中的平台名一致
+    rate_limit_platform: str = ""
+    # 开启代理时由爬虫设置，请求结果上报给代理池，代理被封时从代理池换一个代理
+    ip_pool: Optional[ProxyIpPool] = None
+
     @abstractmethod
     async def request(self, method, url, **kwargs):
         pass
@@ -104,3 +117,77 @@ class AbstractApiClient(ABC):
     @abstractmethod
     async def update_cookies(self, browser_context: BrowserContext):
         pass
+
+    @property
+    def http_pool(self) -> HttpClientPool:
+        """
+        API客户端共享的长连接池，首次使用时创建
+        """
+        if self._http_pool is None:
+            self._http_pool = HttpClientPool()
+        return self._http_pool
+
+    @property
+    def current_proxies(self) -> ProxiesType:
+        """
+        客户端当前使用的代理，httpx 格式
+        """
+        return getattr(self, "proxies", None)
+
+    @current_proxies.setter
+    def current_proxies(self, proxies: ProxiesType) -> None:
+        self.proxies = proxies
+
+    @asynccontextmanager
+    async def rate_limit(self, endpoint: str, proxies: ProxiesType = None) -> AsyncIterator[RateLimitSlot]:
+        """
+        请求前获取限流令牌，按 (平台, 账号, 代理, 接口类型) 限流；
+        设置了代理池时把请求耗时和结果上报给代理池，出现风控信号时把当前代理换成代理池中分数最高的代理
+        :param endpoint: 请求地址，快手为 GraphQL operationName
+        :param proxies: 请求使用的代理，默认为客户端当前的代理
+        :return:
+        """
+        proxies = proxies or self.current_proxies
+        cookie = (getattr(self, "headers", None) or {}).get("Cookie", "")
+        async with get_rate_limiter().limit(self.rate_limit_platform, endpoint, account_key(cookie),
+                                            proxies) as rate_limit_slot:
+            if self.ip_pool is None or not proxies:
+                yield rate_limit_slot
+                return
+            start = time.perf_counter()
+            transport_error = False
+            try:
+                yield rate_limit_slot
+            except httpx.TransportError:
+                transport_error = True
+                raise
+            finally:
+                if rate_limit_slot.is_throttled:
+                    await self._rotate_proxy(proxies)
+                elif transport_error:
+                    self.ip_pool.report_failure(proxies)
+                else:
+                    self.ip_pool.report_success(proxies, time.perf_counter() - start)
+
+    async def _rotate_proxy(self, blocked_proxies: ProxiesType) -> None:
+        """
+        代理被封后换一个代理，并发请求同时遇到封禁时只换一次
+        :param blocked_proxies:
+        :return:
+        """
+        try:
+            new_proxies = await self.ip_pool.rotate_proxy(blocked_proxies)
+        except Exception as e:
+            utils.logger.error(f"[{type(self).__name__}._rotate_proxy] get a new proxy err: {e}")
+            return
+        if self.current_proxies == blocked_proxies:
+            self.current_proxies = new_proxies
+            utils.logger.info(f"[{type(self).__name__}._rotate_proxy] proxy is blocked, switch to a new proxy")
+
+    async def close(self):
+        """
+        关闭API客户端持有的连接池，爬虫结束时调用
+        """
+        if self._http_pool is not None:
+            await self._http_pool.aclose()
+            self._http_pool = None
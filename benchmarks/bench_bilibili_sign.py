@@ -0,0 +1,58 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 14:50
+# @Desc    : B站 wbi 签名吞吐量(signatures/sec)，对比每次请求重新创建签名器与复用缓存的签名器
+#            用法: python -m benchmarks.bench_bilibili_sign --calls 100000
+import argparse
+import time
+
+from media_platform.bilibili.help import BilibiliSign
+
+IMG_KEY = "7cd084941338484aae1ad9425b84077c"
+SUB_KEY = "4932caff0ff746eab6f01bf08b70ac45"
+SEARCH_PARAMS = {
+    "search_type": "video",
+    "keyword": "python",
+    "page": 1,
+    "page_size": 20,
+    "order": "click",
+    "duration": "",
+    "tids": 0,
+}
+
+
+def bench(calls: int) -> None:
+    start = time.perf_counter()
+    for _ in range(calls):
+        BilibiliSign(IMG_KEY, SUB_KEY).sign(dict(SEARCH_PARAMS))
+    elapsed = time.perf_counter() - start
+    print(f"[new signer per request] {calls / elapsed:10.1f} signatures/sec")
+
+    wbi_sign = BilibiliSign(IMG_KEY, SUB_KEY)
+    start = time.perf_counter()
+    for _ in range(calls):
+        wbi_sign.sign(dict(SEARCH_PARAMS))
+    elapsed = time.perf_counter() - start
+    print(f"[cached signer]          {calls / elapsed:10.1f} signatures/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bilibili wbi sign benchmark")
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+    bench(args.calls)
+
+
+if __name__ == "__main__":
+    main()
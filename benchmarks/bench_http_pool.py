@@ -0,0 +1,76 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 11:05
+# @Desc    : 对比每次请求新建 httpx.AsyncClient 与共享连接池两种方式的吞吐量
+#            用法: python -m benchmarks.bench_http_pool --requests 2000 --concurrency 20
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+import httpx
+
+from media_platform.kuaishou.client import KuaiShouClient
+from test.stub_server import StubHttpServer
+
+
+async def _run(total: int, concurrency: int, do_request: Callable[[], Awaitable]) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await do_request()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(total)])
+    return time.perf_counter() - start
+
+
+async def bench(total: int, concurrency: int, latency: float) -> None:
+    async with StubHttpServer(latency=latency) as server:
+        url = server.base_url + "/graphql"
+
+        async def per_request_client():
+            # 改造前的写法：每次请求都新建客户端，重新建立 TCP 连接
+            async with httpx.AsyncClient() as client:
+                response = await client.request("POST", url, timeout=10, data="{}")
+            response.json()
+
+        elapsed = await _run(total, concurrency, per_request_client)
+        print(f"[per-request client] {total / elapsed:8.1f} req/s, "
+              f"connections: {server.connection_count}")
+
+        server.connection_count = 0
+        ks_client = KuaiShouClient(headers={}, playwright_page=None, cookie_dict={})
+
+        async def pooled_client():
+            await ks_client.request("POST", url, data="{}")
+
+        elapsed = await _run(total, concurrency, pooled_client)
+        await ks_client.close()
+        print(f"[pooled client]      {total / elapsed:8.1f} req/s, "
+              f"connections: {server.connection_count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="http connection pool benchmark")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub server latency in seconds")
+    args = parser.parse_args()
+    asyncio.run(bench(args.requests, args.concurrency, args.latency))
+
+
+if __name__ == "__main__":
+    main()
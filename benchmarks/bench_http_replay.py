@@ -0,0 +1,112 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 23:30
+# @Desc    : 录制快手评论接口后离线回放，统计爬取的吞吐量（条/秒），回放结果确定，可以在不同提交之间对比
+#            用法: python -m benchmarks.bench_http_replay --videos 50 --pages 5 --concurrency 10
+#            已有录制归档时只回放: python -m benchmarks.bench_http_replay --archive data/http_archive.db --no-record
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import List
+
+import config
+from media_platform.kuaishou.client import KuaiShouClient
+from test.stub_server import StubHttpServer, StubRequest
+from tools.http_replay import HTTP_REPLAY_MODE_RECORD, HTTP_REPLAY_MODE_REPLAY, close_http_archive
+
+STUB_HOST = "127.0.0.1:18765"
+
+
+def make_comment_handler(pages: int, page_size: int):
+    def handler(request: StubRequest):
+        variables = request.json()["variables"]
+        page = int(variables["pcursor"] or "0")
+        root_comments = [{"commentId": f"{variables['photoId']}_{page}_{i}", "content": "comment " * 20,
+                          "subCommentsPcursor": "no_more"} for i in range(page_size)]
+        pcursor = str(page + 1) if page + 1 < pages else "no_more"
+        body = {"data": {"visionCommentList": {"pcursor": pcursor, "rootComments": root_comments}}}
+        return 200, {"Content-Type": "application/json"}, json.dumps(body).encode()
+
+    return handler
+
+
+async def crawl(video_ids: List[str], concurrency: int) -> int:
+    client = KuaiShouClient(headers={}, playwright_page=None, cookie_dict={})
+    client._host = f"http://{STUB_HOST}/graphql"
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(video_id: str) -> int:
+        async with semaphore:
+            comments = await client.get_video_all_comments(video_id, crawl_interval=0, max_count=10 ** 6)
+            return len(comments)
+
+    try:
+        return sum(await asyncio.gather(*[one(video_id) for video_id in video_ids]))
+    finally:
+        await client.close()
+
+
+async def bench(args) -> None:
+    config.ENABLE_CRAWL_CHECKPOINT = False
+    config.ENABLE_SEEN_ID_FILTER = False
+    config.HTTP_ARCHIVE_FILE = args.archive
+    video_ids = [f"photo_{i}" for i in range(args.videos)]
+
+    if not args.no_record:
+        config.HTTP_REPLAY_MODE = HTTP_REPLAY_MODE_RECORD
+        host, port = STUB_HOST.split(":")
+        async with StubHttpServer(make_comment_handler(args.pages, args.page_size), latency=args.latency / 1000,
+                                  host=host, port=int(port)):
+            start = time.perf_counter()
+            items = await crawl(video_ids, args.concurrency)
+            elapsed = time.perf_counter() - start
+        close_http_archive()
+        print(f"[record]  {items} items, {items / elapsed:10.1f} items/s")
+
+    config.HTTP_REPLAY_MODE = HTTP_REPLAY_MODE_REPLAY
+    config.HTTP_REPLAY_LATENCY_MS = args.replay_latency
+    for _ in range(args.rounds):
+        close_http_archive()
+        start = time.perf_counter()
+        items = await crawl(video_ids, args.concurrency)
+        elapsed = time.perf_counter() - start
+        print(f"[replay]  {items} items, {items / elapsed:10.1f} items/s "
+              f"(latency {args.replay_latency} ms, concurrency {args.concurrency})")
+    close_http_archive()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="offline record/replay crawl throughput benchmark")
+    parser.add_argument("--videos", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=5, help="comment pages per video")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=20, help="stub server latency in ms when recording")
+    parser.add_argument("--replay-latency", type=int, default=0,
+                        help="replay latency in ms, -1 replays the recorded latency")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--archive", default="")
+    parser.add_argument("--no-record", action="store_true", help="replay an existing archive only")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        args.archive = args.archive or os.path.join(temp_dir, "http_archive.db")
+        asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 13:40
+# @Desc    : 对比 execjs 与常驻 js 签名 worker 池的签名吞吐量(signatures/sec)
+#            用法: python -m benchmarks.bench_js_signer --execjs-calls 20 --worker-calls 2000
+import argparse
+import asyncio
+import time
+
+from media_platform.douyin.help import douyin_signer, get_a_bogus_from_js
+from media_platform.zhihu.help import sign as zhihu_sign
+from media_platform.zhihu.help import zhihu_signer
+
+DOUYIN_URI = "/aweme/v1/web/comment/list/"
+DOUYIN_PARAMS = "aweme_id=7280854932641664319&cursor=0&count=20&item_type=0&device_platform=webapp&aid=6383"
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0"
+ZHIHU_URL = "/api/v4/search_v3?gk_version=gz-gaokao&t=general&q=python&correction=1&offset=0&limit=20"
+ZHIHU_COOKIES = "d_c0=AFBTxxxxxxxx|1700000000; z_c0=xxx"
+
+
+def bench_execjs(calls: int) -> None:
+    start = time.perf_counter()
+    for _ in range(calls):
+        get_a_bogus_from_js(DOUYIN_URI, DOUYIN_PARAMS, USER_AGENT)
+    elapsed = time.perf_counter() - start
+    print(f"[execjs]  douyin a_bogus: {calls / elapsed:8.1f} signatures/sec")
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        zhihu_sign(ZHIHU_URL, ZHIHU_COOKIES)
+    elapsed = time.perf_counter() - start
+    print(f"[execjs]  zhihu x-zse-96: {calls / elapsed:8.1f} signatures/sec")
+
+
+async def bench_worker_pool(calls: int) -> None:
+    # 预热，启动常驻进程的耗时不计入
+    await douyin_signer.call("sign_datail", DOUYIN_PARAMS, USER_AGENT)
+    await zhihu_signer.call("get_sign", ZHIHU_URL, ZHIHU_COOKIES)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[douyin_signer.call("sign_datail", DOUYIN_PARAMS, USER_AGENT) for _ in range(calls)])
+    elapsed = time.perf_counter() - start
+    print(f"[workers] douyin a_bogus: {calls / elapsed:8.1f} signatures/sec ({douyin_signer.worker_num} workers)")
+
+    start = time.perf_counter()
+    await asyncio.gather(*[zhihu_signer.call("get_sign", ZHIHU_URL, ZHIHU_COOKIES) for _ in range(calls)])
+    elapsed = time.perf_counter() - start
+    print(f"[workers] zhihu x-zse-96: {calls / elapsed:8.1f} signatures/sec ({zhihu_signer.worker_num} workers)")
+
+    await douyin_signer.close()
+    await zhihu_signer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="js signer benchmark")
+    parser.add_argument("--execjs-calls", type=int, default=20)
+    parser.add_argument("--worker-calls", type=int, default=2000)
+    args = parser.parse_args()
+    bench_execjs(args.execjs_calls)
+    asyncio.run(bench_worker_pool(args.worker_calls))
+
+
+if __name__ == "__main__":
+    main()
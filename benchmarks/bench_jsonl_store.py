@@ -0,0 +1,91 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 15:50
+# @Desc    : 对比 json 存储（整文件读改写）与 jsonl 存储（缓冲追加写）保存评论的速度
+#            json 存储是 O(n²) 的，超过 --json-timeout 秒后停止，并按已写入的部分估算总耗时
+#            用法: python -m benchmarks.bench_jsonl_store --count 100000 --json-timeout 60
+import argparse
+import asyncio
+import tempfile
+import time
+
+import config
+from store.xhs.xhs_store_impl import XhsJsonlStoreImplement, XhsJsonStoreImplement
+from tools.jsonl_store import close_all_jsonl_writers
+from var import crawler_type_var
+
+
+def make_comment(i: int) -> dict:
+    return {
+        "comment_id": f"65a1b2c3d4e5f6{i:010d}",
+        "create_time": 1705200000000 + i,
+        "ip_location": "上海",
+        "note_id": "65a1b2c3000000001e00abcd",
+        "content": f"这是第 {i} 条评论，用来测试存储的写入速度",
+        "user_id": "5f0a1b2c000000000101abcd",
+        "nickname": "测试用户",
+        "avatar": "https://sns-avatar-qc.xhscdn.com/avatar/xxxx.jpg",
+        "sub_comment_count": "0",
+        "pictures": "",
+        "parent_comment_id": 0,
+        "last_modify_ts": 1705200000000,
+        "like_count": "12",
+    }
+
+
+async def bench_json(count: int, timeout: float, store_path: str) -> None:
+    store = XhsJsonStoreImplement()
+    store.json_store_path = f"{store_path}/json"
+    store.words_store_path = f"{store_path}/words"
+    start = time.perf_counter()
+    written = 0
+    for i in range(count):
+        await store.store_comment(make_comment(i))
+        written += 1
+        if time.perf_counter() - start > timeout:
+            break
+    elapsed = time.perf_counter() - start
+    print(f"[json]  {written:7d} comments in {elapsed:8.2f}s, {written / elapsed:10.1f} comments/sec")
+    if written < count:
+        # 每次写入的耗时与已有数据量成正比，总耗时约为 elapsed * (count / written)²
+        print(f"[json]  stopped after {timeout}s, estimated time for {count} comments: "
+              f"{elapsed * (count / written) ** 2:.0f}s")
+
+
+async def bench_jsonl(count: int, store_path: str) -> None:
+    store = XhsJsonlStoreImplement()
+    store.jsonl_store_path = f"{store_path}/jsonl"
+    start = time.perf_counter()
+    for i in range(count):
+        await store.store_comment(make_comment(i))
+    await close_all_jsonl_writers()
+    elapsed = time.perf_counter() - start
+    print(f"[jsonl] {count:7d} comments in {elapsed:8.2f}s, {count / elapsed:10.1f} comments/sec")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="json vs jsonl store benchmark")
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--json-timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    config.ENABLE_GET_WORDCLOUD = False
+    crawler_type_var.set("search")
+    with tempfile.TemporaryDirectory() as store_path:
+        await bench_jsonl(args.count, store_path)
+        await bench_json(args.count, args.json_timeout, store_path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 03:40
+# @Desc    : 本地缓存微基准：写入、命中、未命中、按前缀查询 keys、过期清理和 LRU 淘汰
+#            用法: python -m benchmarks.bench_local_cache --keys 1000000 --prefixes 100
+import argparse
+import gc
+import time
+from typing import Callable
+
+from cache.local_cache import ExpiringLocalCache
+
+
+def timed(name: str, count: int, func: Callable[[], None]) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {count:>9} ops {elapsed:8.3f}s {count / elapsed:12.0f} ops/s")
+
+
+def bench(args) -> None:
+    keys = [f"brand{i % args.prefixes}_10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}_{8000 + i % 1000}"
+            for i in range(args.keys)]
+    cache = ExpiringLocalCache(cron_interval=3600)
+
+    def set_all():
+        for key in keys:
+            cache.set(key, key, 600)
+
+    def get_all():
+        for key in keys:
+            cache.get(key)
+
+    def get_missing():
+        for key in keys:
+            cache.get("missing_" + key)
+
+    def keys_by_prefix():
+        for i in range(args.lookups):
+            cache.keys(f"brand{i % args.prefixes}_*")
+
+    def keys_full_scan():
+        cache.keys("*_8001")
+
+    timed("set", args.keys, set_all)
+    timed("get (hit)", args.keys, get_all)
+    timed("get (miss)", args.keys, get_missing)
+    timed("keys('brandN_*')", args.lookups, keys_by_prefix)
+    timed("keys('*_8001') full scan", 1, keys_full_scan)
+    timed("set (overwrite)", args.keys, set_all)
+
+    # 没有键过期时清理只检查堆顶
+    timed("clear (none expired)", 1, cache._clear)
+    # 把过期时间改到过去，每个键的过期时间不同，模拟陆续过期的键全部清理
+    for i, key in enumerate(keys):
+        cache._cache_container[key] = (key, i / args.keys)
+    cache._compact_heap()
+    timed("clear (all expired)", args.keys, cache._clear)
+    print(f"stats: {cache.stats()}")
+    del cache
+    gc.collect()
+
+    lru_cache = ExpiringLocalCache(cron_interval=3600, max_size=args.keys // 10)
+
+    def set_bounded():
+        for key in keys:
+            lru_cache.set(key, key, 600)
+
+    timed(f"set (max_size {args.keys // 10})", args.keys, set_bounded)
+    print(f"stats: {lru_cache.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ExpiringLocalCache micro benchmark")
+    parser.add_argument("--keys", type=int, default=1000000)
+    parser.add_argument("--prefixes", type=int, default=100, help="distinct key prefixes, like proxy brand names")
+    parser.add_argument("--lookups", type=int, default=100, help="keys(pattern) calls")
+    args = parser.parse_args()
+    bench(args)
+
+
+if __name__ == "__main__":
+    main()
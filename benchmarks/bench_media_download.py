@@ -0,0 +1,93 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 20:15
+# @Desc    : 对比下载视频时的内存峰值：原来整体读入 response.content 再写文件，与下载队列流式写入文件
+#            桩服务运行在子进程中，tracemalloc 只统计下载一侧的内存分配
+#            用法: python -m benchmarks.bench_media_download --size-mb 200 --files 3
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+import tracemalloc
+
+import aiofiles
+import httpx
+
+from test.stub_server import StubHttpServer
+from tools.media_downloader import MediaDownloader
+
+
+def serve(size: int, port_queue: multiprocessing.Queue) -> None:
+    content = os.urandom(1024 * 1024) * (size // (1024 * 1024))
+
+    async def run():
+        server = StubHttpServer(lambda request: (200, {"Content-Type": "video/mp4"}, content))
+        await server.start()
+        port_queue.put(server.port)
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+async def legacy_download(url: str, save_file_name: str) -> None:
+    async with httpx.AsyncClient() as client:
+        response = await client.request("GET", url, timeout=60)
+        async with aiofiles.open(save_file_name, "wb") as f:
+            await f.write(response.content)
+
+
+async def bench(name: str, download, file_count: int) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    await download(file_count)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"[{name}] {file_count} files in {elapsed:6.2f}s, peak memory: {peak / 1024 / 1024:8.1f} MB")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="media download memory benchmark")
+    parser.add_argument("--size-mb", type=int, default=200)
+    parser.add_argument("--files", type=int, default=3)
+    args = parser.parse_args()
+
+    port_queue = multiprocessing.get_context("spawn").Queue()
+    server_process = multiprocessing.get_context("spawn").Process(
+        target=serve, args=(args.size_mb * 1024 * 1024, port_queue), daemon=True)
+    server_process.start()
+    base_url = f"http://127.0.0.1:{port_queue.get()}"
+
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            async def legacy(file_count: int):
+                for i in range(file_count):
+                    await legacy_download(f"{base_url}/{i}.mp4", os.path.join(temp_dir, f"legacy_{i}.mp4"))
+
+            async def streaming(file_count: int):
+                downloader = MediaDownloader()
+                for i in range(file_count):
+                    await downloader.submit(f"{base_url}/{i}.mp4", os.path.join(temp_dir, f"stream_{i}.mp4"))
+                await downloader.close()
+
+            await bench("legacy", legacy, args.files)
+            await bench("streaming", streaming, args.files)
+    finally:
+        server_process.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,167 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 05:00
+# @Desc    : RedisCache（同步，逐个请求）与 AsyncRedisCache（管道、MGET、SCAN）的吞吐量对比，以及各序列化方式的体积和耗时
+#            默认在子进程中启动本地 Redis 兼容服务，也可以指定真实的 redis；
+#            本地兼容服务是 python 实现，吞吐量上限受它限制，主要用来对比往返次数的差异，绝对数值以真实 redis 为准
+#            用法: python -m benchmarks.bench_redis_cache --keys 10000
+#                  python -m benchmarks.bench_redis_cache --host 127.0.0.1 --port 6379
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from cache.async_redis_cache import AsyncRedisCache
+from cache.redis_cache import RedisCache
+from cache.serializer import (SERIALIZER_JSON, SERIALIZER_MSGPACK, SERIALIZER_PICKLE,
+                              create_serializer)
+from config import db_config
+from test.redis_stub import RedisStubServer
+
+
+def make_value(i: int) -> Dict[str, Any]:
+    return {"note_id": f"note_{i}", "title": "标题" * 10, "liked_count": i, "tags": ["tag1", "tag2", "tag3"],
+            "user": {"user_id": f"user_{i}", "nickname": "nickname"}}
+
+
+def run_stub_server(port: int) -> None:
+    async def serve():
+        server = RedisStubServer(port=port)
+        await server.start()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(host: str, port: int, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"redis server {host}:{port} is not ready")
+
+
+def report(name: str, count: int, elapsed: float) -> None:
+    print(f"{name:<40} {count:>7} ops {elapsed:8.3f}s {count / elapsed:12.0f} ops/s")
+
+
+def timed(name: str, count: int, func: Callable[[], Any]) -> None:
+    start = time.perf_counter()
+    func()
+    report(name, count, time.perf_counter() - start)
+
+
+async def async_timed(name: str, count: int, func: Callable[[], Awaitable[Any]]) -> None:
+    start = time.perf_counter()
+    await func()
+    report(name, count, time.perf_counter() - start)
+
+
+def bench_serializers(count: int) -> None:
+    values = [make_value(i) for i in range(count)]
+    for name in (SERIALIZER_PICKLE, SERIALIZER_JSON, SERIALIZER_MSGPACK):
+        try:
+            serializer = create_serializer(name)
+        except ImportError:
+            print(f"{name:<10} skipped, msgpack is not installed")
+            continue
+        start = time.perf_counter()
+        payloads = [serializer.dumps(value) for value in values]
+        dumps_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        for payload in payloads:
+            serializer.loads(payload)
+        loads_elapsed = time.perf_counter() - start
+        print(f"{name:<10} avg size {sum(map(len, payloads)) / count:7.1f} bytes, "
+              f"dumps {count / dumps_elapsed:10.0f}/s, loads {count / loads_elapsed:10.0f}/s")
+
+
+def bench_sync(args, keys, values) -> None:
+    cache = RedisCache(serializer=SERIALIZER_PICKLE)
+    cache._redis_client.flushdb()
+
+    def set_all():
+        for key, value in zip(keys, values):
+            cache.set(key, value, 600)
+
+    timed("sync set (pickle)", args.keys, set_all)
+    timed("sync get", args.keys, lambda: [cache.get(key) for key in keys])
+    timed("sync KEYS", 1, lambda: cache._redis_client.keys("note_*"))
+    timed("sync keys (SCAN)", 1, lambda: cache.keys("note_*"))
+    cache._redis_client.close()
+
+
+async def bench_async(args, keys, values) -> None:
+    cache = AsyncRedisCache(serializer=args.serializer)
+    mapping = dict(zip(keys, values))
+    await cache.get("warmup")
+
+    async def concurrent_get():
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def get(key: str):
+            async with semaphore:
+                return await cache.get(key)
+
+        await asyncio.gather(*[get(key) for key in keys])
+
+    await async_timed(f"async mset pipeline ({args.serializer})", args.keys, lambda: cache.mset(mapping, 600))
+    await async_timed("async mget", args.keys, lambda: cache.mget(keys))
+    await async_timed(f"async get x{args.concurrency} concurrent", args.keys, concurrent_get)
+    await async_timed("async keys (SCAN)", 1, lambda: cache.keys("note_*"))
+    await cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RedisCache vs AsyncRedisCache benchmark")
+    parser.add_argument("--keys", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--serializer", default=SERIALIZER_JSON)
+    parser.add_argument("--host", default="", help="use a real redis instead of the local stub server")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    process = None
+    if not args.host:
+        args.host, args.port = "127.0.0.1", free_port()
+        process = multiprocessing.Process(target=run_stub_server, args=(args.port,), daemon=True)
+        process.start()
+        wait_for_port(args.host, args.port)
+    db_config.REDIS_DB_HOST, db_config.REDIS_DB_PORT = args.host, args.port
+
+    keys = [f"note_{i}" for i in range(args.keys)]
+    values = [make_value(i) for i in range(args.keys)]
+    try:
+        bench_serializers(args.keys)
+        bench_sync(args, keys, values)
+        asyncio.run(bench_async(args, keys, values))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
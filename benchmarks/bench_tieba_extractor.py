@@ -0,0 +1,79 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 18:30
+# @Desc    : 用 media_platform/tieba/test_data 下的页面测试 TieBaExtractor 各个提取方法的速度（页/秒）和内存峰值
+#            内存峰值为 tracemalloc 统计的 python 对象内存，不包含 lxml 在 C 层分配的文档树内存
+#            用法: python -m benchmarks.bench_tieba_extractor --rounds 20
+import argparse
+import os
+import resource
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from media_platform.tieba.help import TieBaExtractor
+from model.m_baidu_tieba import TiebaComment
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "media_platform", "tieba", "test_data")
+
+PARENT_COMMENT = TiebaComment(comment_id="123456", content="content", user_link="user_link",
+                              user_nickname="user_nickname", user_avatar="user_avatar",
+                              publish_time="publish_time", parent_comment_id="parent_comment_id",
+                              note_id="note_id", note_url="note_url", tieba_id="tieba_id",
+                              tieba_name="tieba_name", tieba_link="tieba_link")
+
+
+def extractor_cases(extractor: TieBaExtractor) -> List[Tuple[str, str, Callable]]:
+    return [
+        ("extract_search_note_list", "search_keyword_notes.html", extractor.extract_search_note_list),
+        ("extract_tieba_note_list", "tieba_note_list.html", extractor.extract_tieba_note_list),
+        ("extract_note_detail", "note_detail.html", extractor.extract_note_detail),
+        ("extract_tieba_note_parment_comments", "note_comments.html",
+         lambda page: extractor.extract_tieba_note_parment_comments(page, "123456")),
+        ("extract_tieba_note_sub_comments", "note_sub_comments.html",
+         lambda page: extractor.extract_tieba_note_sub_comments(page, PARENT_COMMENT)),
+        ("extract_creator_info", "creator_info.html", extractor.extract_creator_info),
+    ]
+
+
+def bench(name: str, func: Callable, page_content: str, rounds: int) -> None:
+    func(page_content)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(page_content)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:38s} {len(page_content) / 1024:8.1f} KB {rounds / elapsed:10.1f} pages/sec "
+          f"peak {peak / 1024 / 1024:8.2f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="tieba extractor benchmark")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, fixture, func in extractor_cases(TieBaExtractor()):
+        fixture_file = os.path.join(TEST_DATA_DIR, fixture)
+        if not os.path.exists(fixture_file):
+            print(f"{name:38s} skipped, fixture {fixture} not found")
+            continue
+        with open(fixture_file, mode="r", encoding="utf-8") as f:
+            bench(name, func, f.read(), args.rounds)
+    print(f"process max rss: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
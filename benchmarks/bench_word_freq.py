@@ -0,0 +1,84 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 17:50
+# @Desc    : 对比每保存一条评论都全量分词（原来的做法）与增量分词的 CPU 耗时
+#            全量分词是 O(n²) 的，超过 --full-timeout 秒后停止，并按已处理的部分估算总耗时
+#            用法: python -m benchmarks.bench_word_freq --count 10000 --full-timeout 60
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from collections import Counter
+
+import config
+from tools.words import AsyncWordCloudGenerator, close_all_word_cloud_generators
+
+WORDS = ["编程", "副业", "兼职", "学习", "工作", "程序员", "赚钱", "分享", "经验", "项目", "时间", "推荐", "教程", "入门"]
+
+
+def make_comment(i: int) -> dict:
+    rnd = random.Random(i)
+    return {"comment_id": str(i), "content": "，".join(rnd.choice(WORDS) + rnd.choice(WORDS) for _ in range(6))}
+
+
+def bench_full(generator: AsyncWordCloudGenerator, comments: list, timeout: float) -> Counter:
+    start = time.process_time()
+    word_freq = Counter()
+    processed = 0
+    for i in range(len(comments)):
+        word_freq = generator.count_words(comments[:i + 1])
+        processed += 1
+        if time.process_time() - start > timeout:
+            break
+    elapsed = time.process_time() - start
+    print(f"[full]        {processed:7d} comments, cpu {elapsed:8.2f}s")
+    if processed < len(comments):
+        # 每次分词的耗时与已有评论数成正比，总耗时约为 elapsed * (count / processed)²
+        print(f"[full]        stopped after {timeout}s, estimated cpu time for {len(comments)} comments: "
+              f"{elapsed * (len(comments) / processed) ** 2:.0f}s")
+    return word_freq
+
+
+async def bench_incremental(generator: AsyncWordCloudGenerator, comments: list, words_prefix: str) -> Counter:
+    start = time.process_time()
+    save_data = []
+    for comment in comments:
+        save_data.append(comment)
+        await generator.generate_word_frequency_and_cloud(save_data, words_prefix)
+    elapsed = time.process_time() - start
+    print(f"[incremental] {len(comments):7d} comments, cpu {elapsed:8.2f}s (word cloud is rendered in a worker process)")
+    return generator.states[words_prefix].word_freq
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="word frequency benchmark")
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--full-timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    comments = [make_comment(i) for i in range(args.count)]
+    generator = AsyncWordCloudGenerator()
+    # 预热 jieba 词典
+    generator.count_words(comments[:1])
+    with tempfile.TemporaryDirectory() as words_path:
+        word_freq = await bench_incremental(generator, comments, f"{words_path}/search_comments")
+        assert word_freq == generator.count_words(comments), "incremental word frequency mismatch"
+        config.WORDCLOUD_DEBOUNCE_SEC = 0
+        await close_all_word_cloud_generators()
+    bench_full(generator, comments, args.full_timeout)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
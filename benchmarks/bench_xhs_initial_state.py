@@ -0,0 +1,62 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 18:10
+# @Desc    : 对比小红书笔记详情页 __INITIAL_STATE__ 解析的耗时：
+#            原来的做法（正则匹配整个 HTML + 每层 json.dumps/json.loads 重新序列化）与一次解析完成的做法
+#            用法: python -m benchmarks.bench_xhs_initial_state --html note1.html note2.html
+#            不传 --html 时使用生成的笔记页面（--images 张图片、--tags 个话题）
+import argparse
+import time
+from typing import List
+
+from media_platform.xhs.help import parse_note_detail_from_html
+from test.xhs_note_page import NOTE_ID, legacy_get_note_dict, make_note_html
+
+
+def bench(name: str, func, pages: List[str], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for html in pages:
+            func(html, NOTE_ID)
+    elapsed = time.perf_counter() - start
+    per_page = elapsed / (rounds * len(pages)) * 1000
+    print(f"[{name}] {rounds * len(pages):6d} pages in {elapsed:7.2f}s, {per_page:7.3f} ms/page")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="xhs __INITIAL_STATE__ parse benchmark")
+    parser.add_argument("--html", nargs="*", help="saved note detail page html files")
+    parser.add_argument("--images", type=int, default=18)
+    parser.add_argument("--tags", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.html:
+        pages = []
+        for html_file in args.html:
+            with open(html_file, mode="r", encoding="utf-8") as f:
+                pages.append(f.read())
+    else:
+        pages = [make_note_html(args.images, args.tags)]
+    for html in pages:
+        assert parse_note_detail_from_html(html, NOTE_ID) == legacy_get_note_dict(html, NOTE_ID), "parse result mismatch"
+
+    legacy = bench("legacy", legacy_get_note_dict, pages, args.rounds)
+    current = bench("single-pass", parse_note_detail_from_html, pages, args.rounds)
+    print(f"speedup: {legacy / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 00:20
+# @Desc    : 端到端压测：真实的 *Crawler 关键词搜索流程跑在本地模拟平台服务上（test/mock_platforms.py），
+#            统计吞吐量（条/秒）和每个接口的 p50/p95/p99 延迟
+#            不启动浏览器，playwright 页面只用于签名，由 FakePage 返回固定值；jsonl 存储写到临时目录
+#            用法: python -m benchmarks.load_test --platform xhs,ks --pages 5 --latency 50 --latency-dist exponential
+#            注入异常: python -m benchmarks.load_test --platform xhs --error-rate 0.05 --captcha-rate 0.01 --rate-limit 200
+#            自适应限流: python -m benchmarks.load_test --platform zhihu --rate-limit 20 --adaptive-rate-limit
+import argparse
+import asyncio
+import glob
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from unittest import mock
+
+import config
+from factory.crawler_factory import CrawlerFactory
+from media_platform.bilibili.client import BilibiliClient
+from media_platform.douyin.client import DOUYINClient
+from media_platform.kuaishou.client import KuaiShouClient
+from media_platform.tieba.client import BaiduTieBaClient
+from media_platform.weibo.client import WeiboClient
+from media_platform.xhs.client import XiaoHongShuClient
+from media_platform.zhihu.client import ZhiHuClient
+from store.bilibili import BiliStoreFactory
+from store.douyin import DouyinStoreFactory
+from store.kuaishou import KuaishouStoreFactory
+from store.tieba import TieBaStoreFactory
+from store.weibo import WeibostoreFactory
+from store.xhs import XhsStoreFactory
+from store.zhihu import ZhihuStoreFactory
+from test.mock_platforms import (LATENCY_DISTRIBUTIONS, MOCK_PLATFORMS, BilibiliMockPlatform, MockPlatformServer,
+                                 MockRoutingTransport)
+from tools.http_pool import HttpClientPool
+from tools.js_signer import close_all_signers
+from tools.jsonl_store import close_all_jsonl_writers
+from tools.rate_limiter import close_rate_limiter, get_rate_limiter
+from var import crawler_type_var
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) " \
+             "Chrome/126.0.0.0 Safari/537.36"
+
+
+# 各平台爬虫中每页搜索结果的固定数量最大为 20，CRAWLER_MAX_NOTES_COUNT 按它计算时每个平台都能翻完 pages 页
+SEARCH_PAGE_SIZE = 20
+
+
+class FakePage:
+    """
+    代替 playwright 页面，返回签名需要的 localStorage 等固定值
+    """
+
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        if isinstance(arg, list):  # 小红书批量计算 X-s / X-t
+            return [{"X-s": "XYW_" + "mock_x_s" * 8, "X-t": int(time.time() * 1000)} for _ in arg]
+        if "getItem('b1')" in expression:
+            return "mock_b1" * 8
+        if "wbi_img_urls" in expression:
+            return {"img_urls": "-".join(BilibiliMockPlatform.WBI_IMG_URLS)}
+        if "localStorage" in expression:
+            return {"xmst": "mock_ms_token"}
+        return ""
+
+
+class NoIntervalRandom:
+    """
+    替换爬虫模块中的 random，去掉请求之间的随机等待，只测量爬虫本身的处理能力
+    """
+
+    @staticmethod
+    def random() -> float:
+        return 0.0
+
+    @staticmethod
+    def uniform(a: float, b: float) -> float:
+        return 0.0
+
+    @staticmethod
+    def randint(a: int, b: int) -> int:
+        return 0
+
+
+def _headers(**extra: str) -> Dict[str, str]:
+    return {"User-Agent": USER_AGENT, "Cookie": "a1=mock_a1; d_c0=mock_d_c0",
+            "Content-Type": "application/json;charset=UTF-8", **extra}
+
+
+def _cookie_dict() -> Dict[str, str]:
+    return {"a1": "mock_a1", "d_c0": "mock_d_c0"}
+
+
+# 平台 -> (爬虫中 client 的属性名, 创建 client 的函数, 存储工厂)
+PLATFORM_CLIENTS: Dict[str, Tuple[str, Callable[[], Any], Any]] = {
+    "xhs": ("xhs_client", lambda: XiaoHongShuClient(
+        headers=_headers(Origin="https://www.xiaohongshu.com"), playwright_page=FakePage(),
+        cookie_dict=_cookie_dict()), XhsStoreFactory),
+    "dy": ("dy_client", lambda: DOUYINClient(
+        headers=_headers(Origin="https://www.douyin.com", Referer="https://www.douyin.com/"),
+        playwright_page=FakePage(), cookie_dict=_cookie_dict()), DouyinStoreFactory),
+    "ks": ("ks_client", lambda: KuaiShouClient(
+        headers=_headers(Origin="https://www.kuaishou.com"), playwright_page=FakePage(),
+        cookie_dict=_cookie_dict()), KuaishouStoreFactory),
+    "bili": ("bili_client", lambda: BilibiliClient(
+        headers=_headers(Origin="https://www.bilibili.com"), playwright_page=FakePage(),
+        cookie_dict=_cookie_dict()), BiliStoreFactory),
+    "wb": ("wb_client", lambda: WeiboClient(
+        headers=_headers(Referer="https://m.weibo.cn/"), playwright_page=FakePage(),
+        cookie_dict=_cookie_dict()), WeibostoreFactory),
+    "tieba": ("tieba_client", lambda: BaiduTieBaClient(), TieBaStoreFactory),
+    "zhihu": ("zhihu_client", lambda: ZhiHuClient(
+        headers=_headers(cookie="d_c0=mock_d_c0"), playwright_page=FakePage(), cookie_dict=_cookie_dict()),
+              ZhihuStoreFactory),
+}
+
+
+def count_jsonl_items(store_path: str) -> Dict[str, int]:
+    """
+    统计 jsonl 存储中每种类型（contents / comments / creator）的条数
+    :param store_path:
+    :return:
+    """
+    counts: Dict[str, int] = {}
+    for file_name in glob.glob(os.path.join(store_path, "*.jsonl")):
+        store_type = next((t for t in ("contents", "comments", "creator") if t in os.path.basename(file_name)),
+                          "other")
+        with open(file_name, mode="rb") as f:
+            counts[store_type] = counts.get(store_type, 0) + sum(1 for line in f if line.strip())
+    return counts
+
+
+async def run_platform(platform: str, output_dir: str, pages: int = 3, comment_pages: int = 2,
+                       page_size: int = 10, notes: int = 0, keywords: str = "mock", concurrency: int = 4,
+                       latency_ms: float = 0.0, latency_distribution: str = "fixed", error_rate: float = 0.0,
+                       captcha_rate: float = 0.0, rate_limit: float = 0.0, keep_intervals: bool = False,
+                       adaptive_rate_limit: bool = False, seed: Optional[int] = 0) -> Dict:
+    """
+    在模拟平台上运行一次关键词搜索爬取
+    :param platform: 平台
+    :param output_dir: jsonl 存储目录
+    :param pages: 每个关键词的搜索结果页数
+    :param comment_pages: 每条内容的评论页数
+    :param page_size: 每页条数
+    :param notes: CRAWLER_MAX_NOTES_COUNT，默认按 pages 页计算，保证爬完所有搜索结果
+    :param keywords: 搜索关键词，英文逗号分隔
+    :param concurrency: MAX_CONCURRENCY_NUM
+    :param latency_ms: 模拟服务的平均延迟
+    :param latency_distribution: fixed | uniform | exponential
+    :param error_rate: 服务端错误比例
+    :param captcha_rate: 验证码比例
+    :param rate_limit: 模拟服务每秒允许的请求数，0 不限流
+    :param keep_intervals: 是否保留爬虫请求之间的随机等待
+    :param adaptive_rate_limit: 是否开启自适应限流（ENABLE_RATE_LIMITER）
+    :param seed: 模拟服务的随机种子
+    :return: 压测结果
+    """
+    crawler_client_attr, create_client, store_factory = PLATFORM_CLIENTS[platform]
+    store_class = store_factory.STORES["jsonl"]
+    store_path = os.path.join(output_dir, platform)
+    crawler = CrawlerFactory.create_crawler(platform)
+    patches = [
+        mock.patch.multiple(
+            config, PLATFORM=platform, KEYWORDS=keywords, START_PAGE=1, SAVE_DATA_OPTION="jsonl",
+            CRAWLER_MAX_NOTES_COUNT=notes or pages * SEARCH_PAGE_SIZE, MAX_CONCURRENCY_NUM=concurrency,
+            CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES=comment_pages * page_size, ENABLE_GET_COMMENTS=True,
+            ENABLE_GET_SUB_COMMENTS=False, ENABLE_GET_IMAGES=False, ENABLE_GET_WORDCLOUD=False,
+            ENABLE_CRAWL_CHECKPOINT=False, ENABLE_SEEN_ID_FILTER=False, HTTP_REPLAY_MODE="", ENABLE_IP_PROXY=False,
+            ENABLE_RATE_LIMITER=adaptive_rate_limit),
+        mock.patch.object(store_class, "jsonl_store_path", store_path),
+        mock.patch.object(store_class, "writers", {}),
+    ]
+    crawler_module = sys.modules[type(crawler).__module__]
+    if hasattr(crawler_module, "CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES"):
+        # 小红书爬虫在导入时读取了这个配置
+        patches.append(mock.patch.object(crawler_module, "CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES",
+                                         comment_pages * page_size))
+    if not keep_intervals:
+        patches.append(mock.patch.object(crawler_module, "random", NoIntervalRandom()))
+
+    result: Dict[str, Any] = {"platform": platform, "error": None}
+    async with MockPlatformServer(platform, pages=pages, comment_pages=comment_pages, page_size=page_size,
+                                  latency_ms=latency_ms, latency_distribution=latency_distribution,
+                                  error_rate=error_rate, captcha_rate=captcha_rate, rate_limit=rate_limit,
+                                  seed=seed) as server:
+        transport = MockRoutingTransport(server.base_url)
+        for patch in patches:
+            patch.start()
+        try:
+            client = create_client()
+            client._http_pool = HttpClientPool(transport=transport)
+            setattr(crawler, crawler_client_attr, client)
+            crawler_type_var.set("search")
+            start = time.perf_counter()
+            try:
+                await crawler.search()
+            except Exception as e:
+                # 注入异常后爬虫可能提前结束，和真实平台上的表现一致，记录下来继续统计
+                result["error"] = repr(e)
+            result["elapsed"] = time.perf_counter() - start
+            result["rate_limiter"] = [(endpoint, bucket.rate, bucket.success_count, bucket.throttled_count)
+                                      for (_, _, _, endpoint), bucket in get_rate_limiter().buckets.items()]
+            close_rate_limiter()
+            await close_all_jsonl_writers()
+            await client.close()
+        finally:
+            for patch in reversed(patches):
+                patch.stop()
+        await transport.aclose()
+        result["requests"] = server.request_count
+        result["injected"] = dict(server.injected)
+
+    result["items"] = count_jsonl_items(store_path)
+    result["latency"] = transport.latency_summary()
+    result["status_errors"] = sum(transport.status_errors.values())
+    return result
+
+
+def print_result(result: Dict) -> None:
+    items = result["items"]
+    total = sum(items.values())
+    elapsed = result["elapsed"]
+    injected = ", ".join(f"{k} {v}" for k, v in sorted(result["injected"].items())) or "none"
+    item_counts = " + ".join(f"{count} {store_type}" for store_type, count in sorted(items.items())) or "0 items"
+    print(f"[{result['platform']}] {item_counts} in {elapsed:.2f}s, {total / elapsed if elapsed else 0:10.1f} items/s, "
+          f"{result['requests']} requests, non-200 responses {result['status_errors']}, injected: {injected}")
+    if result["error"]:
+        print(f"    crawler stopped: {result['error']}")
+    print(f"    {'endpoint':<60}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, count, p50, p95, p99 in result["latency"]:
+        print(f"    {endpoint:<60}{count:>8}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}")
+    for endpoint, rate, success_count, throttled_count in result["rate_limiter"]:
+        print(f"    rate limiter {endpoint}: {rate:.2f}/s, success {success_count}, throttled {throttled_count}")
+
+
+async def bench(args) -> None:
+    platforms = list(MOCK_PLATFORMS) if args.platform == "all" else args.platform.split(",")
+    with tempfile.TemporaryDirectory() as output_dir:
+        try:
+            for platform in platforms:
+                result = await run_platform(
+                    platform, output_dir, pages=args.pages, comment_pages=args.comment_pages,
+                    page_size=args.page_size, notes=args.notes, keywords=args.keywords,
+                    concurrency=args.concurrency, latency_ms=args.latency, latency_distribution=args.latency_dist,
+                    error_rate=args.error_rate, captcha_rate=args.captcha_rate, rate_limit=args.rate_limit,
+                    keep_intervals=args.keep_intervals, adaptive_rate_limit=args.adaptive_rate_limit, seed=args.seed)
+                print_result(result)
+        finally:
+            await close_all_signers()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="end-to-end crawler load test against local mock platforms")
+    parser.add_argument("--platform", default="all", help=f"all or comma separated: {','.join(MOCK_PLATFORMS)}")
+    parser.add_argument("--keywords", default="mock", help="comma separated search keywords")
+    parser.add_argument("--pages", type=int, default=3, help="search result pages per keyword")
+    parser.add_argument("--comment-pages", type=int, default=2, help="comment pages per content")
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--notes", type=int, default=0, help="CRAWLER_MAX_NOTES_COUNT, default pages * page size")
+    parser.add_argument("--concurrency", type=int, default=4, help="MAX_CONCURRENCY_NUM")
+    parser.add_argument("--latency", type=float, default=20, help="mean mock server latency in ms")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--captcha-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests per second, 0 means unlimited")
+    parser.add_argument("--keep-intervals", action="store_true", help="keep the crawlers' random sleep")
+    parser.add_argument("--adaptive-rate-limit", action="store_true", help="enable the adaptive rate limiter")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
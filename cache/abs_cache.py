@@ -16,7 +16,7 @@
 # @Desc    : 抽象类
 
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 
 class AbstractCache(ABC):
@@ -43,6 +43,15 @@ class AbstractCache(ABC):
         """
         raise NotImplementedError
 
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        批量获取键的值，顺序和 keys 一致，不存在的键返回 None
+        远程缓存的子类应该覆盖这个方法，一次请求取回所有值
+        :param keys: 键列表
+        :return:
+        """
+        return [self.get(key) for key in keys]
+
     @abstractmethod
     def keys(self, pattern: str) -> List[str]:
         """
@@ -51,3 +60,62 @@ class AbstractCache(ABC):
         :return:
         """
         raise NotImplementedError
+
+
+class AbstractAsyncCache(ABC):
+    """
+    异步缓存，远程缓存在爬虫协程中使用时不阻塞事件循环
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        从缓存中获取键的值
+        :param key: 键
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        将键的值设置到缓存中
+        :param key: 键
+        :param value: 值
+        :param expire_time: 过期时间
+        :return:
+        """
+        raise NotImplementedError
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        批量获取键的值，顺序和 keys 一致，不存在的键返回 None
+        :param keys: 键列表
+        :return:
+        """
+        return [await self.get(key) for key in keys]
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        批量设置键的值，过期时间相同
+        :param mapping: 键 -> 值
+        :param expire_time: 过期时间
+        :return:
+        """
+        for key, value in mapping.items():
+            await self.set(key, value, expire_time)
+
+    @abstractmethod
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        获取所有符合pattern的key
+        :param pattern: 匹配模式
+        :return:
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """
+        释放连接
+        :return:
+        """
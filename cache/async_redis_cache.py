@@ -0,0 +1,133 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 04:20
+# @Desc    : 异步 RedisCache 实现，基于 redis.asyncio，批量读写通过管道一次往返完成，按模式列出键使用 SCAN 游标
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from redis.asyncio import Redis
+
+from cache.abs_cache import AbstractAsyncCache
+from cache.serializer import AbstractSerializer, create_serializer
+from config import db_config
+
+# 一条 MGET 命令最多包含的键数量，更多的键拆成多条命令放在同一个管道中
+MGET_BATCH_SIZE = 1000
+
+# SCAN 每次迭代建议返回的键数量
+SCAN_COUNT = 1000
+
+
+def create_async_redis_client() -> Redis:
+    """
+    按 db_config 中的 redis 配置创建异步 redis 客户端，需要直接使用 redis 命令（事务、哈希等）的模块共用
+    :return:
+    """
+    return Redis(
+        host=db_config.REDIS_DB_HOST,
+        port=db_config.REDIS_DB_PORT,
+        db=db_config.REDIS_DB_NUM,
+        password=db_config.REDIS_DB_PWD,
+    )
+
+
+class AsyncRedisCache(AbstractAsyncCache):
+
+    def __init__(self, serializer: Optional[str] = None, redis_client: Optional[Redis] = None) -> None:
+        """
+        :param serializer: 序列化方式，默认为 REDIS_CACHE_SERIALIZER
+        :param redis_client: 默认按 db_config 中的 redis 配置连接
+        """
+        self._serializer: AbstractSerializer = create_serializer(serializer or db_config.REDIS_CACHE_SERIALIZER)
+        self._redis_client = redis_client or create_async_redis_client()
+
+    def _loads(self, value: Optional[bytes]) -> Any:
+        return None if value is None else self._serializer.loads(value)
+
+    async def get(self, key: str) -> Any:
+        """
+        从缓存中获取键的值, 并且反序列化
+        :param key:
+        :return:
+        """
+        return self._loads(await self._redis_client.get(key))
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        将键的值设置到缓存中, 并且序列化
+        :param key:
+        :param value:
+        :param expire_time:
+        :return:
+        """
+        await self._redis_client.set(key, self._serializer.dumps(value), ex=expire_time)
+
+    async def mget(self, keys: List[str]) -> List[Any]:
+        """
+        批量获取，所有 MGET 命令在同一个管道中发送
+        :param keys:
+        :return:
+        """
+        if not keys:
+            return []
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            for i in range(0, len(keys), MGET_BATCH_SIZE):
+                pipe.mget(keys[i:i + MGET_BATCH_SIZE])
+            results = await pipe.execute()
+        return [self._loads(value) for values in results for value in values]
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        批量设置，MSET 不支持过期时间，改为在同一个管道中发送多条 SET EX
+        :param mapping:
+        :param expire_time:
+        :return:
+        """
+        if not mapping:
+            return
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, self._serializer.dumps(value), ex=expire_time)
+            await pipe.execute()
+
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        获取所有符合pattern的key，使用 SCAN 游标分批遍历，不会像 KEYS 一样长时间阻塞 redis
+        """
+        return [key.decode() async for key in self._redis_client.scan_iter(match=pattern, count=SCAN_COUNT)]
+
+    async def delete(self, *keys: str) -> int:
+        """
+        删除键
+        :param keys:
+        :return: 删除的数量
+        """
+        if not keys:
+            return 0
+        return await self._redis_client.delete(*keys)
+
+    async def close(self) -> None:
+        await self._redis_client.close()
+        await self._redis_client.connection_pool.disconnect()
+
+
+if __name__ == '__main__':
+    async def main():
+        redis_cache = AsyncRedisCache()
+        await redis_cache.mset({"name": "程序员阿江-Relakkes", "list": [1, 2, 3]}, 10)
+        print(await redis_cache.mget(["name", "list", "missing"]))  # ['程序员阿江-Relakkes', [1, 2, 3], None]
+        print(await redis_cache.keys("*"))  # ['name', 'list']
+        await redis_cache.close()
+
+    asyncio.run(main())
@@ -35,6 +35,9 @@ class CacheFactory:
             return ExpiringLocalCache(*args, **kwargs)
         elif cache_type == 'redis':
             from .redis_cache import RedisCache
-            return RedisCache()
+            return RedisCache(*args, **kwargs)
+        elif cache_type == 'async_redis':
+            from .async_redis_cache import AsyncRedisCache
+            return AsyncRedisCache(*args, **kwargs)
         else:
             raise ValueError(f'Unknown cache type: {cache_type}')
@@ -14,24 +14,61 @@
 # @Name    : 程序员阿江-Relakkes
 # @Time    : 2024/6/2 11:05
 # @Desc    : 本地缓存
+#            过期时间放在最小堆中，清理时只弹出已经过期的键；可选的容量上限按 LRU 淘汰；
+#            keys 支持完整的通配符匹配，按键的第一段前缀建立索引，"{proxy_brand_name}_*" 这类查询只检查同一前缀下的键
 
 import asyncio
+import fnmatch
+import heapq
+import re
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from cache.abs_cache import AbstractCache
 
+# 前缀索引按第一个分隔符切分键，例如 "kuaidaili_1.2.3.4_8080" 的前缀为 "kuaidaili_"
+PREFIX_SEPARATORS = ("_", ":")
+GLOB_SPECIAL_CHAR_PATTERN = re.compile(r"[*?\[]")
+
+# 键被覆盖或删除后过期堆中会留下失效的条目，条目数超过键数量的这个倍数时重建过期堆
+HEAP_COMPACT_RATIO = 2
+
+
+def key_prefix(key: str) -> str:
+    """
+    键的第一段前缀（包含分隔符），没有分隔符时为空字符串
+    :param key:
+    :return:
+    """
+    end = len(key)
+    for separator in PREFIX_SEPARATORS:
+        index = key.find(separator, 0, end)
+        if index != -1:
+            end = index
+    return key[:end + 1] if end < len(key) else ""
+
 
 class ExpiringLocalCache(AbstractCache):
 
-    def __init__(self, cron_interval: int = 10):
+    def __init__(self, cron_interval: int = 10, max_size: int = 0):
         """
         初始化本地缓存
         :param cron_interval: 定时清楚cache的时间间隔
+        :param max_size: 最多缓存的键数量，超出时淘汰最久没有访问的键，0 表示不限制
         :return:
         """
         self._cron_interval = cron_interval
-        self._cache_container: Dict[str, Tuple[Any, float]] = {}
+        self._max_size = max_size
+        self._cache_container: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        # (过期时间, 键) 组成的最小堆
+        self._expire_heap: List[Tuple[float, str]] = []
+        # 键的第一段前缀 -> 键
+        self._prefix_index: Dict[str, Set[str]] = {}
+        self.hit_count = 0
+        self.miss_count = 0
+        self.expired_count = 0
+        self.evicted_count = 0
         self._cron_task: Optional[asyncio.Task] = None
         # 开启定时清理任务
         self._schedule_clear()
@@ -44,21 +81,31 @@ class ExpiringLocalCache(AbstractCache):
         if self._cron_task is not None:
             self._cron_task.cancel()
 
+    def __len__(self) -> int:
+        return len(self._cache_container)
+
     def get(self, key: str) -> Optional[Any]:
         """
         从缓存中获取键的值
         :param key:
         :return:
         """
-        value, expire_time = self._cache_container.get(key, (None, 0))
-        if value is None:
+        item = self._cache_container.get(key)
+        if item is None:
+            self.miss_count += 1
             return None
 
         # 如果键已过期，则删除键并返回None
-        if expire_time < time.time():
-            del self._cache_container[key]
+        value, expire_at = item
+        if expire_at <= time.monotonic():
+            self._delete(key)
+            self.expired_count += 1
+            self.miss_count += 1
             return None
 
+        if self._max_size:
+            self._cache_container.move_to_end(key)
+        self.hit_count += 1
         return value
 
     def set(self, key: str, value: Any, expire_time: int) -> None:
@@ -69,22 +116,80 @@ class ExpiringLocalCache(AbstractCache):
         :param expire_time:
         :return:
         """
-        self._cache_container[key] = (value, time.time() + expire_time)
+        self._clear()
+        expire_at = time.monotonic() + expire_time
+        if key in self._cache_container:
+            self._cache_container.move_to_end(key)
+        else:
+            if self._max_size and len(self._cache_container) >= self._max_size:
+                self._evict_lru()
+            self._prefix_index.setdefault(key_prefix(key), set()).add(key)
+        self._cache_container[key] = (value, expire_at)
+        heapq.heappush(self._expire_heap, (expire_at, key))
+        if len(self._expire_heap) > HEAP_COMPACT_RATIO * len(self._cache_container) + 64:
+            self._compact_heap()
 
     def keys(self, pattern: str) -> List[str]:
         """
-        获取所有符合pattern的key
+        获取所有符合pattern的key，通配符规则和 fnmatch 一致（* ? [seq]）
         :param pattern: 匹配模式
         :return:
         """
-        if pattern == '*':
-            return list(self._cache_container.keys())
+        match = GLOB_SPECIAL_CHAR_PATTERN.search(pattern)
+        if match is None:
+            return [pattern] if self._is_alive(pattern, time.monotonic()) else []
+
+        # 通配符之前的固定部分包含分隔符时，匹配的键都在同一个前缀下
+        literal_prefix = pattern[:match.start()]
+        index_prefix = key_prefix(literal_prefix)
+        candidates = self._prefix_index.get(index_prefix, ()) if index_prefix else self._cache_container.keys()
+        container = self._cache_container
+        now = time.monotonic()
+        if pattern == literal_prefix + "*":
+            return [key for key in candidates if key.startswith(literal_prefix) and container[key][1] > now]
+        regex = re.compile(fnmatch.translate(pattern))
+        return [key for key in candidates
+                if key.startswith(literal_prefix) and regex.match(key) and container[key][1] > now]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        缓存的命中、过期和淘汰次数
+        :return:
+        """
+        return {
+            "size": len(self._cache_container),
+            "hit_count": self.hit_count,
+            "miss_count": self.miss_count,
+            "expired_count": self.expired_count,
+            "evicted_count": self.evicted_count,
+        }
+
+    def _is_alive(self, key: str, now: float) -> bool:
+        item = self._cache_container.get(key)
+        return item is not None and item[1] > now
+
+    def _delete(self, key: str) -> None:
+        """
+        删除键，过期堆中的条目在弹出或者重建时丢弃
+        :param key:
+        :return:
+        """
+        self._cache_container.pop(key, None)
+        prefix = key_prefix(key)
+        keys = self._prefix_index.get(prefix)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._prefix_index[prefix]
 
-        # 本地缓存通配符暂时将*替换为空
-        if '*' in pattern:
-            pattern = pattern.replace('*', '')
+    def _evict_lru(self) -> None:
+        key = next(iter(self._cache_container))
+        self._delete(key)
+        self.evicted_count += 1
 
-        return [key for key in self._cache_container.keys() if pattern in key]
+    def _compact_heap(self) -> None:
+        self._expire_heap = [(expire_at, key) for key, (_, expire_at) in self._cache_container.items()]
+        heapq.heapify(self._expire_heap)
 
     def _schedule_clear(self):
         """
@@ -102,12 +207,18 @@ class ExpiringLocalCache(AbstractCache):
 
     def _clear(self):
         """
-        根据过期时间清理缓存
+        根据过期时间清理缓存，只从过期堆顶弹出已经过期的键，没有过期的键时为 O(1)
         :return:
         """
-        for key, (value, expire_time) in self._cache_container.items():
-            if expire_time < time.time():
-                del self._cache_container[key]
+        now = time.monotonic()
+        heap = self._expire_heap
+        while heap and heap[0][0] <= now:
+            expire_at, key = heapq.heappop(heap)
+            item = self._cache_container.get(key)
+            # 键被重新设置过时，堆中旧的过期时间已经失效
+            if item is not None and item[1] == expire_at:
+                self._delete(key)
+                self.expired_count += 1
 
     async def _start_clear_cron(self):
         """
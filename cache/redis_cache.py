@@ -14,19 +14,26 @@
 # @Name    : 程序员阿江-Relakkes
 # @Time    : 2024/5/29 22:57
 # @Desc    : RedisCache实现
-import pickle
 import time
-from typing import Any, List
+from typing import Any, List, Optional
 
 from redis import Redis
 
 from cache.abs_cache import AbstractCache
+from cache.serializer import SERIALIZER_PICKLE, AbstractSerializer, create_serializer
 from config import db_config
 
+# SCAN 每次迭代建议返回的键数量
+SCAN_COUNT = 1000
+
 
 class RedisCache(AbstractCache):
 
-    def __init__(self) -> None:
+    def __init__(self, serializer: Optional[str] = None) -> None:
+        """
+        :param serializer: 序列化方式，默认为 pickle，和已经写入 redis 的缓存兼容
+        """
+        self._serializer: AbstractSerializer = create_serializer(serializer or SERIALIZER_PICKLE)
         # 连接redis, 返回redis客户端
         self._redis_client = self._connet_redis()
 
@@ -52,7 +59,17 @@ class RedisCache(AbstractCache):
         value = self._redis_client.get(key)
         if value is None:
             return None
-        return pickle.loads(value)
+        return self._serializer.loads(value)
+
+    def mget(self, keys: List[str]) -> List[Any]:
+        """
+        一次 MGET 取回多个键的值, 并且反序列化
+        :param keys:
+        :return:
+        """
+        if not keys:
+            return []
+        return [None if value is None else self._serializer.loads(value) for value in self._redis_client.mget(keys)]
 
     def set(self, key: str, value: Any, expire_time: int) -> None:
         """
@@ -62,13 +79,13 @@ class RedisCache(AbstractCache):
         :param expire_time:
         :return:
         """
-        self._redis_client.set(key, pickle.dumps(value), ex=expire_time)
+        self._redis_client.set(key, self._serializer.dumps(value), ex=expire_time)
 
     def keys(self, pattern: str) -> List[str]:
         """
-        获取所有符合pattern的key
+        获取所有符合pattern的key，使用 SCAN 游标分批遍历，不会像 KEYS 一样长时间阻塞 redis
         """
-        return [key.decode() for key in self._redis_client.keys(pattern)]
+        return [key.decode() for key in self._redis_client.scan_iter(match=pattern, count=SCAN_COUNT)]
 
 
 if __name__ == '__main__':
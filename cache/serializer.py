@@ -0,0 +1,89 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 04:10
+# @Desc    : 缓存值的序列化方式
+#            json: 默认，体积小、跨语言，只支持 json 类型；msgpack: 更紧凑更快，需要 pip install msgpack；
+#            pickle: 支持任意 python 对象，兼容旧版本写入的缓存
+import json
+import pickle
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Type
+
+SERIALIZER_JSON = "json"
+SERIALIZER_MSGPACK = "msgpack"
+SERIALIZER_PICKLE = "pickle"
+
+
+class AbstractSerializer(ABC):
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class JsonSerializer(AbstractSerializer):
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class MsgpackSerializer(AbstractSerializer):
+
+    def __init__(self):
+        try:
+            import msgpack
+        except ImportError:
+            raise ImportError("msgpack serializer requires the msgpack package, please run: pip install msgpack")
+        self._msgpack = msgpack
+
+    def dumps(self, value: Any) -> bytes:
+        return self._msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return self._msgpack.unpackb(data, raw=False)
+
+
+class PickleSerializer(AbstractSerializer):
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value)
+
+    def loads(self, data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+_serializer_classes: Dict[str, Type[AbstractSerializer]] = {
+    SERIALIZER_JSON: JsonSerializer,
+    SERIALIZER_MSGPACK: MsgpackSerializer,
+    SERIALIZER_PICKLE: PickleSerializer,
+}
+
+
+def create_serializer(name: str) -> AbstractSerializer:
+    """
+    按名称创建序列化器
+    :param name: json | msgpack | pickle
+    :return:
+    """
+    serializer_class = _serializer_classes.get(name)
+    if serializer_class is None:
+        raise ValueError(f"Unknown cache serializer: {name}")
+    return serializer_class()
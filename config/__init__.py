@@ -11,3 +11,32 @@
 
 from .base_config import *
 from .db_config import *
+
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+# 调度器会在同一个进程中并发执行多个任务，任务配置不能写到全局 config 上，否则任务之间会互相覆盖。
+# 爬虫通过 apply_task_config 把任务配置保存到当前协程的上下文中（只对当前任务以及它创建的子任务生效），
+# 会被任务配置覆盖的配置项通过 get_config 读取，没有任务配置时（命令行模式）读取的就是全局配置
+_task_config_overrides: ContextVar[Optional[Dict[str, Any]]] = ContextVar("task_config_overrides", default=None)
+
+
+def apply_task_config(overrides: Dict[str, Any]) -> None:
+    """
+    设置当前任务的配置，需要在任务自己的 asyncio task 中调用
+    :param overrides: 配置项名称 -> 配置值
+    :return:
+    """
+    _task_config_overrides.set(dict(overrides))
+
+
+def get_config(name: str) -> Any:
+    """
+    读取配置项，优先使用当前任务的配置
+    :param name: 配置项名称
+    :return:
+    """
+    overrides = _task_config_overrides.get()
+    if overrides is not None and name in overrides:
+        return overrides[name]
+    return globals()[name]
@@ -23,6 +23,19 @@ CRAWLER_TYPE = (
 )
 # 运行模式：crawler(常规爬虫模式) | scheduler(任务调度模式)
 RUN_MODE = "crawler"
+
+# 任务调度模式下同时执行的任务数量上限
+SCHEDULER_MAX_CONCURRENT_TASKS = 4
+
+# 任务调度模式下单个平台同时执行的任务数量上限，未配置的平台使用 SCHEDULER_DEFAULT_PLATFORM_CONCURRENCY
+# 同一平台的任务共用浏览器用户数据目录（USER_DATA_DIR），开启 SAVE_LOGIN_STATE 时不要超过 1
+SCHEDULER_PLATFORM_CONCURRENCY = {}
+SCHEDULER_DEFAULT_PLATFORM_CONCURRENCY = 1
+
+# 任务调度模式下领取任务的租约时长，单位秒，调度器每隔 1/3 租约时长续约一次
+# 调度器进程退出后，租约到期的任务会被其他调度器进程重新领取
+SCHEDULER_TASK_LEASE_SEC = 300
+
 # 自定义User Agent（暂时仅对XHS有效）
 UA = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36 Edg/131.0.0.0'
 
@@ -32,12 +45,104 @@ ENABLE_IP_PROXY = False
 # 未启用代理时的最大爬取间隔，单位秒（暂时仅对XHS有效）
 CRAWLER_MAX_SLEEP_SEC = 2
 
+# 是否开启自适应限流，按 (平台, 账号, 代理, 接口类型) 限制请求速率，请求成功时逐步加速，出现验证码、IP 被封时减速；
+# 开启后不再按上面的爬取间隔随机等待
+ENABLE_RATE_LIMITER = False
+
+# 每个限流桶的初始速率、最低速率，单位 次/秒
+RATE_LIMIT_INITIAL_QPS = 1.0
+RATE_LIMIT_MIN_QPS = 0.1
+
+# 每个限流桶的最高速率，单位 次/秒，按平台配置，未配置的平台使用 default
+RATE_LIMIT_MAX_QPS = {
+    "default": 5.0,
+    "xhs": 2.0,
+}
+
+# 令牌桶容量，即空闲之后允许连续发出的请求数
+RATE_LIMIT_BURST = 2
+
+# 每次请求成功后速率增加多少（次/秒），出现风控信号时速率乘以多少
+RATE_LIMIT_INCREASE_STEP = 0.05
+RATE_LIMIT_DECREASE_FACTOR = 0.5
+
 # 代理IP池数量
 IP_PROXY_POOL_COUNT = 2
 
 # 代理IP提供商名称
 IP_PROXY_PROVIDER_NAME = "kuaidaili"
 
+# 代理池中可用的代理少于这个数量时在后台从代理商补充，补充到 IP_PROXY_POOL_COUNT 个
+IP_PROXY_POOL_LOW_WATERMARK = 1
+
+# 代理池后台检查的间隔，单位秒，检查时移出快要过期的代理并补充代理
+IP_PROXY_POOL_CHECK_INTERVAL_SEC = 10
+
+# 距离过期时间不足多少秒的代理提前移出代理池，单位秒
+IP_PROXY_EXPIRE_MARGIN_SEC = 30
+
+# 验证代理是否可用的地址、超时时间（秒）和同时验证的代理数量
+IP_PROXY_VALIDATE_URL = "https://httpbin.org/ip"
+IP_PROXY_VALIDATE_TIMEOUT_SEC = 10
+IP_PROXY_VALIDATE_CONCURRENCY = 10
+
+# 代理连续请求失败（网络错误）多少次后移出代理池，出现 IP 被封等风控信号时直接移出
+IP_PROXY_MAX_FAILURES = 3
+
+# 多个爬虫进程/主机共用同一个代理商账号时开启代理租约：代理缓存放到 redis（连接信息见 db_config），
+# 代理池只使用租到的代理，同一时间一个 IP 只被一个进程使用
+ENABLE_IP_PROXY_LEASE = False
+
+# 代理租约的有效期，单位秒，代理池后台检查时续约，进程异常退出后租约到期自动释放，需要大于 IP_PROXY_POOL_CHECK_INTERVAL_SEC
+IP_PROXY_LEASE_TTL_SEC = 60
+
+# HTTP连接池配置，同一个爬虫（同一个代理）下的API请求复用长连接
+# 连接池最大连接数
+HTTP_POOL_MAX_CONNECTIONS = 100
+
+# 连接池最大保活连接数
+HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS = 20
+
+# 空闲保活连接的过期时间，单位秒
+HTTP_POOL_KEEPALIVE_EXPIRY = 30
+
+# 是否开启HTTP/2（需要安装 h2 依赖: pip install httpx[http2]，未安装时自动回退到HTTP/1.1）
+ENABLE_HTTP2 = True
+
+# 常驻JS签名进程数量（抖音 a_bogus、知乎 x-zse-96 签名），需要本机安装 node，未安装时回退到 execjs
+JS_SIGNER_WORKER_NUM = 2
+
+# 单次JS签名调用的超时时间，单位秒
+JS_SIGNER_TIMEOUT_SEC = 10
+
+# 小红书签名用到的 localStorage b1 缓存时间，单位秒，过期后重新从浏览器页面读取
+XHS_SIGN_B1_CACHE_TTL_SEC = 300
+
+# B站 wbi 签名 key（img_key、sub_key）的缓存时间，单位秒，签名失败时会提前刷新
+BILI_WBI_KEY_CACHE_TTL_SEC = 3600
+
+# 调试用：是否开启事件循环阻塞检测，开启后会统计事件循环延迟，并打印阻塞超过阈值时的调用栈
+ENABLE_EVENT_LOOP_MONITOR = False
+
+# 事件循环阻塞阈值，单位秒
+EVENT_LOOP_BLOCK_THRESHOLD_SEC = 0.1
+
+# 是否把页面 HTML/JSON 解析（贴吧、知乎、小红书详情页、微博详情页）放到进程池中执行，解析量大时避免阻塞事件循环
+ENABLE_PARSE_PROCESS_POOL = False
+
+# 解析进程池的进程数量，0 表示使用 CPU 核数
+PARSE_PROCESS_POOL_SIZE = 0
+
+# HTTP 录制/回放模式：""(关闭) | record(把平台接口的请求和响应保存到本地归档) | replay(不访问网络，从归档返回响应)
+# 用于离线的基准测试和回归测试
+HTTP_REPLAY_MODE = ""
+
+# HTTP 录制归档文件
+HTTP_ARCHIVE_FILE = "data/http_archive.db"
+
+# 回放时每个请求的响应延迟，单位毫秒，-1 表示使用录制时的耗时
+HTTP_REPLAY_LATENCY_MS = 0
+
 # 设置为True不会打开浏览器（无头浏览器）
 # 设置False会打开一个浏览器
 # 小红书如果一直扫码登录不通过，打开浏览器手动过一下滑动验证码
@@ -47,8 +152,18 @@ HEADLESS = False
 # 是否保存登录状态
 SAVE_LOGIN_STATE = True
 
-# 数据保存类型选项配置,支持三种类型：csv、db、json, 最好保存到DB，有排重的功能。
-SAVE_DATA_OPTION = "json"  # csv or db or json
+# 数据保存类型选项配置,支持四种类型：csv、db、json、jsonl, 最好保存到DB，有排重的功能。
+# jsonl 为追加写入，数据量大时比 json 快很多，可以用 python -m tools.jsonl_store 导出成 json 格式
+SAVE_DATA_OPTION = "json"  # csv or db or json or jsonl
+
+# jsonl 存储缓冲多少行后写入文件
+JSONL_BUFFER_SIZE = 500
+
+# jsonl 存储定时写入文件并 fsync 的间隔，单位秒
+JSONL_FLUSH_INTERVAL_SEC = 5
+
+# jsonl 存储单个文件的最大大小，单位MB，超过后写入新的分片文件
+JSONL_MAX_FILE_SIZE_MB = 256
 
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%s_user_data_dir"  # %s will be replaced by platform name
@@ -56,6 +171,48 @@ USER_DATA_DIR = "%s_user_data_dir"  # %s will be replaced by platform name
 # 爬取开始页数 默认从第一页开始
 START_PAGE = 1
 
+# 是否开启断点续爬，记录每个关键词、帖子评论、创作者作品列表已经处理完成的页码或游标，
+# 爬虫中途退出后重新运行（调度器模式下任务重试）时从断点继续，任务正常结束后清除断点；
+# 命令行模式下只有平台、爬取类型以及关键词、评论数量等爬取配置都没有变化时才会沿用断点
+ENABLE_CRAWL_CHECKPOINT = True
+
+# 断点存储方式：sqlite(本地文件) | memory(进程内缓存) | redis
+CRAWL_CHECKPOINT_BACKEND = "sqlite"
+
+# sqlite 断点文件路径
+CRAWL_CHECKPOINT_SQLITE_PATH = "data/crawl_checkpoint.db"
+
+# 断点批量写入：累积多少条断点更新后写入一次
+CRAWL_CHECKPOINT_BATCH_SIZE = 20
+
+# 断点批量写入：距离上次写入超过多少秒后写入一次
+CRAWL_CHECKPOINT_FLUSH_INTERVAL_SEC = 5
+
+# memory / redis 方式保存的断点过期时间，单位秒
+CRAWL_CHECKPOINT_EXPIRE_SEC = 7 * 24 * 3600
+
+# 是否开启已爬取ID过滤，跨多次运行记录已经爬取过的帖子详情和帖子评论，刷新时间内再次遇到时跳过请求
+ENABLE_SEEN_ID_FILTER = False
+
+# 每种数据的刷新时间，单位秒，超过刷新时间后重新爬取：note(帖子/视频详情) comments(帖子的评论)
+SEEN_ID_REFRESH_SEC = {
+    "note": 7 * 24 * 3600,
+    "comments": 24 * 3600,
+}
+
+# 已爬取ID过滤文件的目录，布隆过滤器按平台、数据类型分文件保存
+SEEN_ID_FILTER_PATH = "data/seen_ids"
+
+# 单个布隆过滤器文件的容量和误判率，写满后新建文件；容量 100 万、误判率 0.1% 时文件约 1.8MB
+SEEN_ID_FILTER_CAPACITY = 1000000
+SEEN_ID_FILTER_ERROR_RATE = 0.001
+
+# 布隆过滤器按时间分代，每个分代的时长，单位秒，超过刷新时间的分代文件会被删除
+SEEN_ID_FILTER_GENERATION_SEC = 24 * 3600
+
+# 布隆过滤器命中后是否再查询 SQLite 精确索引，排除误判并精确判断爬取时间
+SEEN_ID_EXACT_CHECK = True
+
 # 爬取视频/帖子的数量控制
 CRAWLER_MAX_NOTES_COUNT = 200
 
@@ -65,6 +222,30 @@ MAX_CONCURRENCY_NUM = 1
 # 是否开启爬图片模式, 默认不开启爬图片
 ENABLE_GET_IMAGES = False
 
+# 图片/视频下载协程数量，下载任务放入队列后由这些协程流式写入文件
+MEDIA_DOWNLOAD_WORKER_NUM = 4
+
+# 同一个域名同时下载的文件数量上限
+MEDIA_DOWNLOAD_HOST_CONCURRENCY = 2
+
+# 下载队列长度上限，队列满时爬虫等待下载进度
+MEDIA_DOWNLOAD_QUEUE_SIZE = 100
+
+# 每次从响应中读取并写入文件的块大小，单位字节
+MEDIA_DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+# 下载中断后的重试次数，重试时通过 HTTP Range 从已下载的位置继续
+MEDIA_DOWNLOAD_MAX_RETRIES = 3
+
+# 下载时单次网络读写的超时时间，单位秒
+MEDIA_DOWNLOAD_TIMEOUT_SEC = 60
+
+# 是否开启图片/视频去重存储，相同内容只保存一份，笔记目录下的文件以硬链接指向这份内容，已下载过的URL不再下载
+ENABLE_MEDIA_DEDUP = True
+
+# 去重存储的目录，保存文件内容和 SQLite 索引
+MEDIA_STORE_PATH = "data/media"
+
 # 是否开启爬评论模式, 默认开启爬评论
 ENABLE_GET_COMMENTS = True
 
@@ -186,6 +367,9 @@ STOP_WORDS_FILE = "./docs/hit_stopwords.txt"
 # 中文字体文件路径
 FONT_PATH = "./docs/STZHONGS.TTF"
 
+# 词频文件和词云图片的生成间隔，单位秒，期间保存的评论只做增量分词，合并后生成一次
+WORDCLOUD_DEBOUNCE_SEC = 10
+
 # 爬取开始的天数，仅支持 bilibili 关键字搜索，YYYY-MM-DD 格式，若为 None 则表示不设置时间范围，按照默认关键字最多返回 1000 条视频的结果处理
 START_DAY = '2024-01-01'
 
@@ -197,6 +381,9 @@ END_DAY = '2024-01-01'
 # 若为 True，则按照 START_DAY 至 END_DAY 按照每一天进行筛选，这样能够突破 1000 条视频的限制，最大程度爬取该关键词下的所有视频
 ALL_DAY = False
 
+# bilibili 关键字搜索的排序方式：hot(综合) | time(最新发布) | totalrank | danmaku(最多弹幕) | reply(最多评论) | view(最多播放) | favorite(最多收藏)，为空时按综合排序
+SEARCH_TYPE = ""
+
 #!!! 下面仅支持 bilibili creator搜索
 # 爬取评论creator主页还是爬取creator动态和关系列表(True为前者)
 CREATOR_MODE = True
@@ -18,6 +18,18 @@ RELATION_DB_HOST = os.getenv("RELATION_DB_HOST", "localhost")
 RELATION_DB_PORT = os.getenv("RELATION_DB_PORT", 3306)
 RELATION_DB_NAME = os.getenv("RELATION_DB_NAME", "media_crawler")
 
+# 评论等数据批量入库：缓冲多少条后合并成一条 INSERT ... ON DUPLICATE KEY UPDATE
+DB_BATCH_UPSERT_SIZE = 200
+
+# 批量入库的定时刷新间隔，单位秒
+DB_BATCH_FLUSH_INTERVAL_SEC = 2
+
+# 批量写入连续失败多少次后拆成单条写入，单条仍然失败的记录会被丢弃并记录日志
+DB_BATCH_MAX_RETRIES = 3
+
+# 每张表写缓冲的记录数上限，超过后不再等待重试，直接拆成单条写入
+DB_BATCH_BUFFER_MAX_SIZE = 10000
+
 
 # redis config
 REDIS_DB_HOST = "127.0.0.1"  # your redis host
@@ -27,4 +39,9 @@ REDIS_DB_NUM = os.getenv("REDIS_DB_NUM", 0)  # your redis db num
 
 # cache type
 CACHE_TYPE_REDIS = "redis"
-CACHE_TYPE_MEMORY = "memory"
\ No newline at end of file
+CACHE_TYPE_ASYNC_REDIS = "async_redis"  # redis.asyncio 客户端，在爬虫协程中使用不阻塞事件循环
+CACHE_TYPE_MEMORY = "memory"
+
+# 异步 redis 缓存（AsyncRedisCache）值的序列化方式：json | msgpack（需要安装 msgpack） | pickle
+# 同步的 RedisCache 固定使用 pickle，和已经写入 redis 的缓存兼容
+REDIS_CACHE_SERIALIZER = os.getenv("REDIS_CACHE_SERIALIZER", "json")
\ No newline at end of file
@@ -65,6 +65,10 @@ async def close():
 
     """
     utils.logger.info("[close] close mediacrawler db pool")
+    async_db_obj: AsyncMysqlDB = media_crawler_db_var.get()
+    if async_db_obj is not None:
+        # 写缓冲中还没入库的数据
+        await async_db_obj.close_upserts()
     db_pool: aiomysql.Pool = db_conn_pool_var.get()
     if db_pool is not None:
         db_pool.close()
@@ -0,0 +1,51 @@
+/**
+ * 常驻的 JS 签名 worker，由 tools/js_signer.py 启动
+ * 启动参数: node signer_worker.js <签名js文件路径> <导出函数名1> <导出函数名2> ...
+ * 签名 js 只在启动时读取、编译一次，之后通过 stdin/stdout 按行传输 JSON 请求和响应：
+ *   请求: {"id": 1, "fn": "get_sign", "args": ["...", "..."]}
+ *   响应: {"id": 1, "result": ...} 或 {"id": 1, "error": "..."}
+ */
+const fs = require('fs');
+const readline = require('readline');
+
+const scriptPath = process.argv[2];
+const exportNames = process.argv.slice(3);
+
+// 签名 js 里的 console 输出不能写到 stdout，否则会破坏通信协议
+const writeStderr = (...args) => process.stderr.write(args.map(String).join(' ') + '\n');
+console.log = writeStderr;
+console.info = writeStderr;
+console.warn = writeStderr;
+console.error = writeStderr;
+
+const source = fs.readFileSync(scriptPath, 'utf-8').replace(/^\uFEFF/, '');
+const factory = new Function('require', source + '\n;return {' + exportNames.join(',') + '};');
+const api = factory(require);
+
+const rl = readline.createInterface({input: process.stdin, terminal: false});
+
+rl.on('line', (line) => {
+    if (!line) {
+        return;
+    }
+    let request;
+    try {
+        request = JSON.parse(line);
+    } catch (e) {
+        return;
+    }
+    const response = {id: request.id};
+    try {
+        const fn = api[request.fn];
+        if (typeof fn !== 'function') {
+            throw new Error('function not exported: ' + request.fn);
+        }
+        response.result = fn.apply(null, request.args || []);
+    } catch (e) {
+        response.error = String(e && e.stack ? e.stack : e);
+    }
+    process.stdout.write(JSON.stringify(response) + '\n');
+});
+
+// 父进程退出时 stdin 关闭，worker 随之退出
+rl.on('close', () => process.exit(0));
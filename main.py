@@ -16,48 +16,20 @@ import time
 import cmd_arg
 import config
 import db
-from base.base_crawler import AbstractCrawler
-from media_platform.bilibili import BilibiliCrawler
-from media_platform.douyin import DouYinCrawler
-from media_platform.kuaishou import KuaishouCrawler
-from media_platform.tieba import TieBaCrawler
-from media_platform.weibo import WeiboCrawler
-from media_platform.xhs import XiaoHongShuCrawler
-from media_platform.zhihu import ZhihuCrawler
+from factory.crawler_factory import CrawlerFactory
+from proxy.proxy_ip_pool import close_all_ip_pools
 from task_manager.scheduler import start_scheduler, stop_scheduler
 from tools import utils
-
-
-class CrawlerFactory:
-    CRAWLERS = {
-        "xhs": XiaoHongShuCrawler,
-        "dy": DouYinCrawler,
-        "ks": KuaishouCrawler,
-        "bili": BilibiliCrawler,
-        "wb": WeiboCrawler,
-        "tieba": TieBaCrawler,
-        "zhihu": ZhihuCrawler
-    }
-
-    @staticmethod
-    def create_crawler(platform: str, task_config=None) -> AbstractCrawler:
-        """
-        创建爬虫实例
-        
-        Args:
-            platform: 平台名称
-            task_config: 任务配置对象，如果提供则使用此配置，否则使用全局配置
-            
-        Returns:
-            AbstractCrawler: 爬虫实例
-            
-        Raises:
-            ValueError: 如果平台不受支持
-        """
-        crawler_class = CrawlerFactory.CRAWLERS.get(platform)
-        if not crawler_class:
-            raise ValueError("Invalid Media Platform Currently only supported xhs or dy or ks or bili ...")
-        return crawler_class(task_config=task_config)
+from tools.crawl_checkpoint import clear_crawl_checkpoint, close_all_crawl_checkpoints
+from tools.http_replay import close_http_archive
+from tools.js_signer import close_all_signers
+from tools.jsonl_store import close_all_jsonl_writers
+from tools.media_downloader import close_media_downloader
+from tools.parse_executor import close_parse_executor
+from tools.rate_limiter import close_rate_limiter
+from tools.seen_filter import close_seen_filters
+from tools.words import close_all_word_cloud_generators
+from tools.loop_monitor import EventLoopMonitor
 
 
 async def main():
@@ -69,28 +41,54 @@ async def main():
         utils.logger.warning("调度器模式必须使用数据库存储！自动将SAVE_DATA_OPTION设置为'db'")
         config.SAVE_DATA_OPTION = "db"
 
+    # 调试模式下检测事件循环阻塞
+    loop_monitor = None
+    if config.ENABLE_EVENT_LOOP_MONITOR:
+        loop_monitor = EventLoopMonitor(threshold=config.EVENT_LOOP_BLOCK_THRESHOLD_SEC)
+        loop_monitor.start()
+
     # init db
     if config.SAVE_DATA_OPTION == "db":
         await db.init_db()
     
     # 根据运行模式执行不同的逻辑
-    if config.RUN_MODE == "scheduler":
-        utils.logger.info("Starting in scheduler mode...")
-        try:
-            # 启动任务调度器
-            await start_scheduler()
-        except KeyboardInterrupt:
-            utils.logger.info("Scheduler stopped by user")
-            stop_scheduler()
-    else:
-        # 传统模式：直接运行单个爬虫任务
-        utils.logger.info(f"Starting in crawler mode for {config.PLATFORM}...")
-        crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
-        await crawler.start()
+    try:
+        if config.RUN_MODE == "scheduler":
+            utils.logger.info("Starting in scheduler mode...")
+            try:
+                # 启动任务调度器
+                await start_scheduler()
+            except KeyboardInterrupt:
+                utils.logger.info("Scheduler stopped by user")
+                stop_scheduler()
+        else:
+            # 传统模式：直接运行单个爬虫任务
+            utils.logger.info(f"Starting in crawler mode for {config.PLATFORM}...")
+            crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
+            await crawler.start()
+            # 正常结束后清除断点，下次运行从头开始
+            await clear_crawl_checkpoint()
+    finally:
+        # 爬虫异常退出时也要写入已经完成的断点
+        await close_all_crawl_checkpoints()
+
+    await close_all_ip_pools()
+    await close_media_downloader()
+    close_seen_filters()
+    close_http_archive()
+    close_rate_limiter()
 
     if config.SAVE_DATA_OPTION == "db":
         await db.close()
 
+    await close_all_jsonl_writers()
+    await close_all_word_cloud_generators()
+    await close_all_signers()
+    await close_parse_executor()
+
+    if loop_monitor:
+        loop_monitor.stop()
+
 
 if __name__ == '__main__':
     try:
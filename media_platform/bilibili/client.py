@@ -15,22 +15,28 @@
 # @Desc    : bilibili 请求客户端
 import asyncio
 import json
+import time
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.crawl_checkpoint import get_crawl_checkpoint
+from tools.seen_filter import get_seen_filter
+from tools.media_downloader import get_media_downloader
+from tools.rate_limiter import crawl_sleep
 
-from .exception import DataFetchError
+from .exception import DataFetchError, WbiSignError
 from .field import CommentOrderType, SearchOrderType
 from .help import BilibiliSign
 
 
 class BilibiliClient(AbstractApiClient):
+    rate_limit_platform = "bili"
+
     def __init__(
             self,
             timeout=10,
@@ -46,40 +52,83 @@ class BilibiliClient(AbstractApiClient):
         self._host = "https://api.bilibili.com"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        self.WBI_SIGN_ERROR_CODE = -403
+        # -412 请求被拦截，-352 风控校验失败，-509 请求过于频繁
+        self.RISK_CONTROL_CODES = (-412, -352, -509)
+        self._wbi_sign: Optional[BilibiliSign] = None
+        self._wbi_sign_expire_at = 0.0
+        self._wbi_refresh_task: Optional[asyncio.Task] = None
 
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+        async with self.rate_limit(url) as rate_limit_slot:
+            client = self.http_pool.get_client(self.proxies)
             response = await client.request(
                 method, url, timeout=self.timeout,
                 **kwargs
             )
-        data: Dict = response.json()
-        if data.get("code") != 0:
-            raise DataFetchError(data.get("message", "unkonw error"))
-        else:
-            return data.get("data", {})
+            rate_limit_slot.observe_status(response.status_code)
+            data: Dict = response.json()
+            if data.get("code") == self.WBI_SIGN_ERROR_CODE:
+                raise WbiSignError(data.get("message", "wbi sign error"))
+            if data.get("code") in self.RISK_CONTROL_CODES:
+                rate_limit_slot.throttled()
+            if data.get("code") != 0:
+                raise DataFetchError(data.get("message", "unkonw error"))
+            else:
+                return data.get("data", {})
 
-    async def pre_request_data(self, req_data: Dict) -> Dict:
+    async def pre_request_data(self, req_data: Dict, force_refresh: bool = False) -> Dict:
         """
         发送请求进行请求参数签名
         需要从 localStorage 拿 wbi_img_urls 这参数，值如下：
         https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png-https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png
         :param req_data:
+        :param force_refresh: 是否强制重新获取 wbi key
         :return:
         """
         if not req_data:
             return {}
+        wbi_sign = await self.get_wbi_sign(force_refresh)
+        return wbi_sign.sign(req_data)
+
+    async def get_wbi_sign(self, force_refresh: bool = False) -> BilibiliSign:
+        """
+        获取缓存的 wbi 签名器，缓存过期或者签名失败时才重新获取 img_key 和 sub_key
+        :param force_refresh: 是否强制刷新
+        :return:
+        """
+        if force_refresh:
+            self._wbi_sign_expire_at = 0.0
+        if self._wbi_sign is not None and time.monotonic() < self._wbi_sign_expire_at:
+            return self._wbi_sign
+        # 并发请求同时发现缓存过期时只刷新一次
+        if self._wbi_refresh_task is None or self._wbi_refresh_task.done():
+            self._wbi_refresh_task = asyncio.create_task(self._refresh_wbi_sign())
+        return await asyncio.shield(self._wbi_refresh_task)
+
+    async def _refresh_wbi_sign(self) -> BilibiliSign:
         img_key, sub_key = await self.get_wbi_keys()
-        return BilibiliSign(img_key, sub_key).sign(req_data)
+        self._wbi_sign = BilibiliSign(img_key, sub_key)
+        self._wbi_sign_expire_at = time.monotonic() + config.BILI_WBI_KEY_CACHE_TTL_SEC
+        utils.logger.info(f"[BilibiliClient._refresh_wbi_sign] refresh wbi keys, img_key: {img_key}, sub_key: {sub_key}")
+        return self._wbi_sign
 
     async def get_wbi_keys(self) -> Tuple[str, str]:
         """
         获取最新的 img_key 和 sub_key
         :return:
         """
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
-        wbi_img_urls = local_storage.get("wbi_img_urls", "") or local_storage.get(
-            "wbi_img_url") + "-" + local_storage.get("wbi_sub_url")
+        # 只读取需要的几个 key，不序列化整个 localStorage
+        wbi_storage: Dict = await self.playwright_page.evaluate(
+            "() => ({"
+            "img_urls: window.localStorage.getItem('wbi_img_urls'), "
+            "img_url: window.localStorage.getItem('wbi_img_url'), "
+            "sub_url: window.localStorage.getItem('wbi_sub_url')"
+            "})"
+        )
+        wbi_img_urls = wbi_storage.get("img_urls") or ""
+        if not wbi_img_urls and wbi_storage.get("img_url") and wbi_storage.get("sub_url"):
+            wbi_img_urls = wbi_storage["img_url"] + "-" + wbi_storage["sub_url"]
         if wbi_img_urls and "-" in wbi_img_urls:
             img_url, sub_url = wbi_img_urls.split("-")
         else:
@@ -91,16 +140,30 @@ class BilibiliClient(AbstractApiClient):
         return img_key, sub_key
 
     async def get(self, uri: str, params=None, enable_params_sign: bool = True) -> Dict:
+        if not enable_params_sign:
+            return await self._get(uri, params)
+        try:
+            return await self._get(uri, await self.pre_request_data(dict(params or {})))
+        except WbiSignError:
+            # wbi key 已经轮换，刷新后重试一次
+            utils.logger.warning(f"[BilibiliClient.get] wbi sign expired, refresh wbi keys and retry, uri: {uri}")
+            return await self._get(uri, await self.pre_request_data(dict(params or {}), force_refresh=True))
+
+    async def _get(self, uri: str, params=None) -> Dict:
         final_uri = uri
-        if enable_params_sign:
-            params = await self.pre_request_data(params)
         if isinstance(params, dict):
             final_uri = (f"{uri}?"
                          f"{urlencode(params)}")
         return await self.request(method="GET", url=f"{self._host}{final_uri}", headers=self.headers)
 
     async def post(self, uri: str, data: dict) -> Dict:
-        data = await self.pre_request_data(data)
+        try:
+            return await self._post(uri, await self.pre_request_data(dict(data)))
+        except WbiSignError:
+            utils.logger.warning(f"[BilibiliClient.post] wbi sign expired, refresh wbi keys and retry, uri: {uri}")
+            return await self._post(uri, await self.pre_request_data(dict(data), force_refresh=True))
+
+    async def _post(self, uri: str, data: Dict) -> Dict:
         json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
         return await self.request(method="POST", url=f"{self._host}{uri}",
                                   data=json_str, headers=self.headers)
@@ -193,13 +256,22 @@ class BilibiliClient(AbstractApiClient):
         return await self.get(uri, params, enable_params_sign=True)
 
     async def get_video_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(f"[BilibiliClient.get_video_media] request {url} err, res:{response.text}")
-                return None
-            else:
-                return response.content
+        client = self.http_pool.get_client(self.proxies)
+        response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
+        if not response.reason_phrase == "OK":
+            utils.logger.error(f"[BilibiliClient.get_video_media] request {url} err, res:{response.text}")
+            return None
+        else:
+            return response.content
+
+    async def download_video_media(self, url: str, save_file_name: str) -> None:
+        """
+        把视频加入下载队列，下载时流式写入文件，不整体读入内存
+        :param url: 视频地址
+        :param save_file_name: 保存路径
+        :return:
+        """
+        await get_media_downloader().submit(url, save_file_name, headers=self.headers, proxies=self.proxies)
 
     async def get_video_comments(self,
                                  video_id: str,
@@ -235,11 +307,21 @@ class BilibiliClient(AbstractApiClient):
 
         :return:
         """
-
+        seen_filter = get_seen_filter("comments")
+        if seen_filter.is_seen(video_id):
+            utils.logger.info(f"[BilibiliClient.get_video_all_comments] Comments of {video_id} has been crawled recently, skip")
+            return []
+        checkpoint = get_crawl_checkpoint()
+        if await checkpoint.is_done("comments", video_id):
+            utils.logger.info(f"[BilibiliClient.get_video_all_comments] Comments of video {video_id} has been crawled")
+            return []
+        # 断点续爬时从上次完成的页继续，已经爬取的评论数量计入 max_count
+        comments_checkpoint = await checkpoint.get("comments", video_id) or {}
+        crawled_count = comments_checkpoint.get("count", 0)
         result = []
         is_end = False
-        next_page = 0
-        while not is_end and len(result) < max_count:
+        next_page = comments_checkpoint.get("next", 0)
+        while not is_end and crawled_count + len(result) < max_count:
             comments_res = await self.get_video_comments(video_id, CommentOrderType.DEFAULT, next_page)
             cursor_info: Dict = comments_res.get("cursor")
             comment_list: List[Dict] = comments_res.get("replies", [])
@@ -253,14 +335,16 @@ class BilibiliClient(AbstractApiClient):
                             await self.get_video_all_level_two_comments(
                                 video_id, comment_id, CommentOrderType.DEFAULT, 10, crawl_interval,  callback)
                         }
-            if len(result) + len(comment_list) > max_count:
-                comment_list = comment_list[:max_count - len(result)]
+            if crawled_count + len(result) + len(comment_list) > max_count:
+                comment_list = comment_list[:max_count - crawled_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(video_id, comment_list)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             if not is_fetch_sub_comments:
                 result.extend(comment_list)
-                continue
+            await checkpoint.save("comments", video_id, {"next": next_page, "count": crawled_count + len(result)})
+        await checkpoint.mark_done("comments", video_id)
+        seen_filter.add(video_id)
         return result
 
     async def get_video_all_level_two_comments(self,
@@ -289,7 +373,7 @@ class BilibiliClient(AbstractApiClient):
             comment_list: List[Dict] = result.get("replies", [])
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(video_id, comment_list)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             if (int(result["page"]["count"]) <= pn * ps):
                 break
 
@@ -433,7 +517,7 @@ class BilibiliClient(AbstractApiClient):
                 fans_list = fans_list[:max_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(creator_info, fans_list)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             if not fans_list:
                 break
             result.extend(fans_list)
@@ -463,7 +547,7 @@ class BilibiliClient(AbstractApiClient):
                 followings_list = followings_list[:max_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(creator_info, followings_list)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             if not followings_list:
                 break
             result.extend(followings_list)
@@ -494,6 +578,6 @@ class BilibiliClient(AbstractApiClient):
                 dynamics_list = dynamics_list[:max_count - len(result)]
             if callback:
                 await callback(creator_info, dynamics_list)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             result.extend(dynamics_list)
         return result
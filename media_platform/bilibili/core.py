@@ -26,15 +26,19 @@ from playwright.async_api import (BrowserContext, BrowserType, Page, async_playw
 
 import config
 from base.base_crawler import AbstractCrawler
-from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
+from proxy.proxy_ip_pool import IpInfoModel, close_ip_pool, create_ip_pool
 from store import bilibili as bilibili_store
 from tools import utils
+from tools.crawl_checkpoint import get_crawl_checkpoint
+from tools.seen_filter import get_seen_filter
+from tools.rate_limiter import crawl_sleep
 from var import crawler_type_var, source_keyword_var
 from task_manager.task_config import TaskConfig, SearchTaskConfig, CreatorTaskConfig, DetailTaskConfig
 
 from .client import BilibiliClient
 from .exception import DataFetchError
 from .field import SearchOrderType
+from .help import bvid_to_aid
 from .login import BilibiliLogin
 
 
@@ -49,7 +53,7 @@ class BilibiliCrawler(AbstractCrawler):
         self.user_agent = utils.get_user_agent()
 
     async def start(self):
-        playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, playwright_proxy_format, httpx_proxy_format = None, None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
@@ -70,49 +74,56 @@ class BilibiliCrawler(AbstractCrawler):
             self.context_page = await self.browser_context.new_page()
             await self.context_page.goto(self.index_url)
 
-            # 如果有任务配置，应用到全局配置
+            # 如果有任务配置，应用到当前任务的配置上下文
             if self.task_config:
-                self._apply_task_config_to_global()
+                self._apply_task_config()
 
             # Create a client to interact with the bilibili website.
             self.bili_client = await self.create_bilibili_client(httpx_proxy_format)
-            if not await self.bili_client.pong():
-                # 优先使用任务配置中的登录信息
-                login_type = self.task_config.login_type if self.task_config else config.LOGIN_TYPE
-                cookies = self.task_config.cookies if self.task_config else config.COOKIES
-                
-                login_obj = BilibiliLogin(
-                    login_type=login_type,
-                    login_phone="",  # your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=cookies
-                )
-                await login_obj.begin()
-                await self.bili_client.update_cookies(browser_context=self.browser_context)
-
-            # 设置爬虫类型
-            crawler_type = self.task_config.task_type if self.task_config else config.CRAWLER_TYPE
-            crawler_type_var.set(crawler_type)
-            if crawler_type == "search":
-                # Search for video and retrieve their comment information.
-                await self.search()
-            elif crawler_type == "detail":
-                # Get the information and comments of the specified post
-                # 使用任务配置中的帖子ID列表或全局配置
-                post_ids = self.task_config.post_ids if isinstance(self.task_config, DetailTaskConfig) else config.BILI_SPECIFIED_ID_LIST
-                await self.get_specified_videos(post_ids)
-            elif crawler_type == "creator":
-                # 使用任务配置中的创作者ID列表或全局配置
-                creator_ids = self.task_config.creator_ids if isinstance(self.task_config, CreatorTaskConfig) else config.BILI_CREATOR_ID_LIST
-                
-                if config.CREATOR_MODE:
-                    for creator_id in creator_ids:
-                        await self.get_creator_videos(int(creator_id))
+            try:
+                # 代理被封时从代理池换一个代理
+                self.bili_client.ip_pool = ip_proxy_pool
+                if not await self.bili_client.pong():
+                    # 优先使用任务配置中的登录信息
+                    login_type = self.task_config.login_type if self.task_config else config.LOGIN_TYPE
+                    cookies = self.task_config.cookies if self.task_config else config.COOKIES
+
+                    login_obj = BilibiliLogin(
+                        login_type=login_type,
+                        login_phone="",  # your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=cookies
+                    )
+                    await login_obj.begin()
+                    await self.bili_client.update_cookies(browser_context=self.browser_context)
+
+                # 设置爬虫类型
+                crawler_type = self.task_config.task_type if self.task_config else config.CRAWLER_TYPE
+                crawler_type_var.set(crawler_type)
+                if crawler_type == "search":
+                    # Search for video and retrieve their comment information.
+                    await self.search()
+                elif crawler_type == "detail":
+                    # Get the information and comments of the specified post
+                    # 使用任务配置中的帖子ID列表或全局配置
+                    post_ids = self.task_config.post_ids if isinstance(self.task_config, DetailTaskConfig) else config.BILI_SPECIFIED_ID_LIST
+                    await self.get_specified_videos(post_ids)
+                elif crawler_type == "creator":
+                    # 使用任务配置中的创作者ID列表或全局配置
+                    creator_ids = self.task_config.creator_ids if isinstance(self.task_config, CreatorTaskConfig) else config.BILI_CREATOR_ID_LIST
+
+                    if config.CREATOR_MODE:
+                        for creator_id in creator_ids:
+                            await self.get_creator_videos(int(creator_id))
+                    else:
+                        await self.get_all_creator_details(creator_ids)
                 else:
-                    await self.get_all_creator_details(creator_ids)
-            else:
-                pass
+                    pass
+            finally:
+                # 爬取异常退出时也要关闭客户端和代理池，释放连接池，停止代理池的后台任务
+                await self.bili_client.close()
+                await close_ip_pool(ip_proxy_pool)
             utils.logger.info(
                 "[BilibiliCrawler.start] Bilibili Crawler finished ...")
 
@@ -152,8 +163,9 @@ class BilibiliCrawler(AbstractCrawler):
         :return:
         """
         utils.logger.info("[BilibiliCrawler.search] Begin search bilibili keywords")
+        bili_limit_count = 20  # bilibili limit page fixed value
         start_page = config.START_PAGE  # start page number
-        pubtime_begin_s, pubtime_end_s = self.get_pubtime_datetime()
+        pubtime_begin_s, pubtime_end_s = await self.get_pubtime_datetime()
         
         # 使用任务配置或全局配置的搜索类型
         search_type = ""
@@ -180,13 +192,14 @@ class BilibiliCrawler(AbstractCrawler):
         else:
             search_order_type = SearchOrderType.DEFAULT
         
-        for keyword in config.KEYWORDS.split(","):
+        for keyword in config.get_config("KEYWORDS").split(","):
             source_keyword_var.set(keyword)
             utils.logger.info(f"[BilibiliCrawler.search] Current search keyword: {keyword}")
+            checkpoint = get_crawl_checkpoint()
             # 每个关键词最多返回 1000 条数据
             if not config.ALL_DAY:
-                page = 1
-                while (page - start_page + 1) * 20 <= config.CRAWLER_MAX_NOTES_COUNT:
+                page = (await checkpoint.get("search", keyword) or {}).get("page", 1)
+                while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                     if page < start_page:
                         utils.logger.info(f"[BilibiliCrawler.search] Skip page: {page}")
                         page += 1
@@ -211,20 +224,28 @@ class BilibiliCrawler(AbstractCrawler):
                     except Exception as e:
                         utils.logger.warning(f"[BilibiliCrawler.search] error in the task list. The video for this page will not be included. {e}")
                     video_items = await asyncio.gather(*task_list)
-                    for video_item in video_items:
+                    seen_filter = get_seen_filter("note")
+                    for search_item, video_item in zip(video_list, video_items):
                         if video_item:
                             video_id_list.append(video_item.get("View").get("aid"))
                             await bilibili_store.update_bilibili_video(video_item)
                             await bilibili_store.update_up_info(video_item)
                             await self.get_bilibili_video(video_item, semaphore)
+                        elif seen_filter.contains(str(search_item.get("aid"))):
+                            # 跳过了最近爬取过的视频详情，评论是否需要刷新由评论的过滤器决定
+                            video_id_list.append(search_item.get("aid"))
                     page += 1
                     await self.batch_get_video_comments(video_id_list)
+                    await checkpoint.save("search", keyword, {"page": page})
             # 按照 START_DAY 至 END_DAY 按照每一天进行筛选，这样能够突破 1000 条视频的限制，最大程度爬取该关键词下每一天的所有视频
             else:
                 for day in pd.date_range(start=config.START_DAY, end=config.END_DAY, freq='D'):
+                    checkpoint_key = f"{keyword}:{day.strftime('%Y-%m-%d')}"
+                    if await checkpoint.is_done("search", checkpoint_key):
+                        continue
                     # 按照每一天进行爬取的时间戳参数
                     pubtime_begin_s, pubtime_end_s = await self.get_pubtime_datetime(start=day.strftime('%Y-%m-%d'), end=day.strftime('%Y-%m-%d'))
-                    page = 1
+                    page = (await checkpoint.get("search", checkpoint_key) or {}).get("page", 1)
                     #!该段 while 语句在发生异常时（通常情况下为当天数据为空时）会自动跳转到下一天，以实现最大程度爬取该关键词下当天的所有视频
                     #!除了仅保留现在原有的 try, except Exception 语句外，不要再添加其他的异常处理！！！否则将使该段代码失效，使其仅能爬取当天一天数据而无法跳转到下一天
                     #!除非将该段代码的逻辑进行重构以实现相同的功能，否则不要进行修改！！！
@@ -252,18 +273,24 @@ class BilibiliCrawler(AbstractCrawler):
                             semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
                             task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
                             video_items = await asyncio.gather(*task_list)
-                            for video_item in video_items:
+                            seen_filter = get_seen_filter("note")
+                            for search_item, video_item in zip(video_list, video_items):
                                 if video_item:
                                     video_id_list.append(video_item.get("View").get("aid"))
                                     await bilibili_store.update_bilibili_video(video_item)
                                     await bilibili_store.update_up_info(video_item)
                                     await self.get_bilibili_video(video_item, semaphore)
+                                elif seen_filter.contains(str(search_item.get("aid"))):
+                                    # 跳过了最近爬取过的视频详情，评论是否需要刷新由评论的过滤器决定
+                                    video_id_list.append(search_item.get("aid"))
                             page += 1
                             await self.batch_get_video_comments(video_id_list)
+                            await checkpoint.save("search", checkpoint_key, {"page": page})
                         # go to next day
                         except Exception as e:
                             print(e)
                             break
+                    await checkpoint.mark_done("search", checkpoint_key)
 
     async def batch_get_video_comments(self, video_id_list: List[str]):
         """
@@ -271,7 +298,7 @@ class BilibiliCrawler(AbstractCrawler):
         :param video_id_list:
         :return:
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not config.get_config("ENABLE_GET_COMMENTS"):
             utils.logger.info(
                 f"[BilibiliCrawler.batch_get_note_comments] Crawling comment mode is not enabled")
             return
@@ -300,7 +327,7 @@ class BilibiliCrawler(AbstractCrawler):
                 await self.bili_client.get_video_all_comments(
                     video_id=video_id,
                     crawl_interval=random.random(),
-                    is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
+                    is_fetch_sub_comments=config.get_config("ENABLE_GET_SUB_COMMENTS"),
                     callback=bilibili_store.batch_update_bilibili_video_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
                 )
@@ -326,7 +353,7 @@ class BilibiliCrawler(AbstractCrawler):
                 video_bvids_list.append(video["bvid"])
             if (int(result["page"]["count"]) <= pn * ps):
                 break
-            await asyncio.sleep(random.random())
+            await crawl_sleep(random.random())
             pn += 1
         await self.get_specified_videos(video_bvids_list)
 
@@ -342,7 +369,8 @@ class BilibiliCrawler(AbstractCrawler):
         ]
         video_details = await asyncio.gather(*task_list)
         video_aids_list = []
-        for video_detail in video_details:
+        seen_filter = get_seen_filter("note")
+        for bvid, video_detail in zip(bvids_list, video_details):
             if video_detail is not None:
                 video_item_view: Dict = video_detail.get("View")
                 video_aid: str = video_item_view.get("aid")
@@ -351,6 +379,9 @@ class BilibiliCrawler(AbstractCrawler):
                 await bilibili_store.update_bilibili_video(video_detail)
                 await bilibili_store.update_up_info(video_detail)
                 await self.get_bilibili_video(video_detail, semaphore)
+            elif seen_filter.contains(str(bvid_to_aid(bvid))):
+                # 跳过了最近爬取过的视频详情，评论是否需要刷新由评论的过滤器决定，评论接口使用 aid
+                video_aids_list.append(bvid_to_aid(bvid))
         await self.batch_get_video_comments(video_aids_list)
 
     async def get_video_info_task(self, aid: int, bvid: str, semaphore: asyncio.Semaphore) -> Optional[Dict]:
@@ -361,9 +392,17 @@ class BilibiliCrawler(AbstractCrawler):
         :param semaphore:
         :return:
         """
+        # 搜索拿到的是 aid，指定视频是 bvid，统一用 aid 去重
+        video_id = str(aid or bvid_to_aid(bvid))
+        seen_filter = get_seen_filter("note")
+        if seen_filter.is_seen(video_id):
+            utils.logger.info(f"[BilibiliCrawler.get_video_info_task] {video_id} has been crawled recently, skip")
+            return None
         async with semaphore:
             try:
                 result = await self.bili_client.get_video_info(aid=aid, bvid=bvid)
+                if result:
+                    seen_filter.add(video_id)
                 return result
             except DataFetchError as ex:
                 utils.logger.error(
@@ -456,7 +495,7 @@ class BilibiliCrawler(AbstractCrawler):
             # feat issue #14
             # we will save login state to avoid login every time
             user_data_dir = os.path.join(os.getcwd(), "browser_data",
-                                         config.USER_DATA_DIR % config.PLATFORM)  # type: ignore
+                                         config.USER_DATA_DIR % config.get_config("PLATFORM"))  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 accept_downloads=True,
@@ -504,11 +543,9 @@ class BilibiliCrawler(AbstractCrawler):
             utils.logger.info("[BilibiliCrawler.get_bilibili_video] get video url failed")
             return
 
-        content = await self.bili_client.get_video_media(video_url)
-        if content is None:
-            return
         extension_file_name = f"video.mp4"
-        await bilibili_store.store_video(aid, content, extension_file_name)
+        save_file_name = bilibili_store.get_bilibili_video_file_name(aid, extension_file_name)
+        await self.bili_client.download_video_media(video_url, save_file_name)
 
     async def get_all_creator_details(self, creator_id_list: List[int]):
         """
@@ -603,31 +640,35 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.error(
                     f"[BilibiliCrawler.get_followings] may be been blocked, err:{e}")
 
-    def _apply_task_config_to_global(self) -> None:
-        """将任务配置应用到全局变量"""
+    def _apply_task_config(self) -> None:
+        """将任务配置应用到当前任务的配置上下文，不修改全局配置"""
         if not self.task_config:
             return
             
         # 设置通用配置
-        config.PLATFORM = self.task_config.platform
-        config.CRAWLER_TYPE = self.task_config.task_type
-        config.LOGIN_TYPE = self.task_config.login_type
-        config.COOKIES = self.task_config.cookies
-        config.SAVE_DATA_OPTION = self.task_config.save_data_option
-        config.ENABLE_GET_COMMENTS = self.task_config.enable_get_comments
-        config.ENABLE_GET_SUB_COMMENTS = self.task_config.enable_get_sub_comments
+        overrides = {
+            "PLATFORM": self.task_config.platform,
+            "CRAWLER_TYPE": self.task_config.task_type,
+            "LOGIN_TYPE": self.task_config.login_type,
+            "COOKIES": self.task_config.cookies,
+            "SAVE_DATA_OPTION": self.task_config.save_data_option,
+            "ENABLE_GET_COMMENTS": self.task_config.enable_get_comments,
+            "ENABLE_GET_SUB_COMMENTS": self.task_config.enable_get_sub_comments,
+        }
         
         # 根据任务类型设置特定配置
         if isinstance(self.task_config, SearchTaskConfig):
-            config.KEYWORDS = self.task_config.keywords_str
+            overrides["KEYWORDS"] = self.task_config.keywords_str
             if hasattr(self.task_config, 'search_type'):
-                config.SEARCH_TYPE = self.task_config.search_type
+                overrides["SEARCH_TYPE"] = self.task_config.search_type
             
         elif isinstance(self.task_config, CreatorTaskConfig):
-            config.BILI_CREATOR_ID_LIST = self.task_config.creator_ids
+            overrides["BILI_CREATOR_ID_LIST"] = self.task_config.creator_ids
             
         elif isinstance(self.task_config, DetailTaskConfig):
-            config.BILI_SPECIFIED_ID_LIST = self.task_config.post_ids
+            overrides["BILI_SPECIFIED_ID_LIST"] = self.task_config.post_ids
+
+        config.apply_task_config(overrides)
     
     async def get_dynamics(self, creator_info: Dict, semaphore: asyncio.Semaphore):
         """
@@ -23,3 +23,7 @@ class DataFetchError(RequestError):
 
 class IPBlockError(RequestError):
     """fetch so fast that the server block us ip"""
+
+
+class WbiSignError(DataFetchError):
+    """wbi sign expired or invalid, need refresh img_key and sub_key"""
@@ -21,27 +21,38 @@ from typing import Dict
 from tools import utils
 
 
+MIXIN_KEY_ENC_TAB = [
+    46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+    33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+    61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+    36, 20, 34, 44, 52
+]
+
+# 过滤 value 中的 "!'()*" 字符
+_FILTER_CHARS_TABLE = str.maketrans("", "", "!'()*")
+
+# bvid 与 aid 互转使用的常量
+# 参考：https://socialsisteryi.github.io/bilibili-API-collect/docs/misc/bvid_desc.html
+BVID_XOR_CODE = 23442827791579
+BVID_MASK_CODE = (1 << 51) - 1
+BVID_ALPHABET = "FcwAPNKTMug3GV5Lj7EJnHpWsx4tb8haYeviqBz6rkCy12mUSDQX9RdoZf"
+
+
 class BilibiliSign:
     def __init__(self, img_key: str, sub_key: str):
         self.img_key = img_key
         self.sub_key = sub_key
-        self.map_table = [
-            46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
-            33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
-            61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
-            36, 20, 34, 44, 52
-        ]
+        self.map_table = MIXIN_KEY_ENC_TAB
+        # img_key、sub_key 不变时 salt 也不变，只在创建时计算一次
+        self.salt = self.get_salt()
 
     def get_salt(self) -> str:
         """
         获取加盐的 key
         :return:
         """
-        salt = ""
         mixin_key = self.img_key + self.sub_key
-        for mt in self.map_table:
-            salt += mixin_key[mt]
-        return salt[:32]
+        return "".join(mixin_key[mt] for mt in self.map_table)[:32]
 
     def sign(self, req_data: Dict) -> Dict:
         """
@@ -52,20 +63,32 @@ class BilibiliSign:
         """
         current_ts = utils.get_unix_timestamp()
         req_data.update({"wts": current_ts})
-        req_data = dict(sorted(req_data.items()))
         req_data = {
-            # 过滤 value 中的 "!'()*" 字符
-            k: ''.join(filter(lambda ch: ch not in "!'()*", str(v)))
+            k: str(v).translate(_FILTER_CHARS_TABLE)
             for k, v
-            in req_data.items()
+            in sorted(req_data.items())
         }
         query = urllib.parse.urlencode(req_data)
-        salt = self.get_salt()
-        wbi_sign = md5((query + salt).encode()).hexdigest()  # 计算 w_rid
+        wbi_sign = md5((query + self.salt).encode()).hexdigest()  # 计算 w_rid
         req_data['w_rid'] = wbi_sign
         return req_data
 
 
+def bvid_to_aid(bvid: str) -> int:
+    """
+    bvid 转换为 aid，不需要请求视频详情
+    :param bvid: 例如 BV17x411w7KC
+    :return: 例如 170001
+    """
+    chars = list(bvid)
+    chars[3], chars[9] = chars[9], chars[3]
+    chars[4], chars[7] = chars[7], chars[4]
+    tmp = 0
+    for char in chars[3:]:
+        tmp = tmp * len(BVID_ALPHABET) + BVID_ALPHABET.index(char)
+    return (tmp & BVID_MASK_CODE) ^ BVID_XOR_CODE
+
+
 if __name__ == '__main__':
     _img_key = "7cd084941338484aae1ad9425b84077c"
     _sub_key = "4932caff0ff746eab6f01bf08b70ac45"
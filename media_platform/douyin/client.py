@@ -9,17 +9,20 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
 
 
-import asyncio
 import copy
 import json
 import urllib.parse
 from typing import Any, Callable, Dict, Optional
 
-import requests
+import httpx
 from playwright.async_api import BrowserContext
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_fixed
 
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.crawl_checkpoint import get_crawl_checkpoint
+from tools.seen_filter import get_seen_filter
+from tools.rate_limiter import crawl_sleep
 from var import request_keyword_var
 
 from .exception import *
@@ -28,6 +31,8 @@ from .help import *
 
 
 class DOUYINClient(AbstractApiClient):
+    rate_limit_platform = "dy"
+
     def __init__(
             self,
             timeout=30,
@@ -91,19 +96,31 @@ class DOUYINClient(AbstractApiClient):
         a_bogus = await get_a_bogus(uri, query_string, post_data, headers["User-Agent"], self.playwright_page)
         params["a_bogus"] = a_bogus
 
+    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1), retry=retry_if_exception_type(httpx.TransportError),
+           reraise=True)
     async def request(self, method, url, **kwargs):
-        response = None
-        if method == "GET":
-            response = requests.request(method, url, **kwargs)
-        elif method == "POST":
-            response = requests.request(method, url, **kwargs)
-        try:
-            if response.text == "" or response.text == "blocked":
-                utils.logger.error(f"request params incrr, response.text: {response.text}")
-                raise Exception("account blocked")
-            return response.json()
-        except Exception as e:
-            raise DataFetchError(f"{e}, {response.text}")
+        """
+        封装httpx的公共请求方法，走共享连接池，网络层异常（超时、连接失败）自动重试
+        Args:
+            method: 请求方法
+            url: 请求的URL
+            **kwargs: 其他请求参数，例如请求头、请求体等
+
+        Returns:
+
+        """
+        async with self.rate_limit(url) as rate_limit_slot:
+            client = self.http_pool.get_client(self.proxies)
+            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+            rate_limit_slot.observe_status(response.status_code)
+            try:
+                if response.text == "" or response.text == "blocked":
+                    utils.logger.error(f"request params incrr, response.text: {response.text}")
+                    rate_limit_slot.throttled()
+                    raise Exception("account blocked")
+                return response.json()
+            except Exception as e:
+                raise DataFetchError(f"{e}, {response.text}")
 
     async def get(self, uri: str, params: Optional[Dict] = None, headers: Optional[Dict] = None):
         """
@@ -241,46 +258,59 @@ class DOUYINClient(AbstractApiClient):
         :param max_count: 一次帖子爬取的最大评论数量
         :return: 评论列表
         """
+        seen_filter = get_seen_filter("comments")
+        if seen_filter.is_seen(aweme_id):
+            utils.logger.info(f"[DOUYINClient.get_aweme_all_comments] Comments of {aweme_id} has been crawled recently, skip")
+            return []
+        checkpoint = get_crawl_checkpoint()
+        if await checkpoint.is_done("comments", aweme_id):
+            utils.logger.info(f"[DOUYINClient.get_aweme_all_comments] Comments of aweme {aweme_id} has been crawled")
+            return []
+        # 断点续爬时从上次完成的游标继续，已经爬取的评论数量计入 max_count
+        comments_checkpoint = await checkpoint.get("comments", aweme_id) or {}
+        crawled_count = comments_checkpoint.get("count", 0)
         result = []
         comments_has_more = 1
-        comments_cursor = 0
-        while comments_has_more and len(result) < max_count:
+        comments_cursor = comments_checkpoint.get("cursor", 0)
+        while comments_has_more and crawled_count + len(result) < max_count:
             comments_res = await self.get_aweme_comments(aweme_id, comments_cursor)
             comments_has_more = comments_res.get("has_more", 0)
             comments_cursor = comments_res.get("cursor", 0)
             comments = comments_res.get("comments", [])
             if not comments:
                 continue
-            if len(result) + len(comments) > max_count:
-                comments = comments[:max_count - len(result)]
+            if crawled_count + len(result) + len(comments) > max_count:
+                comments = comments[:max_count - crawled_count - len(result)]
             result.extend(comments)
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(aweme_id, comments)
 
-            await asyncio.sleep(crawl_interval)
-            if not is_fetch_sub_comments:
-                continue
-            # 获取二级评论
-            for comment in comments:
-                reply_comment_total = comment.get("reply_comment_total")
-
-                if reply_comment_total > 0:
-                    comment_id = comment.get("cid")
-                    sub_comments_has_more = 1
-                    sub_comments_cursor = 0
-
-                    while sub_comments_has_more:
-                        sub_comments_res = await self.get_sub_comments(comment_id, sub_comments_cursor)
-                        sub_comments_has_more = sub_comments_res.get("has_more", 0)
-                        sub_comments_cursor = sub_comments_res.get("cursor", 0)
-                        sub_comments = sub_comments_res.get("comments", [])
-
-                        if not sub_comments:
-                            continue
-                        result.extend(sub_comments)
-                        if callback:  # 如果有回调函数，就执行回调函数
-                            await callback(aweme_id, sub_comments)
-                        await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
+            if is_fetch_sub_comments:
+                # 获取二级评论
+                for comment in comments:
+                    reply_comment_total = comment.get("reply_comment_total")
+
+                    if reply_comment_total > 0:
+                        comment_id = comment.get("cid")
+                        sub_comments_has_more = 1
+                        sub_comments_cursor = 0
+
+                        while sub_comments_has_more:
+                            sub_comments_res = await self.get_sub_comments(comment_id, sub_comments_cursor)
+                            sub_comments_has_more = sub_comments_res.get("has_more", 0)
+                            sub_comments_cursor = sub_comments_res.get("cursor", 0)
+                            sub_comments = sub_comments_res.get("comments", [])
+
+                            if not sub_comments:
+                                continue
+                            result.extend(sub_comments)
+                            if callback:  # 如果有回调函数，就执行回调函数
+                                await callback(aweme_id, sub_comments)
+                            await crawl_sleep(crawl_interval)
+            await checkpoint.save("comments", aweme_id, {"cursor": comments_cursor, "count": crawled_count + len(result)})
+        await checkpoint.mark_done("comments", aweme_id)
+        seen_filter.add(aweme_id)
         return result
 
     async def get_user_info(self, sec_user_id: str):
@@ -306,9 +336,13 @@ class DOUYINClient(AbstractApiClient):
         return await self.get(uri, params)
 
     async def get_all_user_aweme_posts(self, sec_user_id: str, callback: Optional[Callable] = None):
-        posts_has_more = 1
-        max_cursor = ""
-        result = []
+        # 断点续爬时从上次完成的游标继续，之前已经处理过的作品只保留 aweme_id，调用方用来继续获取评论
+        checkpoint = get_crawl_checkpoint()
+        posts_checkpoint = await checkpoint.get("creator_posts", sec_user_id) or {}
+        posts_has_more = posts_checkpoint.get("has_more", 1)
+        max_cursor = posts_checkpoint.get("max_cursor", "")
+        crawled_aweme_ids = posts_checkpoint.get("aweme_ids", [])
+        result = [{"aweme_id": aweme_id} for aweme_id in crawled_aweme_ids]
         while posts_has_more == 1:
             aweme_post_res = await self.get_user_aweme_posts(sec_user_id, max_cursor)
             posts_has_more = aweme_post_res.get("has_more", 0)
@@ -319,4 +353,7 @@ class DOUYINClient(AbstractApiClient):
             if callback:
                 await callback(aweme_list)
             result.extend(aweme_list)
+            crawled_aweme_ids.extend(aweme.get("aweme_id") for aweme in aweme_list)
+            await checkpoint.save("creator_posts", sec_user_id, {"has_more": posts_has_more, "max_cursor": max_cursor,
+                                                                 "aweme_ids": crawled_aweme_ids})
         return result
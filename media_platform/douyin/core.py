@@ -20,9 +20,11 @@ from playwright.async_api import (BrowserContext, BrowserType, Page,
 
 import config
 from base.base_crawler import AbstractCrawler
-from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
+from proxy.proxy_ip_pool import IpInfoModel, close_ip_pool, create_ip_pool
 from store import douyin as douyin_store
 from tools import utils
+from tools.crawl_checkpoint import get_crawl_checkpoint
+from tools.seen_filter import get_seen_filter
 from var import crawler_type_var, source_keyword_var
 from task_manager.task_config import TaskConfig, SearchTaskConfig, CreatorTaskConfig, DetailTaskConfig
 
@@ -42,7 +44,7 @@ class DouYinCrawler(AbstractCrawler):
         self.index_url = "https://www.douyin.com"
 
     async def start(self) -> None:
-        playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, playwright_proxy_format, httpx_proxy_format = None, None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
@@ -62,39 +64,45 @@ class DouYinCrawler(AbstractCrawler):
             self.context_page = await self.browser_context.new_page()
             await self.context_page.goto(self.index_url)
 
-            # 如果有任务配置，应用到全局配置
+            # 如果有任务配置，应用到当前任务的配置上下文
             if self.task_config:
-                self._apply_task_config_to_global()
+                self._apply_task_config()
                 
             self.dy_client = await self.create_douyin_client(httpx_proxy_format)
-            if not await self.dy_client.pong(browser_context=self.browser_context):
-                login_type = self.task_config.login_type if self.task_config else config.LOGIN_TYPE
-                cookies = self.task_config.cookies if self.task_config else config.COOKIES
-                
-                login_obj = DouYinLogin(
-                    login_type=login_type,
-                    login_phone="",  # you phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=cookies
-                )
-                await login_obj.begin()
-                await self.dy_client.update_cookies(browser_context=self.browser_context)
-                
-            # 设置爬虫类型
-            crawler_type = self.task_config.task_type if self.task_config else config.CRAWLER_TYPE
-            crawler_type_var.set(crawler_type)
-            
-            if crawler_type == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif crawler_type == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_awemes()
-            elif crawler_type == "creator":
-                # Get the information and comments of the specified creator
-                await self.get_creators_and_videos()
+            try:
+                # 代理被封时从代理池换一个代理
+                self.dy_client.ip_pool = ip_proxy_pool
+                if not await self.dy_client.pong(browser_context=self.browser_context):
+                    login_type = self.task_config.login_type if self.task_config else config.LOGIN_TYPE
+                    cookies = self.task_config.cookies if self.task_config else config.COOKIES
 
+                    login_obj = DouYinLogin(
+                        login_type=login_type,
+                        login_phone="",  # you phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=cookies
+                    )
+                    await login_obj.begin()
+                    await self.dy_client.update_cookies(browser_context=self.browser_context)
+
+                # 设置爬虫类型
+                crawler_type = self.task_config.task_type if self.task_config else config.CRAWLER_TYPE
+                crawler_type_var.set(crawler_type)
+
+                if crawler_type == "search":
+                    # Search for notes and retrieve their comment information.
+                    await self.search()
+                elif crawler_type == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_awemes()
+                elif crawler_type == "creator":
+                    # Get the information and comments of the specified creator
+                    await self.get_creators_and_videos()
+            finally:
+                # 爬取异常退出时也要关闭客户端和代理池，释放连接池，停止代理池的后台任务
+                await self.dy_client.close()
+                await close_ip_pool(ip_proxy_pool)
             utils.logger.info("[DouYinCrawler.start] Douyin Crawler finished ...")
 
     async def search(self) -> None:
@@ -112,6 +120,13 @@ class DouYinCrawler(AbstractCrawler):
             aweme_list: List[str] = []
             page = 0
             dy_search_id = ""
+            # 断点续爬时从上次完成的页继续，之前搜索到的视频ID用于后面获取评论
+            checkpoint = get_crawl_checkpoint()
+            search_checkpoint = await checkpoint.get("search", keyword)
+            if search_checkpoint:
+                page, dy_search_id = search_checkpoint["page"], search_checkpoint["search_id"]
+                aweme_list = search_checkpoint["aweme_ids"]
+                utils.logger.info(f"[DouYinCrawler.search] Resume keyword {keyword} from page {page}")
             while (page - start_page + 1) * dy_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
                     utils.logger.info(f"[DouYinCrawler.search] Skip {page}")
@@ -145,6 +160,8 @@ class DouYinCrawler(AbstractCrawler):
                         continue
                     aweme_list.append(aweme_info.get("aweme_id", ""))
                     await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
+                await checkpoint.save("search", keyword, {"page": page, "search_id": dy_search_id,
+                                                          "aweme_ids": aweme_list})
             utils.logger.info(f"[DouYinCrawler.search] keyword:{keyword}, aweme_list:{aweme_list}")
             await self.batch_get_note_comments(aweme_list)
 
@@ -167,9 +184,16 @@ class DouYinCrawler(AbstractCrawler):
 
     async def get_aweme_detail(self, aweme_id: str, semaphore: asyncio.Semaphore) -> Any:
         """Get note detail"""
+        seen_filter = get_seen_filter("note")
+        if seen_filter.is_seen(aweme_id):
+            utils.logger.info(f"[DouYinCrawler.get_aweme_detail] {aweme_id} has been crawled recently, skip")
+            return None
         async with semaphore:
             try:
-                return await self.dy_client.get_video_by_id(aweme_id)
+                aweme_detail = await self.dy_client.get_video_by_id(aweme_id)
+                if aweme_detail:
+                    seen_filter.add(aweme_id)
+                return aweme_detail
             except DataFetchError as ex:
                 utils.logger.error(f"[DouYinCrawler.get_aweme_detail] Get aweme detail error: {ex}")
                 return None
@@ -182,7 +206,7 @@ class DouYinCrawler(AbstractCrawler):
         """
         Batch get note comments
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not config.get_config("ENABLE_GET_COMMENTS"):
             utils.logger.info(f"[DouYinCrawler.batch_get_note_comments] Crawling comment mode is not enabled")
             return
 
@@ -202,7 +226,7 @@ class DouYinCrawler(AbstractCrawler):
                 await self.dy_client.get_aweme_all_comments(
                     aweme_id=aweme_id,
                     crawl_interval=random.random(),
-                    is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
+                    is_fetch_sub_comments=config.get_config("ENABLE_GET_SUB_COMMENTS"),
                     callback=douyin_store.batch_update_dy_aweme_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
                 )
@@ -289,7 +313,7 @@ class DouYinCrawler(AbstractCrawler):
         """Launch browser and create browser context"""
         if config.SAVE_LOGIN_STATE:
             user_data_dir = os.path.join(os.getcwd(), "browser_data",
-                                         config.USER_DATA_DIR % config.PLATFORM)  # type: ignore
+                                         config.USER_DATA_DIR % config.get_config("PLATFORM"))  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 accept_downloads=True,
@@ -307,29 +331,33 @@ class DouYinCrawler(AbstractCrawler):
             )
             return browser_context
 
-    def _apply_task_config_to_global(self) -> None:
-        """将任务配置应用到全局变量"""
+    def _apply_task_config(self) -> None:
+        """将任务配置应用到当前任务的配置上下文，不修改全局配置"""
         if not self.task_config:
             return
             
         # 设置通用配置
-        config.PLATFORM = self.task_config.platform
-        config.CRAWLER_TYPE = self.task_config.task_type
-        config.LOGIN_TYPE = self.task_config.login_type
-        config.COOKIES = self.task_config.cookies
-        config.SAVE_DATA_OPTION = self.task_config.save_data_option
-        config.ENABLE_GET_COMMENTS = self.task_config.enable_get_comments
-        config.ENABLE_GET_SUB_COMMENTS = self.task_config.enable_get_sub_comments
+        overrides = {
+            "PLATFORM": self.task_config.platform,
+            "CRAWLER_TYPE": self.task_config.task_type,
+            "LOGIN_TYPE": self.task_config.login_type,
+            "COOKIES": self.task_config.cookies,
+            "SAVE_DATA_OPTION": self.task_config.save_data_option,
+            "ENABLE_GET_COMMENTS": self.task_config.enable_get_comments,
+            "ENABLE_GET_SUB_COMMENTS": self.task_config.enable_get_sub_comments,
+        }
         
         # 根据任务类型设置特定配置
         if isinstance(self.task_config, SearchTaskConfig):
-            config.KEYWORDS = self.task_config.keywords_str
+            overrides["KEYWORDS"] = self.task_config.keywords_str
             
         elif isinstance(self.task_config, CreatorTaskConfig):
-            config.DY_CREATOR_ID_LIST = self.task_config.creator_ids
+            overrides["DY_CREATOR_ID_LIST"] = self.task_config.creator_ids
             
         elif isinstance(self.task_config, DetailTaskConfig):
-            config.DOUYIN_SPECIFIED_URL_LIST = self.task_config.post_ids
+            overrides["DOUYIN_SPECIFIED_URL_LIST"] = self.task_config.post_ids
+
+        config.apply_task_config(overrides)
     
     async def close(self) -> None:
         """Close browser context"""
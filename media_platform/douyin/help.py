@@ -20,7 +20,10 @@ import random
 import execjs
 from playwright.async_api import Page
 
+from tools.js_signer import JsSignerPool
+
 douyin_sign_obj = execjs.compile(open('libs/douyin.js', encoding='utf-8-sig').read())
+douyin_signer = JsSignerPool("libs/douyin.js", ["sign_datail", "sign_reply"])
 
 def get_web_id():
     """
@@ -47,8 +50,24 @@ def get_web_id():
 async def get_a_bogus(url: str, params: str, post_data: dict, user_agent: str, page: Page = None):
     """
     获取 a_bogus 参数, 目前不支持post请求类型的签名
+    通过常驻的 js 签名进程计算，不阻塞事件循环
     """
-    return get_a_bogus_from_js(url, params, user_agent)
+    return await douyin_signer.call(get_sign_js_name(url), params, user_agent)
+
+
+def get_sign_js_name(url: str) -> str:
+    """
+    根据请求的url选择 a_bogus 签名函数
+    Args:
+        url:
+
+    Returns:
+
+    """
+    if "/reply" in url:
+        return "sign_reply"
+    return "sign_datail"
+
 
 def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     """
@@ -61,10 +80,7 @@ def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     Returns:
 
     """
-    sign_js_name = "sign_datail"
-    if "/reply" in url:
-        sign_js_name = "sign_reply"
-    return douyin_sign_obj.call(sign_js_name, params, user_agent)
+    return douyin_sign_obj.call(get_sign_js_name(url), params, user_agent)
 
 
 
@@ -10,23 +10,26 @@
 
 
 # -*- coding: utf-8 -*-
-import asyncio
 import json
 from typing import Any, Callable, Dict, List, Optional
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.crawl_checkpoint import get_crawl_checkpoint
+from tools.seen_filter import get_seen_filter
+from tools.rate_limiter import crawl_sleep
 
 from .exception import DataFetchError
 from .graphql import KuaiShouGraphQL
 
 
 class KuaiShouClient(AbstractApiClient):
+    rate_limit_platform = "ks"
+
     def __init__(
         self,
         timeout=10,
@@ -44,14 +47,17 @@ class KuaiShouClient(AbstractApiClient):
         self.cookie_dict = cookie_dict
         self.graphql = KuaiShouGraphQL()
 
-    async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+    async def request(self, method, url, rate_limit_endpoint: str = "", **kwargs) -> Any:
+        # 所有 GraphQL 请求共用一个地址，按 operationName 区分接口类型
+        async with self.rate_limit(rate_limit_endpoint or url) as rate_limit_slot:
+            client = self.http_pool.get_client(self.proxies)
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
-        data: Dict = response.json()
-        if data.get("errors"):
-            raise DataFetchError(data.get("errors", "unkonw error"))
-        else:
-            return data.get("data", {})
+            rate_limit_slot.observe_status(response.status_code)
+            data: Dict = response.json()
+            if data.get("errors"):
+                raise DataFetchError(data.get("errors", "unkonw error"))
+            else:
+                return data.get("data", {})
 
     async def get(self, uri: str, params=None) -> Dict:
         final_uri = uri
@@ -64,7 +70,8 @@ class KuaiShouClient(AbstractApiClient):
     async def post(self, uri: str, data: dict) -> Dict:
         json_str = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
         return await self.request(
-            method="POST", url=f"{self._host}{uri}", data=json_str, headers=self.headers
+            method="POST", url=f"{self._host}{uri}", data=json_str, headers=self.headers,
+            rate_limit_endpoint=data.get("operationName", ""),
         )
 
     async def pong(self) -> bool:
@@ -192,25 +199,34 @@ class KuaiShouClient(AbstractApiClient):
         :param max_count:
         :return:
         """
-
+        seen_filter = get_seen_filter("comments")
+        if seen_filter.is_seen(photo_id):
+            utils.logger.info(f"[KuaiShouClient.get_video_all_comments] Comments of {photo_id} has been crawled recently, skip")
+            return []
+        checkpoint = get_crawl_checkpoint()
+        # 断点续爬时从上次完成的游标继续，已经爬取的评论数量计入 max_count
+        comments_checkpoint = await checkpoint.get("comments", photo_id) or {}
+        crawled_count = comments_checkpoint.get("count", 0)
         result = []
-        pcursor = ""
+        pcursor = comments_checkpoint.get("pcursor", "")
 
-        while pcursor != "no_more" and len(result) < max_count:
+        while pcursor != "no_more" and crawled_count + len(result) < max_count:
             comments_res = await self.get_video_comments(photo_id, pcursor)
             vision_commen_list = comments_res.get("visionCommentList", {})
             pcursor = vision_commen_list.get("pcursor", "")
             comments = vision_commen_list.get("rootComments", [])
-            if len(result) + len(comments) > max_count:
-                comments = comments[: max_count - len(result)]
+            if crawled_count + len(result) + len(comments) > max_count:
+                comments = comments[: max_count - crawled_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(photo_id, comments)
             result.extend(comments)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             sub_comments = await self.get_comments_all_sub_comments(
                 comments, photo_id, crawl_interval, callback
             )
             result.extend(sub_comments)
+            await checkpoint.save("comments", photo_id, {"pcursor": pcursor, "count": crawled_count + len(result)})
+        seen_filter.add(photo_id)
         return result
 
     async def get_comments_all_sub_comments(
@@ -230,7 +246,7 @@ class KuaiShouClient(AbstractApiClient):
         Returns:
 
         """
-        if not config.ENABLE_GET_SUB_COMMENTS:
+        if not config.get_config("ENABLE_GET_SUB_COMMENTS"):
             utils.logger.info(
                 f"[KuaiShouClient.get_comments_all_sub_comments] Crawling sub_comment mode is not enabled"
             )
@@ -259,7 +275,7 @@ class KuaiShouClient(AbstractApiClient):
                 comments = vision_sub_comment_list.get("subComments", {})
                 if callback:
                     await callback(photo_id, comments)
-                await asyncio.sleep(crawl_interval)
+                await crawl_sleep(crawl_interval)
                 result.extend(comments)
         return result
 
@@ -308,6 +324,6 @@ class KuaiShouClient(AbstractApiClient):
 
             if callback:
                 await callback(videos)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             result.extend(videos)
         return result
@@ -12,7 +12,6 @@
 import asyncio
 import os
 import random
-import time
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
@@ -20,9 +19,10 @@ from playwright.async_api import BrowserContext, BrowserType, Page, async_playwr
 
 import config
 from base.base_crawler import AbstractCrawler
-from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
+from proxy.proxy_ip_pool import IpInfoModel, close_ip_pool, create_ip_pool
 from store import kuaishou as kuaishou_store
 from tools import utils
+from tools.seen_filter import get_seen_filter
 from var import comment_tasks_var, crawler_type_var, source_keyword_var
 from task_manager.task_config import TaskConfig, SearchTaskConfig, CreatorTaskConfig, DetailTaskConfig
 
@@ -42,7 +42,7 @@ class KuaishouCrawler(AbstractCrawler):
         self.user_agent = utils.get_user_agent()
 
     async def start(self):
-        playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, playwright_proxy_format, httpx_proxy_format = None, None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(
                 config.IP_PROXY_POOL_COUNT, enable_validate_ip=True
@@ -63,43 +63,49 @@ class KuaishouCrawler(AbstractCrawler):
             self.context_page = await self.browser_context.new_page()
             await self.context_page.goto(f"{self.index_url}?isHome=1")
 
-            # 如果有任务配置，应用到全局配置
+            # 如果有任务配置，应用到当前任务的配置上下文
             if self.task_config:
-                self._apply_task_config_to_global()
+                self._apply_task_config()
             
             # Create a client to interact with the kuaishou website.
             self.ks_client = await self.create_ks_client(httpx_proxy_format)
-            if not await self.ks_client.pong():
-                login_type = self.task_config.login_type if self.task_config else config.LOGIN_TYPE
-                cookies = self.task_config.cookies if self.task_config else config.COOKIES
-                
-                login_obj = KuaishouLogin(
-                    login_type=login_type,
-                    login_phone=httpx_proxy_format,
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=cookies,
-                )
-                await login_obj.begin()
-                await self.ks_client.update_cookies(
-                    browser_context=self.browser_context
-                )
+            try:
+                # 代理被封时从代理池换一个代理
+                self.ks_client.ip_pool = ip_proxy_pool
+                if not await self.ks_client.pong():
+                    login_type = self.task_config.login_type if self.task_config else config.LOGIN_TYPE
+                    cookies = self.task_config.cookies if self.task_config else config.COOKIES
 
-            # 设置爬虫类型
-            crawler_type = self.task_config.task_type if self.task_config else config.CRAWLER_TYPE
-            crawler_type_var.set(crawler_type)
-            if crawler_type == "search":
-                # Search for videos and retrieve their comment information.
-                await self.search()
-            elif crawler_type == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_videos()
-            elif crawler_type == "creator":
-                # Get creator's information and their videos and comments
-                await self.get_creators_and_videos()
-            else:
-                utils.logger.error(f"Invalid crawler type {crawler_type}")
+                    login_obj = KuaishouLogin(
+                        login_type=login_type,
+                        login_phone=httpx_proxy_format,
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=cookies,
+                    )
+                    await login_obj.begin()
+                    await self.ks_client.update_cookies(
+                        browser_context=self.browser_context
+                    )
 
+                # 设置爬虫类型
+                crawler_type = self.task_config.task_type if self.task_config else config.CRAWLER_TYPE
+                crawler_type_var.set(crawler_type)
+                if crawler_type == "search":
+                    # Search for videos and retrieve their comment information.
+                    await self.search()
+                elif crawler_type == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_videos()
+                elif crawler_type == "creator":
+                    # Get creator's information and their videos and comments
+                    await self.get_creators_and_videos()
+                else:
+                    utils.logger.error(f"Invalid crawler type {crawler_type}")
+            finally:
+                # 爬取异常退出时也要关闭客户端和代理池，释放连接池，停止代理池的后台任务
+                await self.ks_client.close()
+                await close_ip_pool(ip_proxy_pool)
             utils.logger.info("[KuaishouCrawler.start] Kuaishou Crawler finished ...")
 
     async def search(self):
@@ -180,13 +186,20 @@ class KuaishouCrawler(AbstractCrawler):
         self, video_id: str, semaphore: asyncio.Semaphore
     ) -> Optional[Dict]:
         """Get video detail task"""
+        seen_filter = get_seen_filter("note")
+        if seen_filter.is_seen(video_id):
+            utils.logger.info(f"[KuaishouCrawler.get_video_info_task] {video_id} has been crawled recently, skip")
+            return None
         async with semaphore:
             try:
                 result = await self.ks_client.get_video_info(video_id)
                 utils.logger.info(
                     f"[KuaishouCrawler.get_video_info_task] Get video_id:{video_id} info result: {result} ..."
                 )
-                return result.get("visionVideoDetail")
+                video_detail = result.get("visionVideoDetail")
+                if video_detail:
+                    seen_filter.add(video_id)
+                return video_detail
             except DataFetchError as ex:
                 utils.logger.error(
                     f"[KuaishouCrawler.get_video_info_task] Get video detail error: {ex}"
@@ -204,7 +217,7 @@ class KuaishouCrawler(AbstractCrawler):
         :param video_id_list:
         :return:
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not config.get_config("ENABLE_GET_COMMENTS"):
             utils.logger.info(
                 f"[KuaishouCrawler.batch_get_video_comments] Crawling comment mode is not enabled"
             )
@@ -250,12 +263,14 @@ class KuaishouCrawler(AbstractCrawler):
                 utils.logger.error(
                     f"[KuaishouCrawler.get_comments] may be been blocked, err:{e}"
                 )
-                # use time.sleeep block main coroutine instead of asyncio.sleep and cacel running comment task
-                # maybe kuaishou block our request, we will take a nap and update the cookie again
+                # maybe kuaishou block our request, cancel the other running comment tasks,
+                # take a nap without blocking the event loop and update the cookie again
+                current_task = asyncio.current_task()
                 current_running_tasks = comment_tasks_var.get()
                 for task in current_running_tasks:
-                    task.cancel()
-                time.sleep(20)
+                    if task is not current_task:
+                        task.cancel()
+                await asyncio.sleep(20)
                 await self.context_page.goto(f"{self.index_url}?isHome=1")
                 await self.ks_client.update_cookies(
                     browser_context=self.browser_context
@@ -311,7 +326,7 @@ class KuaishouCrawler(AbstractCrawler):
         )
         if config.SAVE_LOGIN_STATE:
             user_data_dir = os.path.join(
-                os.getcwd(), "browser_data", config.USER_DATA_DIR % config.PLATFORM
+                os.getcwd(), "browser_data", config.USER_DATA_DIR % config.get_config("PLATFORM")
             )  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
@@ -371,29 +386,33 @@ class KuaishouCrawler(AbstractCrawler):
             if video_detail is not None:
                 await kuaishou_store.update_kuaishou_video(video_detail)
 
-    def _apply_task_config_to_global(self) -> None:
-        """将任务配置应用到全局变量"""
+    def _apply_task_config(self) -> None:
+        """将任务配置应用到当前任务的配置上下文，不修改全局配置"""
         if not self.task_config:
             return
             
         # 设置通用配置
-        config.PLATFORM = self.task_config.platform
-        config.CRAWLER_TYPE = self.task_config.task_type
-        config.LOGIN_TYPE = self.task_config.login_type
-        config.COOKIES = self.task_config.cookies
-        config.SAVE_DATA_OPTION = self.task_config.save_data_option
-        config.ENABLE_GET_COMMENTS = self.task_config.enable_get_comments
-        config.ENABLE_GET_SUB_COMMENTS = self.task_config.enable_get_sub_comments
+        overrides = {
+            "PLATFORM": self.task_config.platform,
+            "CRAWLER_TYPE": self.task_config.task_type,
+            "LOGIN_TYPE": self.task_config.login_type,
+            "COOKIES": self.task_config.cookies,
+            "SAVE_DATA_OPTION": self.task_config.save_data_option,
+            "ENABLE_GET_COMMENTS": self.task_config.enable_get_comments,
+            "ENABLE_GET_SUB_COMMENTS": self.task_config.enable_get_sub_comments,
+        }
         
         # 根据任务类型设置特定配置
         if isinstance(self.task_config, SearchTaskConfig):
-            config.KEYWORDS = self.task_config.keywords_str
+            overrides["KEYWORDS"] = self.task_config.keywords_str
             
         elif isinstance(self.task_config, CreatorTaskConfig):
-            config.KS_CREATOR_ID_LIST = self.task_config.creator_ids
+            overrides["KS_CREATOR_ID_LIST"] = self.task_config.creator_ids
             
         elif isinstance(self.task_config, DetailTaskConfig):
-            config.KUAISHOU_SPECIFIED_URL_LIST = self.task_config.post_ids
+            overrides["KUAISHOU_SPECIFIED_URL_LIST"] = self.task_config.post_ids
+
+        config.apply_task_config(overrides)
     
     async def close(self):
         """Close browser context"""
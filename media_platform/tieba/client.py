@@ -14,7 +14,6 @@ import json
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext
 from tenacity import RetryError, retry, stop_after_attempt, wait_fixed
 
@@ -23,12 +22,18 @@ from base.base_crawler import AbstractApiClient
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import ProxyIpPool
 from tools import utils
+from tools.crawl_checkpoint import get_crawl_checkpoint
+from tools.seen_filter import get_seen_filter
+from tools.parse_executor import run_parser
+from tools.rate_limiter import crawl_sleep
 
 from .field import SearchNoteType, SearchSortType
 from .help import TieBaExtractor
 
 
 class BaiduTieBaClient(AbstractApiClient):
+    rate_limit_platform = "tieba"
+
     def __init__(
             self,
             timeout=10,
@@ -45,6 +50,14 @@ class BaiduTieBaClient(AbstractApiClient):
         self._page_extractor = TieBaExtractor()
         self.default_ip_proxy = default_ip_proxy
 
+    @property
+    def current_proxies(self):
+        return self.default_ip_proxy
+
+    @current_proxies.setter
+    def current_proxies(self, proxies) -> None:
+        self.default_ip_proxy = proxies
+
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, return_ori_content=False, proxies=None, **kwargs) -> Union[str, Any]:
         """
@@ -60,20 +73,23 @@ class BaiduTieBaClient(AbstractApiClient):
 
         """
         actual_proxies = proxies if proxies else self.default_ip_proxy
-        async with httpx.AsyncClient(proxies=actual_proxies) as client:
+        async with self.rate_limit(url, actual_proxies) as rate_limit_slot:
+            client = self.http_pool.get_client(actual_proxies)
             response = await client.request(
                 method, url, timeout=self.timeout,
                 headers=self.headers, **kwargs
             )
+            rate_limit_slot.observe_status(response.status_code)
 
-        if response.status_code != 200:
-            utils.logger.error(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
-            utils.logger.error(f"Request failed, response: {response.text}")
-            raise Exception(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
+            if response.status_code != 200:
+                utils.logger.error(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
+                utils.logger.error(f"Request failed, response: {response.text}")
+                raise Exception(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
 
-        if response.text == "" or response.text == "blocked":
-            utils.logger.error(f"request params incrr, response.text: {response.text}")
-            raise Exception("account blocked")
+            if response.text == "" or response.text == "blocked":
+                utils.logger.error(f"request params incrr, response.text: {response.text}")
+                rate_limit_slot.throttled()
+                raise Exception("account blocked")
 
         if return_ori_content:
             return response.text
@@ -102,8 +118,8 @@ class BaiduTieBaClient(AbstractApiClient):
             return res
         except RetryError as e:
             if self.ip_pool:
-                proxie_model = await self.ip_pool.get_proxy()
-                _, proxies = utils.format_proxy_info(proxie_model)
+                # 当前代理多次请求失败，从代理池中移出并换一个代理
+                proxies = await self.ip_pool.rotate_proxy(self.default_ip_proxy)
                 res = await self.request(method="GET", url=f"{self._host}{final_uri}",
                                          return_ori_content=return_ori_content,
                                          proxies=proxies,
@@ -188,7 +204,7 @@ class BaiduTieBaClient(AbstractApiClient):
             "only_thread": note_type.value
         }
         page_content = await self.get(uri, params=params, return_ori_content=True)
-        return self._page_extractor.extract_search_note_list(page_content)
+        return await run_parser(self._page_extractor.extract_search_note_list, page_content)
 
     async def get_note_by_id(self, note_id: str) -> TiebaNote:
         """
@@ -201,7 +217,7 @@ class BaiduTieBaClient(AbstractApiClient):
         """
         uri = f"/p/{note_id}"
         page_content = await self.get(uri, return_ori_content=True)
-        return self._page_extractor.extract_note_detail(page_content)
+        return await run_parser(self._page_extractor.extract_note_detail, page_content)
 
     async def get_note_all_comments(self, note_detail: TiebaNote, crawl_interval: float = 1.0,
                                     callback: Optional[Callable] = None,
@@ -217,27 +233,38 @@ class BaiduTieBaClient(AbstractApiClient):
         Returns:
 
         """
+        seen_filter = get_seen_filter("comments")
+        if seen_filter.is_seen(note_detail.note_id):
+            utils.logger.info(f"[BaiduTieBaClient.get_note_all_comments] Comments of {note_detail.note_id} has been crawled recently, skip")
+            return []
         uri = f"/p/{note_detail.note_id}"
+        # 断点续爬时从上次完成的页继续，已经爬取的评论数量计入 max_count
+        checkpoint = get_crawl_checkpoint()
+        comments_checkpoint = await checkpoint.get("comments", note_detail.note_id) or {}
+        crawled_count = comments_checkpoint.get("count", 0)
         result: List[TiebaComment] = []
-        current_page = 1
-        while note_detail.total_replay_page >= current_page and len(result) < max_count:
+        current_page = comments_checkpoint.get("page", 1)
+        while note_detail.total_replay_page >= current_page and crawled_count + len(result) < max_count:
             params = {
                 "pn": current_page
             }
             page_content = await self.get(uri, params=params, return_ori_content=True)
-            comments = self._page_extractor.extract_tieba_note_parment_comments(page_content,
-                                                                                note_id=note_detail.note_id)
+            comments = await run_parser(self._page_extractor.extract_tieba_note_parment_comments, page_content,
+                                        note_detail.note_id)
             if not comments:
                 break
-            if len(result) + len(comments) > max_count:
-                comments = comments[:max_count - len(result)]
+            if crawled_count + len(result) + len(comments) > max_count:
+                comments = comments[:max_count - crawled_count - len(result)]
             if callback:
                 await callback(note_detail.note_id, comments)
             result.extend(comments)
             # 获取所有子评论
             await self.get_comments_all_sub_comments(comments, crawl_interval=crawl_interval, callback=callback)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             current_page += 1
+            await checkpoint.save("comments", note_detail.note_id, {"page": current_page,
+                                                                     "count": crawled_count + len(result)})
+        seen_filter.add(note_detail.note_id)
         return result
 
     async def get_comments_all_sub_comments(self, comments: List[TiebaComment], crawl_interval: float = 1.0,
@@ -253,7 +280,7 @@ class BaiduTieBaClient(AbstractApiClient):
 
         """
         uri = "/p/comment"
-        if not config.ENABLE_GET_SUB_COMMENTS:
+        if not config.get_config("ENABLE_GET_SUB_COMMENTS"):
             return []
 
         # # 贴吧获取所有子评论需要登录态
@@ -275,15 +302,15 @@ class BaiduTieBaClient(AbstractApiClient):
                     "pn": current_page  # 页码
                 }
                 page_content = await self.get(uri, params=params, return_ori_content=True)
-                sub_comments = self._page_extractor.extract_tieba_note_sub_comments(page_content,
-                                                                                    parent_comment=parment_comment)
+                sub_comments = await run_parser(self._page_extractor.extract_tieba_note_sub_comments, page_content,
+                                                parment_comment)
 
                 if not sub_comments:
                     break
                 if callback:
                     await callback(parment_comment.note_id, sub_comments)
                 all_sub_comments.extend(sub_comments)
-                await asyncio.sleep(crawl_interval)
+                await crawl_sleep(crawl_interval)
                 current_page += 1
         return all_sub_comments
 
@@ -299,7 +326,7 @@ class BaiduTieBaClient(AbstractApiClient):
         """
         uri = f"/f?kw={tieba_name}&pn={page_num}"
         page_content = await self.get(uri, return_ori_content=True)
-        return self._page_extractor.extract_tieba_note_list(page_content)
+        return await run_parser(self._page_extractor.extract_tieba_note_list, page_content)
 
     async def get_creator_info_by_url(self, creator_url: str) -> str:
         """
@@ -354,10 +381,8 @@ class BaiduTieBaClient(AbstractApiClient):
         # 百度贴吧比较特殊一些，前10个帖子是直接展示在主页上的，要单独处理，通过API获取不到
         result: List[TiebaNote] = []
         if creator_page_html_content:
-            thread_id_list = (
-                self._page_extractor.extract_tieba_thread_id_list_from_creator_page(
-                    creator_page_html_content
-                )
+            thread_id_list = await run_parser(
+                self._page_extractor.extract_tieba_thread_id_list_from_creator_page, creator_page_html_content
             )
             utils.logger.info(
                 f"[BaiduTieBaClient.get_all_notes_by_creator] got user_name:{user_name} thread_id_list len : {len(thread_id_list)}"
@@ -390,7 +415,7 @@ class BaiduTieBaClient(AbstractApiClient):
             notes = await asyncio.gather(*note_detail_task)
             if callback:
                 await callback(notes)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             result.extend(notes)
             page_number += 1
             total_get_count += page_per_count
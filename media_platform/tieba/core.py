@@ -21,10 +21,12 @@ from playwright.async_api import (BrowserContext, BrowserType, Page,
 import config
 from base.base_crawler import AbstractCrawler
 from model.m_baidu_tieba import TiebaCreator, TiebaNote
-from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
+from proxy.proxy_ip_pool import IpInfoModel, close_ip_pool, create_ip_pool
 from store import tieba as tieba_store
 from tools import utils
 from tools.crawler_util import format_proxy_info
+from tools.parse_executor import run_parser
+from tools.seen_filter import get_seen_filter, need_crawl_comments
 from var import crawler_type_var, source_keyword_var
 from task_manager.task_config import TaskConfig, SearchTaskConfig, CreatorTaskConfig, DetailTaskConfig
 
@@ -59,33 +61,36 @@ class TieBaCrawler(AbstractCrawler):
             _, httpx_proxy_format = format_proxy_info(ip_proxy_info)
             utils.logger.info(f"[BaiduTieBaCrawler.start] Init default ip proxy, value: {httpx_proxy_format}")
 
-        # 如果有任务配置，应用到全局配置
+        # 如果有任务配置，应用到当前任务的配置上下文
         if self.task_config:
-            self._apply_task_config_to_global()
+            self._apply_task_config()
             
         # Create a client to interact with the baidutieba website.
         self.tieba_client = BaiduTieBaClient(
             ip_pool=ip_proxy_pool,
             default_ip_proxy=httpx_proxy_format,
         )
-        
-        # 设置爬虫类型
-        crawler_type = self.task_config.task_type if self.task_config else config.CRAWLER_TYPE
-        crawler_type_var.set(crawler_type)
-        
-        if crawler_type == "search":
-            # Search for notes and retrieve their comment information.
-            await self.search()
-            await self.get_specified_tieba_notes()
-        elif crawler_type == "detail":
-            # Get the information and comments of the specified post
-            await self.get_specified_notes()
-        elif crawler_type == "creator":
-            # Get creator's information and their notes and comments
-            await self.get_creators_and_notes()
-        else:
-            pass
-
+        try:
+            # 设置爬虫类型
+            crawler_type = self.task_config.task_type if self.task_config else config.CRAWLER_TYPE
+            crawler_type_var.set(crawler_type)
+
+            if crawler_type == "search":
+                # Search for notes and retrieve their comment information.
+                await self.search()
+                await self.get_specified_tieba_notes()
+            elif crawler_type == "detail":
+                # Get the information and comments of the specified post
+                await self.get_specified_notes()
+            elif crawler_type == "creator":
+                # Get creator's information and their notes and comments
+                await self.get_creators_and_notes()
+            else:
+                pass
+        finally:
+            # 爬取异常退出时也要关闭客户端和代理池，释放连接池，停止代理池的后台任务
+            await self.tieba_client.close()
+            await close_ip_pool(ip_proxy_pool)
         utils.logger.info("[BaiduTieBaCrawler.start] Tieba Crawler finished ...")
 
     async def search(self) -> None:
@@ -196,6 +201,11 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
+        seen_filter = get_seen_filter("note")
+        # 贴吧评论的爬取需要帖子详情中的评论页数，评论仍需要刷新时不跳过帖子详情
+        if not need_crawl_comments(note_id) and seen_filter.is_seen(note_id):
+            utils.logger.info(f"[BaiduTieBaCrawler.get_note_detail] {note_id} has been crawled recently, skip")
+            return None
         async with semaphore:
             try:
                 utils.logger.info(f"[BaiduTieBaCrawler.get_note_detail] Begin get note detail, note_id: {note_id}")
@@ -204,6 +214,7 @@ class TieBaCrawler(AbstractCrawler):
                     utils.logger.error(
                         f"[BaiduTieBaCrawler.get_note_detail] Get note detail error, note_id: {note_id}")
                     return None
+                seen_filter.add(note_id)
                 return note_detail
             except Exception as ex:
                 utils.logger.error(f"[BaiduTieBaCrawler.get_note_detail] Get note detail error: {ex}")
@@ -222,7 +233,7 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not config.get_config("ENABLE_GET_COMMENTS"):
             return
 
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
@@ -264,7 +275,8 @@ class TieBaCrawler(AbstractCrawler):
         
         for creator_url in creator_urls:
             creator_page_html_content = await self.tieba_client.get_creator_info_by_url(creator_url=creator_url)
-            creator_info: TiebaCreator = self._page_extractor.extract_creator_info(creator_page_html_content)
+            creator_info: TiebaCreator = await run_parser(self._page_extractor.extract_creator_info,
+                                                         creator_page_html_content)
             if creator_info:
                 utils.logger.info(f"[WeiboCrawler.get_creators_and_notes] creator info: {creator_info}")
                 if not creator_info:
@@ -310,7 +322,7 @@ class TieBaCrawler(AbstractCrawler):
             # feat issue #14
             # we will save login state to avoid login every time
             user_data_dir = os.path.join(os.getcwd(), "browser_data",
-                                         config.USER_DATA_DIR % config.PLATFORM)  # type: ignore
+                                         config.USER_DATA_DIR % config.get_config("PLATFORM"))  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 accept_downloads=True,
@@ -328,29 +340,33 @@ class TieBaCrawler(AbstractCrawler):
             )
             return browser_context
 
-    def _apply_task_config_to_global(self) -> None:
-        """将任务配置应用到全局变量"""
+    def _apply_task_config(self) -> None:
+        """将任务配置应用到当前任务的配置上下文，不修改全局配置"""
         if not self.task_config:
             return
             
         # 设置通用配置
-        config.PLATFORM = self.task_config.platform
-        config.CRAWLER_TYPE = self.task_config.task_type
-        config.LOGIN_TYPE = self.task_config.login_type
-        config.COOKIES = self.task_config.cookies
-        config.SAVE_DATA_OPTION = self.task_config.save_data_option
-        config.ENABLE_GET_COMMENTS = self.task_config.enable_get_comments
-        config.ENABLE_GET_SUB_COMMENTS = self.task_config.enable_get_sub_comments
+        overrides = {
+            "PLATFORM": self.task_config.platform,
+            "CRAWLER_TYPE": self.task_config.task_type,
+            "LOGIN_TYPE": self.task_config.login_type,
+            "COOKIES": self.task_config.cookies,
+            "SAVE_DATA_OPTION": self.task_config.save_data_option,
+            "ENABLE_GET_COMMENTS": self.task_config.enable_get_comments,
+            "ENABLE_GET_SUB_COMMENTS": self.task_config.enable_get_sub_comments,
+        }
         
         # 根据任务类型设置特定配置
         if isinstance(self.task_config, SearchTaskConfig):
-            config.KEYWORDS = self.task_config.keywords_str
+            overrides["KEYWORDS"] = self.task_config.keywords_str
             
         elif isinstance(self.task_config, CreatorTaskConfig):
-            config.TIEBA_CREATOR_URL_LIST = self.task_config.creator_urls
+            overrides["TIEBA_CREATOR_URL_LIST"] = self.task_config.creator_urls
             
         elif isinstance(self.task_config, DetailTaskConfig):
-            config.TIEBA_SPECIFIED_ID_LIST = self.task_config.post_ids
+            overrides["TIEBA_SPECIFIED_ID_LIST"] = self.task_config.post_ids
+
+        config.apply_task_config(overrides)
     
     async def close(self):
         """
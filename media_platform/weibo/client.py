@@ -14,25 +14,31 @@
 # @Time    : 2023/12/23 15:40
 # @Desc    : 微博爬虫 API 请求 client
 
-import asyncio
 import copy
 import json
-import re
 from typing import Callable, Dict, List, Optional, Union
 from urllib.parse import parse_qs, unquote, urlencode
 
-import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
 
 import config
+from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.crawl_checkpoint import get_crawl_checkpoint
+from tools.seen_filter import get_seen_filter
+from tools.media_downloader import get_media_downloader
+from tools.parse_executor import run_parser
+from tools.rate_limiter import crawl_sleep
 
 from .exception import DataFetchError
 from .field import SearchType
+from .help import parse_note_detail_from_html
 
 
-class WeiboClient:
+class WeiboClient(AbstractApiClient):
+    rate_limit_platform = "wb"
+
     def __init__(
             self,
             timeout=10,
@@ -49,28 +55,34 @@ class WeiboClient:
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
         self._image_agent_host = "https://i1.wp.com/"
+        # 触发安全验证时 ok 返回 -100
+        self.VERIFY_OK_CODE = -100
 
     async def request(self, method, url, **kwargs) -> Union[Response, Dict]:
         enable_return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+        async with self.rate_limit(url) as rate_limit_slot:
+            client = self.http_pool.get_client(self.proxies)
             response = await client.request(
                 method, url, timeout=self.timeout,
                 **kwargs
             )
-
-        if enable_return_response:
-            return response
-
-        data: Dict = response.json()
-        ok_code = data.get("ok")
-        if ok_code == 0:  # response error
-            utils.logger.error(f"[WeiboClient.request] request {method}:{url} err, res:{data}")
-            raise DataFetchError(data.get("msg", "response error"))
-        elif ok_code != 1:  # unknown error
-            utils.logger.error(f"[WeiboClient.request] request {method}:{url} err, res:{data}")
-            raise DataFetchError(data.get("msg", "unknown error"))
-        else:  # response right
-            return data.get("data", {})
+            rate_limit_slot.observe_status(response.status_code)
+
+            if enable_return_response:
+                return response
+
+            data: Dict = response.json()
+            ok_code = data.get("ok")
+            if ok_code == 0:  # response error
+                utils.logger.error(f"[WeiboClient.request] request {method}:{url} err, res:{data}")
+                raise DataFetchError(data.get("msg", "response error"))
+            elif ok_code != 1:  # unknown error
+                if ok_code == self.VERIFY_OK_CODE:
+                    rate_limit_slot.throttled()
+                utils.logger.error(f"[WeiboClient.request] request {method}:{url} err, res:{data}")
+                raise DataFetchError(data.get("msg", "unknown error"))
+            else:  # response right
+                return data.get("data", {})
 
     async def get(self, uri: str, params=None, headers=None, **kwargs) -> Union[Response, Dict]:
         final_uri = uri
@@ -166,24 +178,35 @@ class WeiboClient:
         :param max_count:
         :return:
         """
+        seen_filter = get_seen_filter("comments")
+        if seen_filter.is_seen(note_id):
+            utils.logger.info(f"[WeiboClient.get_note_all_comments] Comments of {note_id} has been crawled recently, skip")
+            return []
+        checkpoint = get_crawl_checkpoint()
+        # 断点续爬时从上次完成的位置继续，已经爬取的评论数量计入 max_count
+        comments_checkpoint = await checkpoint.get("comments", note_id) or {}
+        crawled_count = comments_checkpoint.get("count", 0)
         result = []
-        is_end = False
-        max_id = -1
-        max_id_type = 0
-        while not is_end and len(result) < max_count:
+        max_id = comments_checkpoint.get("max_id", -1)
+        max_id_type = comments_checkpoint.get("max_id_type", 0)
+        is_end = max_id == 0
+        while not is_end and crawled_count + len(result) < max_count:
             comments_res = await self.get_note_comments(note_id, max_id, max_id_type)
             max_id: int = comments_res.get("max_id")
             max_id_type: int = comments_res.get("max_id_type")
             comment_list: List[Dict] = comments_res.get("data", [])
             is_end = max_id == 0
-            if len(result) + len(comment_list) > max_count:
-                comment_list = comment_list[:max_count - len(result)]
+            if crawled_count + len(result) + len(comment_list) > max_count:
+                comment_list = comment_list[:max_count - crawled_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(note_id, comment_list)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             result.extend(comment_list)
             sub_comment_result = await self.get_comments_all_sub_comments(note_id, comment_list, callback)
             result.extend(sub_comment_result)
+            await checkpoint.save("comments", note_id, {"max_id": max_id, "max_id_type": max_id_type,
+                                                        "count": crawled_count + len(result)})
+        seen_filter.add(note_id)
         return result
 
     @staticmethod
@@ -199,7 +222,7 @@ class WeiboClient:
         Returns:
 
         """
-        if not config.ENABLE_GET_SUB_COMMENTS:
+        if not config.get_config("ENABLE_GET_SUB_COMMENTS"):
             utils.logger.info(
                 f"[WeiboClient.get_comments_all_sub_comments] Crawling sub_comment mode is not enabled")
             return []
@@ -219,26 +242,25 @@ class WeiboClient:
         :return:
         """
         url = f"{self._host}/detail/{note_id}"
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+        async with self.rate_limit(url) as rate_limit_slot:
+            client = self.http_pool.get_client(self.proxies)
             response = await client.request(
                 "GET", url, timeout=self.timeout, headers=self.headers
             )
-            if response.status_code != 200:
-                raise DataFetchError(f"get weibo detail err: {response.text}")
-            match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
-            if match:
-                render_data_json = match.group(1)
-                render_data_dict = json.loads(render_data_json)
-                note_detail = render_data_dict[0].get("status")
-                note_item = {
-                    "mblog": note_detail
-                }
-                return note_item
-            else:
-                utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
-                return dict()
-
-    async def get_note_image(self, image_url: str) -> bytes:
+            rate_limit_slot.observe_status(response.status_code)
+        if response.status_code != 200:
+            raise DataFetchError(f"get weibo detail err: {response.text}")
+        note_item = await run_parser(parse_note_detail_from_html, response.text)
+        if not note_item:
+            utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
+        return note_item
+
+    def get_note_image_agent_url(self, image_url: str) -> str:
+        """
+        获取微博图片经过图床代理的高清大图地址
+        :param image_url: 微博图片地址
+        :return:
+        """
         image_url = image_url[8:]  # 去掉 https://
         sub_url = image_url.split("/")
         image_url = ""
@@ -251,14 +273,27 @@ class WeiboClient:
                 image_url += sub_url[i] + "/"
         # 微博图床对外存在防盗链，所以需要代理访问
         # 由于微博图片是通过 i1.wp.com 来访问的，所以需要拼接一下
-        final_uri = (f"{self._image_agent_host}" f"{image_url}")
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", final_uri, timeout=self.timeout)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
-                return None
-            else:
-                return response.content
+        return f"{self._image_agent_host}" f"{image_url}"
+
+    async def get_note_image(self, image_url: str) -> bytes:
+        final_uri = self.get_note_image_agent_url(image_url)
+        client = self.http_pool.get_client(self.proxies)
+        response = await client.request("GET", final_uri, timeout=self.timeout)
+        if not response.reason_phrase == "OK":
+            utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
+            return None
+        else:
+            return response.content
+
+    async def download_note_image(self, image_url: str, save_file_name: str) -> None:
+        """
+        把微博图片加入下载队列，下载时流式写入文件，不整体读入内存
+        :param image_url: 微博图片地址
+        :param save_file_name: 保存路径
+        :return:
+        """
+        await get_media_downloader().submit(self.get_note_image_agent_url(image_url), save_file_name,
+                                            proxies=self.proxies)
 
 
 
@@ -372,7 +407,7 @@ class WeiboClient:
             notes = [note for note  in notes if note.get("card_type") == 9]
             if callback:
                 await callback(notes)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             result.extend(notes)
             crawler_total_count += 10
             notes_has_more = notes_res.get("cardlistInfo", {}).get("total", 0) > crawler_total_count
@@ -26,9 +26,10 @@ from playwright.async_api import (BrowserContext, BrowserType, Page,
 
 import config
 from base.base_crawler import AbstractCrawler
-from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
+from proxy.proxy_ip_pool import IpInfoModel, close_ip_pool, create_ip_pool
 from store import weibo as weibo_store
 from tools import utils
+from tools.seen_filter import get_seen_filter
 from var import crawler_type_var, source_keyword_var
 from task_manager.task_config import TaskConfig, SearchTaskConfig, CreatorTaskConfig, DetailTaskConfig
 
@@ -52,7 +53,7 @@ class WeiboCrawler(AbstractCrawler):
         self.mobile_user_agent = utils.get_mobile_user_agent()
 
     async def start(self):
-        playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, playwright_proxy_format, httpx_proxy_format = None, None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
@@ -72,46 +73,53 @@ class WeiboCrawler(AbstractCrawler):
             self.context_page = await self.browser_context.new_page()
             await self.context_page.goto(self.mobile_index_url)
 
-            # 如果有任务配置，应用到全局配置
+            # 如果有任务配置，应用到当前任务的配置上下文
             if self.task_config:
-                self._apply_task_config_to_global()
+                self._apply_task_config()
                 
             # Create a client to interact with the weibo website.
             self.wb_client = await self.create_weibo_client(httpx_proxy_format)
-            if not await self.wb_client.pong():
-                # 优先使用任务配置中的登录信息
-                login_type = self.task_config.login_type if self.task_config else config.LOGIN_TYPE
-                cookies = self.task_config.cookies if self.task_config else config.COOKIES
-                
-                login_obj = WeiboLogin(
-                    login_type=login_type,
-                    login_phone="",  # your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=cookies
-                )
-                await login_obj.begin()
-
-                # 登录成功后重定向到手机端的网站，再更新手机端登录成功的cookie
-                utils.logger.info("[WeiboCrawler.start] redirect weibo mobile homepage and update cookies on mobile platform")
-                await self.context_page.goto(self.mobile_index_url)
-                await asyncio.sleep(2)
-                await self.wb_client.update_cookies(browser_context=self.browser_context)
-
-            # 设置爬虫类型
-            crawler_type = self.task_config.task_type if self.task_config else config.CRAWLER_TYPE
-            crawler_type_var.set(crawler_type)
-            if crawler_type == "search":
-                # Search for video and retrieve their comment information.
-                await self.search()
-            elif crawler_type == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
+            try:
+                # 代理被封时从代理池换一个代理
+                self.wb_client.ip_pool = ip_proxy_pool
+                if not await self.wb_client.pong():
+                    # 优先使用任务配置中的登录信息
+                    login_type = self.task_config.login_type if self.task_config else config.LOGIN_TYPE
+                    cookies = self.task_config.cookies if self.task_config else config.COOKIES
+
+                    login_obj = WeiboLogin(
+                        login_type=login_type,
+                        login_phone="",  # your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=cookies
+                    )
+                    await login_obj.begin()
+
+                    # 登录成功后重定向到手机端的网站，再更新手机端登录成功的cookie
+                    utils.logger.info("[WeiboCrawler.start] redirect weibo mobile homepage and update cookies on mobile platform")
+                    await self.context_page.goto(self.mobile_index_url)
+                    await asyncio.sleep(2)
+                    await self.wb_client.update_cookies(browser_context=self.browser_context)
+
+                # 设置爬虫类型
+                crawler_type = self.task_config.task_type if self.task_config else config.CRAWLER_TYPE
+                crawler_type_var.set(crawler_type)
+                if crawler_type == "search":
+                    # Search for video and retrieve their comment information.
+                    await self.search()
+                elif crawler_type == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_notes()
+                elif config.get_config("CRAWLER_TYPE") == "creator":
+                    # Get creator's information and their notes and comments
+                    await self.get_creators_and_notes()
+                else:
+                    pass
+            finally:
+                # 爬取异常退出时也要关闭客户端和代理池，释放连接池，停止代理池的后台任务
+                await self.wb_client.close()
+                await close_ip_pool(ip_proxy_pool)
             utils.logger.info("[WeiboCrawler.start] Weibo Crawler finished ...")
 
     async def search(self):
@@ -187,9 +195,15 @@ class WeiboCrawler(AbstractCrawler):
         :param semaphore:
         :return:
         """
+        seen_filter = get_seen_filter("note")
+        if seen_filter.is_seen(note_id):
+            utils.logger.info(f"[WeiboCrawler.get_note_info_task] {note_id} has been crawled recently, skip")
+            return None
         async with semaphore:
             try:
                 result = await self.wb_client.get_note_info_by_id(note_id)
+                if result:
+                    seen_filter.add(note_id)
                 return result
             except DataFetchError as ex:
                 utils.logger.error(f"[WeiboCrawler.get_note_info_task] Get note detail error: {ex}")
@@ -205,7 +219,7 @@ class WeiboCrawler(AbstractCrawler):
         :param note_id_list:
         :return:
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not config.get_config("ENABLE_GET_COMMENTS"):
             utils.logger.info(f"[WeiboCrawler.batch_get_note_comments] Crawling comment mode is not enabled")
             return
 
@@ -255,10 +269,9 @@ class WeiboCrawler(AbstractCrawler):
             url = pic.get("url")
             if not url:
                 continue
-            content = await self.wb_client.get_note_image(url)
-            if content != None:
-                extension_file_name = url.split(".")[-1]
-                await weibo_store.update_weibo_note_image(pic["pid"], content, extension_file_name)
+            extension_file_name = url.split(".")[-1]
+            save_file_name = weibo_store.get_weibo_note_image_file_name(pic["pid"], extension_file_name)
+            await self.wb_client.download_note_image(url, save_file_name)
 
 
     async def get_creators_and_notes(self) -> None:
@@ -341,7 +354,7 @@ class WeiboCrawler(AbstractCrawler):
         utils.logger.info("[WeiboCrawler.launch_browser] Begin create browser context ...")
         if config.SAVE_LOGIN_STATE:
             user_data_dir = os.path.join(os.getcwd(), "browser_data",
-                                         config.USER_DATA_DIR % config.PLATFORM)  # type: ignore
+                                         config.USER_DATA_DIR % config.get_config("PLATFORM"))  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 accept_downloads=True,
@@ -359,26 +372,30 @@ class WeiboCrawler(AbstractCrawler):
             )
             return browser_context
             
-    def _apply_task_config_to_global(self) -> None:
-        """将任务配置应用到全局变量"""
+    def _apply_task_config(self) -> None:
+        """将任务配置应用到当前任务的配置上下文，不修改全局配置"""
         if not self.task_config:
             return
             
         # 设置通用配置
-        config.PLATFORM = self.task_config.platform
-        config.CRAWLER_TYPE = self.task_config.task_type
-        config.LOGIN_TYPE = self.task_config.login_type
-        config.COOKIES = self.task_config.cookies
-        config.SAVE_DATA_OPTION = self.task_config.save_data_option
-        config.ENABLE_GET_COMMENTS = self.task_config.enable_get_comments
-        config.ENABLE_GET_SUB_COMMENTS = self.task_config.enable_get_sub_comments
+        overrides = {
+            "PLATFORM": self.task_config.platform,
+            "CRAWLER_TYPE": self.task_config.task_type,
+            "LOGIN_TYPE": self.task_config.login_type,
+            "COOKIES": self.task_config.cookies,
+            "SAVE_DATA_OPTION": self.task_config.save_data_option,
+            "ENABLE_GET_COMMENTS": self.task_config.enable_get_comments,
+            "ENABLE_GET_SUB_COMMENTS": self.task_config.enable_get_sub_comments,
+        }
         
         # 根据任务类型设置特定配置
         if isinstance(self.task_config, SearchTaskConfig):
-            config.KEYWORDS = self.task_config.keywords_str
+            overrides["KEYWORDS"] = self.task_config.keywords_str
             
         elif isinstance(self.task_config, CreatorTaskConfig):
-            config.WEIBO_CREATOR_ID_LIST = self.task_config.creator_ids
+            overrides["WEIBO_CREATOR_ID_LIST"] = self.task_config.creator_ids
             
         elif isinstance(self.task_config, DetailTaskConfig):
-            config.WEIBO_SPECIFIED_ID_LIST = self.task_config.post_ids
+            overrides["WEIBO_SPECIFIED_ID_LIST"] = self.task_config.post_ids
+
+        config.apply_task_config(overrides)
@@ -14,8 +14,12 @@
 # @Time    : 2023/12/24 17:37
 # @Desc    :
 
+import json
+import re
 from typing import Dict, List
 
+RENDER_DATA_PATTERN = re.compile(r'var \$render_data = (\[.*?\])\[0\]', re.DOTALL)
+
 
 def filter_search_result_card(card_list: List[Dict]) -> List[Dict]:
     """
@@ -34,3 +38,20 @@ def filter_search_result_card(card_list: List[Dict]) -> List[Dict]:
                     note_list.append(card_group_item)
 
     return note_list
+
+
+def parse_note_detail_from_html(html: str) -> Dict:
+    """
+    从帖子详情页 HTML 的 $render_data 中解析帖子详情
+    :param html:
+    :return: {"mblog": 帖子详情}，页面中没有 $render_data 时返回空字典
+    """
+    match = RENDER_DATA_PATTERN.search(html)
+    if not match:
+        return dict()
+    render_data_dict = json.loads(match.group(1))
+    note_detail = render_data_dict[0].get("status")
+    note_item = {
+        "mblog": note_detail
+    }
+    return note_item
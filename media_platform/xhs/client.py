@@ -9,27 +9,32 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 
-import asyncio
 import json
-import re
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_result
 
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.crawl_checkpoint import get_crawl_checkpoint
+from tools.seen_filter import get_seen_filter
+from tools.media_downloader import get_media_downloader
+from tools.parse_executor import run_parser
+from tools.rate_limiter import crawl_sleep
 from html import unescape
 
 from .exception import DataFetchError, IPBlockError
 from .field import SearchNoteType, SearchSortType
-from .help import get_search_id, sign
+from .help import get_search_id, parse_creator_info_from_html, parse_note_detail_from_html
+from .signer import XhsSignService
 
 
 class XiaoHongShuClient(AbstractApiClient):
+    rate_limit_platform = "xhs"
+
     def __init__(
         self,
         timeout=10,
@@ -50,6 +55,7 @@ class XiaoHongShuClient(AbstractApiClient):
         self.NOTE_ABNORMAL_CODE = -510001
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        self.sign_service = XhsSignService(playwright_page)
 
     async def _pre_headers(self, url: str, data=None) -> Dict:
         """
@@ -61,25 +67,11 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
-        encrypt_params = await self.playwright_page.evaluate(
-            "([url, data]) => window._webmsxyw(url,data)", [url, data]
-        )
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
-        signs = sign(
-            a1=self.cookie_dict.get("a1", ""),
-            b1=local_storage.get("b1", ""),
-            x_s=encrypt_params.get("X-s", ""),
-            x_t=str(encrypt_params.get("X-t", "")),
-        )
-
-        headers = {
-            "X-S": signs["x-s"],
-            "X-T": signs["x-t"],
-            "x-S-Common": signs["x-s-common"],
-            "X-B3-Traceid": signs["x-b3-traceid"],
-        }
-        self.headers.update(headers)
-        return self.headers
+        sign_headers = await self.sign_service.sign_headers(url, self.cookie_dict.get("a1", ""), data)
+        # 每个请求使用独立的请求头，并发请求时不会互相覆盖签名
+        headers = self.headers.copy()
+        headers.update(sign_headers)
+        return headers
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
@@ -96,26 +88,30 @@ class XiaoHongShuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop("return_response", False)
 
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+        async with self.rate_limit(url) as rate_limit_slot:
+            client = self.http_pool.get_client(self.proxies)
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
+            rate_limit_slot.observe_status(response.status_code)
+
+            if response.status_code == 471 or response.status_code == 461:
+                # someday someone maybe will bypass captcha
+                rate_limit_slot.throttled()
+                verify_type = response.headers["Verifytype"]
+                verify_uuid = response.headers["Verifyuuid"]
+                raise Exception(
+                    f"出现验证码，请求失败，Verifytype: {verify_type}，Verifyuuid: {verify_uuid}, Response: {response}"
+                )
 
-        if response.status_code == 471 or response.status_code == 461:
-            # someday someone maybe will bypass captcha
-            verify_type = response.headers["Verifytype"]
-            verify_uuid = response.headers["Verifyuuid"]
-            raise Exception(
-                f"出现验证码，请求失败，Verifytype: {verify_type}，Verifyuuid: {verify_uuid}, Response: {response}"
-            )
-
-        if return_response:
-            return response.text
-        data: Dict = response.json()
-        if data["success"]:
-            return data.get("data", data.get("success", {}))
-        elif data["code"] == self.IP_ERROR_CODE:
-            raise IPBlockError(self.IP_ERROR_STR)
-        else:
-            raise DataFetchError(data.get("msg", None))
+            if return_response:
+                return response.text
+            data: Dict = response.json()
+            if data["success"]:
+                return data.get("data", data.get("success", {}))
+            elif data["code"] == self.IP_ERROR_CODE:
+                rate_limit_slot.throttled()
+                raise IPBlockError(self.IP_ERROR_STR)
+            else:
+                raise DataFetchError(data.get("msg", None))
 
     async def get(self, uri: str, params=None) -> Dict:
         """
@@ -156,15 +152,27 @@ class XiaoHongShuClient(AbstractApiClient):
         )
 
     async def get_note_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", url, timeout=self.timeout)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(
-                    f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
-                )
-                return None
-            else:
-                return response.content
+        client = self.http_pool.get_client(self.proxies)
+        response = await client.request("GET", url, timeout=self.timeout)
+        if not response.reason_phrase == "OK":
+            utils.logger.error(
+                f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
+            )
+            return None
+        else:
+            return response.content
+
+    async def download_note_media(self, url: str, save_file_name: str) -> None:
+        """
+        把笔记图片/视频加入下载队列，下载时流式写入文件，不整体读入内存
+        Args:
+            url: 图片/视频地址
+            save_file_name: 保存路径
+
+        Returns:
+
+        """
+        await get_media_downloader().submit(url, save_file_name, proxies=self.proxies)
 
     async def pong(self) -> bool:
         """
@@ -198,6 +206,8 @@ class XiaoHongShuClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        # 登录态变化后 localStorage 中的 b1 可能也会变化
+        self.sign_service.invalidate()
 
     async def get_note_by_keyword(
         self,
@@ -339,10 +349,21 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
+        seen_filter = get_seen_filter("comments")
+        if seen_filter.is_seen(note_id):
+            utils.logger.info(f"[XiaoHongShuClient.get_note_all_comments] Comments of {note_id} has been crawled recently, skip")
+            return []
+        checkpoint = get_crawl_checkpoint()
+        if await checkpoint.is_done("comments", note_id):
+            utils.logger.info(f"[XiaoHongShuClient.get_note_all_comments] Comments of note {note_id} has been crawled")
+            return []
+        # 断点续爬时从上次完成的游标继续，已经爬取的评论数量计入 max_count
+        comments_checkpoint = await checkpoint.get("comments", note_id) or {}
+        crawled_count = comments_checkpoint.get("count", 0)
         result = []
         comments_has_more = True
-        comments_cursor = ""
-        while comments_has_more and len(result) < max_count:
+        comments_cursor = comments_checkpoint.get("cursor", "")
+        while comments_has_more and crawled_count + len(result) < max_count:
             comments_res = await self.get_note_comments(
                 note_id=note_id, xsec_token=xsec_token, cursor=comments_cursor
             )
@@ -352,13 +373,13 @@ class XiaoHongShuClient(AbstractApiClient):
                 utils.logger.info(
                     f"[XiaoHongShuClient.get_note_all_comments] No 'comments' key found in response: {comments_res}"
                 )
-                break
+                return result
             comments = comments_res["comments"]
-            if len(result) + len(comments) > max_count:
-                comments = comments[: max_count - len(result)]
+            if crawled_count + len(result) + len(comments) > max_count:
+                comments = comments[: max_count - crawled_count - len(result)]
             if callback:
                 await callback(note_id, comments)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             result.extend(comments)
             sub_comments = await self.get_comments_all_sub_comments(
                 comments=comments,
@@ -367,6 +388,9 @@ class XiaoHongShuClient(AbstractApiClient):
                 callback=callback,
             )
             result.extend(sub_comments)
+            await checkpoint.save("comments", note_id, {"cursor": comments_cursor, "count": crawled_count + len(result)})
+        await checkpoint.mark_done("comments", note_id)
+        seen_filter.add(note_id)
         return result
 
     async def get_comments_all_sub_comments(
@@ -387,12 +411,13 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
-        if not config.ENABLE_GET_SUB_COMMENTS:
+        if not config.get_config("ENABLE_GET_SUB_COMMENTS"):
             utils.logger.info(
                 f"[XiaoHongShuCrawler.get_comments_all_sub_comments] Crawling sub_comment mode is not enabled"
             )
             return []
 
+        checkpoint = get_crawl_checkpoint()
         result = []
         for comment in comments:
             note_id = comment.get("note_id")
@@ -405,7 +430,11 @@ class XiaoHongShuClient(AbstractApiClient):
                 continue
 
             root_comment_id = comment.get("id")
-            sub_comment_cursor = comment.get("sub_comment_cursor")
+            checkpoint_key = f"{note_id}:{root_comment_id}"
+            if await checkpoint.is_done("sub_comments", checkpoint_key):
+                continue
+            sub_comment_cursor = (await checkpoint.get("sub_comments", checkpoint_key) or {}).get(
+                "cursor", comment.get("sub_comment_cursor"))
 
             while sub_comment_has_more:
                 comments_res = await self.get_note_sub_comments(
@@ -431,8 +460,11 @@ class XiaoHongShuClient(AbstractApiClient):
                 comments = comments_res["comments"]
                 if callback:
                     await callback(note_id, comments)
-                await asyncio.sleep(crawl_interval)
+                await crawl_sleep(crawl_interval)
                 result.extend(comments)
+                await checkpoint.save("sub_comments", checkpoint_key, {"cursor": sub_comment_cursor})
+            else:
+                await checkpoint.mark_done("sub_comments", checkpoint_key)
         return result
 
     async def get_creator_info(self, user_id: str) -> Dict:
@@ -445,17 +477,7 @@ class XiaoHongShuClient(AbstractApiClient):
         html_content = await self.request(
             "GET", self._domain + uri, return_response=True, headers=self.headers
         )
-        match = re.search(
-            r"<script>window.__INITIAL_STATE__=(.+)<\/script>", html_content, re.M
-        )
-
-        if match is None:
-            return {}
-
-        info = json.loads(match.group(1).replace(":undefined", ":null"), strict=False)
-        if info is None:
-            return {}
-        return info.get("user").get("userPageData")
+        return await run_parser(parse_creator_info_from_html, html_content)
 
     async def get_notes_by_creator(
         self, creator: str, cursor: str, page_size: int = 30
@@ -528,7 +550,7 @@ class XiaoHongShuClient(AbstractApiClient):
                 await callback(notes_to_add)
 
             result.extend(notes_to_add)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
 
         utils.logger.info(
             f"[XiaoHongShuClient.get_all_notes_by_creator] Finished getting notes for user {user_id}, total: {len(result)}"
@@ -570,31 +592,6 @@ class XiaoHongShuClient(AbstractApiClient):
 
         """
 
-        def camel_to_underscore(key):
-            return re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower()
-
-        def transform_json_keys(json_data):
-            data_dict = json.loads(json_data)
-            dict_new = {}
-            for key, value in data_dict.items():
-                new_key = camel_to_underscore(key)
-                if not value:
-                    dict_new[new_key] = value
-                elif isinstance(value, dict):
-                    dict_new[new_key] = transform_json_keys(json.dumps(value))
-                elif isinstance(value, list):
-                    dict_new[new_key] = [
-                        (
-                            transform_json_keys(json.dumps(item))
-                            if (item and isinstance(item, dict))
-                            else item
-                        )
-                        for item in value
-                    ]
-                else:
-                    dict_new[new_key] = value
-            return dict_new
-
         url = (
             "https://www.xiaohongshu.com/explore/"
             + note_id
@@ -608,17 +605,7 @@ class XiaoHongShuClient(AbstractApiClient):
             method="GET", url=url, return_response=True, headers=copy_headers
         )
 
-        def get_note_dict(html):
-            state = re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)[
-                0
-            ].replace("undefined", '""')
-
-            if state != "{}":
-                note_dict = transform_json_keys(state)
-                return note_dict["note"]["note_detail_map"][note_id]["note"]
-            return {}
-
         try:
-            return get_note_dict(html)
+            return await run_parser(parse_note_detail_from_html, html, note_id)
         except:
             return None
@@ -12,7 +12,6 @@
 import asyncio
 import os
 import random
-import time
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple, Union
 
@@ -24,9 +23,12 @@ from base.base_crawler import AbstractCrawler
 from task_manager.task_config import TaskConfig, SearchTaskConfig, CreatorTaskConfig, DetailTaskConfig
 from config import CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
 from model.m_xiaohongshu import NoteUrlInfo
-from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
+from proxy.proxy_ip_pool import IpInfoModel, close_ip_pool, create_ip_pool
 from store import xhs as xhs_store
 from tools import utils
+from tools.crawl_checkpoint import get_crawl_checkpoint
+from tools.seen_filter import get_seen_filter
+from tools.rate_limiter import crawl_sleep
 from var import crawler_type_var, source_keyword_var
 
 from .client import XiaoHongShuClient
@@ -48,12 +50,12 @@ class XiaoHongShuCrawler(AbstractCrawler):
         self.user_agent = config.UA if config.UA else "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
 
     async def start(self) -> None:
-        # 如果有任务配置，应用任务配置的参数到全局变量
+        # 如果有任务配置，应用到当前任务的配置上下文
         if self.task_config:
             # 设置平台通用配置
-            self._apply_task_config_to_global()
+            self._apply_task_config()
             
-        playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, playwright_proxy_format, httpx_proxy_format = None, None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(
                 config.IP_PROXY_POOL_COUNT, enable_validate_ip=True
@@ -87,60 +89,71 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
             # Create a client to interact with the xiaohongshu website.
             self.xhs_client = await self.create_xhs_client(httpx_proxy_format)
-            if not await self.xhs_client.pong():
-                login_obj = XiaoHongShuLogin(
-                    login_type=self.task_config.login_type if self.task_config else config.LOGIN_TYPE,
-                    login_phone="",  # input your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=self.task_config.cookies if self.task_config else config.COOKIES,
-                )
-                await login_obj.begin()
-                await self.xhs_client.update_cookies(
-                    browser_context=self.browser_context
-                )
+            try:
+                # 代理被封时从代理池换一个代理
+                self.xhs_client.ip_pool = ip_proxy_pool
+                if not await self.xhs_client.pong():
+                    login_obj = XiaoHongShuLogin(
+                        login_type=self.task_config.login_type if self.task_config else config.LOGIN_TYPE,
+                        login_phone="",  # input your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=self.task_config.cookies if self.task_config else config.COOKIES,
+                    )
+                    await login_obj.begin()
+                    await self.xhs_client.update_cookies(
+                        browser_context=self.browser_context
+                    )
 
-            # 设置爬虫类型
-            if self.task_config:
-                crawler_type_var.set(self.task_config.task_type)
-            else:
-                crawler_type = self.task_config.task_type if self.task_config else config.CRAWLER_TYPE
-            if crawler_type == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif crawler_type == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif crawler_type == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                utils.logger.error(f"Invalid crawler type {crawler_type}")
+                # 设置爬虫类型
+                if self.task_config:
+                    crawler_type_var.set(self.task_config.task_type)
+                else:
+                    crawler_type = self.task_config.task_type if self.task_config else config.CRAWLER_TYPE
+                if crawler_type == "search":
+                    # Search for notes and retrieve their comment information.
+                    await self.search()
+                elif crawler_type == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_notes()
+                elif crawler_type == "creator":
+                    # Get creator's information and their notes and comments
+                    await self.get_creators_and_notes()
+                else:
+                    utils.logger.error(f"Invalid crawler type {crawler_type}")
+            finally:
+                # 爬取异常退出时也要关闭客户端和代理池，释放连接池，停止代理池的后台任务
+                await self.xhs_client.close()
+                await close_ip_pool(ip_proxy_pool)
             utils.logger.info("[XiaoHongShuCrawler.start] Xhs Crawler finished ...")
                 
-    def _apply_task_config_to_global(self) -> None:
-        """将任务配置应用到全局变量"""
+    def _apply_task_config(self) -> None:
+        """将任务配置应用到当前任务的配置上下文，不修改全局配置"""
         if not self.task_config:
             return
             
         # 设置通用配置
-        config.PLATFORM = self.task_config.platform
-        config.CRAWLER_TYPE = self.task_config.task_type
-        config.LOGIN_TYPE = self.task_config.login_type
-        config.COOKIES = self.task_config.cookies
-        config.SAVE_DATA_OPTION = self.task_config.save_data_option
-        config.ENABLE_GET_COMMENTS = self.task_config.enable_get_comments
-        config.ENABLE_GET_SUB_COMMENTS = self.task_config.enable_get_sub_comments
+        overrides = {
+            "PLATFORM": self.task_config.platform,
+            "CRAWLER_TYPE": self.task_config.task_type,
+            "LOGIN_TYPE": self.task_config.login_type,
+            "COOKIES": self.task_config.cookies,
+            "SAVE_DATA_OPTION": self.task_config.save_data_option,
+            "ENABLE_GET_COMMENTS": self.task_config.enable_get_comments,
+            "ENABLE_GET_SUB_COMMENTS": self.task_config.enable_get_sub_comments,
+        }
         
         # 根据任务类型设置特定配置
         if isinstance(self.task_config, SearchTaskConfig):
-            config.KEYWORDS = self.task_config.keywords_str
+            overrides["KEYWORDS"] = self.task_config.keywords_str
             
         elif isinstance(self.task_config, CreatorTaskConfig):
-            config.XHS_CREATOR_ID_LIST = self.task_config.creator_ids
+            overrides["XHS_CREATOR_ID_LIST"] = self.task_config.creator_ids
             
         elif isinstance(self.task_config, DetailTaskConfig):
-            config.XHS_SPECIFIED_URL_LIST = self.task_config.post_ids
+            overrides["XHS_SPECIFIED_URL_LIST"] = self.task_config.post_ids
+
+        config.apply_task_config(overrides)
 
     async def search(self) -> None:
         """Search for notes and retrieve their comment information."""
@@ -170,6 +183,14 @@ class XiaoHongShuCrawler(AbstractCrawler):
             )
             page = 1
             search_id = get_search_id()
+            checkpoint = get_crawl_checkpoint()
+            if await checkpoint.is_done("search", keyword):
+                utils.logger.info(f"[XiaoHongShuCrawler.search] Keyword {keyword} has been crawled, skip")
+                continue
+            search_checkpoint = await checkpoint.get("search", keyword)
+            if search_checkpoint:
+                page, search_id = search_checkpoint["page"], search_checkpoint["search_id"]
+                utils.logger.info(f"[XiaoHongShuCrawler.search] Resume keyword {keyword} from page {page}")
             while (
                 page - start_page + 1
             ) * xhs_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
@@ -199,8 +220,13 @@ class XiaoHongShuCrawler(AbstractCrawler):
                     )
                     if not notes_res or not notes_res.get("has_more", False):
                         utils.logger.info("No more content!")
+                        await checkpoint.mark_done("search", keyword)
                         break
                     semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+                    post_items = [
+                        post_item for post_item in notes_res.get("items", {})
+                        if post_item.get("model_type") not in ("rec_query", "hot_query")
+                    ]
                     task_list = [
                         self.get_note_detail_async_task(
                             note_id=post_item.get("id"),
@@ -208,26 +234,33 @@ class XiaoHongShuCrawler(AbstractCrawler):
                             xsec_token=post_item.get("xsec_token"),
                             semaphore=semaphore,
                         )
-                        for post_item in notes_res.get("items", {})
-                        if post_item.get("model_type") not in ("rec_query", "hot_query")
+                        for post_item in post_items
                     ]
                     note_details = await asyncio.gather(*task_list)
-                    for note_detail in note_details:
+                    seen_filter = get_seen_filter("note")
+                    for post_item, note_detail in zip(post_items, note_details):
                         if note_detail:
                             await xhs_store.update_xhs_note(note_detail)
                             await self.get_notice_media(note_detail)
                             note_ids.append(note_detail.get("note_id"))
                             xsec_tokens.append(note_detail.get("xsec_token"))
+                        elif seen_filter.contains(post_item.get("id")):
+                            # 跳过了最近爬取过的帖子详情，评论是否需要刷新由评论的过滤器决定
+                            note_ids.append(post_item.get("id"))
+                            xsec_tokens.append(post_item.get("xsec_token"))
                     page += 1
                     utils.logger.info(
                         f"[XiaoHongShuCrawler.search] Note details: {note_details}"
                     )
                     await self.batch_get_note_comments(note_ids, xsec_tokens)
+                    await checkpoint.save("search", keyword, {"page": page, "search_id": search_id})
                 except DataFetchError:
                     utils.logger.error(
                         "[XiaoHongShuCrawler.search] Get note detail error"
                     )
                     break
+            else:
+                await checkpoint.mark_done("search", keyword)
 
     async def get_creators_and_notes(self) -> None:
         """Get creator's notes and retrieve their comment information."""
@@ -316,11 +349,13 @@ class XiaoHongShuCrawler(AbstractCrawler):
             )
             return
         get_note_detail_task_list = []
+        note_url_infos: List[NoteUrlInfo] = []
         for full_note_url in note_url_list:
             note_url_info: NoteUrlInfo = parse_note_info_from_note_url(full_note_url)
             utils.logger.info(
                 f"[XiaoHongShuCrawler.get_specified_notes] Parse note url info: {note_url_info}"
             )
+            note_url_infos.append(note_url_info)
             crawler_task = self.get_note_detail_async_task(
                 note_id=note_url_info.note_id,
                 xsec_source=note_url_info.xsec_source,
@@ -332,11 +367,16 @@ class XiaoHongShuCrawler(AbstractCrawler):
         need_get_comment_note_ids = []
         xsec_tokens = []
         note_details = await asyncio.gather(*get_note_detail_task_list)
-        for note_detail in note_details:
+        seen_filter = get_seen_filter("note")
+        for note_url_info, note_detail in zip(note_url_infos, note_details):
             if note_detail:
                 need_get_comment_note_ids.append(note_detail.get("note_id", ""))
                 xsec_tokens.append(note_detail.get("xsec_token", ""))
                 await xhs_store.update_xhs_note(note_detail)
+            elif seen_filter.contains(note_url_info.note_id):
+                # 跳过了最近爬取过的帖子详情，评论是否需要刷新由评论的过滤器决定
+                need_get_comment_note_ids.append(note_url_info.note_id)
+                xsec_tokens.append(note_url_info.xsec_token)
         await self.batch_get_note_comments(need_get_comment_note_ids, xsec_tokens)
 
     async def get_note_detail_async_task(
@@ -357,6 +397,10 @@ class XiaoHongShuCrawler(AbstractCrawler):
         Returns:
             Dict: note detail
         """
+        seen_filter = get_seen_filter("note")
+        if seen_filter.is_seen(note_id):
+            utils.logger.info(f"[XiaoHongShuCrawler.get_note_detail_async_task] {note_id} has been crawled recently, skip")
+            return None
         note_detail_from_html, note_detail_from_api = None, None
         async with semaphore:
             # When proxy is not enabled, increase the crawling interval
@@ -371,7 +415,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                         note_id, xsec_source, xsec_token, enable_cookie=True
                     )
                 )
-                time.sleep(crawl_interval)
+                await crawl_sleep(crawl_interval)
                 if not note_detail_from_html:
                     # 如果网页版笔记详情获取失败，则尝试不使用cookie获取
                     note_detail_from_html = (
@@ -394,6 +438,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                     note_detail.update(
                         {"xsec_token": xsec_token, "xsec_source": xsec_source}
                     )
+                    seen_filter.add(note_id)
                     return note_detail
             except DataFetchError as ex:
                 utils.logger.error(
@@ -410,7 +455,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         self, note_list: List[str], xsec_tokens: List[str]
     ):
         """Batch get note comments"""
-        if not config.ENABLE_GET_COMMENTS:
+        if not config.get_config("ENABLE_GET_COMMENTS"):
             utils.logger.info(
                 f"[XiaoHongShuCrawler.batch_get_note_comments] Crawling comment mode is not enabled"
             )
@@ -504,7 +549,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
             # feat issue #14
             # we will save login state to avoid login every time
             user_data_dir = os.path.join(
-                os.getcwd(), "browser_data", config.USER_DATA_DIR % config.PLATFORM
+                os.getcwd(), "browser_data", config.USER_DATA_DIR % config.get_config("PLATFORM")
             )  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
@@ -560,12 +605,10 @@ class XiaoHongShuCrawler(AbstractCrawler):
             url = pic.get("url")
             if not url:
                 continue
-            content = await self.xhs_client.get_note_media(url)
-            if content is None:
-                continue
             extension_file_name = f"{picNum}.jpg"
             picNum += 1
-            await xhs_store.update_xhs_note_image(note_id, content, extension_file_name)
+            save_file_name = xhs_store.get_xhs_note_media_file_name(note_id, extension_file_name)
+            await self.xhs_client.download_note_media(url, save_file_name)
 
     async def get_notice_video(self, note_item: Dict):
         """
@@ -584,9 +627,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
             return
         videoNum = 0
         for url in videos:
-            content = await self.xhs_client.get_note_media(url)
-            if content is None:
-                continue
             extension_file_name = f"{videoNum}.mp4"
             videoNum += 1
-            await xhs_store.update_xhs_note_image(note_id, content, extension_file_name)
+            save_file_name = xhs_store.get_xhs_note_media_file_name(note_id, extension_file_name)
+            await self.xhs_client.download_note_media(url, save_file_name)
@@ -10,10 +10,13 @@
 
 
 import ctypes
+import functools
 import json
 import random
+import re
 import time
 import urllib.parse
+from typing import Dict, List, Optional, Tuple
 
 from model.m_xiaohongshu import NoteUrlInfo
 from tools.crawler_util import extract_url_params_to_dict
@@ -306,6 +309,100 @@ def parse_note_info_from_note_url(url: str) -> NoteUrlInfo:
     return NoteUrlInfo(note_id=note_id, xsec_token=xsec_token, xsec_source=xsec_source)
 
 
+INITIAL_STATE_PREFIX = "window.__INITIAL_STATE__="
+
+_CAMEL_BOUNDARY_RE = re.compile(r"(?<!^)(?=[A-Z])")
+
+
+@functools.lru_cache(maxsize=4096)
+def camel_to_underscore(key: str) -> str:
+    """
+    驼峰转下划线，同一份页面数据里的 key 大量重复，转换结果缓存起来
+    Args:
+        key: eg: noteDetailMap
+
+    Returns: eg: note_detail_map
+
+    """
+    return _CAMEL_BOUNDARY_RE.sub("_", key).lower()
+
+
+def _underscore_keys_hook(pairs: List[Tuple[str, object]]) -> Dict:
+    return {camel_to_underscore(key): value for key, value in pairs}
+
+
+def transform_json_keys(json_data: str) -> Dict:
+    """
+    解析 json 字符串，同时把所有对象的 key 从驼峰转成下划线，解析过程中一次完成，不需要逐层重新序列化
+    Args:
+        json_data: json 字符串
+
+    Returns:
+
+    """
+    return json.loads(json_data, object_pairs_hook=_underscore_keys_hook)
+
+
+def extract_initial_state(html: str) -> Optional[str]:
+    """
+    从网页 HTML 中截取 window.__INITIAL_STATE__ 的 json 字符串，用字符串查找代替对整个 HTML 的正则匹配
+    Args:
+        html: 网页 HTML
+
+    Returns: __INITIAL_STATE__ 的 json 字符串（未处理 undefined），页面中没有时返回 None
+
+    """
+    start = html.find(INITIAL_STATE_PREFIX)
+    if start == -1:
+        return None
+    start += len(INITIAL_STATE_PREFIX)
+    end = html.find("</script>", start)
+    state = (html[start:end] if end != -1 else html[start:]).strip().rstrip(";")
+    if not state.startswith("{"):
+        return None
+    return state
+
+
+def parse_note_detail_from_html(html: str, note_id: str) -> Optional[Dict]:
+    """
+    从笔记详情页 HTML 中解析笔记详情
+    Args:
+        html: 笔记详情页 HTML
+        note_id: 笔记ID
+
+    Returns: 笔记详情，页面中没有 __INITIAL_STATE__ 时返回 None
+
+    """
+    state = extract_initial_state(html)
+    if state is None:
+        return None
+    state = state.replace("undefined", '""')
+
+    if state != "{}":
+        note_dict = transform_json_keys(state)
+        return note_dict["note"]["note_detail_map"][note_id]["note"]
+    return {}
+
+
+def parse_creator_info_from_html(html: str) -> Dict:
+    """
+    从用户主页 HTML 中解析用户信息
+    Args:
+        html: 用户主页 HTML
+
+    Returns:
+
+    """
+    state = extract_initial_state(html)
+    if state is None:
+        return {}
+
+    info = json.loads(state.replace(":undefined", ":null"), strict=False)
+    if info is None:
+        return {}
+    return info.get("user").get("userPageData")
+
+
 if __name__ == '__main__':
     _img_url = "https://sns-img-bd.xhscdn.com/7a3abfaf-90c1-a828-5de7-022c80b92aa3"
     # 获取一个图片地址在多个cdn下的url地址
@@ -0,0 +1,130 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 14:20
+# @Desc    : 小红书请求头签名服务
+#            - localStorage 中的 b1 带过期时间缓存，不再每次请求都序列化整个 localStorage
+#            - window._webmsxyw 的调用合并成批，一次 page.evaluate 计算多个请求的签名
+#            - 每个请求返回独立的请求头字典，不修改共享状态
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from playwright.async_api import Page
+
+import config
+
+from .help import sign
+
+XHS_BATCH_ENCRYPT_JS = "(items) => items.map(([url, data]) => window._webmsxyw(url, data))"
+XHS_GET_B1_JS = "() => window.localStorage.getItem('b1')"
+
+
+class XhsSignService:
+    def __init__(self, playwright_page: Page, b1_cache_ttl: Optional[float] = None, max_batch_size: int = 20):
+        """
+
+        Args:
+            playwright_page: 已经打开小红书页面的 playwright page
+            b1_cache_ttl: localStorage 中 b1 的缓存时间（秒）
+            max_batch_size: 单次 page.evaluate 最多计算的签名个数
+        """
+        self.playwright_page = playwright_page
+        self.b1_cache_ttl = config.XHS_SIGN_B1_CACHE_TTL_SEC if b1_cache_ttl is None else b1_cache_ttl
+        self.max_batch_size = max_batch_size
+        self._b1: Optional[str] = None
+        self._b1_expire_at = 0.0
+        self._b1_task: Optional[asyncio.Task] = None
+        self._pending: List[Tuple[str, Any, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def sign_headers(self, url: str, a1: str, data: Optional[Dict] = None) -> Dict[str, str]:
+        """
+        计算单个请求的签名请求头
+        Args:
+            url: 请求的uri，GET 请求需要带上 query 参数
+            a1: cookie 中的 a1
+            data: POST 请求体
+
+        Returns:
+
+        """
+        encrypt_params, b1 = await asyncio.gather(self._encrypt(url, data), self.get_b1())
+        signs = sign(
+            a1=a1,
+            b1=b1,
+            x_s=encrypt_params.get("X-s", ""),
+            x_t=str(encrypt_params.get("X-t", "")),
+        )
+        return {
+            "X-S": signs["x-s"],
+            "X-T": signs["x-t"],
+            "x-S-Common": signs["x-s-common"],
+            "X-B3-Traceid": signs["x-b3-traceid"],
+        }
+
+    async def get_b1(self) -> str:
+        """
+        获取 localStorage 中的 b1，过期前直接使用缓存值，并发请求只会触发一次 page.evaluate
+        Returns:
+
+        """
+        if self._b1 is not None and time.monotonic() < self._b1_expire_at:
+            return self._b1
+        if self._b1_task is None or self._b1_task.done():
+            self._b1_task = asyncio.create_task(self._load_b1())
+        return await asyncio.shield(self._b1_task)
+
+    def invalidate(self) -> None:
+        """
+        丢弃缓存的 b1，登录态变化或者签名失效后调用
+        Returns:
+
+        """
+        self._b1 = None
+        self._b1_expire_at = 0.0
+
+    async def _load_b1(self) -> str:
+        b1 = await self.playwright_page.evaluate(XHS_GET_B1_JS) or ""
+        self._b1 = b1
+        self._b1_expire_at = time.monotonic() + self.b1_cache_ttl
+        return b1
+
+    async def _encrypt(self, url: str, data: Optional[Dict]) -> Dict:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((url, data, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+        return await future
+
+    async def _flush(self) -> None:
+        """
+        把排队中的签名请求合并成批计算，上一批在 evaluate 期间新进来的请求会在下一批中处理
+        Returns:
+
+        """
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            try:
+                results = await self.playwright_page.evaluate(
+                    XHS_BATCH_ENCRYPT_JS, [[url, data] for url, data, _ in batch]
+                )
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result or {})
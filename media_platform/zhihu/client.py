@@ -10,12 +10,10 @@
 
 
 # -*- coding: utf-8 -*-
-import asyncio
 import json
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed
@@ -25,13 +23,19 @@ from base.base_crawler import AbstractApiClient
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from tools import utils
+from tools.crawl_checkpoint import get_crawl_checkpoint
+from tools.seen_filter import get_seen_filter
+from tools.parse_executor import run_parser
+from tools.rate_limiter import crawl_sleep
 
 from .exception import DataFetchError, ForbiddenError
 from .field import SearchSort, SearchTime, SearchType
-from .help import ZhihuExtractor, sign
+from .help import ZhihuExtractor, async_sign
 
 
 class ZhiHuClient(AbstractApiClient):
+    rate_limit_platform = "zhihu"
+
     def __init__(
             self,
             timeout=10,
@@ -58,7 +62,7 @@ class ZhiHuClient(AbstractApiClient):
         d_c0 = self.cookie_dict.get("d_c0")
         if not d_c0:
             raise Exception("d_c0 not found in cookies")
-        sign_res = sign(url, self.default_headers["cookie"])
+        sign_res = await async_sign(url, self.default_headers["cookie"])
         headers = self.default_headers.copy()
         headers['x-zst-81'] = sign_res["x-zst-81"]
         headers['x-zse-96'] = sign_res["x-zse-96"]
@@ -79,20 +83,23 @@ class ZhiHuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop('return_response', False)
 
-        async with httpx.AsyncClient(proxies=self.proxies, ) as client:
+        async with self.rate_limit(url) as rate_limit_slot:
+            client = self.http_pool.get_client(self.proxies)
             response = await client.request(
                 method, url, timeout=self.timeout,
                 **kwargs
             )
+            rate_limit_slot.observe_status(response.status_code)
 
-        if response.status_code != 200:
-            utils.logger.error(f"[ZhiHuClient.request] Requset Url: {url}, Request error: {response.text}")
-            if response.status_code == 403:
-                raise ForbiddenError(response.text)
-            elif response.status_code == 404: # 如果一个content没有评论也是404
-                return {}
+            if response.status_code != 200:
+                utils.logger.error(f"[ZhiHuClient.request] Requset Url: {url}, Request error: {response.text}")
+                if response.status_code == 403:
+                    rate_limit_slot.throttled()
+                    raise ForbiddenError(response.text)
+                elif response.status_code == 404: # 如果一个content没有评论也是404
+                    return {}
 
-            raise DataFetchError(response.text)
+                raise DataFetchError(response.text)
 
         if return_response:
             return response.text
@@ -271,9 +278,16 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
+        seen_filter = get_seen_filter("comments")
+        if seen_filter.is_seen(content.content_id):
+            utils.logger.info(f"[ZhiHuClient.get_note_all_comments] Comments of {content.content_id} has been crawled recently, skip")
+            return []
+        # 断点续爬时从上次完成的 offset 继续
+        checkpoint = get_crawl_checkpoint()
+        comments_checkpoint = await checkpoint.get("comments", content.content_id) or {}
         result: List[ZhihuComment] = []
-        is_end: bool = False
-        offset: str = ""
+        is_end: bool = comments_checkpoint.get("is_end", False)
+        offset: str = comments_checkpoint.get("offset", "")
         limit: int = 10
         while not is_end:
             root_comment_res = await self.get_root_comments(content.content_id, content.content_type, offset, limit)
@@ -292,7 +306,9 @@ class ZhiHuClient(AbstractApiClient):
 
             result.extend(comments)
             await self.get_comments_all_sub_comments(content, comments, crawl_interval=crawl_interval, callback=callback)
-            await asyncio.sleep(crawl_interval)
+            await checkpoint.save("comments", content.content_id, {"offset": offset, "is_end": bool(is_end)})
+            await crawl_sleep(crawl_interval)
+        seen_filter.add(content.content_id)
         return result
 
     async def get_comments_all_sub_comments(self, content: ZhihuContent, comments: List[ZhihuComment], crawl_interval: float = 1.0,
@@ -308,7 +324,7 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
-        if not config.ENABLE_GET_SUB_COMMENTS:
+        if not config.get_config("ENABLE_GET_SUB_COMMENTS"):
             return []
 
         all_sub_comments: List[ZhihuComment] = []
@@ -335,7 +351,7 @@ class ZhiHuClient(AbstractApiClient):
                     await callback(sub_comments)
 
                 all_sub_comments.extend(sub_comments)
-                await asyncio.sleep(crawl_interval)
+                await crawl_sleep(crawl_interval)
         return all_sub_comments
 
     async def get_creator_info(self, url_token: str) -> Optional[ZhihuCreator]:
@@ -349,7 +365,7 @@ class ZhiHuClient(AbstractApiClient):
         """
         uri = f"/people/{url_token}"
         html_content: str = await self.get(uri, return_response=True)
-        return self._extractor.extract_creator(url_token, html_content)
+        return await run_parser(self._extractor.extract_creator, url_token, html_content)
 
     async def get_creator_answers(self, url_token: str, offset: int = 0, limit: int = 20) -> Dict:
         """
@@ -440,7 +456,7 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
         return all_contents
 
 
@@ -471,7 +487,7 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
         return all_contents
 
 
@@ -502,7 +518,7 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
         return all_contents
 
 
@@ -520,7 +536,7 @@ class ZhiHuClient(AbstractApiClient):
         """
         uri = f"/question/{question_id}/answer/{answer_id}"
         response_html = await self.get(uri, return_response=True)
-        return self._extractor.extract_answer_content_from_html(response_html)
+        return await run_parser(self._extractor.extract_answer_content_from_html, response_html)
 
     async def get_article_info(self, article_id: str) -> Optional[ZhihuContent]:
         """
@@ -533,7 +549,7 @@ class ZhiHuClient(AbstractApiClient):
         """
         uri = f"/p/{article_id}"
         response_html = await self.get(uri, return_response=True)
-        return self._extractor.extract_article_content_from_html(response_html)
+        return await run_parser(self._extractor.extract_article_content_from_html, response_html)
 
     async def get_video_info(self, video_id: str) -> Optional[ZhihuContent]:
         """
@@ -546,4 +562,4 @@ class ZhiHuClient(AbstractApiClient):
         """
         uri = f"/zvideo/{video_id}"
         response_html = await self.get(uri, return_response=True)
-        return self._extractor.extract_zvideo_content_from_html(response_html)
+        return await run_parser(self._extractor.extract_zvideo_content_from_html, response_html)
@@ -23,7 +23,7 @@ import config
 from constant import zhihu as constant
 from base.base_crawler import AbstractCrawler
 from model.m_zhihu import ZhihuContent, ZhihuCreator
-from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
+from proxy.proxy_ip_pool import IpInfoModel, close_ip_pool, create_ip_pool
 from store import zhihu as zhihu_store
 from tools import utils
 from var import crawler_type_var, source_keyword_var
@@ -53,7 +53,7 @@ class ZhihuCrawler(AbstractCrawler):
         Returns:
 
         """
-        playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, playwright_proxy_format, httpx_proxy_format = None, None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
@@ -74,48 +74,54 @@ class ZhihuCrawler(AbstractCrawler):
             self.context_page = await self.browser_context.new_page()
             await self.context_page.goto(self.index_url, wait_until="domcontentloaded")
 
-            # 如果有任务配置，应用到全局配置
+            # 如果有任务配置，应用到当前任务的配置上下文
             if self.task_config:
-                self._apply_task_config_to_global()
+                self._apply_task_config()
                 
             # Create a client to interact with the zhihu website.
             self.zhihu_client = await self.create_zhihu_client(httpx_proxy_format)
-            if not await self.zhihu_client.pong():
-                # 优先使用任务配置中的登录信息
-                login_type = self.task_config.login_type if self.task_config else config.LOGIN_TYPE
-                cookies = self.task_config.cookies if self.task_config else config.COOKIES
-                
-                login_obj = ZhiHuLogin(
-                    login_type=login_type,
-                    login_phone="",  # input your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=cookies
-                )
-                await login_obj.begin()
-                await self.zhihu_client.update_cookies(browser_context=self.browser_context)
+            try:
+                # 代理被封时从代理池换一个代理
+                self.zhihu_client.ip_pool = ip_proxy_pool
+                if not await self.zhihu_client.pong():
+                    # 优先使用任务配置中的登录信息
+                    login_type = self.task_config.login_type if self.task_config else config.LOGIN_TYPE
+                    cookies = self.task_config.cookies if self.task_config else config.COOKIES
+
+                    login_obj = ZhiHuLogin(
+                        login_type=login_type,
+                        login_phone="",  # input your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=cookies
+                    )
+                    await login_obj.begin()
+                    await self.zhihu_client.update_cookies(browser_context=self.browser_context)
 
-            # 知乎的搜索接口需要打开搜索页面之后cookies才能访问API，单独的首页不行
-            utils.logger.info("[ZhihuCrawler.start] Zhihu跳转到搜索页面获取搜索页面的Cookies，该过程需要5秒左右")
-            await self.context_page.goto(f"{self.index_url}/search?q=python&search_source=Guess&utm_content=search_hot&type=content")
-            await asyncio.sleep(5)
-            await self.zhihu_client.update_cookies(browser_context=self.browser_context)
-
-            # 设置爬虫类型
-            crawler_type = self.task_config.task_type if self.task_config else config.CRAWLER_TYPE
-            crawler_type_var.set(crawler_type)
-            if crawler_type == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif crawler_type == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif crawler_type == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
+                # 知乎的搜索接口需要打开搜索页面之后cookies才能访问API，单独的首页不行
+                utils.logger.info("[ZhihuCrawler.start] Zhihu跳转到搜索页面获取搜索页面的Cookies，该过程需要5秒左右")
+                await self.context_page.goto(f"{self.index_url}/search?q=python&search_source=Guess&utm_content=search_hot&type=content")
+                await asyncio.sleep(5)
+                await self.zhihu_client.update_cookies(browser_context=self.browser_context)
 
+                # 设置爬虫类型
+                crawler_type = self.task_config.task_type if self.task_config else config.CRAWLER_TYPE
+                crawler_type_var.set(crawler_type)
+                if crawler_type == "search":
+                    # Search for notes and retrieve their comment information.
+                    await self.search()
+                elif crawler_type == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_notes()
+                elif crawler_type == "creator":
+                    # Get creator's information and their notes and comments
+                    await self.get_creators_and_notes()
+                else:
+                    pass
+            finally:
+                # 爬取异常退出时也要关闭客户端和代理池，释放连接池，停止代理池的后台任务
+                await self.zhihu_client.close()
+                await close_ip_pool(ip_proxy_pool)
             utils.logger.info("[ZhihuCrawler.start] Zhihu Crawler finished ...")
 
     async def search(self) -> None:
@@ -170,7 +176,7 @@ class ZhihuCrawler(AbstractCrawler):
         Returns:
 
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not config.get_config("ENABLE_GET_COMMENTS"):
             utils.logger.info(f"[ZhihuCrawler.batch_get_content_comments] Crawling comment mode is not enabled")
             return
 
@@ -376,7 +382,7 @@ class ZhihuCrawler(AbstractCrawler):
             # feat issue #14
             # we will save login state to avoid login every time
             user_data_dir = os.path.join(os.getcwd(), "browser_data",
-                                         config.USER_DATA_DIR % config.PLATFORM)  # type: ignore
+                                         config.USER_DATA_DIR % config.get_config("PLATFORM"))  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 accept_downloads=True,
@@ -394,29 +400,33 @@ class ZhihuCrawler(AbstractCrawler):
             )
             return browser_context
 
-    def _apply_task_config_to_global(self) -> None:
-        """将任务配置应用到全局变量"""
+    def _apply_task_config(self) -> None:
+        """将任务配置应用到当前任务的配置上下文，不修改全局配置"""
         if not self.task_config:
             return
             
         # 设置通用配置
-        config.PLATFORM = self.task_config.platform
-        config.CRAWLER_TYPE = self.task_config.task_type
-        config.LOGIN_TYPE = self.task_config.login_type
-        config.COOKIES = self.task_config.cookies
-        config.SAVE_DATA_OPTION = self.task_config.save_data_option
-        config.ENABLE_GET_COMMENTS = self.task_config.enable_get_comments
-        config.ENABLE_GET_SUB_COMMENTS = self.task_config.enable_get_sub_comments
+        overrides = {
+            "PLATFORM": self.task_config.platform,
+            "CRAWLER_TYPE": self.task_config.task_type,
+            "LOGIN_TYPE": self.task_config.login_type,
+            "COOKIES": self.task_config.cookies,
+            "SAVE_DATA_OPTION": self.task_config.save_data_option,
+            "ENABLE_GET_COMMENTS": self.task_config.enable_get_comments,
+            "ENABLE_GET_SUB_COMMENTS": self.task_config.enable_get_sub_comments,
+        }
         
         # 根据任务类型设置特定配置
         if isinstance(self.task_config, SearchTaskConfig):
-            config.KEYWORDS = self.task_config.keywords_str
+            overrides["KEYWORDS"] = self.task_config.keywords_str
             
         elif isinstance(self.task_config, CreatorTaskConfig):
-            config.ZHIHU_CREATOR_ID_LIST = self.task_config.creator_ids
+            overrides["ZHIHU_CREATOR_ID_LIST"] = self.task_config.creator_ids
             
         elif isinstance(self.task_config, DetailTaskConfig):
-            config.ZHIHU_SPECIFIED_ID_LIST = self.task_config.post_urls
+            overrides["ZHIHU_SPECIFIED_ID_LIST"] = self.task_config.post_urls
+
+        config.apply_task_config(overrides)
     
     async def close(self):
         """Close browser context"""
@@ -20,8 +20,10 @@ from parsel import Selector
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from tools.crawler_util import extract_text_from_html
+from tools.js_signer import JsSignerPool
 
 ZHIHU_SGIN_JS = None
+zhihu_signer = JsSignerPool("libs/zhihu.js", ["get_sign"])
 
 
 def sign(url: str, cookies: str) -> Dict:
@@ -42,6 +44,19 @@ def sign(url: str, cookies: str) -> Dict:
     return ZHIHU_SGIN_JS.call("get_sign", url, cookies)
 
 
+async def async_sign(url: str, cookies: str) -> Dict:
+    """
+    zhihu sign algorithm, 通过常驻的 js 签名进程计算，不阻塞事件循环
+    Args:
+        url: request url with query string
+        cookies: request cookies with d_c0 key
+
+    Returns:
+
+    """
+    return await zhihu_signer.call("get_sign", url, cookies)
+
+
 class ZhihuExtractor:
     def __init__(self):
         pass
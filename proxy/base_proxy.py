@@ -16,10 +16,10 @@
 # @Url     : 快代理HTTP实现，官方文档：https://www.kuaidaili.com/?ref=ldwkjqipvz6c
 import json
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, Union
 
 import config
-from cache.abs_cache import AbstractCache
+from cache.abs_cache import AbstractAsyncCache, AbstractCache
 from cache.cache_factory import CacheFactory
 from tools.utils import utils
 
@@ -44,9 +44,21 @@ class ProxyProvider(ABC):
 
 class IpCache:
     def __init__(self):
-        self.cache_client: AbstractCache = CacheFactory.create_cache(cache_type=config.CACHE_TYPE_MEMORY)
+        self._cache_client: Optional[Union[AbstractCache, AbstractAsyncCache]] = None
 
-    def set_ip(self, ip_key: str, ip_value_info: str, ex: int):
+    @property
+    def cache_client(self) -> Union[AbstractCache, AbstractAsyncCache]:
+        """
+        开启代理租约时代理缓存放到 redis（异步客户端，不阻塞事件循环），多个爬虫进程共用代理商提取的 IP，否则使用本地缓存；
+        第一次使用时才创建，命令行参数修改的配置也能生效
+        :return:
+        """
+        if self._cache_client is None:
+            cache_type = config.CACHE_TYPE_ASYNC_REDIS if config.ENABLE_IP_PROXY_LEASE else config.CACHE_TYPE_MEMORY
+            self._cache_client = CacheFactory.create_cache(cache_type=cache_type)
+        return self._cache_client
+
+    async def set_ip(self, ip_key: str, ip_value_info: str, ex: int):
         """
         设置IP并带有过期时间，到期之后由 redis 负责删除
         :param ip_key:
@@ -54,22 +66,32 @@ class IpCache:
         :param ex:
         :return:
         """
-        self.cache_client.set(key=ip_key, value=ip_value_info, expire_time=ex)
+        cache_client = self.cache_client
+        if isinstance(cache_client, AbstractAsyncCache):
+            await cache_client.set(key=ip_key, value=ip_value_info, expire_time=ex)
+        else:
+            cache_client.set(key=ip_key, value=ip_value_info, expire_time=ex)
 
-    def load_all_ip(self, proxy_brand_name: str) -> List[IpInfoModel]:
+    async def load_all_ip(self, proxy_brand_name: str) -> List[IpInfoModel]:
         """
         从 redis 中加载所有还未过期的 IP 信息
         :param proxy_brand_name: 代理商名称
         :return:
         """
         all_ip_list: List[IpInfoModel] = []
-        all_ip_keys: List[str] = self.cache_client.keys(pattern=f"{proxy_brand_name}_*")
+        cache_client = self.cache_client
         try:
-            for ip_key in all_ip_keys:
-                ip_value = self.cache_client.get(ip_key)
+            # SCAN 列出键后批量读取，redis 缓存只需要一次 MGET
+            if isinstance(cache_client, AbstractAsyncCache):
+                all_ip_keys: List[str] = await cache_client.keys(pattern=f"{proxy_brand_name}_*")
+                ip_values = await cache_client.mget(all_ip_keys)
+            else:
+                all_ip_keys = cache_client.keys(pattern=f"{proxy_brand_name}_*")
+                ip_values = cache_client.mget(all_ip_keys)
+            for ip_value in ip_values:
                 if not ip_value:
                     continue
                 all_ip_list.append(IpInfoModel(**json.loads(ip_value)))
         except Exception as e:
-            utils.logger.error("[IpCache.load_all_ip] get ip err from redis db", e)
+            utils.logger.error(f"[IpCache.load_all_ip] get ip err from redis db: {e}")
         return all_ip_list
@@ -92,7 +92,7 @@ class KuaiDaiLiProxy(ProxyProvider):
         uri = "/api/getdps/"
 
         # 优先从缓存中拿 IP
-        ip_cache_list = self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
+        ip_cache_list = await self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
         if len(ip_cache_list) >= num:
             return ip_cache_list[:num]
 
@@ -101,6 +101,7 @@ class KuaiDaiLiProxy(ProxyProvider):
         self.params.update({"num": need_get_count})
 
         ip_infos: List[IpInfoModel] = []
+        current_ts = utils.get_unix_timestamp()
         async with httpx.AsyncClient() as client:
             response = await client.get(self.api_base + uri, params=self.params)
 
@@ -121,11 +122,12 @@ class KuaiDaiLiProxy(ProxyProvider):
                     port=proxy_model.port,
                     user=self.kdl_user_name,
                     password=self.kdl_user_pwd,
-                    expired_time_ts=proxy_model.expire_ts,
+                    # 快代理返回的是剩余有效秒数，和其他代理商一样转成过期时间戳
+                    expired_time_ts=current_ts + proxy_model.expire_ts,
 
                 )
                 ip_key = f"{self.proxy_brand_name}_{ip_info_model.ip}_{ip_info_model.port}"
-                self.ip_cache.set_ip(ip_key, ip_info_model.model_dump_json(), ex=ip_info_model.expired_time_ts)
+                await self.ip_cache.set_ip(ip_key, ip_info_model.model_dump_json(), ex=proxy_model.expire_ts)
                 ip_infos.append(ip_info_model)
 
         return ip_cache_list + ip_infos
@@ -13,8 +13,12 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 13:45
 # @Desc    : ip代理池实现
-import random
-from typing import Dict, List
+#            并发验证代理，记录每个代理的延迟和请求成败得到健康分数，每次取分数最高的代理；
+#            可用代理少于低水位时在后台补充，快要过期、被封或者连续失败的代理移出代理池；
+#            开启代理租约时只使用租到的代理，后台检查时续约，多个爬虫进程不会同时使用同一个 IP
+import asyncio
+import time
+from typing import Dict, List, Optional, Set, Tuple
 
 import httpx
 from tenacity import retry, stop_after_attempt, wait_fixed
@@ -22,25 +26,88 @@ from tenacity import retry, stop_after_attempt, wait_fixed
 import config
 from proxy.providers import new_jisu_http_proxy, new_kuai_daili_proxy
 from tools import utils
+from tools.http_pool import ProxiesType, _proxy_key
 
-from .base_proxy import ProxyProvider
+from .base_proxy import IpGetError, ProxyProvider
+from .proxy_lease import ProxyLeaseStore, proxy_key
 from .types import IpInfoModel, ProviderNameEnum
 
+# 未开启验证时代理的初始延迟，单位秒
+DEFAULT_PROXY_LATENCY_SEC = 1.0
+
+# 一次补充最多向代理商取几轮，代理商返回的代理有一部分验证失败或者快要过期时再取一轮
+REFILL_MAX_ROUNDS = 3
+
+
+def is_expiring(proxy: IpInfoModel, now: int) -> bool:
+    """
+    代理是否已经过期或者即将过期，没有过期时间的代理一直有效
+    :param proxy:
+    :param now: 当前时间戳，单位秒
+    :return:
+    """
+    return proxy.expired_time_ts is not None and proxy.expired_time_ts - now <= config.IP_PROXY_EXPIRE_MARGIN_SEC
+
+
+class ProxyHealth:
+    """
+    代理的健康状况，延迟取指数加权平均，成功率做平滑处理，分数 = 成功率 / 延迟
+    """
+    LATENCY_EWMA_ALPHA = 0.3
+
+    def __init__(self, proxy: IpInfoModel, latency: float):
+        self.proxy = proxy
+        self.httpx_proxies = utils.format_proxy_info(proxy)[1]
+        self.latency = latency
+        self.success_count = 0
+        self.failure_count = 0
+        self.consecutive_failures = 0
+        self.use_count = 0
+        # 已经累加到代理租约使用次数中的部分
+        self.reported_use_count = 0
+
+    @property
+    def score(self) -> float:
+        success_rate = (self.success_count + 1) / (self.success_count + self.failure_count + 2)
+        return success_rate / max(self.latency, 0.001)
+
+    def on_success(self, latency: float) -> None:
+        self.success_count += 1
+        self.consecutive_failures = 0
+        self.latency += self.LATENCY_EWMA_ALPHA * (latency - self.latency)
+
+    def on_failure(self) -> None:
+        self.failure_count += 1
+        self.consecutive_failures += 1
+
 
 class ProxyIpPool:
-    def __init__(self, ip_pool_count: int, enable_validate_ip: bool, ip_provider: ProxyProvider) -> None:
+    def __init__(self, ip_pool_count: int, enable_validate_ip: bool, ip_provider: ProxyProvider,
+                 lease_store: Optional[ProxyLeaseStore] = None) -> None:
         """
 
         Args:
             ip_pool_count:
             enable_validate_ip:
             ip_provider:
+            lease_store: 代理租约，为 None 时不和其他进程协调
         """
-        self.valid_ip_url = "https://httpbin.org/ip"  # 验证 IP 是否有效的地址
+        self.valid_ip_url = config.IP_PROXY_VALIDATE_URL  # 验证 IP 是否有效的地址
         self.ip_pool_count = ip_pool_count
         self.enable_validate_ip = enable_validate_ip
-        self.proxy_list: List[IpInfoModel] = []
         self.ip_provider: ProxyProvider = ip_provider
+        self.lease_store = lease_store
+        self.proxies: Dict[str, ProxyHealth] = {}
+        # 移出代理池的代理 -> 过期时间，代理商的缓存中还有这些代理，过期之前不再加入代理池
+        self._evicted: Dict[str, Optional[int]] = {}
+        self._refill_lock = asyncio.Lock()
+        self._refill_task: Optional[asyncio.Task] = None
+        self._maintain_task: Optional[asyncio.Task] = None
+        self._release_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def proxy_list(self) -> List[IpInfoModel]:
+        return [health.proxy for health in self.proxies.values()]
 
     async def load_proxies(self) -> None:
         """
@@ -48,52 +115,250 @@ class ProxyIpPool:
         Returns:
 
         """
-        self.proxy_list = await self.ip_provider.get_proxies(self.ip_pool_count)
+        await self._refill()
+
+    def start(self) -> None:
+        """
+        启动后台检查：移出快要过期的代理，可用代理不足时补充
+        :return:
+        """
+        if self._maintain_task is None:
+            self._maintain_task = asyncio.create_task(self._maintain())
+
+    async def close(self) -> None:
+        for task in (self._maintain_task, self._refill_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._maintain_task, self._refill_task = None, None
+        if self.lease_store is not None:
+            await asyncio.gather(*self._release_tasks, return_exceptions=True)
+            try:
+                await self._flush_usage()
+                await self.lease_store.release(self.proxy_list)
+            except Exception as e:
+                utils.logger.error(f"[ProxyIpPool.close] release proxy leases err: {e}")
+            await self.lease_store.close()
+
+    async def _maintain(self) -> None:
+        while True:
+            await asyncio.sleep(config.IP_PROXY_POOL_CHECK_INTERVAL_SEC)
+            try:
+                self._evict_expiring()
+                await self._renew_leases()
+                if len(self.proxies) < config.IP_PROXY_POOL_LOW_WATERMARK:
+                    await self._refill()
+            except Exception as e:
+                utils.logger.error(f"[ProxyIpPool._maintain] refill proxies err: {e}")
 
-    async def _is_valid_proxy(self, proxy: IpInfoModel) -> bool:
+    async def _validate_proxy(self, proxy: IpInfoModel) -> Optional[float]:
         """
         验证代理IP是否有效
         :param proxy:
-        :return:
+        :return: 有效时返回请求耗时，单位秒，无效时返回 None
         """
-        utils.logger.info(f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} is it valid ")
+        if not self.enable_validate_ip:
+            return DEFAULT_PROXY_LATENCY_SEC
+        _, httpx_proxy = utils.format_proxy_info(proxy)
+        start = time.perf_counter()
         try:
-            httpx_proxy = {
-                f"{proxy.protocol}": f"http://{proxy.user}:{proxy.password}@{proxy.ip}:{proxy.port}"
-            }
-            async with httpx.AsyncClient(proxies=httpx_proxy) as client:
+            async with httpx.AsyncClient(proxies=httpx_proxy, timeout=config.IP_PROXY_VALIDATE_TIMEOUT_SEC) as client:
                 response = await client.get(self.valid_ip_url)
-            if response.status_code == 200:
-                return True
-            else:
-                return False
         except Exception as e:
-            utils.logger.info(f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} err: {e}")
-            raise e
+            utils.logger.info(f"[ProxyIpPool._validate_proxy] testing {proxy.ip} err: {e}")
+            return None
+        if response.status_code != 200:
+            utils.logger.info(f"[ProxyIpPool._validate_proxy] testing {proxy.ip} status code: {response.status_code}")
+            return None
+        return time.perf_counter() - start
+
+    async def _validate_proxies(self, candidates: List[IpInfoModel]) -> List[Tuple[IpInfoModel, float]]:
+        """
+        并发验证代理
+        :param candidates:
+        :return: [(有效的代理, 延迟)]
+        """
+        semaphore = asyncio.Semaphore(config.IP_PROXY_VALIDATE_CONCURRENCY)
+
+        async def validate(proxy: IpInfoModel) -> Tuple[IpInfoModel, Optional[float]]:
+            async with semaphore:
+                return proxy, await self._validate_proxy(proxy)
+
+        results = await asyncio.gather(*[validate(proxy) for proxy in candidates])
+        for proxy, latency in results:
+            if latency is None:
+                self._evicted[proxy_key(proxy)] = proxy.expired_time_ts
+        return [(proxy, latency) for proxy, latency in results if latency is not None]
+
+    async def _refill(self) -> None:
+        """
+        从代理商补充代理，补充到 ip_pool_count 个
+        :return:
+        """
+        async with self._refill_lock:
+            self._evict_expiring()
+            # 其他进程正在使用的代理，本次补充中跳过
+            leased_elsewhere = set()
+            for _ in range(REFILL_MAX_ROUNDS):
+                need_count = self.ip_pool_count - len(self.proxies)
+                if need_count <= 0:
+                    return
+                # 代理商优先返回缓存中的代理，其中包括已经在代理池中、被移出和其他进程在用的代理，多取这部分数量才能拿到新的代理
+                candidates = await self.ip_provider.get_proxies(
+                    len(self.proxies) + len(self._evicted) + len(leased_elsewhere) + need_count)
+                candidates = [proxy for proxy in candidates if proxy_key(proxy) not in self.proxies
+                              and proxy_key(proxy) not in self._evicted and proxy_key(proxy) not in leased_elsewhere]
+                if not candidates:
+                    return
+                now = utils.get_unix_timestamp()
+                for proxy in candidates:
+                    if is_expiring(proxy, now):
+                        self._evicted[proxy_key(proxy)] = proxy.expired_time_ts
+                candidates = [proxy for proxy in candidates if proxy_key(proxy) not in self._evicted]
+                if self.lease_store is not None:
+                    # 先租用再验证，只验证租到的代理
+                    leased_proxies = await self.lease_store.checkout(candidates, need_count)
+                    leased_keys = {proxy_key(proxy) for proxy in leased_proxies}
+                    leased_elsewhere.update(proxy_key(proxy) for proxy in candidates
+                                            if proxy_key(proxy) not in leased_keys)
+                    candidates = leased_proxies
+                valid_proxies = sorted(await self._validate_proxies(candidates), key=lambda item: item[1])
+                if self.lease_store is not None:
+                    valid_keys = {proxy_key(proxy) for proxy, _ in valid_proxies}
+                    await self.lease_store.release([proxy for proxy in candidates if proxy_key(proxy) not in valid_keys])
+                for proxy, latency in valid_proxies[:need_count]:
+                    self.proxies[proxy_key(proxy)] = ProxyHealth(proxy, latency)
+                utils.logger.info(f"[ProxyIpPool._refill] validated {len(valid_proxies)}/{len(candidates)} proxies, "
+                                  f"pool size: {len(self.proxies)}")
+
+    def _schedule_refill(self) -> None:
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+
+    def _evict_expiring(self) -> None:
+        now = utils.get_unix_timestamp()
+        for key, health in list(self.proxies.items()):
+            if is_expiring(health.proxy, now):
+                utils.logger.info(f"[ProxyIpPool._evict_expiring] proxy {health.proxy.ip} is expiring, remove it")
+                self._remove(key)
+        for key, expired_time_ts in list(self._evicted.items()):
+            if expired_time_ts is not None and expired_time_ts < now:
+                del self._evicted[key]
+
+    def _remove(self, key: str) -> None:
+        health = self.proxies.pop(key, None)
+        if health is None:
+            return
+        self._evicted[key] = health.proxy.expired_time_ts
+        if self.lease_store is not None:
+            self._schedule_release([health.proxy])
+        if len(self.proxies) < config.IP_PROXY_POOL_LOW_WATERMARK:
+            self._schedule_refill()
+
+    def _schedule_release(self, proxies: List[IpInfoModel]) -> None:
+        """
+        在后台归还租约，_remove 会在同步的 report_failure 中调用，不能等待 redis
+        :param proxies:
+        :return:
+        """
+        task = asyncio.create_task(self._release(proxies))
+        self._release_tasks.add(task)
+        task.add_done_callback(self._release_tasks.discard)
+
+    async def _release(self, proxies: List[IpInfoModel]) -> None:
+        try:
+            await self.lease_store.release(proxies)
+        except Exception as e:
+            utils.logger.error(f"[ProxyIpPool._release] release proxy lease err: {e}")
+
+    async def _renew_leases(self) -> None:
+        """
+        续约代理池中的代理，租约已经过期并且被其他进程租走的代理移出代理池
+        :return:
+        """
+        if self.lease_store is None or not self.proxies:
+            return
+        renewed_keys = {proxy_key(proxy) for proxy in await self.lease_store.renew(self.proxy_list)}
+        for key, health in list(self.proxies.items()):
+            if key not in renewed_keys:
+                utils.logger.info(f"[ProxyIpPool._renew_leases] lease of proxy {health.proxy.ip} is lost, remove it")
+                self._remove(key)
+        await self._flush_usage()
+
+    async def _flush_usage(self) -> None:
+        """
+        把新增的使用次数累加到代理租约的使用次数中
+        :return:
+        """
+        # 等待 redis 期间代理仍在使用，只标记这次上报的次数
+        snapshot = [(health, health.use_count) for health in self.proxies.values()]
+        await self.lease_store.add_usage([(health.proxy, use_count - health.reported_use_count)
+                                          for health, use_count in snapshot])
+        for health, use_count in snapshot:
+            health.reported_use_count = use_count
+
+    def _find(self, proxies: ProxiesType) -> Optional[str]:
+        key = _proxy_key(proxies)
+        return next((proxy_key(health.proxy) for health in self.proxies.values()
+                     if _proxy_key(health.httpx_proxies) == key), None)
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def get_proxy(self) -> IpInfoModel:
         """
-        从代理池中随机提取一个代理IP
+        从代理池中取出分数最高的代理IP，分数相同时取使用次数少的，代理仍然留在代理池中
         :return:
         """
-        if len(self.proxy_list) == 0:
-            await self._reload_proxies()
+        self._evict_expiring()
+        if not self.proxies:
+            await self._refill()
+        if not self.proxies:
+            raise IpGetError("[ProxyIpPool.get_proxy] no valid proxy in the pool, try again")
+        health = max(self.proxies.values(), key=lambda item: (item.score, -item.use_count))
+        health.use_count += 1
+        return health.proxy
 
-        proxy = random.choice(self.proxy_list)
-        self.proxy_list.remove(proxy) # 取出来一个IP就应该移出掉
-        if self.enable_validate_ip:
-            if not await self._is_valid_proxy(proxy):
-                raise Exception("[ProxyIpPool.get_proxy] current ip invalid and again get it")
-        return proxy
+    def report_success(self, proxies: ProxiesType, latency: float) -> None:
+        """
+        上报代理请求成功
+        :param proxies: httpx 格式的代理
+        :param latency: 请求耗时，单位秒
+        :return:
+        """
+        key = self._find(proxies)
+        if key is not None:
+            self.proxies[key].on_success(latency)
 
-    async def _reload_proxies(self):
+    def report_failure(self, proxies: ProxiesType) -> None:
         """
-        # 重新加载代理池
+        上报代理请求失败（连接失败、超时等），连续失败 IP_PROXY_MAX_FAILURES 次后移出代理池
+        :param proxies:
         :return:
         """
-        self.proxy_list = []
-        await self.load_proxies()
+        key = self._find(proxies)
+        if key is None:
+            return
+        health = self.proxies[key]
+        health.on_failure()
+        if health.consecutive_failures >= config.IP_PROXY_MAX_FAILURES:
+            utils.logger.info(f"[ProxyIpPool.report_failure] proxy {health.proxy.ip} failed "
+                              f"{health.consecutive_failures} times, remove it")
+            self._remove(key)
+
+    async def rotate_proxy(self, proxies: ProxiesType) -> ProxiesType:
+        """
+        代理被平台封禁（验证码、IPBlockError 等），移出代理池并换一个代理
+        :param proxies: 被封禁的代理
+        :return: 新代理，httpx 格式
+        """
+        key = self._find(proxies)
+        if key is not None:
+            utils.logger.info(f"[ProxyIpPool.rotate_proxy] proxy {self.proxies[key].proxy.ip} is blocked, remove it")
+            self._remove(key)
+        _, httpx_proxy = utils.format_proxy_info(await self.get_proxy())
+        return httpx_proxy
 
 
 IpProxyProvider: Dict[str, ProxyProvider] = {
@@ -101,21 +366,56 @@ IpProxyProvider: Dict[str, ProxyProvider] = {
     ProviderNameEnum.KUAI_DAILI_PROVIDER.value: new_kuai_daili_proxy()
 }
 
+_ip_pools: List[ProxyIpPool] = []
+
 
-async def create_ip_pool(ip_pool_count: int, enable_validate_ip: bool) -> ProxyIpPool:
+async def create_ip_pool(ip_pool_count: int, enable_validate_ip: bool,
+                         ip_provider: Optional[ProxyProvider] = None) -> ProxyIpPool:
     """
      创建 IP 代理池
     :param ip_pool_count: ip池子的数量
     :param enable_validate_ip: 是否开启验证IP代理
+    :param ip_provider: 代理商，默认为 IP_PROXY_PROVIDER_NAME 配置的代理商
     :return:
     """
+    ip_provider = ip_provider or IpProxyProvider.get(config.IP_PROXY_PROVIDER_NAME)
+    lease_store = None
+    if config.ENABLE_IP_PROXY_LEASE:
+        lease_store = ProxyLeaseStore(getattr(ip_provider, "proxy_brand_name", config.IP_PROXY_PROVIDER_NAME))
     pool = ProxyIpPool(ip_pool_count=ip_pool_count,
                        enable_validate_ip=enable_validate_ip,
-                       ip_provider=IpProxyProvider.get(config.IP_PROXY_PROVIDER_NAME)
+                       ip_provider=ip_provider,
+                       lease_store=lease_store
                        )
     await pool.load_proxies()
+    pool.start()
+    _ip_pools.append(pool)
     return pool
 
 
+async def close_ip_pool(pool: Optional[ProxyIpPool]) -> None:
+    """
+    爬虫结束时调用，停止代理池的后台任务（补充代理、续约），归还代理租约
+    :param pool: create_ip_pool 创建的代理池，没有开启代理时为 None
+    :return:
+    """
+    if pool is None:
+        return
+    if pool in _ip_pools:
+        _ip_pools.remove(pool)
+    await pool.close()
+
+
+async def close_all_ip_pools() -> None:
+    """
+    程序退出前调用，停止代理池的后台任务
+    :return:
+    """
+    pools = list(_ip_pools)
+    _ip_pools.clear()
+    for pool in pools:
+        await pool.close()
+
+
 if __name__ == '__main__':
     pass
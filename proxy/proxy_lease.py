@@ -0,0 +1,189 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 02:40
+# @Desc    : 基于 redis 的代理租约，多个爬虫进程/主机共用同一个代理商账号提取的 IP 时，同一时间一个 IP 只被一个进程使用
+import os
+import socket
+import uuid
+from typing import Callable, List, Optional, Tuple
+
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import WatchError
+
+import config
+from cache.async_redis_cache import create_async_redis_client
+from tools import utils
+
+from .types import IpInfoModel
+
+LEASE_KEY_PREFIX = "proxy_lease"
+USAGE_KEY_PREFIX = "proxy_usage"
+
+# 事务执行期间租约被其他进程修改时的重试次数
+TRANSACTION_MAX_RETRIES = 5
+
+
+def proxy_key(proxy: IpInfoModel) -> str:
+    return f"{proxy.ip}:{proxy.port}:{proxy.user}"
+
+
+def default_lease_owner() -> str:
+    """
+    租约持有者标识：主机名 + 进程号，再加上随机后缀区分同一进程内的多个代理池
+    :return:
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class ProxyLeaseStore:
+    """
+    代理租约：
+    - 租约键 proxy_lease:{代理商}:{ip}:{port}:{user}，值为持有者，带过期时间，用 SET NX 原子地租用；
+    - 续约、归还在 WATCH/MULTI 事务中先确认持有者再修改，不会改动其他进程的租约；
+    - 每个 IP 的使用次数记在哈希 proxy_usage:{代理商} 中，租用时优先选择整个集群使用次数少的 IP；
+    - 批量操作都通过管道发送，一次往返完成；使用 redis.asyncio 客户端，不阻塞事件循环
+    """
+
+    def __init__(self, proxy_brand_name: str, redis_client: Optional[Redis] = None, owner: str = "",
+                 lease_ttl: Optional[float] = None):
+        """
+        :param proxy_brand_name: 代理商名称
+        :param redis_client: 默认按 db_config 中的 redis 配置连接
+        :param owner: 租约持有者标识
+        :param lease_ttl: 租约有效期，单位秒，默认为 IP_PROXY_LEASE_TTL_SEC
+        """
+        self.proxy_brand_name = proxy_brand_name
+        self.redis_client = redis_client or create_async_redis_client()
+        self.owner = owner or default_lease_owner()
+        self.lease_ttl = lease_ttl or config.IP_PROXY_LEASE_TTL_SEC
+        self.usage_key = f"{USAGE_KEY_PREFIX}:{proxy_brand_name}"
+
+    def lease_key(self, proxy: IpInfoModel) -> str:
+        return f"{LEASE_KEY_PREFIX}:{self.proxy_brand_name}:{proxy_key(proxy)}"
+
+    @property
+    def lease_ttl_ms(self) -> int:
+        return int(self.lease_ttl * 1000)
+
+    def _is_owner(self, owner: Optional[bytes]) -> bool:
+        if isinstance(owner, bytes):
+            owner = owner.decode()
+        return owner == self.owner
+
+    async def checkout(self, candidates: List[IpInfoModel], count: int) -> List[IpInfoModel]:
+        """
+        从候选代理中租用最多 count 个空闲的代理，优先租用集群中使用次数少的
+        :param candidates: 候选代理，一般是代理商返回的代理
+        :param count: 租用数量
+        :return: 租到的代理
+        """
+        candidates = list({proxy_key(proxy): proxy for proxy in candidates}.values())
+        if count <= 0 or not candidates:
+            return []
+        pipe = self.redis_client.pipeline(transaction=False)
+        for proxy in candidates:
+            pipe.exists(self.lease_key(proxy))
+        pipe.hmget(self.usage_key, [proxy_key(proxy) for proxy in candidates])
+        *leased_flags, usage_counts = await pipe.execute()
+        free_proxies = [proxy for _, _, proxy in sorted(
+            (int(usage_count or 0), index, proxy)
+            for index, (proxy, leased, usage_count) in enumerate(zip(candidates, leased_flags, usage_counts))
+            if not leased
+        )]
+
+        leased_proxies: List[IpInfoModel] = []
+        while free_proxies and len(leased_proxies) < count:
+            need_count = count - len(leased_proxies)
+            batch, free_proxies = free_proxies[:need_count], free_proxies[need_count:]
+            pipe = self.redis_client.pipeline(transaction=False)
+            for proxy in batch:
+                pipe.set(self.lease_key(proxy), self.owner, nx=True, px=self.lease_ttl_ms)
+            # 检查之后其他进程可能先一步租走，同一个 IP 只有一个进程 SET NX 成功
+            leased_proxies.extend(proxy for proxy, ok in zip(batch, await pipe.execute()) if ok)
+        return leased_proxies
+
+    async def _update_owned(self, proxies: List[IpInfoModel], update: Callable[[Pipeline, str], None],
+                            action: str) -> List[IpInfoModel]:
+        """
+        在事务中修改当前进程持有的租约：WATCH 租约键后确认持有者，再在 MULTI 中修改；
+        执行前租约被其他进程改动（过期后被别人租走）时 EXEC 失败，重新读取后重试
+        :param proxies:
+        :param update: 在事务管道中修改一个租约键
+        :param action: 日志中的操作名称
+        :return: 当前进程持有并且修改成功的代理
+        """
+        keys = [self.lease_key(proxy) for proxy in proxies]
+        if not keys:
+            return []
+        for _ in range(TRANSACTION_MAX_RETRIES):
+            async with self.redis_client.pipeline() as pipe:
+                try:
+                    await pipe.watch(*keys)
+                    owners = await pipe.mget(keys)
+                    owned = [(proxy, key) for proxy, key, owner in zip(proxies, keys, owners) if self._is_owner(owner)]
+                    pipe.multi()
+                    for _, key in owned:
+                        update(pipe, key)
+                    await pipe.execute()
+                    return [proxy for proxy, _ in owned]
+                except WatchError:
+                    continue
+        utils.logger.warning(f"[ProxyLeaseStore.{action}] leases changed concurrently, "
+                             f"gave up after {TRANSACTION_MAX_RETRIES} retries")
+        return []
+
+    async def renew(self, proxies: List[IpInfoModel]) -> List[IpInfoModel]:
+        """
+        续约，租约已经过期或者被其他进程租走的代理不再属于当前进程
+        :param proxies:
+        :return: 续约成功的代理
+        """
+        return await self._update_owned(proxies, lambda pipe, key: pipe.pexpire(key, self.lease_ttl_ms), "renew")
+
+    async def release(self, proxies: List[IpInfoModel]) -> List[IpInfoModel]:
+        """
+        归还租约，只删除当前进程持有的租约
+        :param proxies:
+        :return: 归还的代理
+        """
+        return await self._update_owned(proxies, lambda pipe, key: pipe.delete(key), "release")
+
+    async def add_usage(self, usage: List[Tuple[IpInfoModel, int]]) -> None:
+        """
+        累加代理的使用次数
+        :param usage: [(代理, 新增的使用次数)]
+        :return:
+        """
+        usage = [(proxy, count) for proxy, count in usage if count > 0]
+        if not usage:
+            return
+        pipe = self.redis_client.pipeline(transaction=False)
+        for proxy, count in usage:
+            pipe.hincrby(self.usage_key, proxy_key(proxy), count)
+        await pipe.execute()
+
+    async def get_usage(self, proxies: List[IpInfoModel]) -> List[int]:
+        """
+        查询代理在整个集群中的使用次数
+        :param proxies:
+        :return:
+        """
+        if not proxies:
+            return []
+        usage_counts = await self.redis_client.hmget(self.usage_key, [proxy_key(proxy) for proxy in proxies])
+        return [int(count or 0) for count in usage_counts]
+
+    async def close(self) -> None:
+        await self.redis_client.close()
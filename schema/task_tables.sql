@@ -12,8 +12,11 @@ CREATE TABLE `crawl_tasks` (
     `scheduled_at` timestamp NULL COMMENT '计划执行时间',
     `completed_at` timestamp NULL COMMENT '完成时间',
     `error_message` text DEFAULT NULL COMMENT '错误信息',
+    `worker_id` varchar(128) DEFAULT NULL COMMENT '执行任务的调度器进程ID',
+    `lease_expires_at` timestamp NULL COMMENT '任务租约到期时间，到期未续约的任务会被其他调度器重新领取',
     PRIMARY KEY (`id`),
     KEY `idx_tasks_status` (`status`),
+    KEY `idx_tasks_lease` (`status`, `lease_expires_at`),
     KEY `idx_tasks_platform` (`platform`),
     KEY `idx_tasks_scheduled` (`scheduled_at`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='爬取任务表';
@@ -73,3 +76,11 @@ CREATE TABLE `task_execution_log` (
     KEY `idx_log_task_id` (`task_id`),
     CONSTRAINT `fk_log_task` FOREIGN KEY (`task_id`) REFERENCES `crawl_tasks` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='任务执行日志';
+
+-- ----------------------------
+-- 已有 crawl_tasks 表升级：支持多个调度器进程通过租约领取任务
+-- ----------------------------
+-- ALTER TABLE `crawl_tasks`
+--     ADD COLUMN `worker_id` varchar(128) DEFAULT NULL COMMENT '执行任务的调度器进程ID',
+--     ADD COLUMN `lease_expires_at` timestamp NULL COMMENT '任务租约到期时间，到期未续约的任务会被其他调度器重新领取',
+--     ADD KEY `idx_tasks_lease` (`status`, `lease_expires_at`);
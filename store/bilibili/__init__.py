@@ -27,15 +27,16 @@ class BiliStoreFactory:
     STORES = {
         "csv": BiliCsvStoreImplement,
         "db": BiliDbStoreImplement,
-        "json": BiliJsonStoreImplement
+        "json": BiliJsonStoreImplement,
+        "jsonl": BiliJsonlStoreImplement
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
-        store_class = BiliStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
+        store_class = BiliStoreFactory.STORES.get(config.get_config("SAVE_DATA_OPTION"))
         if not store_class:
             raise ValueError(
-                "[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+                "[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl ...")
         return store_class()
 
 
@@ -134,6 +135,16 @@ async def store_video(aid, video_content, extension_file_name):
         {"aid": aid, "video_content": video_content, "extension_file_name": extension_file_name})
 
 
+def get_bilibili_video_file_name(aid, extension_file_name: str) -> str:
+    """
+    video save file name, the video is streamed to this file by the media downloader
+    Args:
+        aid:
+        extension_file_name:
+    """
+    return BilibiliVideo().prepare_save_file_name(str(aid), extension_file_name)
+
+
 async def batch_update_bilibili_creator_fans(creator_info: Dict, fans_list: List[Dict]):
     if not fans_list:
         return
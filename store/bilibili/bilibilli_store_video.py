@@ -47,6 +47,19 @@ class BilibiliVideo(AbstractStoreImage):
         """
         return f"{self.video_store_path}/{aid}/{extension_file_name}"
 
+    def prepare_save_file_name(self, aid: str, extension_file_name: str) -> str:
+        """
+        create the save directory and return the save file name
+        Args:
+            aid: aid
+            extension_file_name: file name with extension
+
+        Returns:
+
+        """
+        pathlib.Path(self.video_store_path + "/" + str(aid)).mkdir(parents=True, exist_ok=True)
+        return self.make_save_file_name(str(aid), extension_file_name)
+
     async def save_video(self, aid: int, video_content: str, extension_file_name="mp4"):
         """
         save video to local
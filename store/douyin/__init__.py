@@ -26,14 +26,15 @@ class DouyinStoreFactory:
         "csv": DouyinCsvStoreImplement,
         "db": DouyinDbStoreImplement,
         "json": DouyinJsonStoreImplement,
+        "jsonl": DouyinJsonlStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
-        store_class = DouyinStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
+        store_class = DouyinStoreFactory.STORES.get(config.get_config("SAVE_DATA_OPTION"))
         if not store_class:
             raise ValueError(
-                "[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json ..."
+                "[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl ..."
             )
         return store_class()
 
@@ -25,15 +25,16 @@ class KuaishouStoreFactory:
     STORES = {
         "csv": KuaishouCsvStoreImplement,
         "db": KuaishouDbStoreImplement,
-        "json": KuaishouJsonStoreImplement
+        "json": KuaishouJsonStoreImplement,
+        "jsonl": KuaishouJsonlStoreImplement
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
-        store_class = KuaishouStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
+        store_class = KuaishouStoreFactory.STORES.get(config.get_config("SAVE_DATA_OPTION"))
         if not store_class:
             raise ValueError(
-                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl ...")
         return store_class()
 
 
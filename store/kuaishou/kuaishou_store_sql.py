@@ -111,3 +111,16 @@ async def update_comment_by_comment_id(comment_id: str, comment_item: Dict) -> i
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
     effect_row: int = await async_db_conn.update_table("kuaishou_video_comment", comment_item, "comment_id", comment_id)
     return effect_row
+
+
+async def add_or_update_comment(comment_item: Dict) -> None:
+    """
+    新增或更新一条评论记录，先放入写缓冲，由 AsyncMysqlDB 合并成批量 upsert 入库
+    Args:
+        comment_item:
+
+    Returns:
+
+    """
+    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+    await async_db_conn.upsert_later("kuaishou_video_comment", comment_item)
@@ -23,15 +23,16 @@ class TieBaStoreFactory:
     STORES = {
         "csv": TieBaCsvStoreImplement,
         "db": TieBaDbStoreImplement,
-        "json": TieBaJsonStoreImplement
+        "json": TieBaJsonStoreImplement,
+        "jsonl": TieBaJsonlStoreImplement
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
-        store_class = TieBaStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
+        store_class = TieBaStoreFactory.STORES.get(config.get_config("SAVE_DATA_OPTION"))
         if not store_class:
             raise ValueError(
-                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl ...")
         return store_class()
 
 
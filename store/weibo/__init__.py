@@ -28,14 +28,15 @@ class WeibostoreFactory:
         "csv": WeiboCsvStoreImplement,
         "db": WeiboDbStoreImplement,
         "json": WeiboJsonStoreImplement,
+        "jsonl": WeiboJsonlStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
-        store_class = WeibostoreFactory.STORES.get(config.SAVE_DATA_OPTION)
+        store_class = WeibostoreFactory.STORES.get(config.get_config("SAVE_DATA_OPTION"))
         if not store_class:
             raise ValueError(
-                "[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+                "[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl ...")
         return store_class()
 
 
@@ -169,6 +170,19 @@ async def update_weibo_note_image(picid: str, pic_content, extension_file_name):
         {"pic_id": picid, "pic_content": pic_content, "extension_file_name": extension_file_name})
 
 
+def get_weibo_note_image_file_name(picid: str, extension_file_name: str) -> str:
+    """
+    Get weibo note image save file name, the image is streamed to this file by the media downloader
+    Args:
+        picid:
+        extension_file_name:
+
+    Returns:
+
+    """
+    return WeiboStoreImage().prepare_save_file_name(picid, extension_file_name)
+
+
 async def save_creator(user_id: str, user_info: Dict):
     """
     Save creator information to local
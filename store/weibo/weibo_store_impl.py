@@ -25,6 +25,7 @@ import aiofiles
 import config
 from base.base_crawler import AbstractStore
 from tools import utils, words
+from tools.jsonl_store import JsonlFileWriter
 from var import crawler_type_var
 
 
@@ -143,16 +144,11 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .weibo_store_sql import (add_new_comment,
-                                      query_comment_by_comment_id,
-                                      update_comment_by_comment_id)
-        comment_id = comment_item.get("comment_id")
-        comment_detail: Dict = await query_comment_by_comment_id(comment_id=comment_id)
-        if not comment_detail:
-            comment_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_comment(comment_item)
-        else:
-            await update_comment_by_comment_id(comment_id, comment_item=comment_item)
+        from .weibo_store_sql import add_or_update_comment
+
+        # 评论已存在时不会更新 add_ts
+        comment_item["add_ts"] = utils.get_current_timestamp()
+        await add_or_update_comment(comment_item)
 
     async def store_creator(self, creator: Dict):
         """
@@ -222,7 +218,7 @@ class WeiboJsonStoreImplement(AbstractStore):
             async with aiofiles.open(save_file_name, 'w', encoding='utf-8') as file:
                 await file.write(json.dumps(save_data, ensure_ascii=False))
 
-            if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
+            if config.get_config("ENABLE_GET_COMMENTS") and config.ENABLE_GET_WORDCLOUD:
                 try:
                     await self.WordCloud.generate_word_frequency_and_cloud(save_data, words_file_name_prefix)
                 except:
@@ -260,3 +256,67 @@ class WeiboJsonStoreImplement(AbstractStore):
 
         """
         await self.save_data_to_json(creator, "creators")
+
+
+class WeiboJsonlStoreImplement(AbstractStore):
+    jsonl_store_path: str = "data/weibo/jsonl"
+    writers: Dict[str, JsonlFileWriter] = {}
+
+    def get_writer(self, store_type: str) -> JsonlFileWriter:
+        """
+        get jsonl writer by crawler type and store type, one writer per file prefix
+        Args:
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        file_prefix = f"{crawler_type_var.get()}_{store_type}"
+        if file_prefix not in self.writers:
+            self.writers[file_prefix] = JsonlFileWriter(self.jsonl_store_path, file_prefix)
+        return self.writers[file_prefix]
+
+    async def save_data_to_jsonl(self, save_item: Dict, store_type: str):
+        """
+        Append one item to the buffered jsonl file, see tools/jsonl_store.py
+        Args:
+            save_item: save content dict info
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        await self.get_writer(store_type).write(save_item)
+
+    async def store_content(self, content_item: Dict):
+        """
+        content JSONL storage implementation
+        Args:
+            content_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(content_item, "contents")
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment JSONL storage implementation
+        Args:
+            comment_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(comment_item, "comments")
+
+    async def store_creator(self, creator: Dict):
+        """
+        creator JSONL storage implementation
+        Args:
+            creator:
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(creator, "creators")
@@ -113,6 +113,19 @@ async def update_comment_by_comment_id(comment_id: str, comment_item: Dict) -> i
     return effect_row
 
 
+async def add_or_update_comment(comment_item: Dict) -> None:
+    """
+    新增或更新一条评论记录，先放入写缓冲，由 AsyncMysqlDB 合并成批量 upsert 入库
+    Args:
+        comment_item:
+
+    Returns:
+
+    """
+    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+    await async_db_conn.upsert_later("weibo_note_comment", comment_item)
+
+
 async def query_creator_by_user_id(user_id: str) -> Dict:
     """
     查询一条创作者记录
@@ -27,14 +27,15 @@ class XhsStoreFactory:
     STORES = {
         "csv": XhsCsvStoreImplement,
         "db": XhsDbStoreImplement,
-        "json": XhsJsonStoreImplement
+        "json": XhsJsonStoreImplement,
+        "jsonl": XhsJsonlStoreImplement
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
-        store_class = XhsStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
+        store_class = XhsStoreFactory.STORES.get(config.get_config("SAVE_DATA_OPTION"))
         if not store_class:
-            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl ...")
         return store_class()
 
 
@@ -225,3 +226,16 @@ async def update_xhs_note_image(note_id, pic_content, extension_file_name):
 
     await XiaoHongShuImage().store_image(
         {"notice_id": note_id, "pic_content": pic_content, "extension_file_name": extension_file_name})
+
+
+def get_xhs_note_media_file_name(note_id: str, extension_file_name: str) -> str:
+    """
+    获取小红书笔记图片/视频的保存路径，交给下载队列流式写入
+    Args:
+        note_id:
+        extension_file_name:
+
+    Returns:
+
+    """
+    return XiaoHongShuImage().prepare_save_file_name(note_id, extension_file_name)
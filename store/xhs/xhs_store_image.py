@@ -49,6 +49,19 @@ class XiaoHongShuImage(AbstractStoreImage):
         """
         return f"{self.image_store_path}/{notice_id}/{extension_file_name}"
 
+    def prepare_save_file_name(self, notice_id: str, extension_file_name: str) -> str:
+        """
+        create the save directory and return the save file name
+        Args:
+            notice_id: notice id
+            extension_file_name: file name with extension
+
+        Returns:
+
+        """
+        pathlib.Path(self.image_store_path + "/" + notice_id).mkdir(parents=True, exist_ok=True)
+        return self.make_save_file_name(notice_id, extension_file_name)
+
     async def save_image(self, notice_id: str, pic_content: str, extension_file_name="jpg"):
         """
         save image to local
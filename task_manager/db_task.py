@@ -139,26 +139,102 @@ class TaskDB:
             await cls.execute(query, (task_id, post_id))
 
     @classmethod
-    async def get_pending_tasks(cls, limit: int = 10) -> List[Dict]:
+    async def get_pending_tasks(cls, limit: int = 10, exclude_platforms: List[str] = None) -> List[Dict]:
         """
         获取待处理的任务
         
         Args:
             limit: 获取任务数量上限
+            exclude_platforms: 排除的平台（例如并发已满的平台）
             
         Returns:
             List[Dict]: 任务列表
         """
-        query = """
+        params = []
+        platform_filter = ""
+        if exclude_platforms:
+            platform_filter = f"AND platform NOT IN ({','.join(['%s'] * len(exclude_platforms))})"
+            params.extend(exclude_platforms)
+        query = f"""
         SELECT * FROM crawl_tasks
-        WHERE status = 'pending' AND (scheduled_at IS NULL OR scheduled_at <= NOW())
+        WHERE status = 'pending' AND (scheduled_at IS NULL OR scheduled_at <= NOW()) {platform_filter}
         ORDER BY priority DESC, scheduled_at ASC, created_at ASC
         LIMIT %s
         """
-        return await cls.execute_query(query, (limit,))
+        params.append(limit)
+        return await cls.execute_query(query, tuple(params))
+
+    @classmethod
+    async def count_pending_tasks(cls) -> int:
+        """
+        统计已到执行时间的待处理任务数量（队列深度）
+        
+        Returns:
+            int: 任务数量
+        """
+        query = """
+        SELECT COUNT(*) AS cnt FROM crawl_tasks
+        WHERE status = 'pending' AND (scheduled_at IS NULL OR scheduled_at <= NOW())
+        """
+        rows = await cls.execute_query(query)
+        return rows[0]["cnt"] if rows else 0
+
+    @classmethod
+    async def claim_task(cls, task_id: int, worker_id: str, lease_seconds: int) -> bool:
+        """
+        领取任务，只有状态仍为 pending 的任务才能被领取成功，多个调度器进程同时领取同一个任务时只有一个会成功
+        
+        Args:
+            task_id: 任务ID
+            worker_id: 调度器进程ID
+            lease_seconds: 租约时长（秒），需要在到期前调用 renew_task_lease 续约
+            
+        Returns:
+            bool: 是否领取成功
+        """
+        query = """
+        UPDATE crawl_tasks
+        SET status = 'running', worker_id = %s, lease_expires_at = NOW() + INTERVAL %s SECOND
+        WHERE id = %s AND status = 'pending'
+        """
+        return await cls.execute(query, (worker_id, lease_seconds, task_id)) == 1
 
     @classmethod
-    async def update_task_status(cls, task_id: int, status: str, error_message: str = None) -> None:
+    async def renew_task_lease(cls, task_id: int, worker_id: str, lease_seconds: int) -> bool:
+        """
+        续约任务租约
+        
+        Args:
+            task_id: 任务ID
+            worker_id: 调度器进程ID
+            lease_seconds: 租约时长（秒）
+            
+        Returns:
+            bool: 是否续约成功，租约已经过期并被其他进程领取时返回 False
+        """
+        query = """
+        UPDATE crawl_tasks SET lease_expires_at = NOW() + INTERVAL %s SECOND
+        WHERE id = %s AND worker_id = %s AND status = 'running'
+        """
+        return await cls.execute(query, (lease_seconds, task_id, worker_id)) == 1
+
+    @classmethod
+    async def reclaim_expired_tasks(cls) -> int:
+        """
+        把租约已过期（执行任务的调度器进程已经退出或卡死）的运行中任务重新放回待处理队列
+        
+        Returns:
+            int: 重新放回队列的任务数量
+        """
+        query = """
+        UPDATE crawl_tasks SET status = 'pending', worker_id = NULL, lease_expires_at = NULL
+        WHERE status = 'running' AND lease_expires_at IS NOT NULL AND lease_expires_at < NOW()
+        """
+        return await cls.execute(query)
+
+    @classmethod
+    async def update_task_status(cls, task_id: int, status: str, error_message: str = None,
+                                 worker_id: str = None) -> None:
         """
         更新任务状态
         
@@ -166,12 +242,16 @@ class TaskDB:
             task_id: 任务ID
             status: 新状态
             error_message: 错误信息（如果有）
+            worker_id: 调度器进程ID，传入时只更新该进程领取的任务
         """
         params = [status]
         query = "UPDATE crawl_tasks SET status = %s"
 
         if status == TaskStatus.COMPLETED.value or status == TaskStatus.COMPLETED:
             query += ", completed_at = NOW()"
+
+        if status != TaskStatus.RUNNING.value:
+            query += ", lease_expires_at = NULL"
         
         if error_message:
             query += ", error_message = %s"
@@ -179,6 +259,10 @@ class TaskDB:
 
         query += " WHERE id = %s"
         params.append(task_id)
+
+        if worker_id:
+            query += " AND worker_id = %s"
+            params.append(worker_id)
         
         await cls.execute(query, tuple(params))
 
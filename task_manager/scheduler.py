@@ -9,14 +9,18 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。 
 
 import asyncio
+import os
+import socket
 import time
+import uuid
+from collections import Counter
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Callable
 
 import config
-from base.base_crawler import AbstractCrawler
-from factory.crawler_factory import CrawlerFactory
 from tools import utils
+from tools.crawl_checkpoint import clear_crawl_checkpoint, get_crawl_checkpoint
+from var import crawl_task_id_var
 from .db_task import TaskDB
 from .models import TaskStatus, TaskExecutionLog
 from .task_config import SearchTaskConfig, CreatorTaskConfig, DetailTaskConfig, TaskConfig
@@ -25,53 +29,160 @@ from .task_config import SearchTaskConfig, CreatorTaskConfig, DetailTaskConfig,
 class TaskScheduler:
     """
     任务调度器，负责从数据库查询待执行任务并调度执行
+    最多同时执行 max_concurrency 个任务，每个平台单独限制并发数，任务结束后立即补位，不用等到下一次轮询
+    任务通过租约领取，多个调度器进程（可以在不同机器上）可以共用同一张 crawl_tasks 表
     """
-    def __init__(self, check_interval: int = 60):
+    def __init__(self, check_interval: int = 60, max_concurrency: Optional[int] = None,
+                 platform_concurrency: Optional[Dict[str, int]] = None):
         """
         初始化任务调度器
         
         Args:
             check_interval: 检查任务间隔（秒）
+            max_concurrency: 同时执行的任务数量上限
+            platform_concurrency: 各平台同时执行的任务数量上限
         """
         self.check_interval = check_interval
+        self.max_concurrency = max_concurrency or config.SCHEDULER_MAX_CONCURRENT_TASKS
+        self.platform_concurrency = platform_concurrency if platform_concurrency is not None \
+            else config.SCHEDULER_PLATFORM_CONCURRENCY
         self.running = False
-        self.current_task = None
+        self.running_tasks: Dict[int, asyncio.Task] = {}
+        self.platform_running: Counter = Counter()
+        self.queue_depth = 0
         self.task_lock = asyncio.Lock()
-        
+        self._wakeup: Optional[asyncio.Event] = None
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = config.SCHEDULER_TASK_LEASE_SEC
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
     async def start(self) -> None:
         """启动任务调度器"""
         self.running = True
-        utils.logger.info("[TaskScheduler.start] Task scheduler started")
+        self._wakeup = asyncio.Event()
+        self._heartbeat_task = asyncio.create_task(self.renew_leases_periodically())
+        utils.logger.info(f"[TaskScheduler.start] Task scheduler {self.worker_id} started, "
+                          f"max concurrency: {self.max_concurrency}")
         
         while self.running:
+            self._wakeup.clear()
             try:
                 await self.check_and_run_tasks()
+                utils.logger.info(f"[TaskScheduler.start] {self.format_stats()}")
             except Exception as e:
                 utils.logger.error(f"[TaskScheduler.start] Error checking tasks: {e}")
-            
-            await asyncio.sleep(self.check_interval)
+
+            # 有任务结束时会提前唤醒
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.check_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        if self.running_tasks:
+            utils.logger.info(f"[TaskScheduler.start] Waiting for {len(self.running_tasks)} running tasks to finish")
+            await asyncio.gather(*self.running_tasks.values(), return_exceptions=True)
+        self._heartbeat_task.cancel()
     
     def stop(self) -> None:
         """停止任务调度器"""
         self.running = False
+        if self._wakeup is not None:
+            self._wakeup.set()
         utils.logger.info("[TaskScheduler.stop] Task scheduler stopped")
-    
+
+    def get_platform_limit(self, platform: str) -> int:
+        return self.platform_concurrency.get(platform, config.SCHEDULER_DEFAULT_PLATFORM_CONCURRENCY)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        调度器运行状态：队列深度、并发槽位使用率、各平台正在执行的任务数
+        
+        Returns:
+            Dict[str, Any]
+        """
+        return {
+            "queue_depth": self.queue_depth,
+            "running": len(self.running_tasks),
+            "max_concurrency": self.max_concurrency,
+            "slot_utilization": len(self.running_tasks) / self.max_concurrency,
+            "platform_running": dict(self.platform_running),
+        }
+
+    def format_stats(self) -> str:
+        stats = self.stats()
+        return (f"queue depth: {stats['queue_depth']}, running: {stats['running']}/{stats['max_concurrency']} "
+                f"({stats['slot_utilization']:.0%}), platforms: {stats['platform_running']}")
+
     async def check_and_run_tasks(self) -> None:
-        """检查并运行待执行的任务"""
+        """检查并运行待执行的任务，把空闲的并发槽位按优先级填满"""
         async with self.task_lock:
-            if self.current_task:
-                # 已有任务在执行
-                return
-            
-            # 获取待执行的任务
-            pending_tasks = await TaskDB.get_pending_tasks(limit=1)
-            if not pending_tasks:
-                return
+            reclaimed = await TaskDB.reclaim_expired_tasks()
+            if reclaimed:
+                utils.logger.warning(f"[TaskScheduler.check_and_run_tasks] Reclaimed {reclaimed} tasks with expired lease")
+            while self.running and len(self.running_tasks) < self.max_concurrency:
+                free_slots = self.max_concurrency - len(self.running_tasks)
+                saturated_platforms = [
+                    platform for platform, count in self.platform_running.items()
+                    if count >= self.get_platform_limit(platform)
+                ]
+                # 多取一些，跳过并发已满的平台后仍能填满槽位
+                pending_tasks = await TaskDB.get_pending_tasks(
+                    limit=free_slots * 2, exclude_platforms=saturated_platforms
+                )
+                started = 0
+                for task in pending_tasks:
+                    if len(self.running_tasks) >= self.max_concurrency:
+                        break
+                    platform = task["platform"]
+                    if task["id"] in self.running_tasks or \
+                            self.platform_running[platform] >= self.get_platform_limit(platform):
+                        continue
+                    if await self.start_task(task):
+                        started += 1
+                if not started:
+                    break
+            self.queue_depth = await TaskDB.count_pending_tasks()
+
+    async def start_task(self, task: Dict[str, Any]) -> bool:
+        """
+        领取任务，领取成功后占用一个并发槽位并在后台执行任务
+        
+        Args:
+            task: 任务信息
             
-            # 执行任务
-            task = pending_tasks[0]
-            self.current_task = task
-            asyncio.create_task(self.execute_task(task))
+        Returns:
+            bool: 是否领取成功，任务已被其他调度器进程领取时返回 False
+        """
+        task_id = task["id"]
+        if not await TaskDB.claim_task(task_id, self.worker_id, self.lease_seconds):
+            return False
+        self.platform_running[task["platform"]] += 1
+        self.running_tasks[task_id] = asyncio.create_task(self.execute_task(task))
+        return True
+
+    async def renew_leases_periodically(self) -> None:
+        """定时为正在执行的任务续约，租约已被其他进程接管的任务会被取消"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            for task_id, running_task in list(self.running_tasks.items()):
+                try:
+                    renewed = await TaskDB.renew_task_lease(task_id, self.worker_id, self.lease_seconds)
+                except Exception as e:
+                    utils.logger.error(f"[TaskScheduler.renew_leases_periodically] Renew task {task_id} lease error: {e}")
+                    continue
+                if not renewed:
+                    utils.logger.warning(
+                        f"[TaskScheduler.renew_leases_periodically] Lost lease of task {task_id}, cancel it")
+                    running_task.cancel()
+
+    def on_task_done(self, task: Dict[str, Any]) -> None:
+        """任务结束，释放并发槽位并唤醒调度循环补位"""
+        self.running_tasks.pop(task["id"], None)
+        self.platform_running[task["platform"]] -= 1
+        if self.platform_running[task["platform"]] <= 0:
+            del self.platform_running[task["platform"]]
+        if self._wakeup is not None:
+            self._wakeup.set()
     
     async def execute_task(self, task: Dict[str, Any]) -> None:
         """
@@ -85,15 +196,16 @@ class TaskScheduler:
         task_type = task["task_type"]
         
         utils.logger.info(f"[TaskScheduler.execute_task] Executing task {task_id} - {platform} - {task_type}")
-        
-        # 更新任务状态为运行中
-        await TaskDB.update_task_status(task_id, TaskStatus.RUNNING.value)
-        
-        # 创建执行日志
-        log = TaskExecutionLog(task_id=task_id, status="running")
-        log_id = await TaskDB.log_task_execution(log)
-        
+
+        # 任务失败后重试时从爬取断点继续
+        crawl_task_id_var.set(f"task_{task_id}")
+
+        log_id = None
         try:
+            # 创建执行日志
+            log = TaskExecutionLog(task_id=task_id, status="running")
+            log_id = await TaskDB.log_task_execution(log)
+
             # 获取任务详细信息
             task_info, task_details = await TaskDB.get_task_details(task_id)
             if not task_info:
@@ -103,25 +215,29 @@ class TaskScheduler:
             task_config = self.create_task_config(task_info, task_details)
             
             # 创建并运行爬虫，传入任务配置对象
+            # 延迟导入，避免 base.base_crawler -> task_manager -> media_platform 的循环导入
+            from factory.crawler_factory import CrawlerFactory
             crawler = CrawlerFactory.create_crawler(platform=platform, task_config=task_config)
             await crawler.start()
+            await clear_crawl_checkpoint()
             
             # 更新任务状态
-            await TaskDB.update_task_status(task_id, TaskStatus.COMPLETED.value)
+            await TaskDB.update_task_status(task_id, TaskStatus.COMPLETED.value, worker_id=self.worker_id)
             await TaskDB.update_log_status(log_id, "completed", log_message="Task completed successfully")
             
         except Exception as e:
             error_message = f"Error executing task: {str(e)}"
             utils.logger.error(f"[TaskScheduler.execute_task] {error_message}")
+            await get_crawl_checkpoint().flush()
             
             # 更新任务状态
-            await TaskDB.update_task_status(task_id, TaskStatus.FAILED.value, error_message)
-            await TaskDB.update_log_status(log_id, "failed", log_message=error_message)
+            await TaskDB.update_task_status(task_id, TaskStatus.FAILED.value, error_message,
+                                            worker_id=self.worker_id)
+            if log_id:
+                await TaskDB.update_log_status(log_id, "failed", log_message=error_message)
         
         finally:
-            # 清理当前任务
-            async with self.task_lock:
-                self.current_task = None
+            self.on_task_done(task)
     
     def create_task_config(self, task_info: Dict[str, Any], task_details: List[str]) -> TaskConfig:
         """
@@ -0,0 +1,760 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 23:50
+# @Desc    : 压测使用的本地模拟平台服务
+#            按各平台真实接口的响应结构生成搜索结果、详情和评论，支持配置页数、延迟分布、错误/验证码注入和限流；
+#            MockRoutingTransport 把平台 client 的请求转发到模拟服务，并按接口统计请求耗时
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import httpx
+
+from test.stub_server import StubHttpServer, StubRequest, StubResponse
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential")
+
+TIEBA_TEST_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   "media_platform", "tieba", "test_data")
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+_HTML_HEADERS = {"Content-Type": "text/html; charset=utf-8"}
+
+# 接口路径中的ID片段（至少 4 位数字），统计耗时时合并成同一个接口
+_PATH_ID_SEGMENT = re.compile(r"/[^/]*\d{4,}[^/]*")
+
+
+def json_response(body: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> StubResponse:
+    return status, {**_JSON_HEADERS, **(headers or {})}, json.dumps(body, ensure_ascii=False).encode()
+
+
+def html_response(html: str, status: int = 200) -> StubResponse:
+    return status, dict(_HTML_HEADERS), html.encode()
+
+
+def endpoint_name(method: str, path: str) -> str:
+    """
+    接口名，路径中的ID片段替换成 {id}
+    :param method:
+    :param path:
+    :return:
+    """
+    return f"{method.upper()} {_PATH_ID_SEGMENT.sub('/{id}', path)}"
+
+
+def keyword_id(keyword: str) -> int:
+    """
+    关键词对应的固定数字，用来生成不同关键词下不重复的内容ID
+    """
+    return zlib.crc32((keyword or "").encode("utf-8")) % 10000
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """
+    最近秩法计算分位数
+    :param sorted_values: 已排序的数据
+    :param percent: 0 - 100
+    :return:
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LatencyModel:
+    """
+    模拟服务的响应延迟，fixed: 固定延迟；uniform: [0, 2 * mean] 均匀分布；exponential: 指数分布，长尾明显
+    """
+
+    def __init__(self, mean_ms: float = 0.0, distribution: str = "fixed", rng: Optional[random.Random] = None):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Invalid latency distribution: {distribution}, supported: {LATENCY_DISTRIBUTIONS}")
+        self.mean_ms = mean_ms
+        self.distribution = distribution
+        self._rng = rng or random.Random()
+
+    def sample(self) -> float:
+        """
+        :return: 延迟，单位秒
+        """
+        if self.mean_ms <= 0:
+            return 0.0
+        if self.distribution == "uniform":
+            return self._rng.uniform(0, 2 * self.mean_ms) / 1000
+        if self.distribution == "exponential":
+            return self._rng.expovariate(1 / self.mean_ms) / 1000
+        return self.mean_ms / 1000
+
+
+class TokenBucket:
+    """
+    模拟平台的限流，每秒补充 rate 个令牌，最多累积 burst 个
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+
+class GraphQLShape:
+    """
+    按 GraphQL 查询语句的字段生成响应，展开 fragment，只支持模拟服务需要的语法子集
+    """
+    _TOKEN = re.compile(r"\.\.\.|[{}():,$!=\[\]]|\"[^\"]*\"|[A-Za-z_][A-Za-z0-9_]*|-?\d+")
+
+    def __init__(self, query: str):
+        self._tokens = self._TOKEN.findall(re.sub(r"#[^\n]*", "", query))
+        self._pos = 0
+        self._fragments: Dict[str, List] = {}
+        operations: List[List] = []
+        while self._pos < len(self._tokens):
+            keyword = self._next()
+            if keyword == "fragment":
+                name = self._next()
+                self._pos += 2  # on TypeName
+                self._fragments[name] = self._parse_selection()
+            elif keyword == "{":
+                self._pos -= 1
+                operations.append(self._parse_selection())
+            else:
+                self._pos += 1  # 操作名
+                if self._peek() == "(":
+                    self._skip_parentheses()
+                operations.append(self._parse_selection())
+        self.selection: Dict[str, Optional[Dict]] = {}
+        for operation in operations:
+            self.selection.update(self._resolve(operation))
+
+    def _next(self) -> str:
+        token = self._tokens[self._pos]
+        self._pos += 1
+        return token
+
+    def _peek(self) -> str:
+        return self._tokens[self._pos] if self._pos < len(self._tokens) else ""
+
+    def _skip_parentheses(self) -> None:
+        depth = 0
+        while True:
+            token = self._next()
+            if token == "(":
+                depth += 1
+            elif token == ")":
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def _parse_selection(self) -> List:
+        assert self._next() == "{"
+        items = []
+        while self._peek() != "}":
+            token = self._next()
+            if token == "...":
+                items.append(("spread", self._next(), None))
+                continue
+            if self._peek() == ":":  # 别名，响应中的字段名是别名
+                self._pos += 2
+            if self._peek() == "(":
+                self._skip_parentheses()
+            sub_selection = self._parse_selection() if self._peek() == "{" else None
+            items.append(("field", token, sub_selection))
+        self._pos += 1
+        return items
+
+    def _resolve(self, items: List) -> Dict[str, Optional[Dict]]:
+        selection: Dict[str, Optional[Dict]] = {}
+        for kind, name, sub_selection in items:
+            if kind == "spread":
+                for field_name, field_selection in self._resolve(self._fragments[name]).items():
+                    if isinstance(selection.get(field_name), dict) and field_selection:
+                        selection[field_name].update(field_selection)
+                    else:
+                        selection[field_name] = field_selection
+            else:
+                selection[name] = self._resolve(sub_selection) if sub_selection is not None else None
+        return selection
+
+    @staticmethod
+    def _scalar(name: str) -> Any:
+        lower_name = name.lower()
+        if lower_name.endswith("count") or lower_name in ("duration", "distance"):
+            return 0
+        if lower_name == "timestamp":
+            return int(time.time() * 1000)
+        if lower_name in ("liked", "authorliked", "following", "musicblocked", "canaddcomment"):
+            return False
+        return f"mock_{name}"
+
+    def build(self, values: Optional[Dict] = None, selection: Optional[Dict] = None) -> Dict:
+        """
+        生成响应的 data 部分，values 按字段结构覆盖生成的值，列表字段传入每个元素的覆盖值
+        未指定的复数形式字段（rootComments、feeds 等）返回空列表
+        :param values:
+        :param selection:
+        :return:
+        """
+        values = values or {}
+        result = {}
+        for name, sub_selection in (self.selection if selection is None else selection).items():
+            value = values.get(name, ...)
+            if sub_selection is None:
+                result[name] = self._scalar(name) if value is ... else value
+            elif isinstance(value, list):
+                result[name] = [self.build(item, sub_selection) for item in value]
+            elif isinstance(value, dict):
+                result[name] = self.build(value, sub_selection)
+            elif value is ...:
+                result[name] = [] if name.endswith("s") else self.build({}, sub_selection)
+            else:
+                result[name] = value
+        return result
+
+
+class MockPlatform:
+    """
+    单个平台的模拟接口，routes 为 (方法, 路径正则) -> 处理函数
+    搜索结果共 pages 页，每条内容的评论共 comment_pages 页，每页 page_size 条
+    """
+    name = ""
+
+    def __init__(self, pages: int = 3, comment_pages: int = 2, page_size: int = 10):
+        self.pages = pages
+        self.comment_pages = comment_pages
+        self.page_size = page_size
+        self.routes: List[Tuple[str, re.Pattern, Callable[[StubRequest, re.Match], StubResponse]]] = []
+
+    def route(self, method: str, pattern: str, handler: Callable[[StubRequest, re.Match], StubResponse]) -> None:
+        self.routes.append((method, re.compile(pattern + "$"), handler))
+
+    def handle(self, request: StubRequest) -> StubResponse:
+        for method, pattern, handler in self.routes:
+            match = pattern.match(request.path)
+            if match and method == request.method:
+                return handler(request, match)
+        return self.not_found_response(request)
+
+    def error_response(self, request: StubRequest) -> StubResponse:
+        """
+        服务端错误/风控
+        """
+        return json_response({"message": "mock server error"}, status=500)
+
+    def captcha_response(self, request: StubRequest) -> StubResponse:
+        """
+        触发验证码
+        """
+        return json_response({"message": "mock captcha"}, status=403)
+
+    def rate_limited_response(self, request: StubRequest) -> StubResponse:
+        return json_response({"message": "too many requests"}, status=429)
+
+    def not_found_response(self, request: StubRequest) -> StubResponse:
+        return json_response({"message": f"mock endpoint not found: {request.method} {request.path}"}, status=404)
+
+    @staticmethod
+    def query(request: StubRequest) -> Dict[str, str]:
+        return dict(parse_qsl(request.query, keep_blank_values=True))
+
+    def page_items(self, page: int, pages: int) -> range:
+        """
+        第 page 页（从 1 开始）的条目序号，超出总页数时为空
+        """
+        if page < 1 or page > pages:
+            return range(0)
+        return range((page - 1) * self.page_size, page * self.page_size)
+
+
+class XhsMockPlatform(MockPlatform):
+    name = "xhs"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.route("POST", r"/api/sns/web/v1/search/notes", self.search_notes)
+        self.route("GET", r"/explore/(?P<note_id>[^/]+)", self.note_detail_html)
+        self.route("POST", r"/api/sns/web/v1/feed", self.note_detail)
+        self.route("GET", r"/api/sns/web/v2/comment/page", self.comments)
+        self.route("GET", r"/api/sns/web/v2/comment/sub/page", self.sub_comments)
+
+    @staticmethod
+    def ok(data: Dict) -> StubResponse:
+        return json_response({"success": True, "code": 0, "msg": "成功", "data": data})
+
+    def error_response(self, request: StubRequest) -> StubResponse:
+        # 与 XiaoHongShuClient.IP_ERROR_CODE 一致
+        return json_response({"success": False, "code": 300012, "msg": "网络连接异常，请检查网络设置或重启试试"})
+
+    def captcha_response(self, request: StubRequest) -> StubResponse:
+        return random.choice((461, 471)), {"Verifytype": "102", "Verifyuuid": str(uuid.uuid4())}, b""
+
+    def rate_limited_response(self, request: StubRequest) -> StubResponse:
+        return json_response({"success": False, "code": -1, "msg": "访问频次异常，请勿频繁操作"})
+
+    @staticmethod
+    def make_note(note_id: str) -> Dict:
+        return {
+            "noteId": note_id, "type": "normal", "title": f"mock note {note_id}", "desc": "mock desc " * 20,
+            "time": int(time.time() * 1000), "lastUpdateTime": int(time.time() * 1000), "ipLocation": "上海",
+            "user": {"userId": f"user_{note_id}", "nickname": "mock user", "avatar": "https://example.com/a.jpg"},
+            "interactInfo": {"likedCount": "10", "collectedCount": "2", "commentCount": "5", "shareCount": "1"},
+            "imageList": [{"urlDefault": f"https://example.com/{note_id}.jpg", "width": 1080, "height": 1440}],
+            "tagList": [{"id": "1", "name": "mock", "type": "topic"}],
+        }
+
+    def search_notes(self, request: StubRequest, match: re.Match) -> StubResponse:
+        body = request.json()
+        keyword, page = body.get("keyword", ""), int(body.get("page", 1))
+        items = [{"id": f"xhs{keyword_id(keyword)}n{i}", "model_type": "note", "xsec_token": f"token_{i}",
+                  "xsec_source": "pc_search"} for i in self.page_items(page, self.pages)]
+        return self.ok({"has_more": page <= self.pages, "items": items})
+
+    def note_detail_html(self, request: StubRequest, match: re.Match) -> StubResponse:
+        note_id = match.group("note_id")
+        state = {"note": {"noteDetailMap": {note_id: {"note": self.make_note(note_id)}}}}
+        return html_response(f"<html><head></head><body><script>window.__INITIAL_STATE__="
+                             f"{json.dumps(state, ensure_ascii=False)}</script></body></html>")
+
+    def note_detail(self, request: StubRequest, match: re.Match) -> StubResponse:
+        note_id = request.json().get("source_note_id", "")
+        note_card = {"note_id": note_id, "type": "normal", "title": f"mock note {note_id}", "desc": "mock desc",
+                     "user": {"user_id": f"user_{note_id}", "nickname": "mock user"}, "interact_info": {}}
+        return self.ok({"items": [{"id": note_id, "model_type": "note", "note_card": note_card}]})
+
+    def comments(self, request: StubRequest, match: re.Match) -> StubResponse:
+        query = self.query(request)
+        note_id, page = query.get("note_id", ""), int(query.get("cursor") or 1)
+        comments = [{"id": f"{note_id}_c{i}", "note_id": note_id, "content": "mock comment " * 5,
+                     "create_time": int(time.time() * 1000), "ip_location": "北京", "like_count": "0",
+                     "sub_comment_count": "0", "sub_comments": [], "sub_comment_has_more": False,
+                     "user_info": {"user_id": f"user_c{i}", "nickname": "mock commenter", "image": ""}}
+                    for i in self.page_items(page, self.comment_pages)]
+        return self.ok({"has_more": page < self.comment_pages, "cursor": str(page + 1), "comments": comments})
+
+    def sub_comments(self, request: StubRequest, match: re.Match) -> StubResponse:
+        return self.ok({"has_more": False, "cursor": "", "comments": []})
+
+
+class DouyinMockPlatform(MockPlatform):
+    name = "dy"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.route("GET", r"/aweme/v1/web/general/search/single/", self.search)
+        self.route("GET", r"/aweme/v1/web/aweme/detail/", self.aweme_detail)
+        self.route("GET", r"/aweme/v1/web/comment/list/", self.comments)
+        self.route("GET", r"/aweme/v1/web/comment/list/reply/", self.sub_comments)
+
+    def error_response(self, request: StubRequest) -> StubResponse:
+        # 抖音风控时返回空响应
+        return 200, dict(_JSON_HEADERS), b""
+
+    def captcha_response(self, request: StubRequest) -> StubResponse:
+        return 200, dict(_JSON_HEADERS), b"blocked"
+
+    @staticmethod
+    def make_aweme(aweme_id: str) -> Dict:
+        url_list = [f"https://example.com/{aweme_id}_{i}.mp4" for i in range(3)]
+        return {
+            "aweme_id": aweme_id, "aweme_type": 0, "desc": f"mock aweme {aweme_id}", "create_time": int(time.time()),
+            "author": {"uid": f"uid_{aweme_id}", "sec_uid": f"sec_{aweme_id}", "short_id": "1", "unique_id": "mock",
+                       "signature": "", "nickname": "mock author", "avatar_thumb": {"url_list": [""]}},
+            "statistics": {"digg_count": 10, "collect_count": 1, "comment_count": 5, "share_count": 0},
+            "ip_label": "北京", "video": {"cover": {"url_list": url_list}, "play_addr": {"url_list": url_list}},
+        }
+
+    def search(self, request: StubRequest, match: re.Match) -> StubResponse:
+        query = self.query(request)
+        offset = int(query.get("offset", 0))
+        total = self.pages * self.page_size
+        data = [{"type": 1, "aweme_info": self.make_aweme(f"7{index:018d}")}
+                for index in range(offset, min(offset + self.page_size, total))]
+        return json_response({"status_code": 0, "data": data, "has_more": int(offset + self.page_size < total),
+                              "cursor": offset + self.page_size, "extra": {"logid": uuid.uuid4().hex}})
+
+    def aweme_detail(self, request: StubRequest, match: re.Match) -> StubResponse:
+        return json_response({"status_code": 0, "aweme_detail": self.make_aweme(self.query(request).get("aweme_id"))})
+
+    def comments(self, request: StubRequest, match: re.Match) -> StubResponse:
+        query = self.query(request)
+        aweme_id, cursor = query.get("aweme_id", ""), int(query.get("cursor", 0))
+        page = cursor // self.page_size + 1
+        comments = [{"cid": f"{aweme_id}{i:04d}", "aweme_id": aweme_id, "text": "mock comment " * 5,
+                     "create_time": int(time.time()), "ip_label": "上海", "digg_count": 0, "reply_comment_total": 0,
+                     "user": {"uid": f"uid_c{i}", "sec_uid": "", "short_id": "", "unique_id": "", "signature": "",
+                              "nickname": "mock commenter", "avatar_thumb": {"url_list": [""]}}}
+                    for i in self.page_items(page, self.comment_pages)]
+        return json_response({"status_code": 0, "comments": comments, "has_more": int(page < self.comment_pages),
+                              "cursor": cursor + self.page_size, "total": self.comment_pages * self.page_size})
+
+    def sub_comments(self, request: StubRequest, match: re.Match) -> StubResponse:
+        return json_response({"status_code": 0, "comments": [], "has_more": 0, "cursor": 0})
+
+
+class BilibiliMockPlatform(MockPlatform):
+    name = "bili"
+    WBI_IMG_URLS = ("https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png",
+                    "https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.route("GET", r"/x/web-interface/nav", self.nav)
+        self.route("GET", r"/x/web-interface/wbi/search/type", self.search)
+        self.route("GET", r"/x/web-interface/view/detail", self.video_detail)
+        self.route("GET", r"/x/v2/reply/wbi/main", self.comments)
+        self.route("GET", r"/x/v2/reply/reply", self.sub_comments)
+
+    @staticmethod
+    def ok(data: Dict) -> StubResponse:
+        return json_response({"code": 0, "message": "0", "ttl": 1, "data": data})
+
+    def error_response(self, request: StubRequest) -> StubResponse:
+        return json_response({"code": -412, "message": "请求被拦截"})
+
+    def captcha_response(self, request: StubRequest) -> StubResponse:
+        return json_response({"code": -352, "message": "风控校验失败"})
+
+    def rate_limited_response(self, request: StubRequest) -> StubResponse:
+        return json_response({"code": -509, "message": "请求过于频繁，请稍后再试"})
+
+    def nav(self, request: StubRequest, match: re.Match) -> StubResponse:
+        img_url, sub_url = self.WBI_IMG_URLS
+        return self.ok({"isLogin": True, "wbi_img": {"img_url": img_url, "sub_url": sub_url}})
+
+    def search(self, request: StubRequest, match: re.Match) -> StubResponse:
+        page = int(self.query(request).get("page", 1))
+        result = [{"type": "video", "aid": 100000 + i, "bvid": f"BV1mock{i:05d}", "title": f"mock video {i}"}
+                  for i in self.page_items(page, self.pages)]
+        return self.ok({"page": page, "pagesize": self.page_size, "numPages": self.pages, "result": result})
+
+    def video_detail(self, request: StubRequest, match: re.Match) -> StubResponse:
+        aid = int(self.query(request).get("aid") or 0)
+        owner = {"mid": aid % 1000, "name": "mock up", "face": "https://example.com/face.jpg"}
+        view = {"aid": aid, "bvid": f"BV1mock{aid}", "cid": aid * 10, "title": f"mock video {aid}", "desc": "mock",
+                "pubdate": int(time.time()), "pic": "https://example.com/cover.jpg", "owner": owner,
+                "stat": {"view": 100, "danmaku": 1, "reply": 5, "favorite": 2, "coin": 1, "share": 0, "like": 10,
+                         "dislike": 0}}
+        card = {"mid": str(owner["mid"]), "name": owner["name"], "sex": "保密", "sign": "", "face": owner["face"],
+                "fans": 0, "friend": 0, "level_info": {"current_level": 1},
+                "official_verify": {"type": -1, "desc": ""}}
+        return self.ok({"View": view, "Card": {"card": card, "follower": 0, "like_num": 0}})
+
+    def comments(self, request: StubRequest, match: re.Match) -> StubResponse:
+        query = self.query(request)
+        # next 从 0 开始
+        oid, page = query.get("oid", ""), int(query.get("next") or 0) + 1
+        replies = [{"rpid": int(oid or 0) * 10000 + i, "oid": int(oid or 0), "parent": 0, "ctime": int(time.time()),
+                    "rcount": 0, "like": 0, "content": {"message": "mock comment " * 5},
+                    "member": {"mid": str(i), "uname": "mock commenter", "sex": "保密", "sign": "", "avatar": ""}}
+                   for i in self.page_items(page, self.comment_pages)]
+        return self.ok({"cursor": {"is_begin": page == 1, "is_end": page >= self.comment_pages, "next": page},
+                        "replies": replies})
+
+    def sub_comments(self, request: StubRequest, match: re.Match) -> StubResponse:
+        return self.ok({"page": {"count": 0, "num": 1, "size": self.page_size}, "replies": []})
+
+
+class WeiboMockPlatform(MockPlatform):
+    name = "wb"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.route("GET", r"/api/container/getIndex", self.search)
+        self.route("GET", r"/comments/hotflow", self.comments)
+
+    @staticmethod
+    def ok(data: Dict) -> StubResponse:
+        return json_response({"ok": 1, "data": data})
+
+    def error_response(self, request: StubRequest) -> StubResponse:
+        return json_response({"ok": 0, "msg": "请求过于频繁，歇歇吧"})
+
+    def captcha_response(self, request: StubRequest) -> StubResponse:
+        return json_response({"ok": -100, "url": "https://passport.weibo.com/sso/signin"})
+
+    @staticmethod
+    def created_at() -> str:
+        return time.strftime("%a %b %d %H:%M:%S +0800 %Y", time.localtime())
+
+    def search(self, request: StubRequest, match: re.Match) -> StubResponse:
+        page = int(self.query(request).get("page", 1))
+        cards = [{"card_type": 9, "mblog": {
+            "id": f"5{i:015d}", "text": f"<span>mock weibo {i}</span>", "created_at": self.created_at(),
+            "attitudes_count": 1, "comments_count": 5, "reposts_count": 0, "region_name": "发布于 北京",
+            "user": {"id": i, "screen_name": "mock user", "gender": "f", "profile_url": "", "profile_image_url": ""},
+        }} for i in self.page_items(page, self.pages)]
+        return self.ok({"cardlistInfo": {"page": page + 1}, "cards": cards})
+
+    def comments(self, request: StubRequest, match: re.Match) -> StubResponse:
+        query = self.query(request)
+        note_id, page = query.get("id", ""), int(query.get("max_id") or 1)
+        comments = [{"id": f"{note_id}{i:04d}", "text": "mock comment " * 5, "created_at": self.created_at(),
+                     "total_number": 0, "like_count": 0, "source": "来自北京", "rootid": f"{note_id}{i:04d}",
+                     "user": {"id": i, "screen_name": "mock commenter", "gender": "m", "profile_url": "",
+                              "profile_image_url": ""}}
+                    for i in self.page_items(page, self.comment_pages)]
+        return self.ok({"data": comments, "max_id": page + 1 if page < self.comment_pages else 0, "max_id_type": 0})
+
+
+class KuaishouMockPlatform(MockPlatform):
+    """
+    快手 GraphQL 接口，响应字段按请求中的查询语句（media_platform/kuaishou/graphql/*.graphql）生成
+    """
+    name = "ks"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._shapes: Dict[str, GraphQLShape] = {}
+        self.route("POST", r"/graphql", self.graphql)
+
+    def error_response(self, request: StubRequest) -> StubResponse:
+        return json_response({"errors": [{"message": "mock server error"}], "data": None})
+
+    def captcha_response(self, request: StubRequest) -> StubResponse:
+        return json_response({"errors": [{"message": "need captcha", "extensions": {"code": 400002}}], "data": None})
+
+    def rate_limited_response(self, request: StubRequest) -> StubResponse:
+        return json_response({"errors": [{"message": "too many requests"}], "data": None})
+
+    def shape(self, query: str) -> GraphQLShape:
+        shape = self._shapes.get(query)
+        if shape is None:
+            shape = self._shapes[query] = GraphQLShape(query)
+        return shape
+
+    def graphql(self, request: StubRequest, match: re.Match) -> StubResponse:
+        body = request.json()
+        variables = body.get("variables", {})
+        operation_name = body.get("operationName")
+        if operation_name == "visionSearchPhoto":
+            page = int(variables.get("pcursor") or 1)
+            feeds = [{"type": 1, "author": {"id": f"author_{i}", "name": "mock author"},
+                      "photo": {"id": f"3x{keyword_id(variables.get('keyword'))}p{i}",
+                                "caption": f"mock video {i}", "realLikeCount": 10, "viewCount": 100}}
+                     for i in self.page_items(page, self.pages)]
+            values = {"visionSearchPhoto": {"result": 1, "searchSessionId": "mock_session", "feeds": feeds,
+                                            "pcursor": str(page + 1) if page < self.pages else "no_more"}}
+        elif operation_name == "commentListQuery":
+            photo_id, page = variables.get("photoId", ""), int(variables.get("pcursor") or 1)
+            root_comments = [{"commentId": f"{photo_id}_{i}", "authorId": f"author_c{i}", "content": "mock comment",
+                              "subCommentsPcursor": "no_more"} for i in self.page_items(page, self.comment_pages)]
+            values = {"visionCommentList": {"rootComments": root_comments,
+                                            "pcursor": str(page + 1) if page < self.comment_pages else "no_more"}}
+        elif operation_name == "visionSubCommentList":
+            values = {"visionSubCommentList": {"pcursor": "no_more", "subComments": []}}
+        else:
+            values = {}
+        return json_response({"data": self.shape(body.get("query", "{}")).build(values)})
+
+
+class TiebaMockPlatform(MockPlatform):
+    """
+    贴吧接口返回 HTML 页面，使用 media_platform/tieba/test_data 中保存的真实页面
+    """
+    name = "tieba"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pages: Dict[str, str] = {}
+        self.route("GET", r"/f/search/res", self.search)
+        self.route("GET", r"/p/comment", self.sub_comments)
+        self.route("GET", r"/p/(?P<note_id>\d+)", self.note)
+
+    def error_response(self, request: StubRequest) -> StubResponse:
+        return html_response("<html><body>mock server error</body></html>", status=500)
+
+    def captcha_response(self, request: StubRequest) -> StubResponse:
+        return html_response("blocked")
+
+    def page_html(self, file_name: str) -> str:
+        html = self._pages.get(file_name)
+        if html is None:
+            with open(os.path.join(TIEBA_TEST_DATA_DIR, file_name), mode="r", encoding="utf-8") as f:
+                html = self._pages[file_name] = f.read()
+        return html
+
+    def search(self, request: StubRequest, match: re.Match) -> StubResponse:
+        page = int(self.query(request).get("pn", 1))
+        if page > self.pages:
+            return html_response("<html><body></body></html>")
+        return html_response(self.page_html("search_keyword_notes.html"))
+
+    def note(self, request: StubRequest, match: re.Match) -> StubResponse:
+        page = self.query(request).get("pn")
+        if page is None:
+            return html_response(self.page_html("note_detail.html"))
+        if int(page) > self.comment_pages:
+            return html_response("<html><body></body></html>")
+        return html_response(self.page_html("note_comments.html"))
+
+    def sub_comments(self, request: StubRequest, match: re.Match) -> StubResponse:
+        return html_response(self.page_html("note_sub_comments.html"))
+
+
+class ZhihuMockPlatform(MockPlatform):
+    name = "zhihu"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.route("GET", r"/api/v4/search_v3", self.search)
+        self.route("GET", r"/api/v4/comment_v5/(?P<content_type>\w+)s/(?P<content_id>\d+)/root_comment",
+                   self.comments)
+        self.route("GET", r"/api/v4/comment_v5/comment/(?P<comment_id>\d+)/child_comment", self.sub_comments)
+
+    def error_response(self, request: StubRequest) -> StubResponse:
+        return json_response({"error": {"code": 10003, "message": "请求参数异常，请升级客户端后重试"}})
+
+    def captcha_response(self, request: StubRequest) -> StubResponse:
+        return json_response({"error": {"code": 40362, "message": "您当前请求存在异常，暂时限制本次访问"}}, status=403)
+
+    def rate_limited_response(self, request: StubRequest) -> StubResponse:
+        return json_response({"error": {"code": 10004, "message": "请求过于频繁"}}, status=429)
+
+    @staticmethod
+    def make_author(index: int) -> Dict:
+        return {"id": f"author{index}", "url_token": f"mock-{index}", "name": "mock author", "avatar_url": ""}
+
+    def search(self, request: StubRequest, match: re.Match) -> StubResponse:
+        query = self.query(request)
+        limit = int(query.get("limit", self.page_size))
+        page = int(query.get("offset", 0)) // max(limit, 1) + 1
+        data = [{"type": "search_result", "object": {
+            "id": str(1000000 + i), "type": "answer", "question": {"id": str(2000000 + i)},
+            "content": f"<p>mock answer {i}</p>", "title": f"<em>mock</em> question {i}", "excerpt": "mock excerpt",
+            "created_time": int(time.time()), "updated_time": int(time.time()), "voteup_count": 10,
+            "comment_count": 5, "author": self.make_author(i),
+        }} for i in self.page_items(page, self.pages)]
+        return json_response({"data": data, "paging": {"is_end": page >= self.pages}})
+
+    def comments(self, request: StubRequest, match: re.Match) -> StubResponse:
+        content_id = match.group("content_id")
+        page = int(self.query(request).get("offset") or 1)
+        data = [{"type": "comment", "id": f"{content_id}{i:04d}", "content": "<p>mock comment</p>",
+                 "created_time": int(time.time()), "child_comment_count": 0, "like_count": 0,
+                 "author": self.make_author(i), "comment_tag": [{"type": "ip_info", "text": "IP 属地北京"}]}
+                for i in self.page_items(page, self.comment_pages)]
+        is_end = page >= self.comment_pages
+        next_url = "" if is_end else (f"https://www.zhihu.com/api/v4/comment_v5/{match.group('content_type')}s/"
+                                      f"{content_id}/root_comment?limit=10&offset={page + 1}&order_by=score")
+        return json_response({"data": data, "paging": {"is_end": is_end, "next": next_url}})
+
+    def sub_comments(self, request: StubRequest, match: re.Match) -> StubResponse:
+        return json_response({"data": [], "paging": {"is_end": True, "next": ""}})
+
+
+MOCK_PLATFORMS = {platform.name: platform for platform in (
+    XhsMockPlatform, DouyinMockPlatform, BilibiliMockPlatform, WeiboMockPlatform, KuaishouMockPlatform,
+    TiebaMockPlatform, ZhihuMockPlatform)}
+
+
+class MockPlatformServer(StubHttpServer):
+    """
+    模拟平台服务
+    每个请求依次经过：限流（超过 rate_limit 次/秒返回平台的限流响应） -> 延迟 -> 按比例注入验证码、服务端错误 -> 平台接口
+    """
+
+    def __init__(self, platform: str, pages: int = 3, comment_pages: int = 2, page_size: int = 10,
+                 latency_ms: float = 0.0, latency_distribution: str = "fixed", error_rate: float = 0.0,
+                 captcha_rate: float = 0.0, rate_limit: float = 0.0, seed: Optional[int] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        super().__init__(handler=self._handle, host=host, port=port)
+        if platform not in MOCK_PLATFORMS:
+            raise ValueError(f"Invalid mock platform: {platform}, supported: {list(MOCK_PLATFORMS)}")
+        self.platform = MOCK_PLATFORMS[platform](pages=pages, comment_pages=comment_pages, page_size=page_size)
+        self._rng = random.Random(seed)
+        self.latency_model = LatencyModel(latency_ms, latency_distribution, self._rng)
+        self.error_rate = error_rate
+        self.captcha_rate = captcha_rate
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit > 0 else None
+        # 注入的各类异常次数：error / captcha / rate_limited
+        self.injected: Dict[str, int] = defaultdict(int)
+
+    async def _handle(self, request: StubRequest) -> StubResponse:
+        if self.rate_limiter is not None and not self.rate_limiter.try_acquire():
+            self.injected["rate_limited"] += 1
+            return self.platform.rate_limited_response(request)
+        latency = self.latency_model.sample()
+        if latency:
+            await asyncio.sleep(latency)
+        roll = self._rng.random()
+        if roll < self.captcha_rate:
+            self.injected["captcha"] += 1
+            return self.platform.captcha_response(request)
+        if roll < self.captcha_rate + self.error_rate:
+            self.injected["error"] += 1
+            return self.platform.error_response(request)
+        return self.platform.handle(request)
+
+
+class MockRoutingTransport(httpx.AsyncBaseTransport):
+    """
+    把所有请求转发到模拟服务（保留路径和参数，替换协议、域名和端口），按接口记录请求耗时
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = httpx.URL(base_url)
+        self._transport = httpx.AsyncHTTPTransport()
+        # 接口 -> 每次请求的耗时，单位毫秒
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        # 接口 -> 非 200 响应次数
+        self.status_errors: Dict[str, int] = defaultdict(int)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = endpoint_name(request.method, request.url.path)
+        if request.url.path.endswith("/graphql"):
+            # GraphQL 的所有操作共用一个地址，按 operationName 区分
+            endpoint += f" {json.loads(request.content or b'{}').get('operationName', '')}"
+        request.url = request.url.copy_with(scheme=self.base_url.scheme, host=self.base_url.host,
+                                            port=self.base_url.port)
+        request.headers["Host"] = self.base_url.netloc.decode("ascii")
+        start = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        await response.aread()
+        self.latencies[endpoint].append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            self.status_errors[endpoint] += 1
+        return response
+
+    def latency_summary(self) -> List[Tuple[str, int, float, float, float]]:
+        """
+        :return: [(接口, 请求数, p50, p95, p99)]，单位毫秒
+        """
+        summary = []
+        for endpoint, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            summary.append((endpoint, len(latencies), percentile(latencies, 50), percentile(latencies, 95),
+                            percentile(latencies, 99)))
+        return summary
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
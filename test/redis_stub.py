@@ -0,0 +1,387 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 02:20
+# @Desc    : 测试与性能基准使用的本地 Redis 兼容服务（RESP2 协议），不依赖 redis-server
+#            支持字符串、哈希、过期时间、SCAN、WATCH/MULTI/EXEC 事务等缓存和代理租约用到的命令子集，数据只保存在内存中
+import asyncio
+import fnmatch
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+CRLF = b"\r\n"
+
+
+class RedisStubError(Exception):
+    pass
+
+
+class RedisStubState:
+    """
+    所有连接共享的数据，按 key 记录版本号，WATCH 的 key 版本变化后 EXEC 放弃执行
+    """
+
+    def __init__(self):
+        self.data: Dict[bytes, Any] = {}
+        self.expires: Dict[bytes, float] = {}
+        self.versions: Dict[bytes, int] = {}
+        self.command_count = 0
+
+    def touch(self, key: bytes) -> None:
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def alive(self, key: bytes) -> bool:
+        expire_at = self.expires.get(key)
+        if expire_at is not None and expire_at <= time.monotonic():
+            self.delete(key)
+        return key in self.data
+
+    def delete(self, key: bytes) -> bool:
+        self.expires.pop(key, None)
+        if self.data.pop(key, None) is None:
+            return False
+        self.touch(key)
+        return True
+
+    def live_keys(self) -> List[bytes]:
+        return [key for key in list(self.data) if self.alive(key)]
+
+
+class RedisStubConnection:
+    def __init__(self, state: RedisStubState):
+        self.state = state
+        self.watched: Dict[bytes, int] = {}
+        self.queued: Optional[List[List[bytes]]] = None
+
+    def execute(self, args: List[bytes]) -> Any:
+        command = args[0].upper().decode()
+        if self.queued is not None and command not in ("EXEC", "DISCARD", "MULTI", "WATCH"):
+            self.queued.append(args)
+            return "QUEUED"
+        handler = getattr(self, f"cmd_{command.lower()}", None)
+        if handler is None:
+            raise RedisStubError(f"ERR unknown command '{command}'")
+        self.state.command_count += 1
+        return handler(*args[1:])
+
+    # 连接
+    def cmd_ping(self, *args):
+        return args[0] if args else "PONG"
+
+    def cmd_auth(self, *args):
+        return "OK"
+
+    def cmd_select(self, db):
+        return "OK"
+
+    def cmd_flushdb(self, *args):
+        for key in list(self.state.data):
+            self.state.delete(key)
+        return "OK"
+
+    # 字符串
+    def cmd_get(self, key):
+        if not self.state.alive(key):
+            return None
+        value = self.state.data[key]
+        if not isinstance(value, bytes):
+            raise RedisStubError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def cmd_mget(self, *keys):
+        return [self.state.data[key] if self.state.alive(key) and isinstance(self.state.data[key], bytes) else None
+                for key in keys]
+
+    def cmd_set(self, key, value, *options):
+        expire_at, nx, xx, i = None, False, False, 0
+        while i < len(options):
+            option = options[i].upper()
+            if option in (b"EX", b"PX"):
+                amount = int(options[i + 1])
+                expire_at = time.monotonic() + (amount if option == b"EX" else amount / 1000)
+                i += 2
+                continue
+            nx, xx = nx or option == b"NX", xx or option == b"XX"
+            i += 1
+        exists = self.state.alive(key)
+        if (nx and exists) or (xx and not exists):
+            return None
+        self.state.data[key] = value
+        self.state.expires.pop(key, None)
+        if expire_at is not None:
+            self.state.expires[key] = expire_at
+        self.state.touch(key)
+        return "OK"
+
+    def cmd_mset(self, *pairs):
+        for key, value in zip(pairs[::2], pairs[1::2]):
+            self.cmd_set(key, value)
+        return "OK"
+
+    def cmd_del(self, *keys):
+        return sum(self.state.alive(key) and self.state.delete(key) for key in keys)
+
+    def cmd_unlink(self, *keys):
+        return self.cmd_del(*keys)
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if self.state.alive(key))
+
+    def cmd_pexpire(self, key, milliseconds):
+        if not self.state.alive(key):
+            return 0
+        self.state.expires[key] = time.monotonic() + int(milliseconds) / 1000
+        self.state.touch(key)
+        return 1
+
+    def cmd_expire(self, key, seconds):
+        return self.cmd_pexpire(key, int(seconds) * 1000)
+
+    def cmd_pttl(self, key):
+        if not self.state.alive(key):
+            return -2
+        expire_at = self.state.expires.get(key)
+        return -1 if expire_at is None else int((expire_at - time.monotonic()) * 1000)
+
+    def cmd_ttl(self, key):
+        pttl = self.cmd_pttl(key)
+        return pttl if pttl < 0 else (pttl + 999) // 1000
+
+    def cmd_keys(self, pattern):
+        return [key for key in self.state.live_keys() if fnmatch.fnmatchcase(key.decode(), pattern.decode())]
+
+    def cmd_scan(self, cursor, *options):
+        pattern, count = b"*", 10
+        for name, value in zip(options[::2], options[1::2]):
+            if name.upper() == b"MATCH":
+                pattern = value
+            elif name.upper() == b"COUNT":
+                count = int(value)
+        keys = sorted(self.state.live_keys())
+        start = int(cursor)
+        batch = keys[start:start + count]
+        next_cursor = start + count if start + count < len(keys) else 0
+        return [str(next_cursor).encode(),
+                [key for key in batch if fnmatch.fnmatchcase(key.decode(), pattern.decode())]]
+
+    def cmd_dbsize(self):
+        return len(self.state.live_keys())
+
+    # 哈希
+    def _hash(self, key, create: bool = False) -> Optional[Dict[bytes, bytes]]:
+        if not self.state.alive(key):
+            if not create:
+                return None
+            self.state.data[key] = {}
+        value = self.state.data[key]
+        if not isinstance(value, dict):
+            raise RedisStubError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def cmd_hincrby(self, key, field, amount):
+        hash_value = self._hash(key, create=True)
+        hash_value[field] = str(int(hash_value.get(field, b"0")) + int(amount)).encode()
+        self.state.touch(key)
+        return int(hash_value[field])
+
+    def cmd_hset(self, key, *pairs):
+        hash_value = self._hash(key, create=True)
+        added = sum(1 for field in pairs[::2] if field not in hash_value)
+        hash_value.update(zip(pairs[::2], pairs[1::2]))
+        self.state.touch(key)
+        return added
+
+    def cmd_hget(self, key, field):
+        hash_value = self._hash(key)
+        return None if hash_value is None else hash_value.get(field)
+
+    def cmd_hmget(self, key, *fields):
+        hash_value = self._hash(key) or {}
+        return [hash_value.get(field) for field in fields]
+
+    def cmd_hgetall(self, key):
+        hash_value = self._hash(key) or {}
+        return [item for pair in hash_value.items() for item in pair]
+
+    def cmd_hdel(self, key, *fields):
+        hash_value = self._hash(key) or {}
+        removed = sum(1 for field in fields if hash_value.pop(field, None) is not None)
+        if removed:
+            self.state.touch(key)
+        return removed
+
+    # 事务
+    def cmd_watch(self, *keys):
+        if self.queued is not None:
+            raise RedisStubError("ERR WATCH inside MULTI is not allowed")
+        for key in keys:
+            self.state.alive(key)
+            self.watched[key] = self.state.versions.get(key, 0)
+        return "OK"
+
+    def cmd_unwatch(self):
+        self.watched.clear()
+        return "OK"
+
+    def cmd_multi(self):
+        if self.queued is not None:
+            raise RedisStubError("ERR MULTI calls can not be nested")
+        self.queued = []
+        return "OK"
+
+    def cmd_discard(self):
+        self.queued = None
+        self.watched.clear()
+        return "OK"
+
+    def cmd_exec(self):
+        if self.queued is None:
+            raise RedisStubError("ERR EXEC without MULTI")
+        queued, self.queued = self.queued, None
+        watched, self.watched = self.watched, {}
+        for key, version in watched.items():
+            self.state.alive(key)
+            if self.state.versions.get(key, 0) != version:
+                return None
+        results = []
+        for args in queued:
+            try:
+                results.append(self.execute(args))
+            except RedisStubError as e:
+                results.append(e)
+        return results
+
+
+def encode_resp(value: Any) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RedisStubError):
+        return b"-" + str(value).encode() + CRLF
+    if isinstance(value, str):
+        return b"+" + value.encode() + CRLF
+    if isinstance(value, bool):
+        return b":" + str(int(value)).encode() + CRLF
+    if isinstance(value, int):
+        return b":" + str(value).encode() + CRLF
+    if isinstance(value, bytes):
+        return b"$" + str(len(value)).encode() + CRLF + value + CRLF
+    if isinstance(value, list):
+        return b"*" + str(len(value)).encode() + CRLF + b"".join(encode_resp(item) for item in value)
+    raise TypeError(f"can not encode {type(value)}")
+
+
+async def read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.strip().split()
+    args = []
+    for _ in range(int(line[1:])):
+        size = int((await reader.readline())[1:])
+        args.append((await reader.readexactly(size + 2))[:-2])
+    return args
+
+
+class RedisStubServer:
+    """
+    极简的 Redis 兼容服务，只用于本地测试和基准
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.state = RedisStubState()
+        self.connection_count = 0
+        self._writers: Set[asyncio.StreamWriter] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> Tuple[str, int]:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.host, self.port
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            await asyncio.sleep(0)
+            self._server = None
+
+    def start_in_thread(self) -> Tuple[str, int]:
+        """
+        在独立线程的事件循环中运行服务，同步的 redis 客户端也可以访问
+        :return:
+        """
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+
+        self._thread_loop = loop
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.host, self.port
+
+    def stop_thread(self) -> None:
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop(), self._thread_loop).result()
+        self._thread_loop.call_soon_threadsafe(self._thread_loop.stop)
+        self._thread.join()
+        self._thread_loop.close()
+        self._thread, self._thread_loop = None, None
+
+    async def __aenter__(self) -> "RedisStubServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connection_count += 1
+        connection = RedisStubConnection(self.state)
+        self._writers.add(writer)
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                if not args:
+                    continue
+                try:
+                    reply = connection.execute(args)
+                except RedisStubError as e:
+                    reply = e
+                except (ValueError, IndexError, TypeError):
+                    reply = RedisStubError(f"ERR wrong arguments for '{args[0].decode()}' command")
+                writer.write(encode_resp(reply))
+                # 管道中连续的命令一起写回
+                if not reader._buffer:
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
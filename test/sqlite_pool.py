@@ -0,0 +1,114 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 17:10
+# @Desc    : 测试用的 aiomysql 连接池替身，把 sql 转成 sqlite 执行，并统计数据库往返次数
+#            sqlite 文件可以被多个进程同时打开，用来测试多个调度器进程领取任务
+import datetime
+import re
+import sqlite3
+from typing import Optional
+
+import aiomysql
+
+
+def _now() -> str:
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def to_sqlite(sql: str, conflict_column: Optional[str]) -> str:
+    """把测试用到的 mysql 语法转成 sqlite 语法"""
+    sql = sql.replace("%s", "?")
+    sql = re.sub(r"NOW\(\) \+ INTERVAL \? SECOND", "DATETIME(NOW(), ? || ' seconds')", sql)
+    if conflict_column:
+        sql = re.sub(
+            r"ON DUPLICATE KEY UPDATE (.*)$",
+            lambda m: f"ON CONFLICT({conflict_column}) DO UPDATE SET "
+                      + re.sub(r"VALUES\((`\w+`)\)", r"excluded.\1", m.group(1)),
+            sql,
+        )
+    return sql
+
+
+class SqliteCursor:
+    def __init__(self, pool: "SqlitePool", dict_cursor: bool):
+        self.pool = pool
+        self.dict_cursor = dict_cursor
+        self.lastrowid = None
+        self.rowcount = -1
+        self._cursor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, sql: str, args=None) -> int:
+        self.pool.round_trips += 1
+        self._cursor = self.pool.conn.execute(to_sqlite(sql, self.pool.conflict_column), list(args or []))
+        self.pool.conn.commit()
+        self.lastrowid = self._cursor.lastrowid
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount
+
+    async def fetchall(self):
+        rows = self._cursor.fetchall()
+        if not self.dict_cursor:
+            return rows
+        columns = [col[0] for col in self._cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    async def fetchone(self):
+        rows = await self.fetchall()
+        return rows[0] if rows else None
+
+
+class SqliteConnection:
+    def __init__(self, pool: "SqlitePool"):
+        self.pool = pool
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def cursor(self, cursor_class=None):
+        return SqliteCursor(self.pool, dict_cursor=cursor_class is aiomysql.DictCursor)
+
+
+class SqlitePool:
+    def __init__(self, db_path: str = ":memory:", schema: str = "", conflict_column: Optional[str] = None):
+        """
+
+        Args:
+            db_path: sqlite 文件路径
+            schema: 建表语句
+            conflict_column: 唯一索引字段，用于把 ON DUPLICATE KEY UPDATE 转成 sqlite 的 ON CONFLICT
+        """
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.create_function("NOW", 0, _now)
+        if schema:
+            self.conn.executescript(schema)
+        self.conflict_column = conflict_column
+        self.round_trips = 0
+
+    def acquire(self):
+        return SqliteConnection(self)
+
+    def close(self):
+        self.conn.close()
+
+    async def wait_closed(self):
+        pass
@@ -0,0 +1,160 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 10:40
+# @Desc    : 测试与性能基准使用的本地 HTTP/1.1 桩服务，支持 keep-alive 与可配置的响应延迟
+import asyncio
+import inspect
+import json
+import threading
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Union
+
+StubResponse = Tuple[int, Dict[str, str], bytes]
+StubHandler = Callable[["StubRequest"], Union[StubResponse, Awaitable[StubResponse]]]
+
+DEFAULT_BODY = json.dumps({"success": True, "code": 0, "ok": 1, "data": {}}).encode()
+
+_REASONS = {200: "OK", 204: "No Content", 206: "Partial Content", 400: "Bad Request", 404: "Not Found",
+            416: "Range Not Satisfiable", 429: "Too Many Requests", 461: "Captcha", 471: "Captcha",
+            500: "Internal Server Error"}
+
+
+class StubRequest:
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.target = target
+        self.path, _, self.query = target.partition("?")
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body or b"{}")
+
+
+class StubHttpServer:
+    """
+    极简的异步 HTTP/1.1 服务，只用于本地测试，不依赖第三方框架
+    统计新建连接数和请求数，用于观察客户端是否复用了连接
+    """
+
+    def __init__(self, handler: Optional[StubHandler] = None, latency: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.handler = handler
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self.connection_count = 0
+        self.request_count = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def start_in_thread(self) -> str:
+        """
+        在独立线程的事件循环中运行服务，被测代码即使阻塞了自己的事件循环，桩服务也能继续响应
+        :return:
+        """
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+
+        self._thread_loop = loop
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.base_url
+
+    def stop_thread(self) -> None:
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop(), self._thread_loop).result()
+        self._thread_loop.call_soon_threadsafe(self._thread_loop.stop)
+        self._thread.join()
+        self._thread_loop.close()
+        self._thread, self._thread_loop = None, None
+
+    async def __aenter__(self) -> "StubHttpServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connection_count += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = b""
+                if "content-length" in headers:
+                    body = await reader.readexactly(int(headers["content-length"]))
+                self.request_count += 1
+
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                status, resp_headers, resp_body = await self._dispatch(StubRequest(method, target, headers, body))
+                keep_alive = headers.get("connection", "").lower() != "close"
+                # handler 声明的 Content-Length 比 body 长时，发送完 body 后断开连接，用来模拟传输中断
+                content_length = int(resp_headers.pop("Content-Length", len(resp_body)))
+                head = [f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}",
+                        f"Content-Length: {content_length}",
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                resp_headers.setdefault("Content-Type", "application/json")
+                head.extend(f"{k}: {v}" for k, v in resp_headers.items())
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + resp_body)
+                await writer.drain()
+                if not keep_alive or content_length > len(resp_body):
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: StubRequest) -> StubResponse:
+        if self.handler is None:
+            return 200, {}, DEFAULT_BODY
+        result = self.handler(request)
+        if inspect.isawaitable(result):
+            result = await result
+        status, headers, body = result
+        return status, dict(headers), body
@@ -0,0 +1,171 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 16:20
+# @Desc    : 用 sqlite 代替 mysql，统计保存 1000 条评论的数据库往返次数
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from async_db import AsyncMysqlDB
+from store.xhs.xhs_store_impl import XhsDbStoreImplement
+from store.xhs.xhs_store_sql import (add_new_comment, query_comment_by_comment_id,
+                                     update_comment_by_comment_id)
+from test.sqlite_pool import SqlitePool
+from var import media_crawler_db_var
+
+XHS_NOTE_COMMENT_SCHEMA = """
+CREATE TABLE xhs_note_comment (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    nickname TEXT,
+    avatar TEXT,
+    ip_location TEXT,
+    add_ts BIGINT NOT NULL,
+    last_modify_ts BIGINT NOT NULL,
+    comment_id TEXT NOT NULL UNIQUE,
+    create_time BIGINT NOT NULL,
+    note_id TEXT NOT NULL,
+    content TEXT NOT NULL,
+    sub_comment_count INT NOT NULL,
+    pictures TEXT,
+    parent_comment_id TEXT,
+    like_count TEXT
+)
+"""
+
+
+def make_comment(i: int, like_count: int = 0) -> dict:
+    return {
+        "comment_id": f"comment_{i}",
+        "create_time": 1705200000000 + i,
+        "ip_location": "上海",
+        "note_id": "note_1",
+        "content": f"评论 {i}",
+        "user_id": "user_1",
+        "nickname": "测试用户",
+        "avatar": "",
+        "sub_comment_count": 0,
+        "pictures": "",
+        "parent_comment_id": 0,
+        "last_modify_ts": 1705200000000,
+        "like_count": str(like_count),
+    }
+
+
+class TestAsyncMysqlDBBatchUpsert(IsolatedAsyncioTestCase):
+
+    async def test_store_comments_round_trips(self):
+        pool = SqlitePool(schema=XHS_NOTE_COMMENT_SCHEMA, conflict_column="comment_id")
+        async_db = AsyncMysqlDB(pool)
+        media_crawler_db_var.set(async_db)
+        store = XhsDbStoreImplement()
+        for i in range(1000):
+            await store.store_comment(make_comment(i))
+        # 重复抓到的评论只更新，不会重复插入，也不会修改 add_ts
+        first_add_ts = pool.conn.execute("select add_ts from xhs_note_comment where comment_id = 'comment_0'").fetchone()
+        for i in range(10):
+            await store.store_comment(make_comment(i, like_count=99))
+        await async_db.close_upserts()
+
+        self.assertEqual(pool.conn.execute("select count(*) from xhs_note_comment").fetchone()[0], 1000)
+        row = pool.conn.execute("select add_ts, like_count from xhs_note_comment where comment_id = 'comment_0'").fetchone()
+        self.assertEqual(row, (first_add_ts[0], "99"))
+        self.assertLessEqual(pool.round_trips, 1010 // async_db.batch_size + 1)
+
+    async def test_failed_flush_keeps_rows(self):
+        pool = SqlitePool(schema=XHS_NOTE_COMMENT_SCHEMA, conflict_column="comment_id")
+        async_db = AsyncMysqlDB(pool)
+        media_crawler_db_var.set(async_db)
+        store = XhsDbStoreImplement()
+        batch_upsert = async_db.batch_upsert
+        failures = [0]
+
+        async def flaky_batch_upsert(table_name, items, *args, **kwargs):
+            # 第二批写入失败一次，模拟数据库连接断开
+            if pool.round_trips == 1 and failures[0] == 0:
+                failures[0] += 1
+                raise ConnectionError("lost connection to mysql server")
+            return await batch_upsert(table_name, items, *args, **kwargs)
+
+        async_db.batch_upsert = flaky_batch_upsert
+        # 写入失败只记录日志，不会抛到爬虫中
+        for i in range(async_db.batch_size * 2 + 10):
+            await store.store_comment(make_comment(i))
+        await async_db.close_upserts()
+
+        self.assertEqual(failures[0], 1)
+        self.assertEqual(pool.conn.execute("select count(*) from xhs_note_comment").fetchone()[0],
+                         async_db.batch_size * 2 + 10)
+
+    async def test_bad_row_dropped_after_retries(self):
+        pool = SqlitePool(schema=XHS_NOTE_COMMENT_SCHEMA, conflict_column="comment_id")
+        async_db = AsyncMysqlDB(pool)
+        media_crawler_db_var.set(async_db)
+        store = XhsDbStoreImplement()
+        batch_upsert = async_db.batch_upsert
+        failed_batches = []
+
+        async def bad_row_batch_upsert(table_name, items, *args, **kwargs):
+            # comment_5 每次都写入失败，模拟数据过长
+            if any(item["comment_id"] == "comment_5" for item in items):
+                failed_batches.append(len(items))
+                raise ValueError("Data too long for column 'content'")
+            return await batch_upsert(table_name, items, *args, **kwargs)
+
+        async_db.batch_upsert = bad_row_batch_upsert
+        total = async_db.batch_size * 2 + 10
+        for i in range(total):
+            await store.store_comment(make_comment(i))
+        await async_db.close_upserts()
+
+        # 批量写入失败 max_retries 次后拆成单条写入，只丢弃 comment_5
+        self.assertEqual(failed_batches, [async_db.batch_size] * async_db.max_retries + [1])
+        self.assertEqual(pool.conn.execute("select count(*) from xhs_note_comment").fetchone()[0], total - 1)
+        self.assertIsNone(pool.conn.execute(
+            "select 1 from xhs_note_comment where comment_id = 'comment_5'").fetchone())
+
+    async def test_buffer_capped_when_database_down(self):
+        pool = SqlitePool(schema=XHS_NOTE_COMMENT_SCHEMA, conflict_column="comment_id")
+        async_db = AsyncMysqlDB(pool)
+        async_db.max_retries = 1000
+        async_db.max_buffer_size = async_db.batch_size * 3
+        media_crawler_db_var.set(async_db)
+        store = XhsDbStoreImplement()
+
+        async def failed_batch_upsert(table_name, items, *args, **kwargs):
+            raise ConnectionError("lost connection to mysql server")
+
+        async_db.batch_upsert = failed_batch_upsert
+        for i in range(async_db.max_buffer_size * 2):
+            await store.store_comment(make_comment(i))
+        # 缓冲达到上限后拆成单条写入，失败的记录被丢弃，缓冲不会无限增长
+        self.assertLess(len(async_db._AsyncMysqlDB__upsert_buffers["xhs_note_comment"]), async_db.max_buffer_size)
+        await async_db.close_upserts()
+        self.assertEqual(async_db._AsyncMysqlDB__upsert_buffers["xhs_note_comment"], [])
+
+    async def test_per_row_round_trips(self):
+        # 原来的写法：每条评论先查询，再插入或者更新
+        pool = SqlitePool(schema=XHS_NOTE_COMMENT_SCHEMA, conflict_column="comment_id")
+        media_crawler_db_var.set(AsyncMysqlDB(pool))
+        for i in range(1000):
+            comment_item = make_comment(i)
+            if not await query_comment_by_comment_id(comment_item["comment_id"]):
+                comment_item["add_ts"] = 0
+                await add_new_comment(comment_item)
+            else:
+                await update_comment_by_comment_id(comment_item["comment_id"], comment_item)
+        self.assertEqual(pool.round_trips, 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 04:40
+# @Desc    : 异步 RedisCache 测试，使用本地 Redis 兼容服务
+import asyncio
+import pickle
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from cache.async_redis_cache import AsyncRedisCache
+from cache.cache_factory import CacheFactory
+from cache.redis_cache import RedisCache
+from cache.serializer import SERIALIZER_MSGPACK, SERIALIZER_PICKLE, create_serializer
+from config import db_config
+from test.redis_stub import RedisStubServer
+
+
+class TestAsyncRedisCache(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = RedisStubServer()
+        await self.server.start()
+        self.origin_config = (db_config.REDIS_DB_HOST, db_config.REDIS_DB_PORT)
+        db_config.REDIS_DB_HOST, db_config.REDIS_DB_PORT = self.server.host, self.server.port
+        self.cache = CacheFactory.create_cache(db_config.CACHE_TYPE_ASYNC_REDIS)
+
+    async def asyncTearDown(self):
+        await self.cache.close()
+        await self.server.stop()
+        db_config.REDIS_DB_HOST, db_config.REDIS_DB_PORT = self.origin_config
+
+    async def test_set_and_get(self):
+        self.assertIsInstance(self.cache, AsyncRedisCache)
+        await self.cache.set('key', {'page': 3, 'cursor': '游标'}, 10)
+        self.assertEqual(await self.cache.get('key'), {'page': 3, 'cursor': '游标'})
+        self.assertIsNone(await self.cache.get('missing'))
+        # 默认使用 json 序列化
+        self.assertEqual(self.server.state.data[b'key'], '{"page":3,"cursor":"游标"}'.encode())
+
+    async def test_expired_key(self):
+        await self.cache.set('key', 'value', 1)
+        await asyncio.sleep(1.1)
+        self.assertIsNone(await self.cache.get('key'))
+
+    async def test_mset_and_mget_in_one_round_trip(self):
+        mapping = {f'key_{i}': i for i in range(2500)}
+        # 先建立连接，连接时的 AUTH 不计入
+        await self.cache.get('missing')
+        command_count = self.server.state.command_count
+        await self.cache.mset(mapping, 10)
+        self.assertEqual(self.server.state.command_count - command_count, 2500)
+        values = await self.cache.mget(list(mapping) + ['missing'])
+        self.assertEqual(values, list(range(2500)) + [None])
+        # 2501 个键拆成 3 条 MGET
+        self.assertEqual(self.server.state.command_count - command_count, 2503)
+
+    async def test_keys_with_scan(self):
+        await self.cache.mset({f'kuaidaili_{i}': i for i in range(1500)}, 10)
+        await self.cache.mset({f'jishuhttp_{i}': i for i in range(10)}, 10)
+        keys = await self.cache.keys('kuaidaili_*')
+        self.assertEqual(sorted(keys), sorted(f'kuaidaili_{i}' for i in range(1500)))
+        self.assertEqual(await self.cache.delete(*keys[:10]), 10)
+        self.assertEqual(len(await self.cache.keys('kuaidaili_*')), 1490)
+
+    async def test_pickle_serializer(self):
+        cache = AsyncRedisCache(serializer=SERIALIZER_PICKLE)
+        await cache.set('key', {'tuple': (1, 2)}, 10)
+        self.assertEqual(await cache.get('key'), {'tuple': (1, 2)})
+        await cache.close()
+
+
+class TestRedisCacheSerializer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = RedisStubServer()
+        host, port = self.server.start_in_thread()
+        self.origin_config = (db_config.REDIS_DB_HOST, db_config.REDIS_DB_PORT, db_config.REDIS_CACHE_SERIALIZER)
+        db_config.REDIS_DB_HOST, db_config.REDIS_DB_PORT = host, port
+        db_config.REDIS_CACHE_SERIALIZER = 'json'
+
+    def tearDown(self):
+        self.server.stop_thread()
+        db_config.REDIS_DB_HOST, db_config.REDIS_DB_PORT, db_config.REDIS_CACHE_SERIALIZER = self.origin_config
+
+    def test_sync_cache_keeps_pickle(self):
+        # 旧版本用 pickle 写入的缓存仍然可以读取
+        self.server.state.data[b'old_key'] = pickle.dumps({'page': 3})
+        cache = RedisCache()
+        self.assertEqual(cache.get('old_key'), {'page': 3})
+        cache.set('key', ('tuple', 1), 10)
+        self.assertEqual(pickle.loads(self.server.state.data[b'key']), ('tuple', 1))
+        cache._redis_client.close()
+
+
+class TestSerializer(unittest.TestCase):
+
+    def test_unknown_serializer(self):
+        with self.assertRaises(ValueError):
+            create_serializer('yaml')
+
+    def test_msgpack_serializer(self):
+        try:
+            serializer = create_serializer(SERIALIZER_MSGPACK)
+        except ImportError:
+            self.skipTest('msgpack is not installed')
+        value = {'list': [1, 2, 3], 'name': '程序员阿江-Relakkes'}
+        self.assertEqual(serializer.loads(serializer.dumps(value)), value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 06:20
+# @Desc    : bilibili wbi key 缓存：并发请求只获取一次 key，-403 时刷新 key 并且只重试一次
+import asyncio
+import json
+import unittest
+from typing import List
+from unittest import IsolatedAsyncioTestCase
+
+from media_platform.bilibili.client import BilibiliClient
+from media_platform.bilibili.exception import WbiSignError
+from test.stub_server import StubHttpServer, StubRequest, StubResponse
+
+NAV_PATH = "/x/web-interface/nav"
+API_PATH = "/x/test"
+
+
+class FakePage:
+    """
+    localStorage 中没有 wbi key，需要请求 nav 接口获取
+    """
+
+    async def evaluate(self, expression, *args):
+        return {}
+
+
+def wbi_key(name: str, version: int) -> str:
+    # 真实的 img_key、sub_key 都是 32 位十六进制字符串
+    return f"{name}{version}".ljust(32, "0")
+
+
+class WbiHandler:
+    """
+    nav 接口每次返回新的 wbi key，API_PATH 前 sign_error_times 次请求返回 -403
+    """
+
+    def __init__(self, sign_error_times: int = 0):
+        self.sign_error_times = sign_error_times
+        self.nav_count = 0
+        self.api_requests: List[StubRequest] = []
+
+    def __call__(self, request: StubRequest) -> StubResponse:
+        if request.path == NAV_PATH:
+            self.nav_count += 1
+            wbi_img = {"img_url": f"https://i0.hdslb.com/bfs/wbi/{wbi_key('a', self.nav_count)}.png",
+                       "sub_url": f"https://i0.hdslb.com/bfs/wbi/{wbi_key('b', self.nav_count)}.png"}
+            return 200, {}, json.dumps({"code": 0, "data": {"wbi_img": wbi_img}}).encode()
+        self.api_requests.append(request)
+        if len(self.api_requests) <= self.sign_error_times:
+            return 200, {}, json.dumps({"code": -403, "message": "访问权限不足"}).encode()
+        return 200, {}, json.dumps({"code": 0, "data": {"ok": True}}).encode()
+
+
+class TestBilibiliWbiSign(IsolatedAsyncioTestCase):
+
+    async def new_client(self, handler: WbiHandler) -> BilibiliClient:
+        self.server = StubHttpServer(handler)
+        await self.server.start()
+        client = BilibiliClient(headers={"User-Agent": "test"}, playwright_page=FakePage(), cookie_dict={})
+        client._host = self.server.base_url
+        self.client = client
+        return client
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.server.stop()
+
+    async def test_keys_fetched_once(self):
+        handler = WbiHandler()
+        client = await self.new_client(handler)
+        results = await asyncio.gather(*[client.get(API_PATH, {"page": i}) for i in range(20)])
+        await client.post(API_PATH, {"page": 20})
+
+        self.assertEqual(results, [{"ok": True}] * 20)
+        self.assertEqual(handler.nav_count, 1)
+        self.assertEqual(len(handler.api_requests), 21)
+        self.assertTrue(all("w_rid=" in request.query for request in handler.api_requests[:20]))
+        self.assertEqual(client._wbi_sign.img_key, wbi_key("a", 1))
+
+    async def test_sign_error_refreshes_keys_and_retries_once(self):
+        handler = WbiHandler(sign_error_times=1)
+        client = await self.new_client(handler)
+        self.assertEqual(await client.get(API_PATH, {"page": 1}), {"ok": True})
+
+        # 第一次请求返回 -403 后刷新一次 key，用新的 key 重试一次
+        self.assertEqual(handler.nav_count, 2)
+        self.assertEqual(len(handler.api_requests), 2)
+        self.assertEqual(client._wbi_sign.img_key, wbi_key("a", 2))
+        self.assertNotEqual(handler.api_requests[0].query, handler.api_requests[1].query)
+
+        # 后续请求使用刷新后的 key，不再请求 nav
+        await client.get(API_PATH, {"page": 2})
+        self.assertEqual(handler.nav_count, 2)
+
+    async def test_post_sign_error_retries_once(self):
+        handler = WbiHandler(sign_error_times=1)
+        client = await self.new_client(handler)
+        self.assertEqual(await client.post(API_PATH, {"page": 1}), {"ok": True})
+        self.assertEqual(handler.nav_count, 2)
+        self.assertEqual(len(handler.api_requests), 2)
+
+    async def test_second_sign_error_raised(self):
+        handler = WbiHandler(sign_error_times=2)
+        client = await self.new_client(handler)
+        with self.assertRaises(WbiSignError):
+            await client.get(API_PATH, {"page": 1})
+        self.assertEqual(handler.nav_count, 2)
+        self.assertEqual(len(handler.api_requests), 2)
+
+        handler.sign_error_times = 4
+        with self.assertRaises(WbiSignError):
+            await client.post(API_PATH, {"page": 1})
+        self.assertEqual(handler.nav_count, 3)
+        self.assertEqual(len(handler.api_requests), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
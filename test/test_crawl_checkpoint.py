@@ -0,0 +1,193 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 21:40
+# @Desc    : 爬取断点：批量写入、按任务隔离、中途退出后从断点继续
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from typing import Dict, List
+from unittest import IsolatedAsyncioTestCase, mock
+
+import config
+from cache.local_cache import ExpiringLocalCache
+from media_platform.douyin.client import DOUYINClient
+from tools import crawl_checkpoint
+from tools.crawl_checkpoint import (CacheCheckpointBackend, CrawlCheckpoint, SqliteCheckpointBackend,
+                                    clear_crawl_checkpoint, close_all_crawl_checkpoints, get_crawl_checkpoint,
+                                    get_current_task_id)
+from var import crawl_task_id_var
+
+
+class FakeCommentClient(DOUYINClient):
+    """
+    每页返回 2 条评论，第 fail_page 页请求时抛出异常模拟爬虫中途退出
+    """
+
+    def __init__(self, page_count: int, fail_page: int = 0):
+        super().__init__(headers={}, playwright_page=None, cookie_dict={})
+        self.page_count = page_count
+        self.fail_page = fail_page
+        self.requested_cursors: List[int] = []
+
+    async def get_aweme_comments(self, aweme_id: str, cursor: int = 0) -> Dict:
+        self.requested_cursors.append(cursor)
+        page = cursor // 2 + 1
+        if page == self.fail_page:
+            raise RuntimeError("crawler crashed")
+        comments = [{"cid": f"{page}_{i}", "reply_comment_total": 0} for i in range(2)]
+        return {"has_more": int(page < self.page_count), "cursor": cursor + 2, "comments": comments}
+
+
+class ThreadRecordingBackend(SqliteCheckpointBackend):
+
+    def __init__(self, db_path: str):
+        super().__init__(db_path)
+        self.save_threads: List[int] = []
+        self.load_threads: List[int] = []
+
+    def load(self, task_id: str) -> Dict[str, Dict]:
+        self.load_threads.append(threading.get_ident())
+        return super().load(task_id)
+
+    def save_many(self, task_id: str, states: Dict[str, Dict]) -> None:
+        self.save_threads.append(threading.get_ident())
+        super().save_many(task_id, states)
+
+
+class TestCrawlCheckpoint(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.origin_config = (config.ENABLE_CRAWL_CHECKPOINT, config.CRAWL_CHECKPOINT_BACKEND,
+                              config.CRAWL_CHECKPOINT_SQLITE_PATH)
+        config.ENABLE_CRAWL_CHECKPOINT = True
+        config.CRAWL_CHECKPOINT_BACKEND = "sqlite"
+        config.CRAWL_CHECKPOINT_SQLITE_PATH = os.path.join(self.temp_dir.name, "checkpoint.db")
+
+    async def asyncSetUp(self):
+        crawl_task_id_var.set("task_1")
+
+    async def asyncTearDown(self):
+        await close_all_crawl_checkpoints()
+        crawl_task_id_var.set("")
+        (config.ENABLE_CRAWL_CHECKPOINT, config.CRAWL_CHECKPOINT_BACKEND,
+         config.CRAWL_CHECKPOINT_SQLITE_PATH) = self.origin_config
+        self.temp_dir.cleanup()
+
+    async def test_batch_write(self):
+        backend = SqliteCheckpointBackend(config.CRAWL_CHECKPOINT_SQLITE_PATH)
+        checkpoint = CrawlCheckpoint("task_1", backend, batch_size=3, flush_interval=60)
+        for page in range(1, 3):
+            await checkpoint.save("search", "keyword", {"page": page})
+            await checkpoint.save("comments", f"note_{page}", {"cursor": str(page)})
+        # 累积 3 个 key 时批量写入，同一个 key 多次更新只保留最后一次
+        self.assertEqual(backend.load("task_1"), {"search:keyword": {"page": 2}, "comments:note_1": {"cursor": "1"},
+                                                  "comments:note_2": {"cursor": "2"}})
+        await checkpoint.save("search", "keyword", {"page": 3})
+        self.assertEqual(backend.load("task_1")["search:keyword"], {"page": 2})
+        await checkpoint.flush()
+        self.assertEqual(backend.load("task_1")["search:keyword"], {"page": 3})
+        self.assertEqual(backend.load("task_2"), {})
+
+        await checkpoint.clear()
+        self.assertEqual(backend.load("task_1"), {})
+        backend.close()
+
+    async def test_cache_backend(self):
+        backend = CacheCheckpointBackend(ExpiringLocalCache(cron_interval=60), expire_time=60)
+        checkpoint = CrawlCheckpoint("task_1", backend, batch_size=1)
+        await checkpoint.save("search", "keyword", {"page": 3})
+        await checkpoint.mark_done("comments", "note_1")
+
+        resumed = CrawlCheckpoint("task_1", backend)
+        self.assertEqual(await resumed.get("search", "keyword"), {"page": 3})
+        self.assertTrue(await resumed.is_done("comments", "note_1"))
+        self.assertIsNone(await CrawlCheckpoint("task_2", backend).get("search", "keyword"))
+        await resumed.clear()
+        self.assertIsNone(await CrawlCheckpoint("task_1", backend).get("search", "keyword"))
+
+    async def test_resume_comments(self):
+        client = FakeCommentClient(page_count=5, fail_page=4)
+        with self.assertRaises(RuntimeError):
+            await client.get_aweme_all_comments("aweme_1", crawl_interval=0, max_count=8)
+        # 模拟进程退出：写入未保存的断点，丢弃内存中的状态
+        await close_all_crawl_checkpoints()
+
+        client = FakeCommentClient(page_count=5)
+        comments = await client.get_aweme_all_comments("aweme_1", crawl_interval=0, max_count=8)
+        self.assertEqual(client.requested_cursors, [6])
+        self.assertEqual([comment["cid"] for comment in comments], ["4_0", "4_1"])
+
+        # 已经完成的帖子不再请求
+        client = FakeCommentClient(page_count=5)
+        self.assertEqual(await client.get_aweme_all_comments("aweme_1", crawl_interval=0, max_count=8), [])
+        self.assertEqual(client.requested_cursors, [])
+
+        # 任务正常结束后清除断点，再次运行从头开始
+        await clear_crawl_checkpoint()
+        client = FakeCommentClient(page_count=5)
+        await client.get_aweme_all_comments("aweme_1", crawl_interval=0, max_count=8)
+        self.assertEqual(client.requested_cursors, [0, 2, 4, 6])
+
+    async def test_flush_off_event_loop(self):
+        backend = ThreadRecordingBackend(config.CRAWL_CHECKPOINT_SQLITE_PATH)
+        checkpoint = CrawlCheckpoint("task_1", backend, batch_size=1)
+        await checkpoint.save("search", "keyword", {"page": 2})
+        # sqlite 写入在线程池中执行，不阻塞事件循环
+        self.assertEqual(len(backend.save_threads), 1)
+        self.assertNotEqual(backend.save_threads[0], threading.get_ident())
+        self.assertEqual(backend.load("task_1"), {"search:keyword": {"page": 2}})
+        await checkpoint.clear()
+        self.assertEqual(backend.load("task_1"), {})
+        backend.close()
+
+    async def test_load_off_event_loop(self):
+        backend = ThreadRecordingBackend(config.CRAWL_CHECKPOINT_SQLITE_PATH)
+        backend.save_many("task_1", {"search:keyword": {"page": 2}})
+        checkpoint = CrawlCheckpoint("task_1", backend)
+        # 并发的第一次读取只加载一次，sqlite 读取在线程池中执行
+        results = await asyncio.gather(*[checkpoint.get("search", "keyword") for _ in range(5)])
+        self.assertEqual(results, [{"page": 2}] * 5)
+        self.assertEqual(len(backend.load_threads), 1)
+        self.assertNotEqual(backend.load_threads[0], threading.get_ident())
+        backend.close()
+
+    async def test_cli_task_id_follows_crawl_config(self):
+        crawl_task_id_var.set("")
+        task_id = get_current_task_id()
+        self.assertTrue(task_id.startswith(f"{config.PLATFORM}:{config.CRAWLER_TYPE}:"))
+        self.assertEqual(get_current_task_id(), task_id)
+        # 关键词、评论数量、指定帖子等配置变化后不再沿用旧的断点
+        for name, value in [("KEYWORDS", "other"), ("CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES", 1000),
+                            ("ENABLE_GET_SUB_COMMENTS", not config.ENABLE_GET_SUB_COMMENTS),
+                            ("DY_SPECIFIED_ID_LIST", ["other"])]:
+            with mock.patch.object(config, name, value):
+                self.assertNotEqual(get_current_task_id(), task_id)
+        self.assertEqual(get_current_task_id(), task_id)
+        # 调度器模式下使用调度任务ID
+        crawl_task_id_var.set("task_2")
+        self.assertEqual(get_current_task_id(), "task_2")
+
+    async def test_disabled(self):
+        config.ENABLE_CRAWL_CHECKPOINT = False
+        checkpoint = get_crawl_checkpoint("task_disabled")
+        await checkpoint.save("search", "keyword", {"page": 2})
+        self.assertIsNone(await checkpoint.get("search", "keyword"))
+        self.assertIsNone(crawl_checkpoint.get_checkpoint_backend())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 11:40
+# @Desc    : 抖音客户端请求不能阻塞事件循环，并发请求需要在时间上重叠
+import asyncio
+import json
+import time
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from media_platform.douyin.client import DOUYINClient
+from test.stub_server import StubHttpServer
+
+
+class FakePage:
+    async def evaluate(self, expression, *args):
+        return {}
+
+
+async def fake_get_a_bogus(*args, **kwargs):
+    return "fake_a_bogus"
+
+
+class TestDouYinClientConcurrency(IsolatedAsyncioTestCase):
+    latency = 0.5
+    concurrency = 5
+
+    async def test_concurrent_comment_requests_overlap(self):
+        body = json.dumps({"has_more": 0, "cursor": 0, "comments": []}).encode()
+        server = StubHttpServer(handler=lambda req: (200, {}, body), latency=self.latency)
+        server.start_in_thread()
+        client = DOUYINClient(headers={"User-Agent": "test"}, playwright_page=FakePage(), cookie_dict={})
+        client._host = server.base_url
+        try:
+            with patch("media_platform.douyin.client.get_a_bogus", fake_get_a_bogus):
+                start = time.perf_counter()
+                results = await asyncio.gather(
+                    *[client.get_aweme_comments(str(i)) for i in range(self.concurrency)]
+                )
+                elapsed = time.perf_counter() - start
+        finally:
+            await client.close()
+            server.stop_thread()
+
+        self.assertEqual(len(results), self.concurrency)
+        self.assertEqual(server.request_count, self.concurrency)
+        # 串行执行至少需要 concurrency * latency 秒，重叠执行应接近单次请求的延迟
+        self.assertLess(elapsed, self.latency * self.concurrency / 2)
@@ -42,6 +42,46 @@ class TestExpiringLocalCache(unittest.TestCase):
         time.sleep(12)
         self.assertIsNone(self.cache.get('key'))
 
+    def test_clear_many_expired_keys(self):
+        for i in range(100):
+            self.cache.set(f'key_{i}', i, 0)
+        self.cache.set('alive', 'value', 10)
+        self.cache._clear()
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.expired_count, 100)
+
+    def test_reset_key_keeps_new_expire_time(self):
+        self.cache.set('key', 'old', 0)
+        self.cache.set('key', 'new', 10)
+        self.cache._clear()
+        self.assertEqual(self.cache.get('key'), 'new')
+
+    def test_keys_glob(self):
+        self.cache.set('kuaidaili_1.1.1.1_80', 1, 10)
+        self.cache.set('kuaidaili_2.2.2.2_81', 2, 10)
+        self.cache.set('JISUHTTP_3.3.3.3_82_user_pwd', 3, 10)
+        self.cache.set('crawl_checkpoint:task:a', 4, 10)
+        self.cache.set('expired_key', 5, 0)
+        self.assertEqual(sorted(self.cache.keys('kuaidaili_*')), ['kuaidaili_1.1.1.1_80', 'kuaidaili_2.2.2.2_81'])
+        self.assertEqual(self.cache.keys('kuaidaili_2*_81'), ['kuaidaili_2.2.2.2_81'])
+        self.assertEqual(self.cache.keys('crawl_checkpoint:task:*'), ['crawl_checkpoint:task:a'])
+        self.assertEqual(self.cache.keys('*_82_*'), ['JISUHTTP_3.3.3.3_82_user_pwd'])
+        self.assertEqual(self.cache.keys('kuai?aili_1.1.1.1_80'), ['kuaidaili_1.1.1.1_80'])
+        self.assertEqual(self.cache.keys('JISUHTTP_3.3.3.3_82_user_pwd'), ['JISUHTTP_3.3.3.3_82_user_pwd'])
+        self.assertEqual(len(self.cache.keys('*')), 4)
+
+    def test_lru_bound(self):
+        self.cache = cache = ExpiringLocalCache(cron_interval=10, max_size=2)
+        cache.set('a', 1, 10)
+        cache.set('b', 2, 10)
+        cache.get('a')
+        cache.set('c', 3, 10)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(sorted(cache.keys('*')), ['a', 'c'])
+        self.assertEqual(cache.stats(), {'size': 2, 'hit_count': 2, 'miss_count': 1, 'expired_count': 0,
+                                         'evicted_count': 1})
+
     def tearDown(self):
         del self.cache
 
@@ -0,0 +1,113 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 23:20
+# @Desc    : HTTP 录制/回放：录制平台 client 的请求，停止服务后离线回放得到相同的结果
+import json
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+import config
+from media_platform.kuaishou.client import KuaiShouClient
+from test.stub_server import StubHttpServer, StubRequest
+from tools.http_replay import (HTTP_REPLAY_MODE_RECORD, HTTP_REPLAY_MODE_REPLAY, HttpArchive, close_http_archive,
+                               make_request_key)
+
+
+def comment_handler(request: StubRequest):
+    """
+    快手评论接口，每页 2 条评论，共 3 页
+    """
+    pcursor = request.json()["variables"]["pcursor"] or "0"
+    page = int(pcursor)
+    root_comments = [{"commentId": f"{page}_{i}", "content": "test", "subCommentsPcursor": "no_more"}
+                     for i in range(2)]
+    next_pcursor = str(page + 1) if page < 2 else "no_more"
+    body = {"data": {"visionCommentList": {"pcursor": next_pcursor, "rootComments": root_comments}}}
+    return 200, {"Content-Type": "application/json"}, json.dumps(body).encode()
+
+
+class TestHttpReplay(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.origin_config = (config.HTTP_REPLAY_MODE, config.HTTP_ARCHIVE_FILE, config.ENABLE_CRAWL_CHECKPOINT)
+        config.HTTP_ARCHIVE_FILE = os.path.join(self.temp_dir.name, "http_archive.db")
+        config.ENABLE_CRAWL_CHECKPOINT = False
+
+    def tearDown(self):
+        close_http_archive()
+        config.HTTP_REPLAY_MODE, config.HTTP_ARCHIVE_FILE, config.ENABLE_CRAWL_CHECKPOINT = self.origin_config
+        self.temp_dir.cleanup()
+
+    def test_request_key(self):
+        url = "https://api.bilibili.com/x/v2/reply/wbi/main?oid=1&next=2"
+        self.assertEqual(make_request_key("GET", url + "&wts=1700000000&w_rid=abc"),
+                         make_request_key("get", "https://API.bilibili.com/x/v2/reply/wbi/main?next=2&oid=1&wts=1"))
+        self.assertNotEqual(make_request_key("GET", url), make_request_key("GET", url.replace("next=2", "next=3")))
+        self.assertEqual(make_request_key("POST", url, b'{"keyword": "a", "search_id": "1", "page": 1}'),
+                         make_request_key("POST", url, b'{"page":1,"keyword":"a","search_id":"2"}'))
+        self.assertNotEqual(make_request_key("POST", url, b'{"page": 1}'), make_request_key("POST", url, b'{"page": 2}'))
+
+    async def test_record_and_replay(self):
+        config.HTTP_REPLAY_MODE = HTTP_REPLAY_MODE_RECORD
+        async with StubHttpServer(comment_handler) as server:
+            client = KuaiShouClient(headers={}, playwright_page=None, cookie_dict={})
+            client._host = f"{server.base_url}/graphql"
+            recorded = await client.get_video_all_comments("photo_1", crawl_interval=0)
+            await client.close()
+            request_count = server.request_count
+        close_http_archive()
+        archive = HttpArchive(config.HTTP_ARCHIVE_FILE)
+        self.assertEqual(len(archive), 3)
+        archive.close()
+
+        # 服务已经停止，回放不访问网络
+        config.HTTP_REPLAY_MODE = HTTP_REPLAY_MODE_REPLAY
+        client = KuaiShouClient(headers={}, playwright_page=None, cookie_dict={})
+        client._host = f"{server.base_url}/graphql"
+        replayed = await client.get_video_all_comments("photo_1", crawl_interval=0)
+        self.assertEqual(replayed, recorded)
+        self.assertEqual([comment["commentId"] for comment in replayed], ["0_0", "0_1", "1_0", "1_1", "2_0", "2_1"])
+        self.assertEqual(server.request_count, request_count)
+
+        with self.assertRaises(httpx.ConnectError):
+            await client.get_video_all_comments("photo_2", crawl_interval=0)
+        await client.close()
+
+    async def test_replay_in_recorded_order(self):
+        responses = iter([b'{"data": {"n": 1}}', b'{"data": {"n": 2}}'])
+        config.HTTP_REPLAY_MODE = HTTP_REPLAY_MODE_RECORD
+        async with StubHttpServer(lambda request: (200, {}, next(responses))) as server:
+            client = KuaiShouClient(headers={}, playwright_page=None, cookie_dict={})
+            client._host = f"{server.base_url}/graphql"
+            recorded = [await client.post("", {"operationName": "same"}) for _ in range(2)]
+            await client.close()
+        close_http_archive()
+
+        config.HTTP_REPLAY_MODE = HTTP_REPLAY_MODE_REPLAY
+        client = KuaiShouClient(headers={}, playwright_page=None, cookie_dict={})
+        client._host = f"{server.base_url}/graphql"
+        # 录制次数用完后重复返回最后一次的响应
+        replayed = [await client.post("", {"operationName": "same"}) for _ in range(3)]
+        await client.close()
+        self.assertEqual(recorded, [{"n": 1}, {"n": 2}])
+        self.assertEqual(replayed, [{"n": 1}, {"n": 2}, {"n": 2}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 13:55
+# @Desc    :
+import asyncio
+import shutil
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from media_platform.zhihu.help import sign
+from tools.js_signer import JsSignerError, JsSignerPool
+
+
+@unittest.skipUnless(shutil.which("node"), "node is not installed")
+class TestJsSignerPool(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.pool = JsSignerPool("libs/zhihu.js", ["get_sign"], worker_num=2)
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+
+    async def test_same_result_as_execjs(self):
+        url = "/api/v4/me?include=is_realname"
+        cookies = "d_c0=AFBTxxxxxxxx|1700000000;"
+        results = await asyncio.gather(*[self.pool.call("get_sign", url, cookies) for _ in range(20)])
+        expected = sign(url, cookies)
+        for result in results:
+            # x-zse-96 的计算带有随机数，只比较固定部分和格式
+            self.assertEqual(result["x-zst-81"], expected["x-zst-81"])
+            self.assertTrue(result["x-zse-96"].startswith("2.0_"))
+            self.assertEqual(len(result["x-zse-96"]), len(expected["x-zse-96"]))
+
+    async def test_unknown_function(self):
+        with self.assertRaises(JsSignerError):
+            await self.pool.call("not_exported")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 15:40
+# @Desc    :
+import json
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from tools.jsonl_store import JsonlFileWriter, compact_jsonl_dir, iter_jsonl_items
+
+
+class TestJsonlFileWriter(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.jsonl_dir = os.path.join(self.tmp_dir.name, "jsonl")
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def test_buffered_write_and_rotate(self):
+        writer = JsonlFileWriter(self.jsonl_dir, "search_comments", buffer_size=10, max_file_size=2048)
+        items = [{"comment_id": str(i), "content": f"评论内容 {i}"} for i in range(200)]
+        for item in items[:5]:
+            await writer.write(item)
+        # 还没达到缓冲大小，数据仍在内存中
+        self.assertFalse(os.path.exists(self.jsonl_dir))
+
+        for item in items[5:]:
+            await writer.write(item)
+        await writer.close()
+
+        files = sorted(os.listdir(self.jsonl_dir))
+        self.assertGreater(len(files), 1)
+        for file_name in files:
+            self.assertLessEqual(os.path.getsize(os.path.join(self.jsonl_dir, file_name)), 2048)
+
+        json_dir = os.path.join(self.tmp_dir.name, "json")
+        result = compact_jsonl_dir(self.jsonl_dir, json_dir)
+        self.assertEqual(list(result.values()), [len(items)])
+        with open(list(result.keys())[0], encoding="utf-8") as f:
+            content = f.read()
+        # 导出格式与 json 存储完全一致
+        self.assertEqual(content, json.dumps(items, ensure_ascii=False, indent=4))
+
+    async def test_append_to_existing_file(self):
+        for start in (0, 3):
+            writer = JsonlFileWriter(self.jsonl_dir, "detail_contents")
+            for i in range(start, start + 3):
+                await writer.write({"note_id": i})
+            await writer.close()
+        files = [os.path.join(self.jsonl_dir, name) for name in os.listdir(self.jsonl_dir)]
+        self.assertEqual([item["note_id"] for item in iter_jsonl_items(files)], list(range(6)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 12:30
+# @Desc    :
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase
+
+from tools.loop_monitor import EventLoopMonitor
+
+
+def blocking_call():
+    time.sleep(0.3)
+
+
+class TestEventLoopMonitor(IsolatedAsyncioTestCase):
+
+    async def test_detect_blocking_call(self):
+        monitor = EventLoopMonitor(threshold=0.1, interval=0.02, report_interval=0)
+        monitor.start()
+        await asyncio.sleep(0.1)
+        with self.assertLogs("MediaCrawler", level="WARNING") as logs:
+            blocking_call()
+            await asyncio.sleep(0.1)
+        monitor.stop()
+
+        metrics = monitor.metrics()
+        self.assertGreaterEqual(metrics["loop_blocked_count"], 1)
+        self.assertGreaterEqual(metrics["loop_lag_max_sec"], 0.2)
+        self.assertTrue(any("blocking_call" in line for line in logs.output))
+
+    async def test_cooperative_sleep_not_reported(self):
+        monitor = EventLoopMonitor(threshold=0.1, interval=0.02, report_interval=0)
+        monitor.start()
+        await asyncio.sleep(0.3)
+        monitor.stop()
+        self.assertEqual(monitor.metrics()["loop_blocked_count"], 0)
@@ -0,0 +1,189 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 20:00
+# @Desc    : 媒体下载队列：流式写入、Range 断点续传、原子重命名、按 host 限制并发
+import asyncio
+import os
+import re
+import tempfile
+import unittest
+from typing import List
+from unittest import IsolatedAsyncioTestCase, mock
+
+import config
+from test.stub_server import StubHttpServer, StubRequest
+from tools.media_downloader import PART_FILE_SUFFIX, MediaDownloader
+from tools import media_store
+from tools.media_store import MediaBlobStore
+
+MEDIA_CONTENT = bytes(range(256)) * 4096
+
+
+class RangeHandler:
+    """
+    支持 Range 请求的媒体文件服务，interrupt_times 次内每次只发送一半内容后断开连接
+    """
+
+    def __init__(self, content: bytes = MEDIA_CONTENT, interrupt_times: int = 0, latency: float = 0.0):
+        self.content = content
+        self.interrupt_times = interrupt_times
+        self.latency = latency
+        self.range_headers: List[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: StubRequest):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return self.respond(request)
+        finally:
+            self.in_flight -= 1
+
+    def respond(self, request: StubRequest):
+        total = len(self.content)
+        headers = {"Content-Type": "video/mp4", "Accept-Ranges": "bytes"}
+        range_header = request.headers.get("range", "")
+        self.range_headers.append(range_header)
+        start = int(re.match(r"bytes=(\d+)-", range_header).group(1)) if range_header else 0
+        if start >= total:
+            return 416, {"Content-Range": f"bytes */{total}"}, b""
+        status = 206 if range_header else 200
+        if range_header:
+            headers["Content-Range"] = f"bytes {start}-{total - 1}/{total}"
+        body = self.content[start:]
+        if self.interrupt_times > 0:
+            self.interrupt_times -= 1
+            headers["Content-Length"] = str(len(body))
+            body = body[:len(body) // 2]
+        return status, headers, body
+
+
+class TestMediaDownloader(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.origin_enable_media_dedup = config.ENABLE_MEDIA_DEDUP
+        config.ENABLE_MEDIA_DEDUP = False
+
+    def tearDown(self):
+        config.ENABLE_MEDIA_DEDUP = self.origin_enable_media_dedup
+        self.temp_dir.cleanup()
+
+    def save_file_name(self, name: str) -> str:
+        return os.path.join(self.temp_dir.name, name)
+
+    async def test_stream_to_file(self):
+        handler = RangeHandler()
+        downloader = MediaDownloader(chunk_size=64 * 1024)
+        async with StubHttpServer(handler) as server:
+            await downloader.submit(f"{server.base_url}/video.mp4", self.save_file_name("video.mp4"))
+            await downloader.close()
+
+        with open(self.save_file_name("video.mp4"), "rb") as f:
+            self.assertEqual(f.read(), MEDIA_CONTENT)
+        self.assertFalse(os.path.exists(self.save_file_name("video.mp4") + PART_FILE_SUFFIX))
+        self.assertEqual((downloader.success_count, downloader.failed_count), (1, 0))
+
+    async def test_resume_after_interrupted(self):
+        handler = RangeHandler(interrupt_times=2)
+        downloader = MediaDownloader(max_retries=3)
+        async with StubHttpServer(handler) as server:
+            await downloader.submit(f"{server.base_url}/video.mp4", self.save_file_name("video.mp4"))
+            await downloader.close()
+
+        with open(self.save_file_name("video.mp4"), "rb") as f:
+            self.assertEqual(f.read(), MEDIA_CONTENT)
+        half, quarter = len(MEDIA_CONTENT) // 2, len(MEDIA_CONTENT) // 4
+        self.assertEqual(handler.range_headers, ["", f"bytes={half}-", f"bytes={half + quarter}-"])
+
+    async def test_resume_from_part_file(self):
+        save_file_name = self.save_file_name("video.mp4")
+        with open(save_file_name + PART_FILE_SUFFIX, "wb") as f:
+            f.write(MEDIA_CONTENT[:1000])
+        handler = RangeHandler()
+        downloader = MediaDownloader()
+        async with StubHttpServer(handler) as server:
+            await downloader.submit(f"{server.base_url}/video.mp4", save_file_name)
+            await downloader.join()
+
+            # 完整的 .part 文件直接重命名，已存在的文件不再下载
+            with open(self.save_file_name("other.mp4") + PART_FILE_SUFFIX, "wb") as f:
+                f.write(MEDIA_CONTENT)
+            await downloader.submit(f"{server.base_url}/video.mp4", self.save_file_name("other.mp4"))
+            await downloader.submit(f"{server.base_url}/video.mp4", save_file_name)
+            await downloader.close()
+
+        for file_name in (save_file_name, self.save_file_name("other.mp4")):
+            with open(file_name, "rb") as f:
+                self.assertEqual(f.read(), MEDIA_CONTENT)
+        self.assertEqual(handler.range_headers[0], "bytes=1000-")
+        self.assertEqual(len(handler.range_headers), 2)
+
+    async def test_host_concurrency(self):
+        handler = RangeHandler(content=b"image", latency=0.05)
+        downloader = MediaDownloader(worker_num=8, host_concurrency=2, queue_size=4)
+        async with StubHttpServer(handler) as server:
+            for i in range(10):
+                await downloader.submit(f"{server.base_url}/{i}.jpg", self.save_file_name(f"{i}.jpg"))
+            await downloader.close()
+
+        self.assertEqual(handler.max_in_flight, 2)
+        self.assertEqual(downloader.success_count, 10)
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), sorted(f"{i}.jpg" for i in range(10)))
+
+    async def test_http_error(self):
+        downloader = MediaDownloader()
+        async with StubHttpServer(lambda request: (404, {}, b"not found")) as server:
+            await downloader.submit(f"{server.base_url}/404.jpg", self.save_file_name("404.jpg"))
+            await downloader.close()
+
+        self.assertEqual((downloader.success_count, downloader.failed_count), (0, 1))
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    async def test_dedup(self):
+        handler = RangeHandler()
+        note_dir = self.save_file_name("notes")
+        os.makedirs(note_dir)
+        blob_store = MediaBlobStore(self.save_file_name("media"))
+        downloader = MediaDownloader(worker_num=1, blob_store=blob_store)
+        # 本地服务当作 bilibili 视频 CDN，忽略它的签名参数
+        volatile_params = {"127.0.0.1": media_store.VOLATILE_QUERY_PARAMS["bilivideo.com"]}
+        with mock.patch.dict(media_store.VOLATILE_QUERY_PARAMS, volatile_params):
+            async with StubHttpServer(handler) as server:
+                await downloader.submit(f"{server.base_url}/video.mp4?deadline=1&upsig=a",
+                                        os.path.join(note_dir, "1.mp4"))
+                await downloader.join()
+                # 签名参数变化的同一个 URL 不再下载，不同 URL 的相同内容只保存一份
+                await downloader.submit(f"{server.base_url}/video.mp4?deadline=2&upsig=b",
+                                        os.path.join(note_dir, "2.mp4"))
+                await downloader.submit(f"{server.base_url}/repost.mp4", os.path.join(note_dir, "3.mp4"))
+                await downloader.close()
+
+        self.assertEqual(len(handler.range_headers), 2)
+        self.assertEqual((downloader.success_count, downloader.skipped_count), (2, 1))
+        inodes = set()
+        for i in range(1, 4):
+            file_name = os.path.join(note_dir, f"{i}.mp4")
+            with open(file_name, "rb") as f:
+                self.assertEqual(f.read(), MEDIA_CONTENT)
+            inodes.add(os.stat(file_name).st_ino)
+        self.assertEqual(len(inodes), 1)
+        self.assertEqual(len(set(MediaBlobStore(self.save_file_name("media")).get_dir_blobs(note_dir).values())), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
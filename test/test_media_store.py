@@ -0,0 +1,66 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+
+from tools.media_store import MediaBlobStore, normalize_url
+
+
+def test_normalize_url():
+    assert normalize_url("https://UPOS-SZ.bilivideo.com/a/b.m4s?deadline=1&e=x&bw=10#t") == \
+        normalize_url("http://upos-sz.bilivideo.com/a/b.m4s?bw=10&deadline=2&e=y")
+    assert normalize_url("https://img.example.com/a.jpg?w=100") != normalize_url("https://img.example.com/a.jpg?w=200")
+    assert normalize_url("https://p3-sign.douyinpic.com/a.jpeg?x-expires=1&x-signature=a") == \
+        normalize_url("https://p3-sign.douyinpic.com/a.jpeg?x-expires=2&x-signature=b")
+
+
+def test_normalize_url_keeps_params_of_other_hosts():
+    # 只有已知 CDN 的签名参数被忽略，其他 host 上同名的参数可能区分不同的资源
+    assert normalize_url("https://img.example.com/a.jpg?mid=1") != normalize_url("https://img.example.com/a.jpg?mid=2")
+    assert normalize_url("https://img.example.com/a.jpg?e=blur") != normalize_url("https://img.example.com/a.jpg?e=crop")
+    assert normalize_url("https://cdn.bilivideo.com.example.org/a.m4s?deadline=1") != \
+        normalize_url("https://cdn.bilivideo.com.example.org/a.m4s?deadline=2")
+
+
+def test_link_from_url_does_not_merge_different_resources(tmp_path):
+    blob_store = MediaBlobStore(str(tmp_path / "media"))
+    first = tmp_path / "first.jpg"
+    first.write_bytes(b"first")
+    blob_store.store_file(str(first), str(tmp_path / "note1.jpg"), "a" * 64, url="https://img.example.com/a.jpg?mid=1")
+    assert blob_store.link_from_url("https://img.example.com/a.jpg?mid=1", str(tmp_path / "note2.jpg"))
+    assert not blob_store.link_from_url("https://img.example.com/a.jpg?mid=2", str(tmp_path / "note3.jpg"))
+    assert not (tmp_path / "note3.jpg").exists()
+    blob_store.close()
+
+
+def test_migrate_dir(tmp_path):
+    image_dir = tmp_path / "xhs" / "images"
+    for note_id, content in (("note1", b"avatar"), ("note2", b"avatar"), ("note3", b"cover")):
+        (image_dir / note_id).mkdir(parents=True)
+        (image_dir / note_id / "0.jpg").write_bytes(content)
+    (image_dir / "note3" / "1.jpg.part").write_bytes(b"unfinished")
+
+    blob_store = MediaBlobStore(str(tmp_path / "media"))
+    stats = blob_store.migrate_dir(str(image_dir))
+    assert stats == {"files": 3, "duplicated": 1, "saved_bytes": len(b"avatar")}
+    # 再次迁移时跳过已经迁移的文件
+    assert blob_store.migrate_dir(str(image_dir))["files"] == 0
+    # 迁移整个 data 目录时不会处理存储目录本身
+    assert blob_store.migrate_dir(str(tmp_path))["files"] == 0
+
+    assert (image_dir / "note1" / "0.jpg").read_bytes() == b"avatar"
+    assert (image_dir / "note3" / "0.jpg").read_bytes() == b"cover"
+    assert os.path.samefile(image_dir / "note1" / "0.jpg", image_dir / "note2" / "0.jpg")
+    blobs = [name for _, _, names in os.walk(tmp_path / "media" / "blobs") for name in names]
+    assert len(blobs) == 2
+    assert list(blob_store.get_dir_blobs(str(image_dir / "note1"))) == [str(image_dir / "note1" / "0.jpg")]
+    blob_store.close()
@@ -0,0 +1,74 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 00:40
+# @Desc    : 模拟平台服务：GraphQL 响应结构、异常注入，以及爬虫在模拟平台上完整跑通搜索和评论
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from benchmarks.load_test import run_platform
+from test.mock_platforms import GraphQLShape, MockPlatformServer, endpoint_name
+
+
+class TestMockPlatforms(IsolatedAsyncioTestCase):
+
+    def test_graphql_shape(self):
+        shape = GraphQLShape("""
+            fragment user on User { id name }
+            query commentListQuery($photoId: String) {
+              visionCommentList(photoId: $photoId) { pcursor rootComments { commentId likedCount author: user { ...user } } }
+            }""")
+        data = shape.build({"visionCommentList": {"pcursor": "no_more"}})
+        comment_list = data["visionCommentList"]
+        self.assertEqual(comment_list["pcursor"], "no_more")
+        self.assertEqual(comment_list["rootComments"], [])
+        self.assertEqual(shape.build({"visionCommentList": {"rootComments": [{}]}})["visionCommentList"]
+                         ["rootComments"], [{"commentId": "mock_commentId", "likedCount": 0,
+                                             "author": {"id": "mock_id", "name": "mock_name"}}])
+        self.assertEqual(endpoint_name("GET", "/api/v4/comment_v5/answers/1000001/root_comment"),
+                         "GET /api/v4/comment_v5/answers/{id}/root_comment")
+
+    async def test_injection(self):
+        async with MockPlatformServer("xhs", captcha_rate=1) as server:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(f"{server.base_url}/api/sns/web/v1/search/notes", json={"page": 1})
+        self.assertIn(response.status_code, (461, 471))
+        self.assertIn("Verifytype", response.headers)
+        self.assertEqual(server.injected["captcha"], 1)
+
+        async with MockPlatformServer("zhihu", rate_limit=1) as server:
+            async with httpx.AsyncClient() as client:
+                responses = [await client.get(f"{server.base_url}/api/v4/search_v3") for _ in range(3)]
+        self.assertEqual(responses[0].status_code, 200)
+        self.assertEqual([response.status_code for response in responses[1:]], [429, 429])
+        self.assertEqual(server.injected["rate_limited"], 2)
+
+    async def test_crawl_mock_platform(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for platform in ("xhs", "ks"):
+                result = await run_platform(platform, temp_dir, pages=2, comment_pages=2, page_size=5, notes=0,
+                                            keywords="mock", concurrency=4, latency_ms=0,
+                                            latency_distribution="fixed", error_rate=0, captcha_rate=0,
+                                            rate_limit=0, keep_intervals=False, seed=1)
+                self.assertIsNone(result["error"], platform)
+                self.assertEqual(result["items"], {"contents": 10, "comments": 100}, platform)
+                self.assertEqual(result["status_errors"], 0)
+                self.assertTrue(os.path.isdir(os.path.join(temp_dir, platform)))
+
+
+if __name__ == '__main__':
+    unittest.main()
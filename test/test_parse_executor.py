@@ -0,0 +1,103 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 19:10
+# @Desc    : 解析进程池：解析结果与进程内解析一致，子进程异常退出时回退到进程内解析，解析量大时总爬取速度更高
+import asyncio
+import multiprocessing
+import os
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import config
+from benchmarks.bench_tieba_extractor import PARENT_COMMENT, TEST_DATA_DIR
+from media_platform.tieba.help import TieBaExtractor
+from tools.parse_executor import close_parse_executor, run_parser
+
+
+def read_test_data(file_name: str) -> str:
+    with open(os.path.join(TEST_DATA_DIR, file_name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def crash_in_worker(value: str) -> str:
+    if multiprocessing.parent_process() is not None:
+        os._exit(1)
+    return value
+
+
+async def simulate_crawl(page_content: str, page_count: int, concurrency: int, network_latency: float) -> float:
+    """
+    模拟爬取：每个页面先等待网络请求，再解析评论页，返回每秒爬取的页面数
+    """
+    extractor = TieBaExtractor()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def crawl_page():
+        async with semaphore:
+            await asyncio.sleep(network_latency)
+            comments = await run_parser(extractor.extract_tieba_note_parment_comments, page_content, "123456")
+            assert len(comments) == 30
+
+    start = time.perf_counter()
+    await asyncio.gather(*[crawl_page() for _ in range(page_count)])
+    return page_count / (time.perf_counter() - start)
+
+
+class TestParseExecutor(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.origin_config = (config.ENABLE_PARSE_PROCESS_POOL, config.PARSE_PROCESS_POOL_SIZE)
+        config.ENABLE_PARSE_PROCESS_POOL = True
+
+    async def asyncTearDown(self):
+        await close_parse_executor()
+        config.ENABLE_PARSE_PROCESS_POOL, config.PARSE_PROCESS_POOL_SIZE = self.origin_config
+
+    async def test_results_match_in_process_parse(self):
+        config.PARSE_PROCESS_POOL_SIZE = 1
+        extractor = TieBaExtractor()
+        cases = [
+            (extractor.extract_tieba_note_list, read_test_data("tieba_note_list.html")),
+            (extractor.extract_note_detail, read_test_data("note_detail.html")),
+            (extractor.extract_tieba_note_parment_comments, read_test_data("note_comments.html"), "123456"),
+            (extractor.extract_tieba_note_sub_comments, read_test_data("note_sub_comments.html"), PARENT_COMMENT),
+        ]
+        for func, *args in cases:
+            self.assertEqual(await run_parser(func, *args), func(*args))
+
+    async def test_fallback_when_worker_crashed(self):
+        config.PARSE_PROCESS_POOL_SIZE = 1
+        self.assertEqual(await run_parser(crash_in_worker, "parsed"), "parsed")
+        # 进程池重建后可以继续使用
+        self.assertEqual(await run_parser(str.upper, "parsed"), "PARSED")
+
+    @unittest.skipIf((os.cpu_count() or 1) < 2, "need at least 2 cpu cores")
+    async def test_crawl_throughput(self):
+        page_content = read_test_data("note_comments.html")
+        config.ENABLE_PARSE_PROCESS_POOL = False
+        in_process_rate = await simulate_crawl(page_content, page_count=80, concurrency=8, network_latency=0.05)
+
+        config.ENABLE_PARSE_PROCESS_POOL = True
+        config.PARSE_PROCESS_POOL_SIZE = 0
+        # 预热，子进程启动和导入模块的耗时不计入
+        await asyncio.gather(*[run_parser(str, i) for i in range(os.cpu_count() * 2)])
+        process_pool_rate = await simulate_crawl(page_content, page_count=80, concurrency=8, network_latency=0.05)
+
+        print(f"in process: {in_process_rate:.1f} pages/sec, process pool: {process_pool_rate:.1f} pages/sec")
+        self.assertGreater(process_pool_rate, in_process_rate)
+
+
+if __name__ == '__main__':
+    unittest.main()
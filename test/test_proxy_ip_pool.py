@@ -13,10 +13,18 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 14:42
 # @Desc    :
+import asyncio
+from typing import List
 from unittest import IsolatedAsyncioTestCase
 
-from proxy.proxy_ip_pool import create_ip_pool
+import config
+from media_platform.kuaishou.client import KuaiShouClient
+from proxy.base_proxy import ProxyProvider
+from proxy import proxy_ip_pool
+from proxy.proxy_ip_pool import close_ip_pool, create_ip_pool, proxy_key
 from proxy.types import IpInfoModel
+from test.stub_server import StubHttpServer, StubRequest
+from tools import utils
 
 
 class TestIpPool(IsolatedAsyncioTestCase):
@@ -28,3 +36,123 @@ class TestIpPool(IsolatedAsyncioTestCase):
             print(ip_proxy_info)
             self.assertIsNotNone(ip_proxy_info.ip, msg="验证 ip 是否获取成功")
 
+
+class FakeProxyProvider(ProxyProvider):
+    """
+    按顺序返回代理，模拟代理商优先返回缓存中的代理
+    """
+
+    def __init__(self, proxies: List[IpInfoModel]):
+        self.proxies = proxies
+        self.requested: List[int] = []
+
+    async def get_proxies(self, num: int) -> List[IpInfoModel]:
+        self.requested.append(num)
+        return self.proxies[:num]
+
+
+def make_proxy(server: StubHttpServer, expired_time_ts: int = None, user: str = "user") -> IpInfoModel:
+    return IpInfoModel(ip=server.host, port=server.port, user=user, password="pwd", protocol="http://",
+                       expired_time_ts=expired_time_ts)
+
+
+class TestProxyIpPoolHealth(IsolatedAsyncioTestCase):
+    """
+    本地桩服务充当 HTTP 代理，不访问外网
+    """
+
+    async def asyncSetUp(self):
+        self.origin_config = (config.IP_PROXY_VALIDATE_URL, config.IP_PROXY_POOL_LOW_WATERMARK)
+        config.IP_PROXY_VALIDATE_URL = "http://validate.test/ip"
+        config.IP_PROXY_POOL_LOW_WATERMARK = 2
+        self.statuses = {}
+        # 同时在处理中的请求数，用来确认验证是并发执行的
+        self.in_flight = self.max_in_flight = 0
+
+        def make_handler(name: str):
+            async def handler(request: StubRequest):
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                try:
+                    await asyncio.sleep(0.2 if name == "slow" else 0.05)
+                finally:
+                    self.in_flight -= 1
+                return self.statuses.get(name, 200), {}, b'{"data": {}}'
+            return handler
+
+        self.servers = {name: StubHttpServer(make_handler(name)) for name in ("fast", "slow", "spare", "bad")}
+        for server in self.servers.values():
+            await server.start()
+        self.statuses["bad"] = 500
+
+    async def asyncTearDown(self):
+        for server in self.servers.values():
+            await server.stop()
+        config.IP_PROXY_VALIDATE_URL, config.IP_PROXY_POOL_LOW_WATERMARK = self.origin_config
+
+    async def test_validate_and_rank(self):
+        now = utils.get_unix_timestamp()
+        expiring = IpInfoModel(ip="127.0.0.1", port=1, user="user", password="pwd", protocol="http://",
+                               expired_time_ts=now + 5)
+        provider = FakeProxyProvider([expiring, make_proxy(self.servers["slow"], now + 600),
+                                      make_proxy(self.servers["bad"]), make_proxy(self.servers["fast"])])
+        pool = await create_ip_pool(ip_pool_count=2, enable_validate_ip=True, ip_provider=provider)
+        # 快要过期和验证失败的代理不加入代理池，再向代理商多取一轮
+        self.assertEqual(sorted(proxy.port for proxy in pool.proxy_list),
+                         sorted([self.servers["slow"].port, self.servers["fast"].port]))
+        proxy = await pool.get_proxy()
+        self.assertEqual(proxy.port, self.servers["fast"].port)
+        # 取出的代理仍然在代理池中
+        self.assertEqual(len(pool.proxy_list), 2)
+
+        fast_proxies = utils.format_proxy_info(proxy)[1]
+        for _ in range(config.IP_PROXY_MAX_FAILURES):
+            pool.report_failure(fast_proxies)
+        self.assertNotIn(proxy_key(proxy), pool.proxies)
+        self.assertEqual((await pool.get_proxy()).port, self.servers["slow"].port)
+        await pool.close()
+
+    async def test_concurrent_validation(self):
+        provider = FakeProxyProvider([make_proxy(self.servers["slow"], user=f"user{i}") for i in range(4)])
+        pool = await create_ip_pool(ip_pool_count=4, enable_validate_ip=True, ip_provider=provider)
+        # 每个代理验证 0.2 秒，4 个代理的验证请求同时在处理中，而不是逐个验证
+        self.assertEqual(self.max_in_flight, 4)
+        self.assertEqual(len(pool.proxy_list), 4)
+        await pool.close()
+
+    async def test_close_ip_pool(self):
+        provider = FakeProxyProvider([make_proxy(self.servers["fast"])])
+        pool = await create_ip_pool(ip_pool_count=1, enable_validate_ip=True, ip_provider=provider)
+        maintain_task = pool._maintain_task
+        self.assertIn(pool, proxy_ip_pool._ip_pools)
+        # 爬虫结束时停止代理池的后台任务，不再等到程序退出
+        await close_ip_pool(pool)
+        self.assertNotIn(pool, proxy_ip_pool._ip_pools)
+        self.assertTrue(maintain_task.cancelled())
+        await close_ip_pool(None)
+
+    async def test_rotate_on_block(self):
+        provider = FakeProxyProvider([make_proxy(self.servers["fast"]), make_proxy(self.servers["slow"])])
+        pool = await create_ip_pool(ip_pool_count=2, enable_validate_ip=True, ip_provider=provider)
+        client = KuaiShouClient(headers={}, playwright_page=None, cookie_dict={},
+                                proxies=utils.format_proxy_info(await pool.get_proxy())[1])
+        client.ip_pool = pool
+        client._host = "http://api.test/graphql"
+
+        await client.post("", {"operationName": "visionSearchPhoto"})
+        self.assertEqual(self.servers["fast"].request_count, 2)
+
+        # 代理被限流，换成代理池中的下一个代理，并在后台补充代理
+        provider.proxies.append(make_proxy(self.servers["spare"]))
+        self.statuses["fast"] = 429
+        await client.post("", {"operationName": "visionSearchPhoto"})
+        self.assertEqual(client.proxies, utils.format_proxy_info(make_proxy(self.servers["slow"]))[1])
+        await client.post("", {"operationName": "visionSearchPhoto"})
+        self.assertEqual(self.servers["slow"].request_count, 2)
+        await asyncio.sleep(0.3)
+        self.assertEqual(sorted(proxy.port for proxy in pool.proxy_list),
+                         sorted([self.servers["slow"].port, self.servers["spare"].port]))
+        # 被移出的代理还在代理商缓存中，补充时多取一个
+        self.assertEqual(provider.requested[-1], 3)
+        await client.close()
+        await pool.close()
@@ -0,0 +1,199 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 03:00
+# @Desc    : 代理租约测试，使用本地 Redis 兼容服务
+import asyncio
+import unittest
+from typing import List
+from unittest import IsolatedAsyncioTestCase
+
+from redis.asyncio import Redis
+
+import config
+from config import db_config
+from proxy.base_proxy import IpCache
+from proxy.proxy_ip_pool import ProxyIpPool
+from proxy.proxy_lease import ProxyLeaseStore, proxy_key
+from proxy.types import IpInfoModel
+from test.redis_stub import RedisStubServer
+from test.test_proxy_ip_pool import FakeProxyProvider
+from tools import utils
+
+
+def make_proxies(count: int) -> List[IpInfoModel]:
+    return [IpInfoModel(ip=f"10.0.0.{i}", port=8000 + i, user="user", password="pwd", protocol="http://",
+                        expired_time_ts=None) for i in range(count)]
+
+
+class TestProxyLeaseStore(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = RedisStubServer()
+        await self.server.start()
+        self.stores: List[ProxyLeaseStore] = []
+
+    async def asyncTearDown(self):
+        for store in self.stores:
+            await store.close()
+        await self.server.stop()
+
+    def new_store(self, owner: str, lease_ttl: float = 60) -> ProxyLeaseStore:
+        store = ProxyLeaseStore("kuaidaili", Redis(host=self.server.host, port=self.server.port), owner=owner,
+                                lease_ttl=lease_ttl)
+        self.stores.append(store)
+        return store
+
+    async def test_checkout_is_exclusive(self):
+        proxies = make_proxies(5)
+        store_a, store_b = self.new_store("a"), self.new_store("b")
+        leased_a = await store_a.checkout(proxies, 3)
+        leased_b = await store_b.checkout(proxies, 3)
+        self.assertEqual(len(leased_a), 3)
+        self.assertEqual(len(leased_b), 2)
+        self.assertFalse({proxy_key(p) for p in leased_a} & {proxy_key(p) for p in leased_b})
+
+    async def test_concurrent_checkout(self):
+        proxies = make_proxies(20)
+        results = await asyncio.gather(*[self.new_store(f"owner_{i}").checkout(proxies, 3) for i in range(8)])
+        leased_keys = [proxy_key(p) for leased in results for p in leased]
+        self.assertEqual(len(leased_keys), 20)
+        self.assertEqual(len(set(leased_keys)), 20)
+
+    async def test_concurrent_renew_and_release(self):
+        proxies = make_proxies(10)
+        store_a, store_b = self.new_store("a"), self.new_store("b")
+        leased_a = await store_a.checkout(proxies, 5)
+        leased_b = await store_b.checkout(proxies, 5)
+        # 两个进程同时在事务中修改各自的租约，WATCH 冲突后重试，不会改动对方的租约
+        renewed_a, released_b = await asyncio.gather(store_a.renew(proxies), store_b.release(proxies))
+        self.assertEqual(renewed_a, leased_a)
+        self.assertEqual(released_b, leased_b)
+        self.assertEqual(await self.new_store("c").checkout(proxies, 10), leased_b)
+
+    async def test_release_and_renew_only_own_leases(self):
+        proxies = make_proxies(2)
+        store_a, store_b = self.new_store("a"), self.new_store("b")
+        leased = await store_a.checkout(proxies, 2)
+        self.assertEqual(await store_b.release(leased), [])
+        self.assertEqual(await store_b.renew(leased), [])
+        self.assertEqual(await store_a.renew(leased), leased)
+        self.assertEqual(await store_a.release(leased[:1]), leased[:1])
+        self.assertEqual(await store_b.checkout(proxies, 2), leased[:1])
+
+    async def test_lease_expires(self):
+        proxies = make_proxies(1)
+        store_a, store_b = self.new_store("a", lease_ttl=0.1), self.new_store("b")
+        self.assertEqual(len(await store_a.checkout(proxies, 1)), 1)
+        self.assertEqual(await store_b.checkout(proxies, 1), [])
+        await asyncio.sleep(0.15)
+        self.assertEqual(len(await store_b.checkout(proxies, 1)), 1)
+        # 租约过期后被其他进程租走，续约失败
+        self.assertEqual(await store_a.renew(proxies), [])
+
+    async def test_checkout_prefers_least_used(self):
+        proxies = make_proxies(3)
+        store = self.new_store("a")
+        await store.add_usage([(proxies[0], 5), (proxies[1], 1)])
+        self.assertEqual(await store.checkout(proxies, 1), [proxies[2]])
+        self.assertEqual(await store.checkout(proxies, 1), [proxies[1]])
+        self.assertEqual(await store.get_usage(proxies), [5, 1, 0])
+
+
+class TestIpCacheBulkLoad(IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = RedisStubServer()
+        cls.host, cls.port = cls.server.start_in_thread()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop_thread()
+
+    def setUp(self):
+        self.origin_config = (config.ENABLE_IP_PROXY_LEASE, db_config.REDIS_DB_HOST, db_config.REDIS_DB_PORT)
+        config.ENABLE_IP_PROXY_LEASE = True
+        db_config.REDIS_DB_HOST, db_config.REDIS_DB_PORT = self.host, self.port
+
+    def tearDown(self):
+        config.ENABLE_IP_PROXY_LEASE, db_config.REDIS_DB_HOST, db_config.REDIS_DB_PORT = self.origin_config
+
+    async def test_load_all_ip_in_one_round_trip(self):
+        ip_cache = IpCache()
+        proxies = make_proxies(50)
+        for proxy in proxies:
+            await ip_cache.set_ip(f"kuaidaili_{proxy.ip}_{proxy.port}", proxy.model_dump_json(), ex=60)
+        command_count = self.server.state.command_count
+        loaded = await ip_cache.load_all_ip("kuaidaili")
+        # SCAN + MGET，和 IP 数量无关
+        self.assertEqual(self.server.state.command_count - command_count, 2)
+        self.assertEqual(sorted(proxy_key(p) for p in loaded), sorted(proxy_key(p) for p in proxies))
+        await ip_cache.cache_client.close()
+
+
+class TestProxyIpPoolLease(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = RedisStubServer()
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    def new_pool(self, provider: FakeProxyProvider, owner: str) -> ProxyIpPool:
+        lease_store = ProxyLeaseStore("kuaidaili", Redis(host=self.server.host, port=self.server.port), owner=owner)
+        return ProxyIpPool(ip_pool_count=3, enable_validate_ip=False, ip_provider=provider, lease_store=lease_store)
+
+    async def test_pools_share_provider_without_overlap(self):
+        proxies = make_proxies(6)
+        provider = FakeProxyProvider(proxies)
+        pools = [self.new_pool(provider, owner) for owner in ("host_a", "host_b")]
+        for pool in pools:
+            await pool.load_proxies()
+        keys_a, keys_b = [{proxy_key(p) for p in pool.proxy_list} for pool in pools]
+        self.assertEqual(len(keys_a), 3)
+        self.assertEqual(len(keys_b), 3)
+        self.assertFalse(keys_a & keys_b)
+
+        # 关闭时归还租约，使用次数累加到集群计数中
+        for _ in range(4):
+            await pools[0].get_proxy()
+        await pools[0].close()
+        self.assertEqual(sum(await pools[1].lease_store.get_usage(proxies)), 4)
+        third = self.new_pool(provider, "host_c")
+        await third.load_proxies()
+        self.assertEqual({proxy_key(p) for p in third.proxy_list}, keys_a)
+        await pools[1].close()
+        await third.close()
+
+    async def test_removed_proxy_lease_released(self):
+        proxies = make_proxies(4)
+        provider = FakeProxyProvider(proxies)
+        pool = self.new_pool(provider, "host_a")
+        await pool.load_proxies()
+        blocked = pool.proxy_list[0]
+        _, httpx_proxy = utils.format_proxy_info(blocked)
+
+        # 移出代理池的代理在后台归还租约，其他进程可以租用
+        await pool.rotate_proxy(httpx_proxy)
+        other = self.new_pool(provider, "host_b")
+        await asyncio.gather(*pool._release_tasks)
+        await other.load_proxies()
+        self.assertIn(proxy_key(blocked), {proxy_key(p) for p in other.proxy_list})
+        await pool.close()
+        await other.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
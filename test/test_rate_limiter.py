@@ -0,0 +1,95 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 01:40
+# @Desc    : 自适应限流：令牌桶速率、AIMD 调整，以及平台 client 上报的风控信号
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import config
+from media_platform.kuaishou.client import KuaiShouClient
+from test.stub_server import StubHttpServer, StubRequest
+from tools.rate_limiter import (AdaptiveTokenBucket, close_rate_limiter, crawl_sleep, endpoint_class,
+                                get_rate_limiter)
+
+
+class TestRateLimiter(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.origin_config = (config.ENABLE_RATE_LIMITER, config.RATE_LIMIT_INITIAL_QPS, config.RATE_LIMIT_BURST)
+        config.ENABLE_RATE_LIMITER = True
+        config.RATE_LIMIT_INITIAL_QPS = 4.0
+        config.RATE_LIMIT_BURST = 1
+
+    def tearDown(self):
+        close_rate_limiter()
+        config.ENABLE_RATE_LIMITER, config.RATE_LIMIT_INITIAL_QPS, config.RATE_LIMIT_BURST = self.origin_config
+
+    def test_endpoint_class(self):
+        self.assertEqual(endpoint_class("https://edith.xiaohongshu.com/api/sns/web/v1/search/notes"), "search")
+        self.assertEqual(endpoint_class("https://www.xiaohongshu.com/explore/1?xsec_source=pc_search"), "default")
+        self.assertEqual(endpoint_class("https://api.bilibili.com/x/v2/reply/wbi/main?oid=1"), "comment")
+        self.assertEqual(endpoint_class("commentListQuery"), "comment")
+
+    def test_aimd(self):
+        bucket = AdaptiveTokenBucket(rate=4, burst=1, min_rate=1, max_rate=5, increase_step=0.5, decrease_factor=0.5)
+        for _ in range(4):
+            bucket.on_success()
+        self.assertEqual(bucket.rate, 5)
+        bucket.on_throttled()
+        # 同一批并发请求返回的风控信号只降速一次
+        bucket.on_throttled()
+        self.assertEqual(bucket.rate, 2.5)
+        self.assertEqual(bucket.throttled_count, 2)
+        self.assertLessEqual(bucket.tokens, 0)
+        bucket._decreased_at = 0
+        bucket.on_throttled()
+        bucket._decreased_at = 0
+        bucket.on_throttled()
+        self.assertEqual(bucket.rate, 1)
+
+    async def test_acquire(self):
+        bucket = AdaptiveTokenBucket(rate=20, burst=1, min_rate=1, max_rate=20, increase_step=0, decrease_factor=0.5)
+        start = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+        # 开启限流后分页之间不再等待
+        start = time.monotonic()
+        await crawl_sleep(10)
+        self.assertLess(time.monotonic() - start, 1)
+
+    async def test_client_signals(self):
+        statuses = iter([429, 200])
+
+        def handler(request: StubRequest):
+            return next(statuses), {"Content-Type": "application/json"}, b'{"data": {}}'
+
+        async with StubHttpServer(handler) as server:
+            client = KuaiShouClient(headers={"Cookie": "a=1"}, playwright_page=None, cookie_dict={})
+            client._host = f"{server.base_url}/graphql"
+            await client.post("", {"operationName": "visionSearchPhoto"})
+            await client.post("", {"operationName": "visionSearchPhoto"})
+            await client.close()
+
+        (key, bucket), = get_rate_limiter().buckets.items()
+        self.assertEqual(key[0], "ks")
+        self.assertEqual(key[3], "search")
+        self.assertEqual((bucket.throttled_count, bucket.success_count), (1, 1))
+        self.assertEqual(bucket.rate, 2 + config.RATE_LIMIT_INCREASE_STEP)
+
+
+if __name__ == '__main__':
+    unittest.main()
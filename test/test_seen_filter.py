@@ -0,0 +1,212 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 22:40
+# @Desc    : 已爬取ID过滤：布隆过滤器持久化、误判率、刷新时间、爬虫跳过已爬取的评论
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from typing import Dict, List
+from unittest import IsolatedAsyncioTestCase, mock
+
+import config
+from media_platform.bilibili.core import BilibiliCrawler
+from media_platform.bilibili.help import bvid_to_aid
+from media_platform.douyin.client import DOUYINClient
+from media_platform.tieba.core import TieBaCrawler
+from media_platform.xhs.client import XiaoHongShuClient
+from media_platform.xhs.core import XiaoHongShuCrawler
+from model.m_baidu_tieba import TiebaNote
+from task_manager.task_config import DetailTaskConfig
+from tools.seen_filter import BloomFilter, SeenIdFilter, close_seen_filters, get_seen_filter
+
+
+class FakeCommentClient(DOUYINClient):
+
+    def __init__(self):
+        super().__init__(headers={}, playwright_page=None, cookie_dict={})
+        self.request_count = 0
+
+    async def get_aweme_comments(self, aweme_id: str, cursor: int = 0) -> Dict:
+        self.request_count += 1
+        return {"has_more": 0, "cursor": 0, "comments": [{"cid": f"{aweme_id}_0", "reply_comment_total": 0}]}
+
+
+class FakeXhsClient(XiaoHongShuClient):
+
+    def __init__(self):
+        super().__init__(headers={}, playwright_page=None, cookie_dict={})
+        self.detail_note_ids: List[str] = []
+        self.comment_requests: List[tuple] = []
+
+    async def get_note_by_id_from_html(self, note_id: str, xsec_source: str, xsec_token: str,
+                                       enable_cookie: bool = False) -> Dict:
+        self.detail_note_ids.append(note_id)
+        return {"note_id": note_id}
+
+    async def get_note_comments(self, note_id: str, xsec_token: str, cursor: str = "") -> Dict:
+        self.comment_requests.append((note_id, xsec_token))
+        return {"has_more": False, "cursor": "", "comments": []}
+
+
+class FakeBilibiliClient:
+
+    def __init__(self, video_info: Dict = None):
+        self.video_info = video_info
+        self.comment_video_ids: List[int] = []
+
+    async def get_video_info(self, aid: int = None, bvid: str = None) -> Dict:
+        if self.video_info is None:
+            raise AssertionError("video detail should be skipped")
+        return self.video_info
+
+    async def get_video_all_comments(self, video_id: int, **kwargs) -> List[Dict]:
+        self.comment_video_ids.append(video_id)
+        return []
+
+
+class FakeTiebaClient:
+
+    def __init__(self):
+        self.detail_note_ids: List[str] = []
+
+    async def get_note_by_id(self, note_id: str) -> TiebaNote:
+        self.detail_note_ids.append(note_id)
+        return TiebaNote(note_id=note_id, title="", note_url="", tieba_name="", tieba_link="")
+
+
+class TestSeenIdFilter(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.origin_config = (config.ENABLE_SEEN_ID_FILTER, config.SEEN_ID_FILTER_PATH, config.ENABLE_CRAWL_CHECKPOINT)
+        config.ENABLE_SEEN_ID_FILTER = True
+        config.SEEN_ID_FILTER_PATH = self.temp_dir.name
+        config.ENABLE_CRAWL_CHECKPOINT = False
+
+    def tearDown(self):
+        close_seen_filters()
+        config.ENABLE_SEEN_ID_FILTER, config.SEEN_ID_FILTER_PATH, config.ENABLE_CRAWL_CHECKPOINT = self.origin_config
+        self.temp_dir.cleanup()
+
+    def test_bloom_filter(self):
+        file_name = os.path.join(self.temp_dir.name, "test.bloom")
+        bloom_filter = BloomFilter(file_name, capacity=10000, error_rate=0.01)
+        for i in range(10000):
+            bloom_filter.add(f"note_{i}")
+        bloom_filter.close()
+        # 每个ID约 1.2 字节
+        self.assertLess(os.path.getsize(file_name), 10000 * 1.3)
+
+        bloom_filter = BloomFilter(file_name, capacity=10000, error_rate=0.01)
+        self.assertTrue(all(f"note_{i}" in bloom_filter for i in range(10000)))
+        false_positives = sum(f"other_{i}" in bloom_filter for i in range(10000))
+        self.assertLess(false_positives, 200)
+        # 添加时误判为已存在的ID不计数
+        self.assertGreater(bloom_filter.count, 9900)
+        bloom_filter.close()
+
+    def test_refresh_age(self):
+        seen_filter = SeenIdFilter("xhs", "note", refresh_sec=3600, generation_sec=600, capacity=100)
+        now = time.time()
+        with mock.patch("tools.seen_filter.time.time", return_value=now - 1800):
+            seen_filter.add("note_old")
+        seen_filter.add("note_new")
+        self.assertFalse(seen_filter.is_seen("note_other"))
+        seen_filter.close()
+
+        # 重新打开后仍然有效，超过刷新时间的ID重新爬取，过期的分代文件被删除
+        seen_filter = SeenIdFilter("xhs", "note", refresh_sec=3600, generation_sec=600, capacity=100)
+        self.assertTrue(seen_filter.is_seen("note_old"))
+        self.assertTrue(seen_filter.is_seen("note_new"))
+        self.assertFalse(SeenIdFilter("dy", "note", refresh_sec=3600).is_seen("note_new"))
+        with mock.patch("tools.seen_filter.time.time", return_value=now + 2400):
+            self.assertFalse(seen_filter.is_seen("note_old"))
+            self.assertTrue(seen_filter.is_seen("note_new"))
+        seen_filter.close()
+        with mock.patch("tools.seen_filter.time.time", return_value=now + 3 * 3600):
+            seen_filter = SeenIdFilter("xhs", "note", refresh_sec=3600, generation_sec=600, capacity=100)
+            self.assertFalse(seen_filter.is_seen("note_new"))
+            self.assertEqual(seen_filter.generations, {})
+            self.assertEqual(os.listdir(seen_filter.filter_path), [])
+        seen_filter.close()
+
+    async def test_skip_crawled_comments(self):
+        with mock.patch.object(config, "PLATFORM", "dy"):
+            client = FakeCommentClient()
+            self.assertEqual(len(await client.get_aweme_all_comments("aweme_1", crawl_interval=0)), 1)
+            close_seen_filters()
+
+            client = FakeCommentClient()
+            self.assertEqual(await client.get_aweme_all_comments("aweme_1", crawl_interval=0), [])
+            await client.get_aweme_all_comments("aweme_2", crawl_interval=0)
+            self.assertEqual(client.request_count, 1)
+
+            config.ENABLE_SEEN_ID_FILTER = False
+            close_seen_filters()
+            client = FakeCommentClient()
+            await client.get_aweme_all_comments("aweme_1", crawl_interval=0)
+            self.assertEqual(client.request_count, 1)
+
+
+    async def test_skipped_note_still_refreshes_comments(self):
+        # 帖子详情在刷新时间内，评论已经超过刷新时间：不请求详情，但仍然爬取评论
+        note_url = "https://www.xiaohongshu.com/explore/note_1?xsec_token=token_1&xsec_source=pc_search"
+        with mock.patch.multiple(config, PLATFORM="xhs", ENABLE_GET_COMMENTS=True, ENABLE_IP_PROXY=True), \
+                mock.patch("media_platform.xhs.core.random.random", return_value=0):
+            get_seen_filter("note").add("note_1")
+            crawler = XiaoHongShuCrawler(DetailTaskConfig(platform="xhs", post_ids=[note_url]))
+            crawler.xhs_client = FakeXhsClient()
+            await crawler.get_specified_notes()
+            self.assertEqual(crawler.xhs_client.detail_note_ids, [])
+            self.assertEqual(crawler.xhs_client.comment_requests, [("note_1", "token_1")])
+
+            # 评论也在刷新时间内时都不请求
+            crawler.xhs_client = FakeXhsClient()
+            await crawler.get_specified_notes()
+            self.assertEqual(crawler.xhs_client.comment_requests, [])
+
+    async def test_skipped_bilibili_video_comments_use_aid(self):
+        with mock.patch.multiple(config, PLATFORM="bili", ENABLE_GET_COMMENTS=True):
+            # 搜索记录的是 aid，指定视频用 bvid 也能去重
+            get_seen_filter("note").add("170001")
+            crawler = BilibiliCrawler()
+            crawler.bili_client = FakeBilibiliClient()
+            await crawler.get_specified_videos(["BV17x411w7KC"])
+            self.assertEqual(crawler.bili_client.comment_video_ids, [170001])
+
+            # 指定视频爬取后记录 aid，搜索到同一个视频时跳过
+            crawler.bili_client = FakeBilibiliClient(video_info={"View": {"aid": bvid_to_aid("BV17x411w7KD")}})
+            semaphore = asyncio.Semaphore(1)
+            self.assertIsNotNone(await crawler.get_video_info_task(aid=0, bvid="BV17x411w7KD", semaphore=semaphore))
+            self.assertTrue(get_seen_filter("note").contains(str(bvid_to_aid("BV17x411w7KD"))))
+            self.assertIsNone(await crawler.get_video_info_task(aid=bvid_to_aid("BV17x411w7KD"), bvid="",
+                                                                semaphore=semaphore))
+
+    async def test_tieba_fetches_note_detail_for_stale_comments(self):
+        # 贴吧评论依赖帖子详情，评论需要刷新时仍然请求详情
+        semaphore = asyncio.Semaphore(1)
+        with mock.patch.multiple(config, PLATFORM="tieba", ENABLE_GET_COMMENTS=True):
+            get_seen_filter("note").add("note_1")
+            crawler = TieBaCrawler()
+            crawler.tieba_client = FakeTiebaClient()
+            self.assertIsNotNone(await crawler.get_note_detail_async_task("note_1", semaphore))
+            get_seen_filter("comments").add("note_1")
+            self.assertIsNone(await crawler.get_note_detail_async_task("note_1", semaphore))
+            self.assertEqual(crawler.tieba_client.detail_note_ids, ["note_1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
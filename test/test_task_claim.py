@@ -0,0 +1,109 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 17:30
+# @Desc    : 多个调度器进程共用同一张任务表（sqlite 文件代替 mysql），每个任务只能被领取一次
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import unittest
+from collections import Counter
+from unittest import IsolatedAsyncioTestCase
+
+from task_manager.db_task import TaskDB
+from test.sqlite_pool import SqlitePool
+
+CRAWL_TASKS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    platform TEXT NOT NULL,
+    task_type TEXT NOT NULL,
+    status TEXT DEFAULT 'pending',
+    priority INT DEFAULT 5,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    scheduled_at TIMESTAMP NULL,
+    completed_at TIMESTAMP NULL,
+    error_message TEXT DEFAULT NULL,
+    worker_id TEXT DEFAULT NULL,
+    lease_expires_at TIMESTAMP NULL
+);
+"""
+
+TASK_COUNT = 200
+
+
+async def claim_all(db_path: str, worker_id: str):
+    TaskDB._pool = SqlitePool(db_path)
+    claimed = []
+    while True:
+        tasks = await TaskDB.get_pending_tasks(limit=5)
+        if not tasks:
+            break
+        for task in tasks:
+            if await TaskDB.claim_task(task["id"], worker_id, 300):
+                claimed.append(task["id"])
+    await TaskDB.close()
+    return claimed
+
+
+def run_worker(db_path: str, worker_id: str):
+    return asyncio.run(claim_all(db_path, worker_id))
+
+
+class TestTaskClaim(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        pool = SqlitePool(self.db_path, schema=CRAWL_TASKS_SCHEMA)
+        pool.conn.executemany(
+            "INSERT INTO crawl_tasks (platform, task_type) VALUES (?, ?)",
+            [("xhs", "search")] * TASK_COUNT,
+        )
+        pool.close()
+
+    def tearDown(self):
+        TaskDB._pool = None
+        os.remove(self.db_path)
+
+    def test_multi_process_claim(self):
+        with multiprocessing.get_context("spawn").Pool(4) as process_pool:
+            results = process_pool.starmap(run_worker, [(self.db_path, f"worker-{i}") for i in range(4)])
+
+        claimed = Counter(task_id for result in results for task_id in result)
+        self.assertEqual(len(claimed), TASK_COUNT)
+        self.assertEqual(max(claimed.values()), 1)
+
+    async def test_reclaim_expired_lease(self):
+        TaskDB._pool = SqlitePool(self.db_path)
+        # 领取后进程退出，租约到期没有续约
+        self.assertTrue(await TaskDB.claim_task(1, "worker-dead", -1))
+        self.assertFalse(await TaskDB.claim_task(1, "worker-alive", 300))
+        self.assertFalse(await TaskDB.renew_task_lease(2, "worker-alive", 300))
+
+        self.assertEqual(await TaskDB.reclaim_expired_tasks(), 1)
+        self.assertTrue(await TaskDB.claim_task(1, "worker-alive", 300))
+        self.assertTrue(await TaskDB.renew_task_lease(1, "worker-alive", 300))
+        self.assertEqual(await TaskDB.reclaim_expired_tasks(), 0)
+
+        # 原来的进程恢复后不能再修改已经被接管的任务
+        await TaskDB.update_task_status(1, "failed", "timeout", worker_id="worker-dead")
+        await TaskDB.update_task_status(1, "completed", worker_id="worker-alive")
+        rows = await TaskDB.execute_query("SELECT status, lease_expires_at FROM crawl_tasks WHERE id = %s", (1,))
+        self.assertEqual(rows[0], {"status": "completed", "lease_expires_at": None})
+        await TaskDB.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
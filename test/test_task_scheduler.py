@@ -0,0 +1,129 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 16:50
+# @Desc    :
+import asyncio
+import time
+import unittest
+from collections import Counter
+from unittest import IsolatedAsyncioTestCase, mock
+
+import config
+from task_manager.models import TaskStatus
+from task_manager.scheduler import TaskScheduler
+
+
+class MemoryTaskDB:
+    """内存中的任务表，代替 TaskDB"""
+
+    def __init__(self, tasks):
+        self.tasks = {task["id"]: dict(task, status="pending") for task in tasks}
+
+    async def get_pending_tasks(self, limit=10, exclude_platforms=None):
+        pending = [
+            task for task in self.tasks.values()
+            if task["status"] == "pending" and task["platform"] not in (exclude_platforms or [])
+        ]
+        pending.sort(key=lambda task: (-task["priority"], task["id"]))
+        return [dict(task) for task in pending[:limit]]
+
+    async def count_pending_tasks(self):
+        return sum(1 for task in self.tasks.values() if task["status"] == "pending")
+
+    async def claim_task(self, task_id, worker_id, lease_seconds):
+        if self.tasks[task_id]["status"] != "pending":
+            return False
+        self.tasks[task_id]["status"] = "running"
+        return True
+
+    async def renew_task_lease(self, task_id, worker_id, lease_seconds):
+        return True
+
+    async def reclaim_expired_tasks(self):
+        return 0
+
+    async def update_task_status(self, task_id, status, error_message=None, worker_id=None):
+        self.tasks[task_id]["status"] = status
+
+    async def log_task_execution(self, log):
+        return log.task_id
+
+    async def update_log_status(self, log_id, status, items_processed=None, log_message=None):
+        pass
+
+    async def get_task_details(self, task_id):
+        return self.tasks[task_id], ["python"]
+
+
+class FakeCrawler:
+    running = Counter()
+    max_running = Counter()
+    started = []
+    platforms_seen = []
+
+    def __init__(self, platform, task_config):
+        self.platform = platform
+        self.task_config = task_config
+
+    async def start(self):
+        FakeCrawler.started.append(self.platform)
+        FakeCrawler.running[self.platform] += 1
+        FakeCrawler.running["all"] += 1
+        for key in (self.platform, "all"):
+            FakeCrawler.max_running[key] = max(FakeCrawler.max_running[key], FakeCrawler.running[key])
+        # 爬虫的任务配置只在当前任务内生效，并发执行时不能互相覆盖，也不能修改全局配置
+        config.apply_task_config({"PLATFORM": self.platform})
+        await asyncio.sleep(0.1)
+        assert config.get_config("PLATFORM") == self.platform
+        FakeCrawler.platforms_seen.append(config.get_config("PLATFORM"))
+        FakeCrawler.running[self.platform] -= 1
+        FakeCrawler.running["all"] -= 1
+
+
+class TestTaskScheduler(IsolatedAsyncioTestCase):
+
+    async def test_concurrent_tasks_with_platform_limit(self):
+        tasks = [{"id": i, "platform": "xhs", "task_type": "search", "priority": 5} for i in range(1, 7)]
+        tasks += [{"id": i, "platform": "dy", "task_type": "search", "priority": 5} for i in range(7, 13)]
+        tasks.append({"id": 13, "platform": "bili", "task_type": "search", "priority": 10})
+        task_db = MemoryTaskDB(tasks)
+        scheduler = TaskScheduler(check_interval=60, max_concurrency=4, platform_concurrency={"xhs": 2, "dy": 2})
+        scheduler.task_lock = asyncio.Lock()
+
+        with mock.patch("task_manager.scheduler.TaskDB", task_db), \
+                mock.patch("factory.crawler_factory.CrawlerFactory.create_crawler", FakeCrawler), \
+                mock.patch.object(config, "ENABLE_CRAWL_CHECKPOINT", False):
+            global_platform = config.PLATFORM
+            start = time.perf_counter()
+            scheduler_task = asyncio.create_task(scheduler.start())
+            while any(task["status"] != TaskStatus.COMPLETED.value for task in task_db.tasks.values()):
+                await asyncio.sleep(0.01)
+                self.assertLess(time.perf_counter() - start, 5)
+            scheduler.stop()
+            await scheduler_task
+
+        # 优先级最高的任务最先执行，同一平台不超过并发上限，任务结束后立即补位（不会等 60 秒的轮询间隔）
+        self.assertEqual(FakeCrawler.started[0], "bili")
+        self.assertEqual(FakeCrawler.max_running["all"], 4)
+        self.assertLessEqual(FakeCrawler.max_running["xhs"], 2)
+        self.assertLessEqual(FakeCrawler.max_running["dy"], 2)
+        self.assertEqual(scheduler.stats()["running"], 0)
+        self.assertEqual(scheduler.queue_depth, 0)
+        self.assertEqual(sorted(FakeCrawler.platforms_seen), sorted(FakeCrawler.started))
+        self.assertEqual(config.PLATFORM, global_platform)
+        self.assertEqual(config.get_config("PLATFORM"), global_platform)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+
+from benchmarks.bench_tieba_extractor import PARENT_COMMENT, TEST_DATA_DIR
+from media_platform.tieba.help import TieBaExtractor
+
+
+def read_test_data(file_name: str) -> str:
+    with open(os.path.join(TEST_DATA_DIR, file_name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_extract_note_list():
+    extractor = TieBaExtractor()
+    notes = extractor.extract_search_note_list(read_test_data("search_keyword_notes.html"))
+    assert len(notes) == 10 and all(note.note_id and note.title for note in notes)
+
+    notes = extractor.extract_tieba_note_list(read_test_data("tieba_note_list.html"))
+    assert len(notes) == 48
+    assert all(note.note_id and note.title for note in notes)
+
+
+def test_extract_note_detail_and_comments():
+    extractor = TieBaExtractor()
+    note = extractor.extract_note_detail(read_test_data("note_detail.html"))
+    assert note.note_id and note.user_nickname and note.total_replay_page
+
+    comments = extractor.extract_tieba_note_parment_comments(read_test_data("note_comments.html"), "123456")
+    assert len(comments) == 30 and all(comment.tieba_name == comments[0].tieba_name for comment in comments)
+    assert any(comment.ip_location for comment in comments)
+
+    sub_comments = extractor.extract_tieba_note_sub_comments(read_test_data("note_sub_comments.html"), PARENT_COMMENT)
+    assert len(sub_comments) == 10 and all(comment.parent_comment_id == "123456" for comment in sub_comments)
+
+
+def test_extract_creator_page():
+    html_content = """
+    <html><body>
+    <p class="space"><a href="/home/main?un=test_user&id=tb.1.abc">主页</a></p>
+    <span class="userinfo_username ">测试用户</span>
+    <div class="userinfo_userdata"><span class="user_sex_male"></span> <span>吧龄:1.9年</span> <span>IP属地:上海</span></div>
+    <span class="concern_num">(<a href="/follow">12</a>)</span><span class="concern_num">(<a href="/fans">34</a>)</span>
+    <ul class="new_list clearfix"><li><div class="thread_name"><a href="/p/8888?pid=1">帖子</a></div></li></ul>
+    </body></html>
+    """
+    extractor = TieBaExtractor()
+    creator = extractor.extract_creator_info(html_content)
+    assert (creator.user_name, creator.user_id, creator.nickname) == ("test_user", "tb.1.abc", "测试用户")
+    assert (creator.gender, creator.ip_location, creator.registration_duration) == ("男", "上海", "1.9年")
+    assert (creator.follows, creator.fans) == (12, 34)
+    assert extractor.extract_tieba_thread_id_list_from_creator_page(html_content) == ["8888"]
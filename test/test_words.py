@@ -0,0 +1,122 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 07:30
+# @Desc    : 增量词频统计：每个前缀单独计数、只对新数据分词、数据文件重新生成时重新统计、延迟合并生成词云
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from collections import Counter
+from typing import List
+from unittest import IsolatedAsyncioTestCase
+
+import config
+from tools import words
+from tools.words import AsyncWordCloudGenerator
+
+
+def make_comment(content: str) -> dict:
+    return {"content": content}
+
+
+class RecordingWordCloudGenerator(AsyncWordCloudGenerator):
+    """
+    记录每次分词的数据条数和生成的词云，不启动渲染子进程
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.counted_sizes: List[int] = []
+        self.rendered: List[tuple] = []
+
+    def count_words(self, data):
+        self.counted_sizes.append(len(data))
+        return super().count_words(data)
+
+    async def generate_word_cloud(self, word_freq, save_words_prefix):
+        self.rendered.append((save_words_prefix, dict(word_freq)))
+
+
+class TestAsyncWordCloudGenerator(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.origin_debounce = config.WORDCLOUD_DEBOUNCE_SEC
+        config.WORDCLOUD_DEBOUNCE_SEC = 0.1
+        self.generator = RecordingWordCloudGenerator()
+
+    async def asyncTearDown(self):
+        await self.generator.close()
+        words._word_cloud_generators.remove(self.generator)
+        config.WORDCLOUD_DEBOUNCE_SEC = self.origin_debounce
+        self.temp_dir.cleanup()
+
+    def prefix(self, name: str) -> str:
+        return os.path.join(self.temp_dir.name, name)
+
+    async def test_incremental_count_per_prefix(self):
+        comments = [make_comment("程序员学习编程"), make_comment("兼职赚钱经验分享"), make_comment("程序员副业项目")]
+        save_data = []
+        for comment in comments:
+            save_data.append(comment)
+            await self.generator.generate_word_frequency_and_cloud(save_data, self.prefix("search_comments"))
+        # 每次只对新追加的一条数据分词，结果和全量分词一致
+        self.assertEqual(self.generator.counted_sizes, [1, 1, 1])
+        word_freq = self.generator.states[self.prefix("search_comments")].word_freq
+        self.assertEqual(word_freq, self.generator.count_words(comments))
+
+        # 没有新数据时不分词，不同前缀单独计数
+        self.generator.counted_sizes.clear()
+        await self.generator.generate_word_frequency_and_cloud(save_data, self.prefix("search_comments"))
+        await self.generator.generate_word_frequency_and_cloud(comments[:1], self.prefix("detail_comments"))
+        self.assertEqual(self.generator.counted_sizes, [1])
+        self.assertEqual(self.generator.states[self.prefix("detail_comments")].word_freq,
+                         self.generator.count_words(comments[:1]))
+        self.assertEqual(self.generator.states[self.prefix("search_comments")].word_freq, word_freq)
+
+    async def test_reset_when_data_restarts(self):
+        prefix = self.prefix("search_comments")
+        first = [make_comment("程序员学习编程"), make_comment("兼职赚钱经验分享")]
+        await self.generator.generate_word_frequency_and_cloud(first, prefix)
+        # 数据文件重新生成（比已经统计的条数少）时丢弃旧的词频，全量重新统计
+        second = [make_comment("副业项目推荐")]
+        await self.generator.generate_word_frequency_and_cloud(second, prefix)
+        self.assertEqual(self.generator.states[prefix].word_freq, self.generator.count_words(second))
+        self.assertEqual(self.generator.states[prefix].item_count, 1)
+
+    async def test_debounce(self):
+        prefix = self.prefix("search_comments")
+        save_data = []
+        for content in ("程序员学习编程", "兼职赚钱经验分享", "程序员副业项目"):
+            save_data.append(make_comment(content))
+            await self.generator.generate_word_frequency_and_cloud(save_data, prefix)
+        # 延迟时间内的多次更新只生成一次词频文件和词云
+        self.assertEqual(self.generator.rendered, [])
+        await asyncio.sleep(config.WORDCLOUD_DEBOUNCE_SEC + 0.1)
+        expected = dict(self.generator.count_words(save_data))
+        self.assertEqual(self.generator.rendered, [(prefix, expected)])
+        with open(f"{prefix}_word_freq.json", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), expected)
+
+        # 生成之后追加的数据触发下一次生成；close 时立即生成等待中的词云
+        save_data.append(make_comment("学习教程入门"))
+        await self.generator.generate_word_frequency_and_cloud(save_data, prefix)
+        await self.generator.close()
+        self.assertEqual(len(self.generator.rendered), 2)
+        self.assertEqual(Counter(self.generator.rendered[1][1]), self.generator.count_words(save_data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+
+from media_platform.xhs.help import (camel_to_underscore, extract_initial_state, parse_note_detail_from_html,
+                                     transform_json_keys)
+from test.xhs_note_page import NOTE_ID, legacy_get_note_dict, make_note_html
+
+
+def test_transform_json_keys():
+    assert camel_to_underscore("noteDetailMap") == "note_detail_map"
+    assert camel_to_underscore("URL") == "u_r_l"
+    data = transform_json_keys('{"imageList": [{"urlDefault": "a", "infoList": [{"imageScene": "WB"}]}, 1], "n": {}}')
+    assert data == {"image_list": [{"url_default": "a", "info_list": [{"image_scene": "WB"}]}, 1], "n": {}}
+
+
+def test_extract_initial_state():
+    assert extract_initial_state("<html><script>window.__INITIAL_STATE__={}</script></html>") == "{}"
+    assert extract_initial_state("<html><script>window.__INITIAL_STATE__={\"a\":1};\n</script>") == "{\"a\":1}"
+    assert extract_initial_state("<html><script>window.__SETUP_SERVER_STATE__={}</script></html>") is None
+
+    html = make_note_html(image_count=3, tag_count=2)
+    assert parse_note_detail_from_html(html, NOTE_ID) == legacy_get_note_dict(html, NOTE_ID)
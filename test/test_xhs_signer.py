@@ -0,0 +1,118 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 06:00
+# @Desc    : 小红书签名服务：合并 page.evaluate、b1 缓存过期刷新、每个请求独立的签名请求头
+import asyncio
+import unittest
+from typing import Any, List
+from unittest import IsolatedAsyncioTestCase
+
+from media_platform.xhs.client import XiaoHongShuClient
+from media_platform.xhs.signer import XHS_BATCH_ENCRYPT_JS, XHS_GET_B1_JS, XhsSignService
+
+
+# 真实的 b1 是一长串 base64，签名算法要求 x_t + x_s + b1 至少 57 个字符
+B1_SUFFIX = "I38rHdgsjopgIvesdVwgIC+oIELmBZ5e3VwXLgFTIxS3bqwIzTGB"
+
+
+def fake_b1(count: int) -> str:
+    return f"b1_{count}_{B1_SUFFIX}"
+
+
+class FakePage:
+    """
+    模拟 playwright page，按脚本记录 evaluate 次数，签名结果由 url 决定
+    """
+
+    def __init__(self, latency: float = 0.01):
+        self.latency = latency
+        self.encrypt_batches: List[List[str]] = []
+        self.b1_count = 0
+
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        await asyncio.sleep(self.latency)
+        if expression == XHS_GET_B1_JS:
+            self.b1_count += 1
+            return fake_b1(self.b1_count)
+        if expression == XHS_BATCH_ENCRYPT_JS:
+            self.encrypt_batches.append([url for url, _ in arg])
+            return [{"X-s": f"xs:{url}", "X-t": len(url)} for url, _ in arg]
+        raise AssertionError(f"unexpected expression: {expression}")
+
+
+class TestXhsSignService(IsolatedAsyncioTestCase):
+
+    async def test_concurrent_signs_share_evaluate(self):
+        page = FakePage()
+        sign_service = XhsSignService(page, b1_cache_ttl=60, max_batch_size=20)
+        urls = [f"/api/sns/web/v1/feed?note_id={i}" for i in range(50)]
+        results = await asyncio.gather(*[sign_service.sign_headers(url, a1="a1") for url in urls])
+
+        # 50 个签名分成 20 + 20 + 10 三次 evaluate，b1 只读取一次
+        self.assertEqual([len(batch) for batch in page.encrypt_batches], [20, 20, 10])
+        self.assertEqual(sum(page.encrypt_batches, []), urls)
+        self.assertEqual(page.b1_count, 1)
+        self.assertEqual([result["X-S"] for result in results], [f"xs:{url}" for url in urls])
+
+        await sign_service.sign_headers(urls[0], a1="a1")
+        self.assertEqual(len(page.encrypt_batches), 4)
+        self.assertEqual(page.b1_count, 1)
+
+    async def test_b1_refresh_after_ttl(self):
+        page = FakePage(latency=0)
+        sign_service = XhsSignService(page, b1_cache_ttl=0.1)
+        self.assertEqual(await sign_service.get_b1(), fake_b1(1))
+        self.assertEqual(await sign_service.get_b1(), fake_b1(1))
+        await asyncio.sleep(0.15)
+        self.assertEqual(await asyncio.gather(sign_service.get_b1(), sign_service.get_b1()), [fake_b1(2)] * 2)
+        self.assertEqual(page.b1_count, 2)
+
+        sign_service.invalidate()
+        self.assertEqual(await sign_service.get_b1(), fake_b1(3))
+
+    async def test_evaluate_error_fails_only_its_batch(self):
+        page = FakePage()
+        sign_service = XhsSignService(page, b1_cache_ttl=60, max_batch_size=2)
+        origin_evaluate = page.evaluate
+
+        async def evaluate(expression: str, arg: Any = None) -> Any:
+            if expression == XHS_BATCH_ENCRYPT_JS and not page.encrypt_batches:
+                page.encrypt_batches.append([])
+                raise RuntimeError("page closed")
+            return await origin_evaluate(expression, arg)
+
+        page.evaluate = evaluate
+        results = await asyncio.gather(*[sign_service.sign_headers(f"/url_{i}", a1="a1") for i in range(4)],
+                                       return_exceptions=True)
+        self.assertIsInstance(results[0], RuntimeError)
+        self.assertIsInstance(results[1], RuntimeError)
+        self.assertEqual([result["X-S"] for result in results[2:]], ["xs:/url_2", "xs:/url_3"])
+
+    async def test_per_request_headers(self):
+        page = FakePage()
+        client = XiaoHongShuClient(headers={"User-Agent": "ua", "Cookie": "a1=a1"}, playwright_page=page,
+                                   cookie_dict={"a1": "a1"})
+        headers_1, headers_2 = await asyncio.gather(client._pre_headers("/url_1"), client._pre_headers("/url_2"))
+
+        # 并发请求的签名互不覆盖，共享的请求头不被修改
+        self.assertEqual((headers_1["X-S"], headers_2["X-S"]), ("xs:/url_1", "xs:/url_2"))
+        self.assertEqual((headers_1["X-T"], headers_2["X-T"]), ("6", "6"))
+        self.assertEqual(headers_1["User-Agent"], "ua")
+        self.assertIsNot(headers_1, headers_2)
+        self.assertEqual(client.headers, {"User-Agent": "ua", "Cookie": "a1=a1"})
+        self.assertEqual(len(page.encrypt_batches), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
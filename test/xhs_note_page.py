@@ -0,0 +1,96 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 08:00
+# @Desc    : 测试与性能基准使用的小红书笔记详情页：生成带 __INITIAL_STATE__ 的页面，以及原来的逐层重新序列化的解析做法
+import json
+import re
+from typing import Dict
+
+NOTE_ID = "66fad51c000000001b0224b8"
+
+
+def legacy_get_note_dict(html: str, note_id: str) -> Dict:
+    def camel_to_underscore(key):
+        return re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower()
+
+    def legacy_transform_json_keys(json_data):
+        data_dict = json.loads(json_data)
+        dict_new = {}
+        for key, value in data_dict.items():
+            new_key = camel_to_underscore(key)
+            if not value:
+                dict_new[new_key] = value
+            elif isinstance(value, dict):
+                dict_new[new_key] = legacy_transform_json_keys(json.dumps(value))
+            elif isinstance(value, list):
+                dict_new[new_key] = [
+                    (
+                        legacy_transform_json_keys(json.dumps(item))
+                        if (item and isinstance(item, dict))
+                        else item
+                    )
+                    for item in value
+                ]
+            else:
+                dict_new[new_key] = value
+        return dict_new
+
+    state = re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)[0].replace("undefined", '""')
+    return legacy_transform_json_keys(state)["note"]["note_detail_map"][note_id]["note"]
+
+
+def make_note_html(image_count: int, tag_count: int) -> str:
+    image_list = [
+        {
+            "width": 1440, "height": 1920, "traceId": "", "fileId": "", "livePhoto": False,
+            "urlPre": f"http://sns-webpic-qc.xhscdn.com/202410181800/pre/{i}!nc_n_webp_prv_1",
+            "urlDefault": f"http://sns-webpic-qc.xhscdn.com/202410181800/default/{i}!nc_n_webp_mw_1",
+            "infoList": [
+                {"imageScene": "WB_PRV", "url": f"http://sns-webpic-qc.xhscdn.com/prv/{i}"},
+                {"imageScene": "WB_DFT", "url": f"http://sns-webpic-qc.xhscdn.com/dft/{i}"},
+            ],
+            "stream": {},
+        }
+        for i in range(image_count)
+    ]
+    note = {
+        "noteId": NOTE_ID, "type": "normal", "title": "编程副业经验分享", "desc": "分享一下做编程副业的经验 " * 20,
+        "time": 1705200000000, "lastUpdateTime": 1705200000000, "ipLocation": "上海", "xsecToken": "token",
+        "user": {"userId": "5f0a1b2c000000000101abcd", "nickname": "测试用户", "avatar": "https://sns-avatar-qc.xhscdn.com/a.jpg"},
+        "interactInfo": {"liked": False, "likedCount": "1024", "collected": False, "collectedCount": "256",
+                         "commentCount": "128", "shareCount": "64", "followed": False, "relation": "none"},
+        "imageList": image_list,
+        "tagList": [{"id": f"tag_{i}", "name": f"话题{i}", "type": "topic"} for i in range(tag_count)],
+        "atUserList": [],
+        "shareInfo": {"unShare": False},
+    }
+    state = {
+        "global": {"appSettings": {"notificationInterval": 30, "prefetchTimeout": 3001}, "serverTime": 1705200000000},
+        "user": {"loggedIn": False, "userInfo": {}, "activeTab": {"key": 0, "index": 0}},
+        "note": {
+            "currentNoteId": NOTE_ID, "isImgFullscreen": False, "gotoPage": "",
+            "noteDetailMap": {NOTE_ID: {"comments": {"list": [], "cursor": "", "hasMore": True}, "currentTime": 1705200000000,
+                                        "note": note}},
+            "serverRequestInfo": {"state": "success", "errorCode": 0, "errMsg": ""},
+        },
+    }
+    state_js = json.dumps(state, ensure_ascii=False).replace('"fileId": ""', '"fileId": undefined')
+    return (
+        "<!doctype html><html><head><meta charset=\"utf-8\"><title>小红书</title>"
+        + "<script>window.__SETUP_SERVER_STATE__={}</script>"
+        + "<style>" + ".a{color:red}" * 2000 + "</style></head><body><div id=\"app\"></div>\n"
+        + f"<script>window.__INITIAL_STATE__={state_js}</script>\n"
+        + "<script src=\"https://fe-static.xhscdn.com/formula-static/xhs-pc-web/public/resource/js/index.js\"></script>"
+        + "</body></html>"
+    )
@@ -0,0 +1,363 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 21:10
+# @Desc    : 爬取断点
+#            按 (任务, 层级, 关键词/帖子ID) 记录已经处理完成的页码或游标，爬虫中途退出后重新运行（或者调度器重试任务）时从断点继续，
+#            不再从第一页重新请求；任务正常结束后清除断点
+#            断点先缓存在内存中，累积 CRAWL_CHECKPOINT_BATCH_SIZE 条或者超过 CRAWL_CHECKPOINT_FLUSH_INTERVAL_SEC 秒后批量写入
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+
+import config
+from cache.abs_cache import AbstractCache
+from cache.cache_factory import CacheFactory
+from cache.local_cache import ExpiringLocalCache
+from var import crawl_task_id_var
+
+from . import utils
+
+# 帖子评论等全部爬取完成后的断点状态
+DONE_STATE = {"done": True}
+
+# 命令行模式下影响断点含义的配置，任意一项变化后使用新的任务ID，不再沿用旧配置的断点；
+# 另外所有以 _LIST 结尾的配置（指定帖子ID、创作者ID等）也会计入
+CHECKPOINT_CONFIG_KEYS = (
+    "KEYWORDS", "SORT_TYPE", "PUBLISH_TIME_TYPE", "START_PAGE", "CRAWLER_MAX_NOTES_COUNT",
+    "ENABLE_GET_COMMENTS", "CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES", "ENABLE_GET_SUB_COMMENTS",
+    "START_DAY", "END_DAY", "ALL_DAY", "SEARCH_TYPE", "CREATOR_MODE", "START_CONTACTS_PAGE",
+    "CRAWLER_MAX_CONTACTS_COUNT_SINGLENOTES", "CRAWLER_MAX_DYNAMICS_COUNT_SINGLENOTES",
+)
+
+
+class AbstractCheckpointBackend(ABC):
+    # 读写是否会阻塞（磁盘、网络 I/O），阻塞的 backend 在线程池中写入，不占用事件循环
+    blocking_io = True
+
+    @abstractmethod
+    def load(self, task_id: str) -> Dict[str, Dict]:
+        """
+        读取任务的全部断点
+        :param task_id: 任务ID
+        :return: {断点key: 断点状态}
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_many(self, task_id: str, states: Dict[str, Dict]) -> None:
+        """
+        批量写入断点
+        :param task_id: 任务ID
+        :param states: {断点key: 断点状态}
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, task_id: str) -> None:
+        """
+        删除任务的全部断点
+        :param task_id: 任务ID
+        :return:
+        """
+        raise NotImplementedError
+
+
+class SqliteCheckpointBackend(AbstractCheckpointBackend):
+    """
+    本地 SQLite 文件保存断点，进程重启后仍然可以继续
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or config.CRAWL_CHECKPOINT_SQLITE_PATH
+        self._conn: Optional[sqlite3.Connection] = None
+        # 写入在线程池中执行，同一个连接的读写需要串行
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_checkpoint (
+                    task_id TEXT NOT NULL,
+                    checkpoint_key TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    update_ts INTEGER NOT NULL,
+                    PRIMARY KEY (task_id, checkpoint_key)
+                )
+            """)
+        return self._conn
+
+    def load(self, task_id: str) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self.conn.execute("SELECT checkpoint_key, state FROM crawl_checkpoint WHERE task_id = ?",
+                                     (task_id,)).fetchall()
+        return {key: json.loads(state) for key, state in rows}
+
+    def save_many(self, task_id: str, states: Dict[str, Dict]) -> None:
+        now = int(time.time())
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO crawl_checkpoint (task_id, checkpoint_key, state, update_ts) VALUES (?, ?, ?, ?)",
+                [(task_id, key, json.dumps(state, ensure_ascii=False), now) for key, state in states.items()])
+
+    def delete(self, task_id: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM crawl_checkpoint WHERE task_id = ?", (task_id,))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CacheCheckpointBackend(AbstractCheckpointBackend):
+    """
+    使用已有的缓存（memory / redis）保存断点，断点在 CRAWL_CHECKPOINT_EXPIRE_SEC 后过期
+    """
+
+    def __init__(self, cache: AbstractCache, expire_time: Optional[int] = None):
+        self.cache = cache
+        self.expire_time = expire_time or config.CRAWL_CHECKPOINT_EXPIRE_SEC
+        # 进程内缓存没有 I/O，并且不是线程安全的，直接在事件循环中读写
+        self.blocking_io = not isinstance(cache, ExpiringLocalCache)
+
+    @staticmethod
+    def _key_prefix(task_id: str) -> str:
+        return f"crawl_checkpoint:{task_id}:"
+
+    def load(self, task_id: str) -> Dict[str, Dict]:
+        prefix = self._key_prefix(task_id)
+        states = {}
+        for cache_key in self.cache.keys(prefix + "*"):
+            state = self.cache.get(cache_key)
+            # 缓存没有删除接口，删除的断点保存为 None
+            if state is not None:
+                states[cache_key[len(prefix):]] = state
+        return states
+
+    def save_many(self, task_id: str, states: Dict[str, Dict]) -> None:
+        prefix = self._key_prefix(task_id)
+        for key, state in states.items():
+            self.cache.set(prefix + key, state, self.expire_time)
+
+    def delete(self, task_id: str) -> None:
+        prefix = self._key_prefix(task_id)
+        for cache_key in self.cache.keys(prefix + "*"):
+            self.cache.set(cache_key, None, 1)
+
+
+class CrawlCheckpoint:
+    """
+    单个任务的爬取断点，backend 为 None 时不记录断点
+    """
+
+    def __init__(self, task_id: str, backend: Optional[AbstractCheckpointBackend],
+                 batch_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        self.task_id = task_id
+        self.backend = backend
+        self.batch_size = batch_size or config.CRAWL_CHECKPOINT_BATCH_SIZE
+        self.flush_interval = config.CRAWL_CHECKPOINT_FLUSH_INTERVAL_SEC if flush_interval is None else flush_interval
+        self._states: Optional[Dict[str, Dict]] = None
+        self._dirty: Dict[str, Dict] = {}
+        self._last_flush_time = time.monotonic()
+        # 写入在线程池中执行，保证同一个断点的多次写入按顺序完成
+        self._flush_lock = asyncio.Lock()
+        # 并发的爬取协程第一次读取断点时只加载一次
+        self._load_lock = asyncio.Lock()
+
+    @staticmethod
+    def make_key(level: str, key: str) -> str:
+        return f"{level}:{key}"
+
+    async def load_states(self) -> Dict[str, Dict]:
+        """
+        第一次访问时从 backend 加载任务的所有断点，会阻塞的 backend 在线程池中加载
+        :return:
+        """
+        if self._states is not None:
+            return self._states
+        async with self._load_lock:
+            if self._states is None:
+                states = await self._run_backend(self.backend.load, self.task_id) if self.backend is not None else {}
+                if states:
+                    utils.logger.info(f"[CrawlCheckpoint] task {self.task_id} resume from {len(states)} checkpoints")
+                self._states = states
+        return self._states
+
+    async def get(self, level: str, key: str) -> Optional[Dict]:
+        """
+        获取断点
+        :param level: 断点层级，例如 search、comments、sub_comments、creator_notes
+        :param key: 关键词、帖子ID等
+        :return: 断点状态，没有断点时返回 None
+        """
+        if self.backend is None:
+            return None
+        return (await self.load_states()).get(self.make_key(level, key))
+
+    async def is_done(self, level: str, key: str) -> bool:
+        return await self.get(level, key) == DONE_STATE
+
+    async def save(self, level: str, key: str, state: Dict) -> None:
+        """
+        记录断点，需要在这一页的数据全部处理完成后调用
+        :param level: 断点层级
+        :param key: 关键词、帖子ID等
+        :param state: 断点状态，需要可以被 json 序列化，例如 {"page": 3} 或 {"cursor": "xxx", "count": 20}
+        :return:
+        """
+        if self.backend is None:
+            return
+        checkpoint_key = self.make_key(level, key)
+        (await self.load_states())[checkpoint_key] = state
+        self._dirty[checkpoint_key] = state
+        if len(self._dirty) >= self.batch_size or time.monotonic() - self._last_flush_time >= self.flush_interval:
+            await self.flush()
+
+    async def mark_done(self, level: str, key: str) -> None:
+        await self.save(level, key, DONE_STATE)
+
+    async def _run_backend(self, func: Callable, *args) -> Any:
+        """
+        调用 backend 的读写方法，会阻塞的 backend 放到线程池中执行
+        """
+        if not self.backend.blocking_io:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def flush(self) -> None:
+        """
+        把缓存的断点写入 backend
+        :return:
+        """
+        self._last_flush_time = time.monotonic()
+        if self.backend is None or not self._dirty:
+            return
+        async with self._flush_lock:
+            dirty, self._dirty = self._dirty, {}
+            if not dirty:
+                return
+            try:
+                await self._run_backend(self.backend.save_many, self.task_id, dirty)
+            except Exception as e:
+                # 写入失败不影响爬取，下次再写
+                for checkpoint_key, state in dirty.items():
+                    self._dirty.setdefault(checkpoint_key, state)
+                utils.logger.error(f"[CrawlCheckpoint.flush] save checkpoints of task {self.task_id} error: {e}")
+
+    async def clear(self) -> None:
+        """
+        任务正常结束后清除断点，下次运行从头开始
+        :return:
+        """
+        self._states, self._dirty = {}, {}
+        if self.backend is not None:
+            async with self._flush_lock:
+                await self._run_backend(self.backend.delete, self.task_id)
+
+
+_checkpoint_backend: Optional[AbstractCheckpointBackend] = None
+_crawl_checkpoints: Dict[str, CrawlCheckpoint] = {}
+
+
+def get_checkpoint_backend() -> Optional[AbstractCheckpointBackend]:
+    """
+    根据 CRAWL_CHECKPOINT_BACKEND 创建断点存储，未开启断点时返回 None
+    :return:
+    """
+    global _checkpoint_backend
+    if not config.ENABLE_CRAWL_CHECKPOINT:
+        return None
+    if _checkpoint_backend is None:
+        backend_type = config.CRAWL_CHECKPOINT_BACKEND
+        if backend_type == "sqlite":
+            _checkpoint_backend = SqliteCheckpointBackend()
+        elif backend_type in (config.CACHE_TYPE_MEMORY, config.CACHE_TYPE_REDIS):
+            _checkpoint_backend = CacheCheckpointBackend(CacheFactory.create_cache(backend_type))
+        else:
+            raise ValueError(f"Unknown crawl checkpoint backend: {backend_type}")
+    return _checkpoint_backend
+
+
+def get_crawl_config_hash() -> str:
+    """
+    影响断点含义的爬取配置的摘要，关键词、评论数量等变化后摘要随之变化
+    :return:
+    """
+    names = list(CHECKPOINT_CONFIG_KEYS) + sorted(name for name in dir(config) if name.endswith("_LIST"))
+    crawl_config = {name: getattr(config, name, None) for name in names}
+    content = json.dumps(crawl_config, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.md5(content.encode("utf-8")).hexdigest()[:12]
+
+
+def get_current_task_id() -> str:
+    """
+    当前任务ID，调度器模式下为调度任务ID，命令行模式下为 平台:爬取类型:爬取配置摘要，
+    修改关键词、评论数量等配置后重新运行不会沿用旧配置的断点
+    :return:
+    """
+    return crawl_task_id_var.get() or f"{config.PLATFORM}:{config.CRAWLER_TYPE}:{get_crawl_config_hash()}"
+
+
+def get_crawl_checkpoint(task_id: Optional[str] = None) -> CrawlCheckpoint:
+    """
+    获取任务的爬取断点，同一个任务共用一个实例
+    :param task_id: 任务ID，默认为当前任务
+    :return:
+    """
+    task_id = task_id or get_current_task_id()
+    checkpoint = _crawl_checkpoints.get(task_id)
+    if checkpoint is None:
+        checkpoint = CrawlCheckpoint(task_id, get_checkpoint_backend())
+        _crawl_checkpoints[task_id] = checkpoint
+    return checkpoint
+
+
+async def clear_crawl_checkpoint(task_id: Optional[str] = None) -> None:
+    """
+    任务正常结束后调用，清除任务的断点
+    :param task_id: 任务ID，默认为当前任务
+    :return:
+    """
+    task_id = task_id or get_current_task_id()
+    checkpoint = _crawl_checkpoints.pop(task_id, None) or CrawlCheckpoint(task_id, get_checkpoint_backend())
+    await checkpoint.clear()
+
+
+async def close_all_crawl_checkpoints() -> None:
+    """
+    写入所有未保存的断点，程序退出前调用
+    :return:
+    """
+    global _checkpoint_backend
+    checkpoints = list(_crawl_checkpoints.values())
+    _crawl_checkpoints.clear()
+    for checkpoint in checkpoints:
+        await checkpoint.flush()
+    if isinstance(_checkpoint_backend, SqliteCheckpointBackend):
+        _checkpoint_backend.close()
+    _checkpoint_backend = None
@@ -0,0 +1,120 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 10:12
+# @Desc    : 长连接复用的 httpx 连接池，按代理维度缓存 AsyncClient
+import importlib.util
+import json
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Dict, Optional, Union
+
+import httpx
+
+import config
+
+from . import utils
+from .http_replay import get_replay_client_kwargs
+
+ProxiesType = Optional[Union[str, Dict[str, str]]]
+
+
+def is_http2_available() -> bool:
+    """
+    httpx 的 HTTP/2 支持依赖可选的 h2 包 (pip install httpx[http2])
+    :return:
+    """
+    return importlib.util.find_spec("h2") is not None
+
+
+def _proxy_key(proxies: ProxiesType) -> str:
+    """
+    代理配置转成可哈希的 key，None 表示直连
+    :param proxies:
+    :return:
+    """
+    if not proxies:
+        return ""
+    if isinstance(proxies, dict):
+        return json.dumps(proxies, sort_keys=True)
+    return str(proxies)
+
+
+class HttpClientPool:
+    """
+    按代理维度复用 httpx.AsyncClient，同一个代理下的请求共享 TCP/TLS 连接（keep-alive），
+    host 支持时通过 ALPN 协商使用 HTTP/2。
+    客户端不保存响应中的 Set-Cookie，cookie 仍然由各平台 client 通过请求头显式传递，和之前每次新建客户端的行为一致。
+    """
+
+    def __init__(
+            self,
+            max_connections: Optional[int] = None,
+            max_keepalive_connections: Optional[int] = None,
+            keepalive_expiry: Optional[float] = None,
+            http2: Optional[bool] = None,
+            transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self._limits = httpx.Limits(
+            max_connections=max_connections or config.HTTP_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive_connections or config.HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=keepalive_expiry or config.HTTP_POOL_KEEPALIVE_EXPIRY,
+        )
+        enable_http2 = config.ENABLE_HTTP2 if http2 is None else http2
+        if enable_http2 and not is_http2_available():
+            utils.logger.info(
+                "[HttpClientPool] HTTP/2 is enabled but the h2 package is not installed, fallback to HTTP/1.1")
+            enable_http2 = False
+        self._http2 = enable_http2
+        # 指定 transport 时所有请求都交给它处理（例如压测时转发到本地模拟服务），不再使用代理
+        self._transport = transport
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    @property
+    def http2(self) -> bool:
+        return self._http2
+
+    def get_client(self, proxies: ProxiesType = None) -> httpx.AsyncClient:
+        """
+        获取指定代理对应的长连接客户端，不存在则创建
+        :param proxies: httpx 格式的代理配置
+        :return:
+        """
+        key = _proxy_key(proxies)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client_kwargs = {"proxies": proxies or None}
+            # HTTP_REPLAY_MODE 开启时录制响应或者从本地归档回放
+            client_kwargs.update(get_replay_client_kwargs())
+            if self._transport is not None:
+                client_kwargs.update(transport=self._transport, proxies=None)
+            client = httpx.AsyncClient(
+                limits=self._limits,
+                http2=self._http2,
+                cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+                **client_kwargs,
+            )
+            self._clients[key] = client
+        return client
+
+    async def aclose(self) -> None:
+        """
+        关闭所有连接
+        :return:
+        """
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+    def __len__(self) -> int:
+        return len(self._clients)
@@ -0,0 +1,233 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 23:00
+# @Desc    : HTTP 录制/回放
+#            record 模式下把平台 client 的请求和响应保存到本地归档（SQLite，响应体 zlib 压缩），
+#            replay 模式下不访问网络，由本地 transport 按请求返回录制的响应，可以配置响应延迟，用于离线基准测试和回归测试
+#            请求按 方法 + 规范化的 URL + 请求体 匹配，签名、时间戳等每次请求都会变化的参数不参与匹配；
+#            同一个请求录制了多次时按录制顺序依次返回，超出后重复返回最后一次
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import httpx
+
+import config
+
+from . import utils
+
+HTTP_REPLAY_MODE_RECORD = "record"
+HTTP_REPLAY_MODE_REPLAY = "replay"
+
+# 签名、时间戳、设备指纹等每次请求都会变化的参数，URL 参数和 JSON 请求体中的同名字段都不参与匹配
+VOLATILE_PARAMS = {"_", "_signature", "a_bogus", "fp", "msToken", "ms_token", "search_id", "t", "timestamp", "ts",
+                   "verifyFp", "w_rid", "webid", "wts", "x-bogus", "X-Bogus", "xsec_token"}
+
+# 响应体保存的是解码后的内容，这些头不再适用
+_SKIP_RESPONSE_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS http_exchange (
+    request_key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status_code INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    elapsed_ms INTEGER NOT NULL,
+    PRIMARY KEY (request_key, seq)
+);
+"""
+
+
+def _strip_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in sorted(value.items()) if k not in VOLATILE_PARAMS}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+def normalize_body(content: bytes) -> bytes:
+    """
+    JSON / 表单请求体去掉易变字段后按 key 排序，其他请求体原样参与匹配
+    :param content:
+    :return:
+    """
+    if not content:
+        return b""
+    try:
+        body = json.loads(content)
+    except ValueError:
+        text = content.decode("utf-8", "replace")
+        if "=" not in text:
+            return content
+        return urlencode(sorted((k, v) for k, v in parse_qsl(text, keep_blank_values=True)
+                                if k not in VOLATILE_PARAMS)).encode()
+    return json.dumps(_strip_volatile(body), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def make_request_key(method: str, url: str, content: bytes = b"") -> str:
+    """
+    请求的匹配 key
+    :param method: 请求方法
+    :param url: 完整的请求地址
+    :param content: 请求体
+    :return:
+    """
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in VOLATILE_PARAMS)
+    digest = hashlib.sha1()
+    digest.update(f"{method.upper()} {parts.netloc.lower()}{parts.path}?{urlencode(query)}\n".encode())
+    digest.update(normalize_body(content))
+    return digest.hexdigest()
+
+
+class HttpArchive:
+    """
+    录制的请求/响应归档
+    """
+
+    def __init__(self, archive_file: Optional[str] = None):
+        self.archive_file = archive_file or config.HTTP_ARCHIVE_FILE
+        self._conn: Optional[sqlite3.Connection] = None
+        self._record_seq: Dict[str, int] = defaultdict(int)
+        self._replay_seq: Dict[str, int] = defaultdict(int)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            archive_dir = os.path.dirname(self.archive_file)
+            if archive_dir:
+                os.makedirs(archive_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.archive_file, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def add(self, request: httpx.Request, response: httpx.Response, elapsed_ms: int) -> None:
+        """
+        保存一次请求的响应，同一个归档重新录制时覆盖之前的录制
+        :param request:
+        :param response: 已经读取完响应体的响应
+        :param elapsed_ms: 请求耗时，单位毫秒
+        :return:
+        """
+        request_key = make_request_key(request.method, str(request.url), request.content)
+        seq = self._record_seq[request_key]
+        self._record_seq[request_key] += 1
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _SKIP_RESPONSE_HEADERS]
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO http_exchange "
+                "(request_key, seq, method, url, status_code, headers, body, elapsed_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (request_key, seq, request.method, str(request.url), response.status_code,
+                 json.dumps(headers, ensure_ascii=False), zlib.compress(response.content), elapsed_ms))
+
+    def next_exchange(self, request: httpx.Request) -> Optional[Dict]:
+        """
+        按录制顺序取出请求对应的下一个响应
+        :param request:
+        :return: 没有录制过这个请求时返回 None
+        """
+        request_key = make_request_key(request.method, str(request.url), request.content)
+        seq = self._replay_seq[request_key]
+        row = self.conn.execute(
+            "SELECT status_code, headers, body, elapsed_ms FROM http_exchange "
+            "WHERE request_key = ? AND seq <= ? ORDER BY seq DESC LIMIT 1", (request_key, seq)).fetchone()
+        if row is None:
+            return None
+        self._replay_seq[request_key] += 1
+        status_code, headers, body, elapsed_ms = row
+        return {"status_code": status_code, "headers": json.loads(headers), "body": zlib.decompress(body),
+                "elapsed_ms": elapsed_ms}
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM http_exchange").fetchone()[0]
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    从归档返回响应的 transport，不建立任何网络连接
+    """
+
+    def __init__(self, archive: HttpArchive, latency_ms: Optional[int] = None):
+        self.archive = archive
+        self.latency_ms = config.HTTP_REPLAY_LATENCY_MS if latency_ms is None else latency_ms
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        exchange = self.archive.next_exchange(request)
+        if exchange is None:
+            raise httpx.ConnectError(f"No recorded response for {request.method} {request.url}", request=request)
+        # latency_ms < 0 时按录制时的耗时返回
+        latency_ms = exchange["elapsed_ms"] if self.latency_ms < 0 else self.latency_ms
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        return httpx.Response(exchange["status_code"], headers=exchange["headers"], content=exchange["body"],
+                              request=request)
+
+
+_http_archive: Optional[HttpArchive] = None
+
+
+def get_http_archive() -> HttpArchive:
+    global _http_archive
+    if _http_archive is None:
+        _http_archive = HttpArchive()
+        utils.logger.info(f"[HttpArchive] {config.HTTP_REPLAY_MODE} http exchanges, archive: {config.HTTP_ARCHIVE_FILE}")
+    return _http_archive
+
+
+async def _record_response(response: httpx.Response) -> None:
+    started_at = response.request.extensions.get("replay_started_at", time.perf_counter())
+    await response.aread()
+    get_http_archive().add(response.request, response, int((time.perf_counter() - started_at) * 1000))
+
+
+async def _mark_request_start(request: httpx.Request) -> None:
+    request.extensions["replay_started_at"] = time.perf_counter()
+
+
+def get_replay_client_kwargs() -> Dict[str, Any]:
+    """
+    根据 HTTP_REPLAY_MODE 返回创建 httpx.AsyncClient 时额外的参数
+    record: 通过事件钩子录制响应（响应体会被完整读入内存）；replay: 使用回放 transport，忽略代理配置
+    :return:
+    """
+    if config.HTTP_REPLAY_MODE == HTTP_REPLAY_MODE_RECORD:
+        return {"event_hooks": {"request": [_mark_request_start], "response": [_record_response]}}
+    if config.HTTP_REPLAY_MODE == HTTP_REPLAY_MODE_REPLAY:
+        return {"transport": ReplayTransport(get_http_archive()), "proxies": None}
+    return {}
+
+
+def close_http_archive() -> None:
+    global _http_archive
+    if _http_archive is not None:
+        _http_archive.close()
+        _http_archive = None
@@ -0,0 +1,189 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 13:05
+# @Desc    : 常驻 Node 进程的 JS 签名 worker 池
+#            execjs 在 Node 运行时下每次 call 都会新起一个 node 进程并重新读取、编译签名 js，
+#            这里改为启动若干常驻 worker（libs/signer_worker.js），js 只编译一次，通过 stdin/stdout 异步收发请求
+import asyncio
+import itertools
+import json
+import shutil
+from typing import Any, Dict, List, Optional
+
+import config
+
+from . import utils
+
+SIGNER_WORKER_SCRIPT = "libs/signer_worker.js"
+
+_signer_pools: List["JsSignerPool"] = []
+
+
+class JsSignerError(Exception):
+    """js sign function raise error or worker exit unexpectedly"""
+
+
+class JsSignerWorker:
+    def __init__(self, script_path: str, export_names: List[str], node_path: str):
+        self.script_path = script_path
+        self.export_names = export_names
+        self.node_path = node_path
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._id_gen = itertools.count(1)
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    @property
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def start(self) -> None:
+        self._process = await asyncio.create_subprocess_exec(
+            self.node_path, SIGNER_WORKER_SCRIPT, self.script_path, *self.export_names,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=1024 * 1024,
+        )
+        self._reader_task = asyncio.create_task(self._read_responses())
+        self._write_lock = asyncio.Lock()
+
+    async def call(self, fn: str, *args: Any) -> Any:
+        request_id = next(self._id_gen)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        line = json.dumps({"id": request_id, "fn": fn, "args": args}, ensure_ascii=False) + "\n"
+        try:
+            # python3.9 的 StreamWriter 不支持多个协程同时 drain
+            async with self._write_lock:
+                self._process.stdin.write(line.encode("utf-8"))
+                await self._process.stdin.drain()
+            return await asyncio.wait_for(future, timeout=config.JS_SIGNER_TIMEOUT_SEC)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _read_responses(self) -> None:
+        try:
+            while True:
+                line = await self._process.stdout.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.get(response.get("id"))
+                if future is None or future.done():
+                    continue
+                if "error" in response:
+                    future.set_exception(JsSignerError(response["error"]))
+                else:
+                    future.set_result(response.get("result"))
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(JsSignerError(f"js signer worker for {self.script_path} exited"))
+
+    def kill(self) -> None:
+        if self.is_alive:
+            self._process.kill()
+
+    async def close(self) -> None:
+        if self._process is None:
+            return
+        if self._process.returncode is None:
+            self._process.stdin.close()
+            try:
+                await asyncio.wait_for(self._process.wait(), timeout=3)
+            except asyncio.TimeoutError:
+                self._process.kill()
+                await self._process.wait()
+        if self._reader_task is not None:
+            await self._reader_task
+        self._process, self._reader_task = None, None
+
+
+class JsSignerPool:
+    """
+    JS 签名 worker 池，首次调用时懒启动，调用会被分发到待处理请求最少的 worker 上
+    机器上没有 node 时回退到 execjs，在线程池中执行，避免阻塞事件循环
+    """
+
+    def __init__(self, script_path: str, export_names: List[str], worker_num: Optional[int] = None):
+        self.script_path = script_path
+        self.export_names = export_names
+        self.worker_num = worker_num or config.JS_SIGNER_WORKER_NUM
+        self.node_path = shutil.which("node")
+        self._workers: List[JsSignerWorker] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._execjs_ctx = None
+        _signer_pools.append(self)
+
+    async def call(self, fn: str, *args: Any) -> Any:
+        """
+        调用签名 js 中导出的函数
+        :param fn: 函数名
+        :param args: 函数参数，需要能被 json 序列化
+        :return:
+        """
+        if not self.node_path:
+            return await asyncio.get_running_loop().run_in_executor(None, self._execjs_call, fn, args)
+        await self._ensure_started()
+        worker = min(self._workers, key=lambda w: w.pending_count)
+        return await worker.call(fn, *args)
+
+    async def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 子进程管道绑定在创建它的事件循环上，换了事件循环需要重新启动 worker
+            for worker in self._workers:
+                worker.kill()
+            self._workers = []
+            self._loop = loop
+            self._start_lock = asyncio.Lock()
+        if len(self._workers) == self.worker_num and all(w.is_alive for w in self._workers):
+            return
+        async with self._start_lock:
+            alive_workers = [w for w in self._workers if w.is_alive]
+            while len(alive_workers) < self.worker_num:
+                worker = JsSignerWorker(self.script_path, self.export_names, self.node_path)
+                await worker.start()
+                alive_workers.append(worker)
+            if len(alive_workers) != len(self._workers):
+                utils.logger.info(
+                    f"[JsSignerPool] started {self.worker_num} js signer workers for {self.script_path}")
+            self._workers = alive_workers
+
+    def _execjs_call(self, fn: str, args: tuple) -> Any:
+        import execjs
+        if self._execjs_ctx is None:
+            with open(self.script_path, mode="r", encoding="utf-8-sig") as f:
+                self._execjs_ctx = execjs.compile(f.read())
+        return self._execjs_ctx.call(fn, *args)
+
+    async def close(self) -> None:
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            await worker.close()
+
+
+async def close_all_signers() -> None:
+    """
+    关闭所有签名 worker 进程，程序退出前调用
+    :return:
+    """
+    for pool in _signer_pools:
+        await pool.close()
@@ -0,0 +1,234 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 15:10
+# @Desc    : 追加写入的 JSON Lines 存储
+#            json 存储每保存一条数据都要读出整个文件、追加后再整体重写，数据越多越慢；
+#            jsonl 存储每条数据一行，缓冲后批量追加写入，定时 fsync，按日期和文件大小切分文件
+#            需要旧的 json 数组格式时可以用 export_jsonl_to_json / compact_jsonl_dir 导出
+#            用法: python -m tools.jsonl_store --input data/xhs/jsonl --output data/xhs/json
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import re
+import textwrap
+import time
+from typing import Dict, Iterable, List, Optional
+
+import config
+
+from . import utils
+
+_jsonl_writers: List["JsonlFileWriter"] = []
+
+# 切分后的文件名: search_comments_2024-01-14.jsonl、search_comments_2024-01-14.1.jsonl ...
+_JSONL_FILE_RE = re.compile(r"^(?P<name>.+?)(?:\.(?P<part>\d+))?\.jsonl$")
+
+
+class JsonlFileWriter:
+    """
+    一类数据（例如 search_comments）对应一个 writer，数据先写入内存缓冲，
+    缓冲满了或者到了刷新间隔再批量追加到文件，刷新时 fsync，保证进程异常退出时最多丢失一个刷新间隔的数据
+    """
+
+    def __init__(
+            self,
+            store_path: str,
+            file_prefix: str,
+            buffer_size: Optional[int] = None,
+            flush_interval: Optional[float] = None,
+            max_file_size: Optional[int] = None,
+    ):
+        """
+
+        Args:
+            store_path: 文件保存目录
+            file_prefix: 文件名前缀，最终文件名为 {file_prefix}_{日期}.jsonl
+            buffer_size: 缓冲多少行后写入文件
+            flush_interval: 定时刷新并 fsync 的间隔（秒）
+            max_file_size: 单个文件最大字节数，超过后写到新的分片文件
+        """
+        self.store_path = store_path
+        self.file_prefix = file_prefix
+        self.buffer_size = buffer_size or config.JSONL_BUFFER_SIZE
+        self.flush_interval = flush_interval or config.JSONL_FLUSH_INTERVAL_SEC
+        self.max_file_size = max_file_size or config.JSONL_MAX_FILE_SIZE_MB * 1024 * 1024
+        self._buffer: List[str] = []
+        self._lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._current_file: Optional[str] = None
+        self._current_size = 0
+        self._last_fsync = time.monotonic()
+        _jsonl_writers.append(self)
+
+    async def write(self, item: Dict) -> None:
+        """
+        写入一条数据
+        Args:
+            item:
+
+        Returns:
+
+        """
+        self._buffer.append(json.dumps(item, ensure_ascii=False) + "\n")
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+        if len(self._buffer) >= self.buffer_size:
+            await self.flush()
+
+    async def flush(self, fsync: bool = False) -> None:
+        """
+        把缓冲中的数据追加写入文件
+        Args:
+            fsync: 是否在写入后 fsync
+
+        Returns:
+
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._buffer:
+                return
+            lines, self._buffer = self._buffer, []
+            fsync = fsync or time.monotonic() - self._last_fsync >= self.flush_interval
+            await asyncio.get_running_loop().run_in_executor(None, self._write_lines, lines, fsync)
+            if fsync:
+                self._last_fsync = time.monotonic()
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush(fsync=True)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush(fsync=True)
+            except Exception as e:
+                utils.logger.error(f"[JsonlFileWriter._flush_periodically] flush {self.file_prefix} error: {e}")
+
+    def _write_lines(self, lines: List[str], fsync: bool) -> None:
+        data = "".join(lines).encode("utf-8")
+        file_name = self._select_file(len(data))
+        with open(file_name, mode="ab") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        self._current_size += len(data)
+
+    def _select_file(self, incoming_size: int) -> str:
+        """
+        按日期和大小选择要写入的文件，日期变化或当前文件写满后切换到新文件
+        Args:
+            incoming_size: 本次写入的字节数
+
+        Returns:
+
+        """
+        pathlib.Path(self.store_path).mkdir(parents=True, exist_ok=True)
+        base_name = f"{self.file_prefix}_{utils.get_current_date()}"
+        if self._current_file is None or not os.path.basename(self._current_file).startswith(base_name + "."):
+            self._current_file = self._latest_part_file(base_name)
+            self._current_size = os.path.getsize(self._current_file) if os.path.exists(self._current_file) else 0
+        if self._current_size > 0 and self._current_size + incoming_size > self.max_file_size:
+            part = _parse_part(self._current_file) + 1
+            self._current_file = os.path.join(self.store_path, f"{base_name}.{part}.jsonl")
+            self._current_size = 0
+        return self._current_file
+
+    def _latest_part_file(self, base_name: str) -> str:
+        parts = [
+            _parse_part(file_name) for file_name in os.listdir(self.store_path)
+            if _JSONL_FILE_RE.match(file_name) and _JSONL_FILE_RE.match(file_name).group("name") == base_name
+        ]
+        part = max(parts) if parts else 0
+        suffix = f".{part}.jsonl" if part else ".jsonl"
+        return os.path.join(self.store_path, base_name + suffix)
+
+
+def _parse_part(file_name: str) -> int:
+    match = _JSONL_FILE_RE.match(os.path.basename(file_name))
+    return int(match.group("part") or 0) if match else 0
+
+
+async def close_all_jsonl_writers() -> None:
+    """
+    把所有 jsonl writer 缓冲中的数据写入文件，程序退出前调用
+    :return:
+    """
+    for writer in _jsonl_writers:
+        await writer.close()
+
+
+def iter_jsonl_items(jsonl_files: Iterable[str]) -> Iterable[Dict]:
+    for jsonl_file in jsonl_files:
+        with open(jsonl_file, mode="r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def export_jsonl_to_json(jsonl_files: List[str], json_file: str) -> int:
+    """
+    把 jsonl 文件导出成 json 存储使用的 json 数组格式（indent=4），逐行读取，不会把所有数据读进内存
+    :param jsonl_files: 同一份数据按顺序排列的 jsonl 分片文件
+    :param json_file: 导出的 json 文件
+    :return: 导出的数据条数
+    """
+    count = 0
+    with open(json_file, mode="w", encoding="utf-8") as f:
+        for item in iter_jsonl_items(jsonl_files):
+            f.write("[\n" if count == 0 else ",\n")
+            f.write(textwrap.indent(json.dumps(item, ensure_ascii=False, indent=4), "    "))
+            count += 1
+        f.write("\n]" if count else "[]")
+    return count
+
+
+def compact_jsonl_dir(jsonl_dir: str, json_dir: str) -> Dict[str, int]:
+    """
+    把目录下的 jsonl 文件按原文件名（合并分片）导出为 json 文件
+    :param jsonl_dir: jsonl 文件目录
+    :param json_dir: json 文件输出目录
+    :return: {json文件名: 数据条数}
+    """
+    groups: Dict[str, List[str]] = {}
+    for file_name in os.listdir(jsonl_dir):
+        match = _JSONL_FILE_RE.match(file_name)
+        if match:
+            groups.setdefault(match.group("name"), []).append(os.path.join(jsonl_dir, file_name))
+
+    pathlib.Path(json_dir).mkdir(parents=True, exist_ok=True)
+    result = {}
+    for name, files in groups.items():
+        json_file = os.path.join(json_dir, f"{name}.json")
+        result[json_file] = export_jsonl_to_json(sorted(files, key=_parse_part), json_file)
+        utils.logger.info(f"[compact_jsonl_dir] export {len(files)} jsonl files to {json_file}, items: {result[json_file]}")
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="export jsonl store files to json array files")
+    parser.add_argument("--input", type=str, required=True, help="jsonl dir, eg: data/xhs/jsonl")
+    parser.add_argument("--output", type=str, required=True, help="json dir, eg: data/xhs/json")
+    args = parser.parse_args()
+    compact_jsonl_dir(args.input, args.output)
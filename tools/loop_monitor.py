@@ -0,0 +1,139 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 12:10
+# @Desc    : 事件循环阻塞检测，统计事件循环延迟并打印阻塞时的调用栈
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Optional
+
+from . import utils
+
+
+class EventLoopMonitor:
+    """
+    事件循环阻塞检测器（调试用）
+    - 心跳协程：每隔 interval 秒醒来一次，实际醒来时间与预期时间的差值即为事件循环延迟(lag)
+    - 看门狗线程：心跳超过 threshold 秒没有更新，说明有回调长时间占用事件循环，此时抓取事件循环线程的调用栈打印出来
+    """
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.05, report_interval: float = 60):
+        """
+        Args:
+            threshold: 超过该时长（秒）视为阻塞
+            interval: 心跳间隔（秒）
+            report_interval: 周期性输出指标日志的间隔（秒），0 表示不输出
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.report_interval = report_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._last_beat = 0.0
+        self._stall_reported = False
+
+        self.samples = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.lag_last = 0.0
+        self.blocked_count = 0
+        self.blocked_seconds = 0.0
+
+    def start(self) -> None:
+        """
+        在当前运行的事件循环中启动检测，必须在协程中调用
+        :return:
+        """
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop_event.clear()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="EventLoopMonitor", daemon=True)
+        self._watchdog.start()
+        utils.logger.info(f"[EventLoopMonitor.start] event loop monitor started, threshold: {self.threshold}s")
+
+    def stop(self) -> None:
+        """
+        停止检测并输出一次汇总指标
+        :return:
+        """
+        self._stop_event.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+        self._report()
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        事件循环延迟指标
+        :return:
+        """
+        return {
+            "loop_lag_samples": self.samples,
+            "loop_lag_avg_sec": self.lag_total / self.samples if self.samples else 0.0,
+            "loop_lag_max_sec": self.lag_max,
+            "loop_lag_last_sec": self.lag_last,
+            "loop_blocked_count": self.blocked_count,
+            "loop_blocked_seconds": self.blocked_seconds,
+        }
+
+    async def _heartbeat(self) -> None:
+        last_report = time.monotonic()
+        while True:
+            expected = self._loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, self._loop.time() - expected)
+            self._last_beat = time.monotonic()
+            self._stall_reported = False
+            self._record(lag)
+            if self.report_interval and self._last_beat - last_report >= self.report_interval:
+                last_report = self._last_beat
+                self._report()
+
+    def _record(self, lag: float) -> None:
+        self.samples += 1
+        self.lag_total += lag
+        self.lag_last = lag
+        self.lag_max = max(self.lag_max, lag)
+        if lag >= self.threshold:
+            self.blocked_count += 1
+            self.blocked_seconds += lag
+            utils.logger.warning(f"[EventLoopMonitor] event loop was blocked for {lag:.3f}s")
+
+    def _watch(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            stalled = time.monotonic() - self._last_beat - self.interval
+            if stalled < self.threshold or self._stall_reported:
+                continue
+            self._stall_reported = True
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            utils.logger.warning(
+                f"[EventLoopMonitor] event loop blocked for more than {stalled:.3f}s, current stack:\n{stack}"
+            )
+
+    def _report(self) -> None:
+        metrics = " ".join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in self.metrics().items())
+        utils.logger.info(f"[EventLoopMonitor] {metrics}")
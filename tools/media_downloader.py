@@ -0,0 +1,247 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 19:40
+# @Desc    : 图片/视频下载队列
+#            爬虫只把下载任务放入有界队列，由固定数量的下载协程消费，响应按块流式写入 .part 临时文件，
+#            下载完成后原子重命名为最终文件；中断后重试时通过 HTTP Range 从 .part 已有的长度继续下载，
+#            单个文件无论多大都不会整体读入内存
+#            开启 ENABLE_MEDIA_DEDUP 时下载完成的文件交给 MediaBlobStore 按内容去重保存，已下载过的 URL 直接跳过
+import asyncio
+import os
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+import aiofiles
+import httpx
+
+import config
+
+from . import utils
+from .http_pool import HttpClientPool, ProxiesType
+from .media_store import MediaBlobStore, file_sha256
+
+PART_FILE_SUFFIX = ".part"
+
+
+class MediaDownloadTask(NamedTuple):
+    url: str
+    save_file_name: str
+    headers: Optional[Dict[str, str]] = None
+    proxies: ProxiesType = None
+
+
+class MediaDownloader:
+    """
+    有界的媒体下载队列：
+    - 队列满时 submit 会等待，爬虫产生任务的速度不会超过下载速度太多
+    - 同一个 host 的并发下载数有上限，避免对图床/CDN 造成压力
+    - 下载中断后从 .part 文件已有的长度继续下载
+    """
+
+    def __init__(
+            self,
+            worker_num: Optional[int] = None,
+            host_concurrency: Optional[int] = None,
+            queue_size: Optional[int] = None,
+            chunk_size: Optional[int] = None,
+            max_retries: Optional[int] = None,
+            timeout: Optional[float] = None,
+            blob_store: Optional[MediaBlobStore] = None,
+    ):
+        self.worker_num = worker_num or config.MEDIA_DOWNLOAD_WORKER_NUM
+        self.host_concurrency = host_concurrency or config.MEDIA_DOWNLOAD_HOST_CONCURRENCY
+        self.queue_size = queue_size or config.MEDIA_DOWNLOAD_QUEUE_SIZE
+        self.chunk_size = chunk_size or config.MEDIA_DOWNLOAD_CHUNK_SIZE
+        self.max_retries = config.MEDIA_DOWNLOAD_MAX_RETRIES if max_retries is None else max_retries
+        self.timeout = timeout or config.MEDIA_DOWNLOAD_TIMEOUT_SEC
+        self.http_pool = HttpClientPool()
+        if blob_store is None and config.ENABLE_MEDIA_DEDUP:
+            blob_store = MediaBlobStore()
+        self.blob_store = blob_store
+        self.success_count = 0
+        self.failed_count = 0
+        self.skipped_count = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _ensure_workers(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_num)]
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.host_concurrency)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def submit(self, url: str, save_file_name: str, headers: Optional[Dict[str, str]] = None,
+                     proxies: ProxiesType = None) -> None:
+        """
+        提交下载任务，目标文件已存在或者 URL 已经下载过时跳过
+        :param url: 图片/视频地址
+        :param save_file_name: 保存路径，所在目录需要已经存在
+        :param headers: 请求头
+        :param proxies: httpx 格式的代理配置
+        :return:
+        """
+        if os.path.exists(save_file_name):
+            utils.logger.info(f"[MediaDownloader.submit] {save_file_name} already exists, skip")
+            return
+        if self.blob_store is not None and self.blob_store.link_from_url(url, save_file_name):
+            self.skipped_count += 1
+            utils.logger.info(f"[MediaDownloader.submit] {url} already downloaded, link to {save_file_name}")
+            return
+        self._ensure_workers()
+        await self._queue.put(MediaDownloadTask(url, save_file_name, headers, proxies))
+
+    async def _worker(self) -> None:
+        while True:
+            task = await self._queue.get()
+            try:
+                if await self.download(task):
+                    self.success_count += 1
+                else:
+                    self.failed_count += 1
+            except Exception as e:
+                self.failed_count += 1
+                utils.logger.error(f"[MediaDownloader._worker] download {task.url} error: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def download(self, task: MediaDownloadTask) -> bool:
+        """
+        下载单个文件，网络错误时按指数退避重试，每次重试都从已下载的位置继续
+        :param task:
+        :return: 是否下载成功
+        """
+        async with self._get_host_semaphore(task.url):
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return await self._download_once(task)
+                except httpx.TransportError as e:
+                    if attempt == self.max_retries:
+                        utils.logger.error(f"[MediaDownloader.download] download {task.url} failed after "
+                                           f"{attempt + 1} attempts: {e!r}")
+                        return False
+                    utils.logger.warning(f"[MediaDownloader.download] download {task.url} interrupted: {e!r}, "
+                                         f"retry {attempt + 1}/{self.max_retries}")
+                    await asyncio.sleep(min(2 ** attempt, 10))
+        return False
+
+    async def _download_once(self, task: MediaDownloadTask) -> bool:
+        part_file_name = task.save_file_name + PART_FILE_SUFFIX
+        offset = os.path.getsize(part_file_name) if os.path.exists(part_file_name) else 0
+        headers = dict(task.headers or {})
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+
+        client = self.http_pool.get_client(task.proxies)
+        async with client.stream("GET", task.url, headers=headers, timeout=self.timeout) as response:
+            if response.status_code == 416 and offset:
+                # .part 已经是完整文件（上次写完后没来得及重命名），否则远端文件变了，丢弃后重新下载
+                if response.headers.get("Content-Range", "").endswith(f"/{offset}"):
+                    await self._save_file(task, part_file_name)
+                    return True
+                os.remove(part_file_name)
+                raise httpx.RemoteProtocolError("range not satisfiable, restart download", request=response.request)
+            if response.status_code == 206:
+                mode = "ab"
+            elif response.status_code == 200:
+                # 服务端不支持 Range 时返回完整内容，从头写入
+                mode = "wb"
+            else:
+                await response.aread()
+                utils.logger.error(f"[MediaDownloader._download_once] request {task.url} err, "
+                                   f"status: {response.status_code}, res: {response.text[:200]}")
+                return False
+
+            async with aiofiles.open(part_file_name, mode) as f:
+                async for chunk in response.aiter_bytes(self.chunk_size):
+                    await f.write(chunk)
+
+        await self._save_file(task, part_file_name)
+        utils.logger.info(f"[MediaDownloader._download_once] save {task.save_file_name} success ...")
+        return True
+
+    async def _save_file(self, task: MediaDownloadTask, part_file_name: str) -> None:
+        """
+        下载完成的 .part 文件重命名为最终文件，开启去重时交给 blob 存储
+        :param task:
+        :param part_file_name:
+        :return:
+        """
+        if self.blob_store is None:
+            os.replace(part_file_name, task.save_file_name)
+            return
+        # 大文件计算哈希比较耗时，放到线程中执行
+        sha256 = await asyncio.get_running_loop().run_in_executor(None, file_sha256, part_file_name)
+        if self.blob_store.store_file(part_file_name, task.save_file_name, sha256, task.url):
+            utils.logger.info(f"[MediaDownloader._save_file] {task.url} is duplicated with a downloaded file")
+
+    async def join(self) -> None:
+        """
+        等待队列中的任务全部下载完成
+        :return:
+        """
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """
+        下载完队列中的任务后停止下载协程并关闭连接池
+        :return:
+        """
+        await self.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self._host_semaphores.clear()
+        await self.http_pool.aclose()
+        if self.blob_store is not None:
+            self.blob_store.close()
+
+
+_media_downloader: Optional[MediaDownloader] = None
+
+
+def get_media_downloader() -> MediaDownloader:
+    """
+    获取进程内共享的下载队列
+    :return:
+    """
+    global _media_downloader
+    if _media_downloader is None:
+        _media_downloader = MediaDownloader()
+    return _media_downloader
+
+
+async def close_media_downloader() -> None:
+    """
+    等待未完成的下载任务并关闭下载队列，程序退出前调用
+    :return:
+    """
+    global _media_downloader
+    if _media_downloader is not None:
+        downloader, _media_downloader = _media_downloader, None
+        utils.logger.info("[close_media_downloader] waiting for pending media downloads ...")
+        await downloader.close()
+        utils.logger.info(f"[close_media_downloader] media downloads finished, success: {downloader.success_count}, "
+                          f"failed: {downloader.failed_count}, skipped: {downloader.skipped_count}")
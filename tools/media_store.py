@@ -0,0 +1,264 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 20:40
+# @Desc    : 按内容寻址的图片/视频存储
+#            文件内容按 sha256 只保存一份（data/media/blobs/ab/abcd...jpg），
+#            笔记目录下原来的文件路径（data/xhs/images/<note_id>/0.jpg）以硬链接指向这一份内容，目录结构保持不变，
+#            本地 SQLite 索引记录 URL -> 内容、文件路径 -> 内容，已下载过的 URL 不再重复下载
+#            已有的 data 目录可以迁移: python -m tools.media_store data/xhs/images data/bilibili/videos
+import argparse
+import hashlib
+import os
+import shutil
+import sqlite3
+import time
+from typing import Dict, FrozenSet, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import config
+
+from . import utils
+
+# 各平台 CDN 每次请求都会变化的签名、过期时间参数，不参与 URL 去重，key 为 host 后缀；
+# 只忽略已知 CDN 上的这些参数，其他 host 的参数（例如图片处理参数 e、资源 ID mid）都保留，避免不同的资源被合并
+VOLATILE_QUERY_PARAMS: Dict[str, FrozenSet[str]] = {
+    # bilibili 视频
+    "bilivideo.com": frozenset({"deadline", "e", "gen", "mid", "nbs", "og", "oi", "orderid", "os", "platform",
+                                "trid", "uipk", "upsig", "uparams"}),
+    "bilivideo.cn": frozenset({"deadline", "e", "gen", "mid", "nbs", "og", "oi", "orderid", "os", "platform",
+                               "trid", "uipk", "upsig", "uparams"}),
+    # 抖音图片、视频
+    "douyinpic.com": frozenset({"x-expires", "x-signature"}),
+    "douyinvod.com": frozenset({"x-expires", "x-signature"}),
+    # 小红书图片
+    "xhscdn.com": frozenset({"sign", "t"}),
+    # 微博图片、视频
+    "sinaimg.cn": frozenset({"expires", "kid", "ssig"}),
+    "weibocdn.com": frozenset({"expires", "kid", "ssig"}),
+    # 知乎视频
+    "vzuu.com": frozenset({"auth_key"}),
+}
+
+
+def get_volatile_query_params(host: str) -> FrozenSet[str]:
+    """
+    host 对应的 CDN 需要忽略的参数，按 host 后缀匹配
+    :param host: 小写的 host
+    :return:
+    """
+    host = host.rsplit(":", 1)[0]
+    for suffix, params in VOLATILE_QUERY_PARAMS.items():
+        if host == suffix or host.endswith("." + suffix):
+            return params
+    return frozenset()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media_blob (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    add_ts INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS media_url (
+    url_key TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS media_file (
+    file_path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL
+);
+"""
+
+
+def normalize_url(url: str) -> str:
+    """
+    URL 去重使用的 key：忽略协议、host 大小写、fragment 以及已知 CDN 的签名/过期时间参数，其余参数排序
+    :param url:
+    :return:
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    volatile_params = get_volatile_query_params(host)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k.lower() not in volatile_params)
+    key = f"{host}{parts.path}"
+    return f"{key}?{urlencode(query)}" if query else key
+
+
+def file_sha256(file_name: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    分块计算文件的 sha256，不把整个文件读入内存
+    :param file_name:
+    :param chunk_size:
+    :return:
+    """
+    digest = hashlib.sha256()
+    with open(file_name, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def link_file(src_file_name: str, dst_file_name: str) -> None:
+    """
+    dst 以硬链接指向 src，文件系统不支持硬链接时复制
+    :param src_file_name:
+    :param dst_file_name:
+    :return:
+    """
+    if os.path.lexists(dst_file_name):
+        os.remove(dst_file_name)
+    try:
+        os.link(src_file_name, dst_file_name)
+    except OSError:
+        shutil.copyfile(src_file_name, dst_file_name)
+
+
+class MediaBlobStore:
+    """
+    按内容寻址的媒体文件存储，索引使用本地 SQLite，多个爬虫进程可以共享同一个存储目录
+    """
+
+    def __init__(self, store_path: Optional[str] = None):
+        self.store_path = store_path or config.MEDIA_STORE_PATH
+        self.blob_path = os.path.join(self.store_path, "blobs")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.blob_path, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.store_path, "index.db"), timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def get_blob_file_name(self, sha256: str, ext: str) -> str:
+        return os.path.join(self.blob_path, sha256[:2], sha256 + ext)
+
+    def _get_blob(self, sha256: str) -> Optional[str]:
+        row = self.conn.execute("SELECT path FROM media_blob WHERE sha256 = ?", (sha256,)).fetchone()
+        if row and os.path.exists(row[0]):
+            return row[0]
+        return None
+
+    def link_from_url(self, url: str, save_file_name: str) -> bool:
+        """
+        URL 已经下载过时直接把已有内容链接到保存路径
+        :param url: 图片/视频地址
+        :param save_file_name: 保存路径
+        :return: 是否命中
+        """
+        row = self.conn.execute("SELECT sha256 FROM media_url WHERE url_key = ?", (normalize_url(url),)).fetchone()
+        if not row:
+            return False
+        blob_file_name = self._get_blob(row[0])
+        if blob_file_name is None:
+            return False
+        link_file(blob_file_name, save_file_name)
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO media_file (file_path, sha256) VALUES (?, ?)",
+                              (save_file_name, row[0]))
+        return True
+
+    def store_file(self, src_file_name: str, save_file_name: str, sha256: str, url: Optional[str] = None) -> bool:
+        """
+        把下载完成的文件放入存储，内容已存在时删除 src，最后把内容链接到保存路径
+        :param src_file_name: 下载完成的文件，调用后不再存在（src 与 save_file_name 相同时除外）
+        :param save_file_name: 笔记目录下的保存路径
+        :param sha256: 文件内容的 sha256
+        :param url: 文件的下载地址
+        :return: 内容是否已经存在
+        """
+        blob_file_name = self._get_blob(sha256)
+        duplicated = blob_file_name is not None
+        if duplicated:
+            os.remove(src_file_name)
+        else:
+            blob_file_name = self.get_blob_file_name(sha256, os.path.splitext(save_file_name)[1])
+            os.makedirs(os.path.dirname(blob_file_name), exist_ok=True)
+            size = os.path.getsize(src_file_name)
+            os.replace(src_file_name, blob_file_name)
+        link_file(blob_file_name, save_file_name)
+
+        with self.conn:
+            if not duplicated:
+                self.conn.execute("INSERT OR REPLACE INTO media_blob (sha256, size, path, add_ts) VALUES (?, ?, ?, ?)",
+                                  (sha256, size, blob_file_name, int(time.time())))
+            if url:
+                self.conn.execute("INSERT OR REPLACE INTO media_url (url_key, sha256) VALUES (?, ?)",
+                                  (normalize_url(url), sha256))
+            self.conn.execute("INSERT OR REPLACE INTO media_file (file_path, sha256) VALUES (?, ?)",
+                              (save_file_name, sha256))
+        return duplicated
+
+    def get_dir_blobs(self, dir_path: str) -> Dict[str, str]:
+        """
+        查询笔记目录下每个文件对应的内容 sha256
+        :param dir_path: 例如 data/xhs/images/<note_id>
+        :return: {文件路径: sha256}
+        """
+        prefix = os.path.join(dir_path, "")
+        rows = self.conn.execute("SELECT file_path, sha256 FROM media_file WHERE substr(file_path, 1, ?) = ?",
+                                 (len(prefix), prefix)).fetchall()
+        return dict(rows)
+
+    def migrate_dir(self, dir_path: str) -> Dict[str, int]:
+        """
+        把已有的 data 目录迁移到内容寻址存储，重复的文件只保留一份，原路径替换为硬链接
+        :param dir_path: 例如 data/xhs/images
+        :return: 迁移统计
+        """
+        stats = {"files": 0, "duplicated": 0, "saved_bytes": 0}
+        indexed = set(self.get_dir_blobs(dir_path))
+        store_path = os.path.abspath(self.store_path)
+        for root, _, file_names in os.walk(dir_path):
+            if os.path.commonpath([os.path.abspath(root), store_path]) == store_path:
+                continue
+            for file_name in file_names:
+                file_path = os.path.join(root, file_name)
+                if file_name.endswith(".part") or file_path in indexed:
+                    continue
+                size = os.path.getsize(file_path)
+                if self.store_file(file_path, file_path, file_sha256(file_path)):
+                    stats["duplicated"] += 1
+                    stats["saved_bytes"] += size
+                stats["files"] += 1
+        return stats
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="migrate media directories to the content-addressed store")
+    parser.add_argument("dirs", nargs="+", help="media directories, e.g. data/xhs/images data/bilibili/videos")
+    parser.add_argument("--store-path", default=config.MEDIA_STORE_PATH)
+    args = parser.parse_args()
+
+    blob_store = MediaBlobStore(args.store_path)
+    try:
+        for dir_path in args.dirs:
+            stats = blob_store.migrate_dir(dir_path)
+            utils.logger.info(f"[MediaBlobStore.migrate_dir] {dir_path}: {stats['files']} files, "
+                              f"{stats['duplicated']} duplicated, saved {stats['saved_bytes'] / 1024 / 1024:.1f} MB")
+    finally:
+        blob_store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 18:50
+# @Desc    : 页面解析进程池
+#            HTML/JSON 解析是 CPU 密集的，直接在事件循环里执行会阻塞其他协程的网络请求，
+#            开启 ENABLE_PARSE_PROCESS_POOL 后解析函数提交到进程池执行，未开启或进程池不可用时在当前进程执行
+#            提交的函数需要是模块级函数或者无状态对象的方法，参数和返回值需要可以被 pickle
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, TypeVar
+
+import config
+
+from . import utils
+
+T = TypeVar("T")
+
+_parse_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_parse_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    获取解析进程池，未开启时返回 None
+    :return:
+    """
+    global _parse_executor
+    if not config.ENABLE_PARSE_PROCESS_POOL:
+        return None
+    if _parse_executor is None:
+        max_workers = config.PARSE_PROCESS_POOL_SIZE or os.cpu_count() or 1
+        try:
+            # 使用 spawn 启动子进程，避免 fork 时复制 playwright 等后台线程的状态
+            _parse_executor = ProcessPoolExecutor(max_workers=max_workers,
+                                                  mp_context=multiprocessing.get_context("spawn"))
+        except (OSError, NotImplementedError) as e:
+            utils.logger.error(f"[get_parse_executor] create parse process pool error: {e}, parse in process")
+            config.ENABLE_PARSE_PROCESS_POOL = False
+            return None
+        utils.logger.info(f"[get_parse_executor] parse process pool started, workers: {max_workers}")
+    return _parse_executor
+
+
+async def run_parser(func: Callable[..., T], *args: Any) -> T:
+    """
+    执行解析函数，开启进程池时在子进程中执行，否则直接在当前进程执行
+    :param func: 解析函数
+    :param args: 解析函数的参数
+    :return: 解析函数的返回值
+    """
+    global _parse_executor
+    executor = get_parse_executor()
+    if executor is None:
+        return func(*args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    except BrokenProcessPool as e:
+        # 子进程异常退出（例如被 OOM kill），重建进程池，本次在当前进程解析
+        utils.logger.error(f"[run_parser] parse process pool is broken: {e}, parse {func.__qualname__} in process")
+        if _parse_executor is executor:
+            _parse_executor = None
+            executor.shutdown(wait=False)
+        return func(*args)
+
+
+async def close_parse_executor() -> None:
+    """
+    关闭解析进程池，程序退出前调用
+    :return:
+    """
+    global _parse_executor
+    if _parse_executor is not None:
+        executor, _parse_executor = _parse_executor, None
+        await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
@@ -0,0 +1,237 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/19 01:10
+# @Desc    : 自适应限流
+#            按 (平台, 账号, 代理, 接口类型) 划分令牌桶，同一个桶内所有并发协程共享请求速率；
+#            请求成功时速率线性增加，出现验证码、IP 被封、429 时速率减半（AIMD），在平台允许的范围内保持最高的请求速率。
+#            开启后 API 客户端分页之间不再按 crawl_interval 随机等待
+import asyncio
+import hashlib
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import config
+
+from . import utils
+from .http_pool import ProxiesType, _proxy_key
+
+RATE_LIMIT_ENDPOINT_SEARCH = "search"
+RATE_LIMIT_ENDPOINT_COMMENT = "comment"
+RATE_LIMIT_ENDPOINT_DEFAULT = "default"
+
+# 通用的限流响应状态码，各平台的验证码、封禁信号由平台 client 上报
+THROTTLED_STATUS_CODES = {429}
+
+
+def endpoint_class(endpoint: str) -> str:
+    """
+    按接口地址（快手为 GraphQL operationName）划分接口类型，搜索、评论接口的风控阈值和其他接口不同，分开限流
+    :param endpoint:
+    :return: search | comment | default
+    """
+    # 只看路径，详情页等地址的参数中也可能出现 search（例如 xsec_source=pc_search）
+    endpoint = urlsplit(endpoint).path.lower() if "://" in endpoint else endpoint.split("?", 1)[0].lower()
+    if "search" in endpoint:
+        return RATE_LIMIT_ENDPOINT_SEARCH
+    if "comment" in endpoint or "reply" in endpoint:
+        return RATE_LIMIT_ENDPOINT_COMMENT
+    return RATE_LIMIT_ENDPOINT_DEFAULT
+
+
+def account_key(cookie: str) -> str:
+    """
+    不同的登录账号分开限流，用 cookie 的摘要区分账号，不在 key 中保存 cookie 原文
+    :param cookie:
+    :return:
+    """
+    return hashlib.md5(cookie.encode("utf-8")).hexdigest()[:12] if cookie else ""
+
+
+class AdaptiveTokenBucket:
+    """
+    速率可调的令牌桶，等待令牌的协程按先后顺序获取
+    """
+
+    def __init__(self, rate: float, burst: float, min_rate: float, max_rate: float, increase_step: float,
+                 decrease_factor: float):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.tokens = burst
+        self.success_count = 0
+        self.throttled_count = 0
+        self._updated_at = time.monotonic()
+        self._decreased_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """
+        获取一个令牌，没有令牌时等待
+        :return:
+        """
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                # 等待期间速率可能被调整，醒来后重新计算
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def on_success(self) -> None:
+        """
+        请求成功，线性增加速率
+        :return:
+        """
+        self.success_count += 1
+        self._refill()
+        self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttled(self) -> None:
+        """
+        出现验证码、IP 被封等风控信号，按比例降低速率并清空令牌；
+        降速前已经发出的并发请求随后返回的风控信号属于同一次限流，一个请求间隔内只降速一次
+        :return:
+        """
+        self.throttled_count += 1
+        now = time.monotonic()
+        if now - self._decreased_at < 1 / self.rate:
+            return
+        self._refill()
+        self._decreased_at = now
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self.tokens = min(self.tokens, 0)
+
+
+class RateLimitSlot:
+    """
+    一次请求占用的限流名额，平台 client 检测到验证码、封禁等风控信号时调用 throttled
+    """
+
+    def __init__(self, bucket: Optional[AdaptiveTokenBucket] = None):
+        self.bucket = bucket
+        self.is_throttled = False
+
+    def throttled(self) -> None:
+        self.is_throttled = True
+
+    def observe_status(self, status_code: int) -> None:
+        """
+        检查通用的限流状态码
+        :param status_code:
+        :return:
+        """
+        if status_code in THROTTLED_STATUS_CODES:
+            self.throttled()
+
+
+class RateLimiter:
+    """
+    管理所有令牌桶
+    """
+
+    def __init__(self):
+        self.buckets: Dict[Tuple[str, str, str, str], AdaptiveTokenBucket] = {}
+
+    def get_bucket(self, platform: str, endpoint: str = "", account: str = "",
+                   proxies: ProxiesType = None) -> AdaptiveTokenBucket:
+        """
+        获取请求对应的令牌桶，不存在则按配置创建
+        :param platform: 平台
+        :param endpoint: 接口地址或者 GraphQL operationName
+        :param account: account_key 计算的账号标识
+        :param proxies: 请求使用的代理
+        :return:
+        """
+        key = (platform, account, _proxy_key(proxies), endpoint_class(endpoint))
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            max_rate = config.RATE_LIMIT_MAX_QPS.get(platform, config.RATE_LIMIT_MAX_QPS["default"])
+            bucket = AdaptiveTokenBucket(
+                rate=min(config.RATE_LIMIT_INITIAL_QPS, max_rate), burst=config.RATE_LIMIT_BURST,
+                min_rate=config.RATE_LIMIT_MIN_QPS, max_rate=max_rate,
+                increase_step=config.RATE_LIMIT_INCREASE_STEP, decrease_factor=config.RATE_LIMIT_DECREASE_FACTOR)
+            self.buckets[key] = bucket
+        return bucket
+
+    @asynccontextmanager
+    async def limit(self, platform: str, endpoint: str = "", account: str = "",
+                    proxies: ProxiesType = None) -> AsyncIterator[RateLimitSlot]:
+        """
+        获取令牌后发送请求，请求结束后根据结果调整速率：
+        正常返回 -> 加速；上报了风控信号 -> 降速；其他异常（网络错误、数据错误）不调整
+        :return:
+        """
+        if not config.ENABLE_RATE_LIMITER:
+            yield RateLimitSlot()
+            return
+        bucket = self.get_bucket(platform, endpoint, account, proxies)
+        await bucket.acquire()
+        slot = RateLimitSlot(bucket)
+        try:
+            yield slot
+        except BaseException:
+            if slot.is_throttled:
+                bucket.on_throttled()
+            raise
+        if slot.is_throttled:
+            bucket.on_throttled()
+        else:
+            bucket.on_success()
+
+
+async def crawl_sleep(crawl_interval: float) -> None:
+    """
+    分页请求之间的等待，开启自适应限流后由限流器控制请求速率，不再额外等待
+    :param crawl_interval: 爬取间隔，单位秒
+    :return:
+    """
+    if not config.ENABLE_RATE_LIMITER:
+        await asyncio.sleep(crawl_interval)
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
+
+
+def close_rate_limiter() -> None:
+    """
+    程序退出前调用，输出每个令牌桶最终的速率
+    :return:
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        return
+    for (platform, account, proxy, endpoint), bucket in _rate_limiter.buckets.items():
+        # 代理地址中可能带有账号密码，不输出到日志
+        utils.logger.info(f"[RateLimiter] {platform} {endpoint} account: {account or '-'}, proxy: {bool(proxy)}, "
+                          f"rate: {bucket.rate:.2f}/s, success: {bucket.success_count}, "
+                          f"throttled: {bucket.throttled_count}")
+    _rate_limiter = None
@@ -0,0 +1,285 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Author  : relakkes@gmail.com
+# @Time    : 2026/10/18 22:10
+# @Desc    : 已爬取ID过滤
+#            按 (平台, 实体类型) 记录已经爬取过的帖子详情、评论ID，跨多次运行有效，刷新时间内不再重复请求
+#            布隆过滤器保存在 mmap 文件中（错误率 0.1% 时每个ID约 1.8 字节），按天分代，超过刷新时间的分代文件直接删除；
+#            布隆过滤器命中后再查询 SQLite 精确索引，排除误判并精确判断爬取时间
+import hashlib
+import math
+import mmap
+import os
+import sqlite3
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+import config
+
+from . import utils
+
+BLOOM_FILE_SUFFIX = ".bloom"
+
+# 文件头：magic、哈希函数个数、位数组长度、已添加的ID数量
+_BLOOM_MAGIC = b"MCBF"
+_BLOOM_HEADER = struct.Struct("<4sIQQ")
+
+
+class BloomFilter:
+    """
+    mmap 文件上的布隆过滤器，只把访问到的页读入内存，进程重启后直接复用
+    """
+
+    def __init__(self, file_name: str, capacity: int, error_rate: float):
+        self.file_name = file_name
+        if not os.path.exists(file_name):
+            bit_count = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+            bit_count = (bit_count + 7) // 8 * 8
+            hash_count = max(1, round(bit_count / capacity * math.log(2)))
+            with open(file_name, "wb") as f:
+                f.write(_BLOOM_HEADER.pack(_BLOOM_MAGIC, hash_count, bit_count, 0))
+                f.truncate(_BLOOM_HEADER.size + bit_count // 8)
+        self._file = open(file_name, "r+b")
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        magic, self.hash_count, self.bit_count, self.count = _BLOOM_HEADER.unpack_from(self._mmap, 0)
+        if magic != _BLOOM_MAGIC:
+            self.close()
+            raise ValueError(f"Invalid bloom filter file: {file_name}")
+        self.capacity = capacity
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.bit_count
+
+    def add(self, item: str) -> bool:
+        """
+        添加ID
+        :param item:
+        :return: 是否为新添加的ID
+        """
+        added = False
+        for position in self._positions(item):
+            offset = _BLOOM_HEADER.size + (position >> 3)
+            mask = 1 << (position & 7)
+            byte = self._mmap[offset]
+            if not byte & mask:
+                self._mmap[offset] = byte | mask
+                added = True
+        if added:
+            self.count += 1
+            _BLOOM_HEADER.pack_into(self._mmap, 0, _BLOOM_MAGIC, self.hash_count, self.bit_count, self.count)
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._mmap[_BLOOM_HEADER.size + (position >> 3)] & (1 << (position & 7))
+                   for position in self._positions(item))
+
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+    def flush(self) -> None:
+        self._mmap.flush()
+
+    def close(self) -> None:
+        if not self._mmap.closed:
+            self._mmap.flush()
+            self._mmap.close()
+        self._file.close()
+
+
+class SeenIdFilter:
+    """
+    单个平台、单个实体类型（note / comments）的已爬取ID过滤器，refresh_sec <= 0 时不过滤
+    """
+
+    def __init__(self, platform: str, entity: str, refresh_sec: int, store_path: Optional[str] = None,
+                 capacity: Optional[int] = None, error_rate: Optional[float] = None,
+                 generation_sec: Optional[int] = None, exact_check: Optional[bool] = None):
+        self.platform = platform
+        self.entity = entity
+        self.refresh_sec = refresh_sec
+        self.store_path = store_path or config.SEEN_ID_FILTER_PATH
+        self.filter_path = os.path.join(self.store_path, platform, entity)
+        self.capacity = capacity or config.SEEN_ID_FILTER_CAPACITY
+        self.error_rate = error_rate or config.SEEN_ID_FILTER_ERROR_RATE
+        self.generation_sec = generation_sec or config.SEEN_ID_FILTER_GENERATION_SEC
+        self.exact_check = config.SEEN_ID_EXACT_CHECK if exact_check is None else exact_check
+        self._generations: Optional[Dict[int, List[BloomFilter]]] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self.skipped_count = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.refresh_sec > 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.store_path, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.store_path, "seen_ids.db"), timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS seen_id (
+                    platform TEXT NOT NULL,
+                    entity TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    seen_ts INTEGER NOT NULL,
+                    PRIMARY KEY (platform, entity, item_id)
+                )
+            """)
+            # 清理超过刷新时间的记录，与删除过期分代文件保持一致
+            with self._conn:
+                self._conn.execute("DELETE FROM seen_id WHERE platform = ? AND entity = ? AND seen_ts < ?",
+                                   (self.platform, self.entity, int(time.time()) - self.refresh_sec))
+        return self._conn
+
+    def _current_generation(self) -> int:
+        return int(time.time() // self.generation_sec)
+
+    def _oldest_generation(self) -> int:
+        return int((time.time() - self.refresh_sec) // self.generation_sec)
+
+    @property
+    def generations(self) -> Dict[int, List[BloomFilter]]:
+        """
+        打开刷新时间内的分代文件，删除已经过期的分代文件
+        :return: {分代序号: [布隆过滤器]}，同一分代写满后追加新的文件
+        """
+        if self._generations is None:
+            self._generations = {}
+            os.makedirs(self.filter_path, exist_ok=True)
+            oldest_generation = self._oldest_generation()
+            generation_files = []
+            for file_name in os.listdir(self.filter_path):
+                if file_name.endswith(BLOOM_FILE_SUFFIX):
+                    generation, index = file_name[:-len(BLOOM_FILE_SUFFIX)].split("_")
+                    generation_files.append((int(generation), int(index), os.path.join(self.filter_path, file_name)))
+            for generation, _, file_path in sorted(generation_files):
+                if generation < oldest_generation:
+                    os.remove(file_path)
+                    continue
+                self._generations.setdefault(generation, []).append(
+                    BloomFilter(file_path, self.capacity, self.error_rate))
+        return self._generations
+
+    def _get_writable_filter(self) -> BloomFilter:
+        generation = self._current_generation()
+        bloom_filters = self.generations.setdefault(generation, [])
+        if not bloom_filters or bloom_filters[-1].is_full:
+            file_name = os.path.join(self.filter_path, f"{generation}_{len(bloom_filters)}{BLOOM_FILE_SUFFIX}")
+            bloom_filters.append(BloomFilter(file_name, self.capacity, self.error_rate))
+        return bloom_filters[-1]
+
+    def is_seen(self, item_id: str) -> bool:
+        """
+        ID 是否在刷新时间内爬取过，爬取过时计入跳过数量
+        未开启精确校验时，最多会把 generation_sec 之前爬取的ID也当作刷新时间内，并有 error_rate 的误判
+        :param item_id: 帖子ID、视频ID等
+        :return:
+        """
+        seen = self.contains(item_id)
+        if seen:
+            self.skipped_count += 1
+        return seen
+
+    def contains(self, item_id: str) -> bool:
+        """
+        与 is_seen 相同，但不计入跳过数量，用于查询已经被跳过的ID
+        :param item_id:
+        :return:
+        """
+        if not self.enabled or not item_id:
+            return False
+        item_id = str(item_id)
+        oldest_generation = self._oldest_generation()
+        maybe_seen = any(item_id in bloom_filter
+                         for generation, bloom_filters in self.generations.items() if generation >= oldest_generation
+                         for bloom_filter in bloom_filters)
+        if maybe_seen and self.exact_check:
+            row = self.conn.execute(
+                "SELECT seen_ts FROM seen_id WHERE platform = ? AND entity = ? AND item_id = ?",
+                (self.platform, self.entity, item_id)).fetchone()
+            maybe_seen = row is not None and row[0] >= time.time() - self.refresh_sec
+        return maybe_seen
+
+    def add(self, item_id: str) -> None:
+        """
+        记录已经爬取完成的ID
+        :param item_id:
+        :return:
+        """
+        if not self.enabled or not item_id:
+            return
+        item_id = str(item_id)
+        self._get_writable_filter().add(item_id)
+        if self.exact_check:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO seen_id (platform, entity, item_id, seen_ts) VALUES (?, ?, ?, ?)",
+                    (self.platform, self.entity, item_id, int(time.time())))
+
+    def close(self) -> None:
+        for bloom_filters in (self._generations or {}).values():
+            for bloom_filter in bloom_filters:
+                bloom_filter.close()
+        self._generations = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_seen_filters: Dict[Tuple[str, str], SeenIdFilter] = {}
+
+
+def get_seen_filter(entity: str, platform: Optional[str] = None) -> SeenIdFilter:
+    """
+    获取已爬取ID过滤器，同一个平台、实体类型共用一个实例
+    :param entity: note(帖子/视频详情) | comments(帖子的评论)
+    :param platform: 平台，默认为当前爬取的平台
+    :return:
+    """
+    platform = platform or config.get_config("PLATFORM")
+    seen_filter = _seen_filters.get((platform, entity))
+    if seen_filter is None:
+        refresh_sec = config.SEEN_ID_REFRESH_SEC.get(entity, 0) if config.ENABLE_SEEN_ID_FILTER else 0
+        seen_filter = SeenIdFilter(platform, entity, refresh_sec)
+        _seen_filters[(platform, entity)] = seen_filter
+    return seen_filter
+
+
+def need_crawl_comments(note_id: str) -> bool:
+    """
+    帖子详情在刷新时间内爬取过时，评论是否仍然需要爬取：开启了评论爬取，并且评论不在刷新时间内
+    评论的爬取依赖帖子详情时（例如贴吧需要评论总页数），据此决定是否仍然请求帖子详情
+    :param note_id:
+    :return:
+    """
+    return config.get_config("ENABLE_GET_COMMENTS") and not get_seen_filter("comments").contains(note_id)
+
+
+def close_seen_filters() -> None:
+    """
+    程序退出前调用，写回 mmap 文件并关闭索引
+    :return:
+    """
+    for seen_filter in _seen_filters.values():
+        if seen_filter.skipped_count:
+            utils.logger.info(f"[SeenIdFilter] {seen_filter.platform} {seen_filter.entity}: "
+                              f"skipped {seen_filter.skipped_count} crawled ids")
+        seen_filter.close()
+    _seen_filters.clear()
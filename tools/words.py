@@ -12,19 +12,70 @@
 import asyncio
 import json
 import logging
+import multiprocessing
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set
 
 import aiofiles
 import jieba
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
 
 import config
 from tools import utils
 
 plot_lock = asyncio.Lock()
 
+_word_cloud_generators: List["AsyncWordCloudGenerator"] = []
+
+
+def render_word_cloud(word_freq: Dict[str, int], save_words_prefix: str, font_path: str, stop_words: Set[str]):
+    """
+    生成词云图片，在子进程中执行，避免阻塞事件循环
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from wordcloud import WordCloud
+
+    top_20_word_freq = {word: freq for word, freq in
+                        sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:20]}
+    wordcloud = WordCloud(
+        font_path=font_path,
+        width=800,
+        height=400,
+        background_color='white',
+        max_words=200,
+        stopwords=stop_words,
+        colormap='viridis',
+        contour_color='steelblue',
+        contour_width=1
+    ).generate_from_frequencies(top_20_word_freq)
+
+    # Save word cloud image
+    plt.figure(figsize=(10, 5), facecolor='white')
+    plt.imshow(wordcloud, interpolation='bilinear')
+
+    plt.axis('off')
+    plt.tight_layout(pad=0)
+    plt.savefig(f"{save_words_prefix}_word_cloud.png", format='png', dpi=300)
+    plt.close()
+
+
+class WordFreqState:
+    """一个输出前缀（一个 json 文件）对应的词频统计状态"""
+
+    def __init__(self):
+        self.item_count = 0
+        self.word_freq = Counter()
+        self.flush_task: Optional[asyncio.Task] = None
+
+
 class AsyncWordCloudGenerator:
+    """
+    增量统计评论词频：每个输出前缀保存一个 Counter 和已经分词的数据条数，
+    每次只对新追加的数据分词；词频文件和词云图片延迟 WORDCLOUD_DEBOUNCE_SEC 秒后合并生成，词云在子进程中渲染
+    """
+
     def __init__(self):
         logging.getLogger('jieba').setLevel(logging.WARNING)
         self.stop_words_file = config.STOP_WORDS_FILE
@@ -33,51 +84,92 @@ class AsyncWordCloudGenerator:
         self.custom_words = config.CUSTOM_WORDS
         for word, group in self.custom_words.items():
             jieba.add_word(word)
+        self.states: Dict[str, WordFreqState] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        _word_cloud_generators.append(self)
 
     def load_stop_words(self):
         with open(self.stop_words_file, 'r', encoding='utf-8') as f:
             return set(f.read().strip().split('\n'))
 
-    async def generate_word_frequency_and_cloud(self, data, save_words_prefix):
+    def count_words(self, data: List[Dict]) -> Counter:
         all_text = ' '.join(item['content'] for item in data)
-        words = [word for word in jieba.lcut(all_text) if word not in self.stop_words and len(word.strip()) > 0]
-        word_freq = Counter(words)
+        return Counter(word for word in jieba.lcut(all_text) if word not in self.stop_words and len(word.strip()) > 0)
+
+    async def generate_word_frequency_and_cloud(self, data, save_words_prefix):
+        """
+        更新词频并延迟生成词频文件和词云
+        :param data: 该前缀下累计保存的全部数据，只会对上次调用之后追加的部分分词
+        :param save_words_prefix: 词频文件和词云图片的路径前缀
+        :return:
+        """
+        async with self.lock:
+            state = self.states.get(save_words_prefix)
+            if state is None or len(data) < state.item_count:
+                # 第一次统计或者数据文件被重新生成，全量统计
+                state = self.states[save_words_prefix] = WordFreqState()
+            new_items = data[state.item_count:]
+            if not new_items:
+                return
+            state.word_freq.update(self.count_words(new_items))
+            state.item_count = len(data)
+            if state.flush_task is None:
+                state.flush_task = asyncio.create_task(self._flush_later(save_words_prefix))
+
+    async def _flush_later(self, save_words_prefix: str):
+        await asyncio.sleep(config.WORDCLOUD_DEBOUNCE_SEC)
+        # 先清掉任务，生成过程中追加的数据会触发下一次生成
+        self.states[save_words_prefix].flush_task = None
+        try:
+            await self.flush(save_words_prefix)
+        except Exception as e:
+            utils.logger.error(f"[AsyncWordCloudGenerator._flush_later] generate {save_words_prefix} word cloud error: {e}")
+
+    async def flush(self, save_words_prefix: str):
+        """
+        保存词频文件并生成词云
+        :param save_words_prefix:
+        :return:
+        """
+        word_freq = dict(self.states[save_words_prefix].word_freq)
 
         # Save word frequency to file
         freq_file = f"{save_words_prefix}_word_freq.json"
         async with aiofiles.open(freq_file, 'w', encoding='utf-8') as file:
             await file.write(json.dumps(word_freq, ensure_ascii=False, indent=4))
 
-        # Try to acquire the plot lock without waiting
-        if plot_lock.locked():
-            utils.logger.info("Skipping word cloud generation as the lock is held.")
-            return
-
         await self.generate_word_cloud(word_freq, save_words_prefix)
 
     async def generate_word_cloud(self, word_freq, save_words_prefix):
-        await plot_lock.acquire()
-        top_20_word_freq = {word: freq for word, freq in
-                            sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:20]}
-        wordcloud = WordCloud(
-            font_path=config.FONT_PATH,
-            width=800,
-            height=400,
-            background_color='white',
-            max_words=200,
-            stopwords=self.stop_words,
-            colormap='viridis',
-            contour_color='steelblue',
-            contour_width=1
-        ).generate_from_frequencies(top_20_word_freq)
-
-        # Save word cloud image
-        plt.figure(figsize=(10, 5), facecolor='white')
-        plt.imshow(wordcloud, interpolation='bilinear')
-
-        plt.axis('off')
-        plt.tight_layout(pad=0)
-        plt.savefig(f"{save_words_prefix}_word_cloud.png", format='png', dpi=300)
-        plt.close()
-
-        plot_lock.release()
\ No newline at end of file
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        async with plot_lock:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, render_word_cloud, word_freq, save_words_prefix, config.FONT_PATH, self.stop_words
+            )
+
+    async def close(self):
+        """
+        立即生成还在等待中的词频文件和词云，关闭渲染子进程
+        :return:
+        """
+        for save_words_prefix, state in self.states.items():
+            if state.flush_task is not None:
+                state.flush_task.cancel()
+                state.flush_task = None
+                try:
+                    await self.flush(save_words_prefix)
+                except Exception as e:
+                    utils.logger.error(f"[AsyncWordCloudGenerator.close] generate {save_words_prefix} word cloud error: {e}")
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+async def close_all_word_cloud_generators():
+    """
+    程序退出前调用，生成还没有生成的词云
+    :return:
+    """
+    for generator in _word_cloud_generators:
+        await generator.close()